@@ -1,367 +1,56 @@
-from lxml import etree
+#!/usr/bin/env python3
+"""
+Compare the element/attribute XPaths of two XSD files and save the result to Excel.
+
+Paths come from the shared schema graph (xsdSchemaGraph): global elements,
+named and anonymous types, element refs, groups, extensions and includes are
+resolved the same way as for the DQ rule metadata, and the graph of an
+unchanged schema is reused from the graph cache.
+
+The workbook has two sheets: "XPaths" (matching / only-in-one paths) and
+"Changes", a structural diff of the two schema graphs (diff_schema_graphs):
+moved/added/removed subtrees and per-type occurrence, type, constraint,
+enumeration and attribute changes, each reported once per type.
+
+Batch mode compares many schemas in one run: every version of a message family
+against its predecessor (--predecessor) and/or against the same family in a
+baseline folder (--baseline), or explicit --pair OLD NEW. Schemas come from a
+folder or from iso_xsd_repository, each graph and path set is built once, the
+pair diffs run in a process pool, and the result is one workbook (Summary +
+Changes sheets) or Parquet files.
+
+Usage:
+  python CompareXSD.py schema1.xsd schema2.xsd -o xsd_comparison.xlsx
+  python CompareXSD.py --batch-dir xsd/2025 --predecessor --baseline xsd/internal -o release_review.xlsx
+  python CompareXSD.py --batch-db --db-user u --db-pass p --db-dsn host:1521/svc --predecessor -o review.parquet
+"""
+
+import os
+import re
+import json
+import argparse
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
+import xsdSchemaGraph
+from xsdSchemaGraph import DEFAULT_CACHE_DIR, load_schema_graph, schema_graph_from_bytes, iter_paths
+from isoNames import split_xsd_name, xsd_name_from_namespace
 
-def extract_xpaths_from_xsd(file_path):
-    tree = etree.parse(file_path)
-    root = tree.getroot()
-
-    # Store complexType definitions
-    complex_types = {
-        c.attrib["name"]: c
-        for c in root.xpath(".//*[local-name()='complexType']")
-        if "name" in c.attrib
-    }
-
-    # Store global element definitions for ref resolution
-    global_elements = {
-        e.attrib["name"]: e
-        for e in root.xpath("./*[local-name()='element']")
-        if "name" in e.attrib
-    }
-
-    xpaths = []
-
-    def traverse(element, current_path):
-        tag_name = etree.QName(element).localname
-
-        if tag_name == "element":
-            # Resolve element name from 'name' or 'ref'
-            if "name" in element.attrib:
-                elem_name = element.attrib["name"]
-            elif "ref" in element.attrib:
-                ref_name = element.attrib["ref"].split(":")[-1]
-                elem_name = ref_name
-                # Follow the referenced element if it exists
-                if ref_name in global_elements:
-                    traverse(global_elements[ref_name], current_path)
-                return  # Stop here after following the ref
-
-            new_path = f"{current_path}/{elem_name}" if current_path else f"/{elem_name}"
-            xpaths.append(new_path)
-
-            # If element uses a named complex type, resolve it
-            if "type" in element.attrib:
-                type_name = element.attrib["type"].split(":")[-1]
-                if type_name in complex_types:
-                    traverse(complex_types[type_name], new_path)
-
-            # Otherwise, traverse inline children
-            for child in element:
-                traverse(child, new_path)
-
-        elif tag_name in ("complexType", "sequence", "choice"):
-            for child in element:
-                traverse(child, current_path)
-
-        elif tag_name == "attribute" and "name" in element.attrib:
-            attr_path = f"{current_path}/@{element.attrib['name']}"
-            xpaths.append(attr_path)
-
-    # Start traversal from all top-level elements
-    for elem in root.xpath("./*[local-name()='element']"):
-        traverse(elem, "")
-
-    return sorted(set(xpaths))
-
-
-def compare_xsd_files(file1, file2, output_excel):
-    xpaths1 = set(extract_xpaths_from_xsd(file1))
-    xpaths2 = set(extract_xpaths_from_xsd(file2))
-
-    matches = sorted(xpaths1 & xpaths2)
-    only_in_file1 = sorted(xpaths1 - xpaths2)
-    only_in_file2 = sorted(xpaths2 - xpaths1)
-
-    max_len = max(len(matches), len(only_in_file1), len(only_in_file2))
-    matches += [""] * (max_len - len(matches))
-    only_in_file1 += [""] * (max_len - len(only_in_file1))
-    only_in_file2 += [""] * (max_len - len(only_in_file2))
-
-    df = pd.DataFrame({
-        "Matching XPaths": matches,
-        "Only in File 1": only_in_file1,
-        "Only in File 2": only_in_file2
-    })
-    df.to_excel(output_excel, index=False)
-    print(f"Comparison saved to {output_excel}")
-
-
-# Example usage
-file1 = "schema1.xsd"
-file2 = "schema2.xsd"
-output_excel = "xsd_comparison.xlsx"
-
-compare_xsd_files(file1, file2, output_excel)
-
-
-
-
-from lxml import etree
-import pandas as pd
-
-def extract_xpaths_from_xsd(file_path):
-    tree = etree.parse(file_path)
-    root = tree.getroot()
-
-    # Map of complex types
-    complex_types = {}
-    for ctype in root.xpath(".//*[local-name()='complexType']"):
-        if "name" in ctype.attrib:
-            complex_types[ctype.attrib["name"]] = ctype
-
-    xpaths = []
-
-    def traverse(element, current_path):
-        tag_name = etree.QName(element).localname
-
-        if tag_name == "element" and "name" in element.attrib:
-            new_path = f"{current_path}/{element.attrib['name']}" if current_path else f"/{element.attrib['name']}"
-            xpaths.append(new_path)
-
-            # Follow type references
-            if "type" in element.attrib:
-                type_name = element.attrib["type"].split(":")[-1]
-                if type_name in complex_types:
-                    traverse(complex_types[type_name], new_path)
-
-            # Traverse inline children
-            for child in element:
-                traverse(child, new_path)
-
-        elif tag_name in ("complexType", "sequence", "choice"):
-            for child in element:
-                traverse(child, current_path)
-
-    # Start from all top-level elements (regardless of prefix)
-    for elem in root.xpath("./*[local-name()='element']"):
-        traverse(elem, "")
-
-    return sorted(set(xpaths))
-
-
-def compare_xsd_files(file1, file2, output_excel):
-    xpaths1 = set(extract_xpaths_from_xsd(file1))
-    xpaths2 = set(extract_xpaths_from_xsd(file2))
-
-    matches = sorted(xpaths1 & xpaths2)
-    only_in_file1 = sorted(xpaths1 - xpaths2)
-    only_in_file2 = sorted(xpaths2 - xpaths1)
-
-    max_len = max(len(matches), len(only_in_file1), len(only_in_file2))
-    matches += [""] * (max_len - len(matches))
-    only_in_file1 += [""] * (max_len - len(only_in_file1))
-    only_in_file2 += [""] * (max_len - len(only_in_file2))
-
-    df = pd.DataFrame({
-        "Matching XPaths": matches,
-        "Only in File 1": only_in_file1,
-        "Only in File 2": only_in_file2
-    })
-    df.to_excel(output_excel, index=False)
-    print(f"Comparison saved to {output_excel}")
-
-
-# Example usage
-file1 = "schema1.xsd"
-file2 = "schema2.xsd"
-output_excel = "xsd_comparison.xlsx"
-
-compare_xsd_files(file1, file2, output_excel)
-
-
-
-from lxml import etree
-import pandas as pd
-
-def extract_xpaths_from_xsd(file_path):
-    tree = etree.parse(file_path)
-    root = tree.getroot()
-
-    namespaces = root.nsmap.copy()
-    if None in namespaces:
-        namespaces["xsd"] = namespaces.pop(None)
-
-    # Store complexType definitions for lookup
-    complex_types = {}
-    for ctype in root.findall(".//xsd:complexType", namespaces):
-        if "name" in ctype.attrib:
-            complex_types[ctype.attrib["name"]] = ctype
-
-    xpaths = []
-
-    def traverse(element, current_path):
-        tag_name = etree.QName(element).localname
-
-        if tag_name == "element" and "name" in element.attrib:
-            new_path = f"{current_path}/{element.attrib['name']}" if current_path else f"/{element.attrib['name']}"
-            xpaths.append(new_path)
-
-            # If this element uses a named complex type, traverse that definition
-            if "type" in element.attrib:
-                type_name = element.attrib["type"].split(":")[-1]  # remove namespace prefix
-                if type_name in complex_types:
-                    traverse(complex_types[type_name], new_path)
-
-            # Otherwise, traverse inline children
-            for child in element:
-                traverse(child, new_path)
-
-        elif tag_name in ("complexType", "sequence", "choice"):
-            for child in element:
-                traverse(child, current_path)
-
-    # Start from all top-level elements
-    for elem in root.findall(".//xsd:element", namespaces):
-        parent_tag = etree.QName(elem.getparent()).localname
-        if parent_tag == "schema":
-            traverse(elem, "")
-
-    return sorted(set(xpaths))
-
-
-def compare_xsd_files(file1, file2, output_excel):
-    xpaths1 = set(extract_xpaths_from_xsd(file1))
-    xpaths2 = set(extract_xpaths_from_xsd(file2))
-
-    matches = sorted(xpaths1 & xpaths2)
-    only_in_file1 = sorted(xpaths1 - xpaths2)
-    only_in_file2 = sorted(xpaths2 - xpaths1)
-
-    max_len = max(len(matches), len(only_in_file1), len(only_in_file2))
-    matches += [""] * (max_len - len(matches))
-    only_in_file1 += [""] * (max_len - len(only_in_file1))
-    only_in_file2 += [""] * (max_len - len(only_in_file2))
-
-    df = pd.DataFrame({
-        "Matching XPaths": matches,
-        "Only in File 1": only_in_file1,
-        "Only in File 2": only_in_file2
-    })
-    df.to_excel(output_excel, index=False)
-    print(f"Comparison saved to {output_excel}")
-
-
-# Example usage
-file1 = "schema1.xsd"
-file2 = "schema2.xsd"
-output_excel = "xsd_comparison.xlsx"
-
-compare_xsd_files(file1, file2, output_excel)
-
-
-
-from lxml import etree
-import pandas as pd
-
-def extract_xpaths_from_xsd(file_path):
-    """
-    Extracts full XPaths from the root element to each child element in the XSD.
-    """
-    tree = etree.parse(file_path)
-    root = tree.getroot()
-
-    namespaces = root.nsmap.copy()
-    if None in namespaces:
-        namespaces["xsd"] = namespaces.pop(None)
-
-    xpaths = []
-
-    def traverse(element, current_path):
-        tag_name = etree.QName(element).localname
-
-        if tag_name == "element" and "name" in element.attrib:
-            # Build full path
-            new_path = f"{current_path}/{element.attrib['name']}" if current_path else f"/{element.attrib['name']}"
-            xpaths.append(new_path)
-
-            # Traverse deeper
-            for child in element:
-                traverse(child, new_path)
-        else:
-            # Continue through other schema constructs without adding to path
-            for child in element:
-                traverse(child, current_path)
-
-    # Start traversal ONLY from global elements
-    for elem in root.findall(".//xsd:element", namespaces):
-        parent_tag = etree.QName(elem.getparent()).localname
-        if parent_tag == "schema":  # only top-level elements
-            traverse(elem, "")
-
-    return sorted(set(xpaths))
-
-
-def compare_xsd_files(file1, file2, output_excel):
-    xpaths1 = set(extract_xpaths_from_xsd(file1))
-    xpaths2 = set(extract_xpaths_from_xsd(file2))
-
-    matches = sorted(xpaths1 & xpaths2)
-    only_in_file1 = sorted(xpaths1 - xpaths2)
-    only_in_file2 = sorted(xpaths2 - xpaths1)
-
-    max_len = max(len(matches), len(only_in_file1), len(only_in_file2))
-    matches += [""] * (max_len - len(matches))
-    only_in_file1 += [""] * (max_len - len(only_in_file1))
-    only_in_file2 += [""] * (max_len - len(only_in_file2))
-
-    df = pd.DataFrame({
-        "Matching XPaths": matches,
-        "Only in File 1": only_in_file1,
-        "Only in File 2": only_in_file2
-    })
-    df.to_excel(output_excel, index=False)
-    print(f"Comparison saved to {output_excel}")
-
-
-# Example usage
-file1 = "schema1.xsd"
-file2 = "schema2.xsd"
-output_excel = "xsd_comparison.xlsx"
-
-compare_xsd_files(file1, file2, output_excel)
-
-
-from lxml import etree
-import pandas as pd
-
-def extract_xpaths_from_xsd(file_path):
+def extract_xpaths_from_xsd(file_path, cache_dir=DEFAULT_CACHE_DIR):
     """
-    Extracts all complete XPaths from an XSD file, including nested child elements.
+    Extracts all complete XPaths (elements and @attributes) from an XSD file,
+    starting at its global elements.
     """
-    tree = etree.parse(file_path)
-    root = tree.getroot()
-
-    namespaces = root.nsmap.copy()
-    if None in namespaces:
-        namespaces["xsd"] = namespaces.pop(None)
-
-    xpaths = []
-
-    def traverse(element, current_path=""):
-        tag_name = etree.QName(element).localname
-        if tag_name == "element" and "name" in element.attrib:
-            # Append this element to the current path
-            new_path = f"{current_path}/{element.attrib['name']}" if current_path else f"/{element.attrib['name']}"
-            xpaths.append(new_path)
-
-            # Traverse children with updated path
-            for child in element:
-                traverse(child, new_path)
-        else:
-            # Continue traversing non-element tags (like complexType, sequence)
-            for child in element:
-                traverse(child, current_path)
-
-    traverse(root, "")
-    return sorted(set(xpaths))
+    graph = load_schema_graph(file_path, cache_dir=cache_dir)
+    return sorted({xpath for xpath, _, _ in iter_paths(graph)})
 
 
-def compare_xsd_files(file1, file2, output_excel):
-    # Extract full XPaths
-    xpaths1 = set(extract_xpaths_from_xsd(file1))
-    xpaths2 = set(extract_xpaths_from_xsd(file2))
+def compare_xsd_files(file1, file2, output_excel, cache_dir=DEFAULT_CACHE_DIR):
+    graph1 = load_schema_graph(file1, cache_dir=cache_dir)
+    graph2 = load_schema_graph(file2, cache_dir=cache_dir)
+    xpaths1 = {xpath for xpath, _, _ in iter_paths(graph1)}
+    xpaths2 = {xpath for xpath, _, _ in iter_paths(graph2)}
 
-    # Compare sets
     matches = sorted(xpaths1 & xpaths2)
     only_in_file1 = sorted(xpaths1 - xpaths2)
     only_in_file2 = sorted(xpaths2 - xpaths1)
@@ -372,78 +61,439 @@ def compare_xsd_files(file1, file2, output_excel):
     only_in_file1 += [""] * (max_len - len(only_in_file1))
     only_in_file2 += [""] * (max_len - len(only_in_file2))
 
-    # Save to Excel
     df = pd.DataFrame({
         "Matching XPaths": matches,
         "Only in File 1": only_in_file1,
         "Only in File 2": only_in_file2
     })
-    df.to_excel(output_excel, index=False)
-    print(f"Comparison saved to {output_excel}")
-
-
-# Example usage
-file1 = "schema1.xsd"
-file2 = "schema2.xsd"
-output_excel = "xsd_comparison.xlsx"
-
-compare_xsd_files(file1, file2, output_excel)
-
-
-from lxml import etree
-import pandas as pd
-from pathlib import Path
+    changes = pd.DataFrame(diff_schema_graphs(graph1, graph2), columns=CHANGE_COLUMNS)
+    with pd.ExcelWriter(output_excel) as writer:
+        df.to_excel(writer, sheet_name="XPaths", index=False)
+        changes.to_excel(writer, sheet_name="Changes", index=False)
+    print(f"Comparison saved to {output_excel} ({len(changes)} structural changes)")
+
+
+# -------------------------
+# Structural diff
+# Types are matched by local name (ISO versions differ in namespace), anonymous
+# types by their position (owner type + element name). Each matched pair of types
+# is diffed once; a change is reported once per type with the number of paths
+# that use the type, not once per path. Named simpleTypes are diffed as types of
+# their own, so a facet change of Max35Text is one row however many elements and
+# attributes use it.
+# -------------------------
+CHANGE_COLUMNS = ["Change", "Type", "Item", "Old", "New", "Paths", "Example Path"]
+
+def _local(name):
+    return re.sub(r"\{[^}]*\}", "", name.split(":")[-1]) if name else name
+
+def _type_key(type_id):
+    return re.sub(r"^\{[^}]*\}", "", type_id)
+
+def _strip_ns(value):
+    """value with the namespace removed from every type id in it, for comparing versions."""
+    if isinstance(value, dict):
+        return {k: _strip_ns(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_strip_ns(v) for v in value]
+    return _type_key(value) if isinstance(value, str) else value
+
+def _occurs(node):
+    return f"{node['minOccurs']}..{'unbounded' if node['maxOccurs'] is None else node['maxOccurs']}"
+
+def _type_name(node):
+    if node.get("content") is not None:
+        return _local(node.get("type")) or "(anonymous)"
+    return _local(node.get("type")) or node["kind"]
+
+# One-level structural signature of a type, used to recognise renamed types
+# (facet changes are reported separately, so constraints are not part of it)
+def _type_signature(type_node):
+    return json.dumps([[(a["name"], _local(a["type"]), a["use"]) for a in type_node["attributes"]],
+                       [(c["name"], c["minOccurs"], c["maxOccurs"], c["kind"], _local(c.get("type")))
+                        for c in type_node["children"]]])
+
+def _diff_constraints(c1, c2):
+    """[(item, old, new)] for constraint facets that differ; enumerations by value."""
+    changes = []
+    for facet in sorted(set(c1) | set(c2)):
+        v1, v2 = c1.get(facet), c2.get(facet)
+        if v1 == v2:
+            continue
+        if facet == "enumeration" and v1 and v2:
+            removed = [v for v in v1 if v not in set(v2)]
+            added = [v for v in v2 if v not in set(v1)]
+            if removed:
+                changes.append(("enumeration removed", ", ".join(removed), ""))
+            if added:
+                changes.append(("enumeration added", "", ", ".join(added)))
+        else:
+            changes.append((facet, "" if v1 is None else str(v1), "" if v2 is None else str(v2)))
+    return changes
+
+def _facet_changes(n1, n2):
+    """Constraint rows of an element or attribute whose facets are not those of one named simpleType."""
+    if n1.get("type") and _local(n1["type"]) == _local(n2.get("type")):
+        return []   # same named type: its facet changes are reported once, for the simpleType
+    return [(facet if facet.startswith("enumeration") else f"constraint {facet}", old, new)
+            for facet, old, new in _diff_constraints(n1.get("constraints") or {}, n2.get("constraints") or {})]
+
+def _diff_types(t1, t2, renamed):
+    """[(change, item, old, new)] between two versions of one type."""
+    changes = []
+    a1 = OrderedDict((a["name"], a) for a in t1["attributes"])
+    a2 = OrderedDict((a["name"], a) for a in t2["attributes"])
+    for name in a1:
+        if name not in a2:
+            changes.append(("attribute removed", "@" + name, _local(a1[name]["type"]), ""))
+        else:
+            for field in ("type", "use"):
+                old, new = a1[name][field], a2[name][field]
+                if field == "type":
+                    old, new = _local(old), _local(new)
+                if old != new:
+                    changes.append((f"attribute {field}", "@" + name, old, new))
+            for change, old, new in _facet_changes(a1[name], a2[name]):
+                changes.append((change, "@" + name, old, new))
+    for name in a2:
+        if name not in a1:
+            changes.append(("attribute added", "@" + name, "", _local(a2[name]["type"])))
+
+    c1 = OrderedDict()
+    for c in t1["children"]:
+        c1.setdefault(c["name"], c)
+    c2 = OrderedDict()
+    for c in t2["children"]:
+        c2.setdefault(c["name"], c)
+    for name, n1 in c1.items():
+        n2 = c2.get(name)
+        if n2 is None:
+            changes.append(("element removed", name, _type_name(n1), ""))
+            continue
+        if (n1["minOccurs"], n1["maxOccurs"]) != (n2["minOccurs"], n2["maxOccurs"]):
+            changes.append(("occurrence", name, _occurs(n1), _occurs(n2)))
+        if n1["inChoice"] != n2["inChoice"]:
+            changes.append(("choice", name, str(n1["inChoice"]), str(n2["inChoice"])))
+        old_t, new_t = _type_name(n1), _type_name(n2)
+        if old_t != new_t:
+            kind = "type renamed" if renamed.get(old_t) == new_t else "type"
+            changes.append((kind, name, old_t, new_t))
+        for change, old, new in _facet_changes(n1, n2):
+            changes.append((change, name, old, new))
+    for name, n2 in c2.items():
+        if name not in c1:
+            changes.append(("element added", name, "", _type_name(n2)))
+
+    # order of the elements present in both versions
+    common1 = [n for n in c1 if n in c2]
+    common2 = [n for n in c2 if n in c1]
+    if common1 != common2:
+        pos2 = {n: i for i, n in enumerate(common2)}
+        for i, n in enumerate(common1):
+            if pos2[n] != i:
+                changes.append(("element reordered", n, str(i + 1), str(pos2[n] + 1)))
+    return changes
+
+# path indexes already built in this process: id(graph) -> (graph, (paths, usage))
+_PATH_INDEXES = {}
+
+# {type_key: (path count, example path)} and {path: node} for a graph, built once per graph;
+# simpleTypes are counted under their local name, over element and attribute paths
+def _path_index(graph):
+    cached = _PATH_INDEXES.get(id(graph))
+    if cached is not None and cached[0] is graph:
+        return cached[1]
+    usage = {}
+    paths = OrderedDict()
+    for xpath, kind, node in iter_paths(graph):
+        paths[xpath] = node
+        if kind == "element" and node.get("content") is not None:
+            key = _type_key(node["content"])
+        elif node.get("type") and (kind == "attribute" or node.get("kind") == "simple"):
+            key = _local(node["type"])
+        else:
+            continue
+        count, example = usage.get(key, (0, xpath))
+        usage[key] = (count + 1, example)
+    _PATH_INDEXES[id(graph)] = (graph, (paths, usage))
+    return paths, usage
+
+# Added/removed subtrees reported at their top path; a removed and an added top path
+# with the same leaf name and type are a move
+def _path_changes(paths1, paths2):
+    removed = [p for p in paths1 if p not in paths2]
+    added = [p for p in paths2 if p not in paths1]
+
+    # paths are in depth-first order, so a subtree follows its top path
+    def tops(ps):
+        result = OrderedDict()
+        current = None
+        for p in ps:
+            if current is not None and p.startswith(current + "/"):
+                result[current] += 1
+            else:
+                current = p
+                result[p] = 1
+        return result
+
+    removed_tops = tops(removed)
+    added_tops = tops(added)
+
+    def signature(p, paths):
+        node = paths[p]
+        return p.rsplit("/", 1)[-1], _local(node.get("type")) if isinstance(node, dict) else None
+
+    added_by_sig = {}
+    for p in added_tops:
+        added_by_sig.setdefault(signature(p, paths2), []).append(p)
+    rows = []
+    for p, count in removed_tops.items():
+        candidates = added_by_sig.get(signature(p, paths1))
+        if candidates:
+            target = candidates.pop(0)
+            rows.append(("path moved", p, target, count))
+            del added_tops[target]
+        else:
+            rows.append(("path removed", p, "", count))
+    for p, count in added_tops.items():
+        rows.append(("path added", "", p, count))
+    return rows
 
-def extract_xpaths_from_xsd(file_path):
+def diff_schema_graphs(graph1, graph2):
     """
-    Extracts all element XPaths from an XSD file.
+    Structural diff of two schema graphs. Returns rows (dicts with CHANGE_COLUMNS):
+    path added/removed/moved, and per type: element/attribute added/removed,
+    occurrence, choice, type, type renamed, constraint and enumeration changes,
+    element reordered; per named simpleType: constraint and enumeration changes.
     """
-    tree = etree.parse(file_path)
-    root = tree.getroot()
-    namespaces = root.nsmap
-    if None in namespaces:
-        namespaces["xsd"] = namespaces.pop(None)  # unify default namespace
-
-    xpaths = []
-
-    def traverse(element, current_path=""):
-        tag_name = etree.QName(element).localname
-        if tag_name == "element" and "name" in element.attrib:
-            path = f"{current_path}/{element.attrib['name']}"
-            xpaths.append(path)
-
-        for child in element:
-            traverse(child, current_path=current_path if tag_name != "element" else f"{current_path}/{element.attrib.get('name', '')}")
-
-    traverse(root)
-    return sorted(set(xpaths))
-
-
-def compare_xsd_files(file1, file2, output_excel):
-    # Extract XPaths
-    xpaths1 = set(extract_xpaths_from_xsd(file1))
-    xpaths2 = set(extract_xpaths_from_xsd(file2))
-
-    # Compare
-    matches = sorted(xpaths1 & xpaths2)
-    only_in_file1 = sorted(xpaths1 - xpaths2)
-    only_in_file2 = sorted(xpaths2 - xpaths1)
-
-    # Prepare DataFrame
-    df = pd.DataFrame({
-        "Matching XPaths": matches + [""] * (max(len(only_in_file1), len(only_in_file2)) - len(matches)),
-        "Only in File 1": only_in_file1 + [""] * (len(matches) - len(only_in_file1) if len(matches) > len(only_in_file1) else 0),
-        "Only in File 2": only_in_file2 + [""] * (len(matches) - len(only_in_file2) if len(matches) > len(only_in_file2) else 0),
-    })
-
-    # Save to Excel
-    df.to_excel(output_excel, index=False)
-    print(f"Comparison saved to {output_excel}")
-
-
-# Example usage
-file1 = "schema1.xsd"
-file2 = "schema2.xsd"
-output_excel = "xsd_comparison.xlsx"
-
-compare_xsd_files(file1, file2, output_excel)
\ No newline at end of file
+    paths1, usage1 = _path_index(graph1)
+    paths2, usage2 = _path_index(graph2)
+    rows = []
+    for change, old, new, count in _path_changes(paths1, paths2):
+        rows.append({"Change": change, "Type": "", "Item": new or old, "Old": old, "New": new,
+                     "Paths": count, "Example Path": new or old})
+
+    types1 = OrderedDict((_type_key(k), v) for k, v in graph1["types"].items())
+    types2 = OrderedDict((_type_key(k), v) for k, v in graph2["types"].items())
+    # renamed: a type only in graph1 with the same structure as a type only in graph2
+    only2 = {}
+    for key in types2:
+        if key not in types1:
+            only2.setdefault(_type_signature(types2[key]), []).append(key)
+    renamed = {}
+    for key in types1:
+        if key not in types2:
+            matches = only2.get(_type_signature(types1[key]))
+            if matches:
+                renamed[key] = matches.pop(0)
+                rows.append({"Change": "type renamed", "Type": key, "Item": key, "Old": key, "New": renamed[key],
+                             "Paths": usage2.get(renamed[key], (0, ""))[0],
+                             "Example Path": usage2.get(renamed[key], (0, ""))[1]})
+
+    for key, t1 in types1.items():
+        t2 = types2.get(key)
+        if t2 is None:
+            t2 = types2.get(renamed.get(key))
+        if t2 is None or _strip_ns(t1) == _strip_ns(t2):
+            continue
+        count, example = usage2.get(key, usage1.get(key, (0, "")))
+        for change, item, old, new in _diff_types(t1, t2, renamed):
+            rows.append({"Change": change, "Type": key, "Item": item, "Old": old, "New": new,
+                         "Paths": count, "Example Path": f"{example}/{item}" if example else ""})
+
+    simple2 = {_type_key(k): v for k, v in graph2.get("simple_types", {}).items()}
+    for key, c1 in ((_type_key(k), v) for k, v in graph1.get("simple_types", {}).items()):
+        c2 = simple2.get(key)
+        if c2 is None or c1 == c2:
+            continue
+        count, example = usage2.get(key, usage1.get(key, (0, "")))
+        for facet, old, new in _diff_constraints(c1, c2):
+            rows.append({"Change": facet if facet.startswith("enumeration") else f"constraint {facet}",
+                         "Type": key, "Item": key, "Old": old, "New": new, "Paths": count, "Example Path": example})
+    return rows
+
+def structural_diff(file1, file2, cache_dir=DEFAULT_CACHE_DIR):
+    return diff_schema_graphs(load_schema_graph(file1, cache_dir=cache_dir), load_schema_graph(file2, cache_dir=cache_dir))
+
+
+# -------------------------
+# Batch comparison
+# -------------------------
+SUMMARY_COLUMNS = ["Old Schema", "New Schema", "Relation", "Matching Paths", "Only in Old", "Only in New",
+                   "Structural Changes"]
+
+DEFAULT_DB_QUERY = ("SELECT file_name, xsd_content FROM iso_xsd_repository WHERE is_active = 'Y' "
+                    "ORDER BY msg_family, version_no")
+
+def schema_name(graph, fallback):
+    """'pacs.008.001.08' from the target namespace, else from the file name."""
+    name = xsd_name_from_namespace(graph.get("target_namespace"))
+    if name:
+        return name
+    family, version = split_xsd_name(fallback)
+    return f"{family}.{version}" if family else os.path.splitext(os.path.basename(fallback))[0]
+
+def _add_schema(catalog, sources, graph, source):
+    """Add graph under its schema name; two sources with the same name are an error."""
+    name = schema_name(graph, source)
+    if name in catalog:
+        raise ValueError(f"schema {name} defined twice: {sources[name]} and {source}")
+    catalog[name] = graph
+    sources[name] = source
+
+def load_catalog_dir(folder, cache_dir=DEFAULT_CACHE_DIR):
+    """{schema name: graph} for every .xsd in folder (ValueError when two files give the same name)."""
+    catalog = OrderedDict()
+    sources = {}
+    for fname in sorted(os.listdir(folder)):
+        if fname.lower().endswith(".xsd"):
+            graph = load_schema_graph(os.path.join(folder, fname), cache_dir=cache_dir)
+            if graph["roots"]:
+                _add_schema(catalog, sources, graph, fname)
+    return catalog
+
+def load_catalog_db(db_user, db_pass, db_dsn, query=DEFAULT_DB_QUERY, cache_dir=DEFAULT_CACHE_DIR):
+    """{schema name: graph} for the (file_name, xsd_content) rows of query (ValueError on duplicate names)."""
+    try:
+        import cx_Oracle
+    except Exception:
+        raise RuntimeError("cx_Oracle not installed. Install with: pip install cx_Oracle")
+    conn = cx_Oracle.connect(db_user, db_pass, db_dsn)
+    cur = conn.cursor()
+    cur.execute(query)
+    rows = []
+    for file_name, xsd_content in cur.fetchall():
+        text = xsd_content.read() if hasattr(xsd_content, "read") else str(xsd_content)
+        rows.append((file_name, text.encode("utf-8")))
+    cur.close()
+    conn.close()
+    # includes/imports resolve against the other rows by file name
+    xsdSchemaGraph._DB_SCHEMAS.update({os.path.basename(f): data for f, data in rows})
+    catalog = OrderedDict()
+    sources = {}
+    for file_name, data in rows:
+        graph = schema_graph_from_bytes(data, "db:" + os.path.basename(file_name), source=file_name,
+                                        cache_dir=cache_dir)
+        if graph["roots"]:
+            _add_schema(catalog, sources, graph, file_name)
+    return catalog
+
+def _version_key(name):
+    family, version = split_xsd_name(name)
+    return tuple(int(p) for p in version.split(".")) if version else ()
+
+def plan_pairs(catalog, predecessor=True, baseline=None, pairs=None):
+    """[(old name, new name, relation)] to compare; baseline is a second catalog."""
+    plan = []
+    by_family = OrderedDict()
+    for name in catalog:
+        family, _ = split_xsd_name(name)
+        by_family.setdefault(family or name, []).append(name)
+    if predecessor:
+        for family, names in by_family.items():
+            names = sorted(names, key=_version_key)
+            plan.extend((old, new, "predecessor") for old, new in zip(names, names[1:]))
+    if baseline:
+        base_by_family = {}
+        for name in sorted(baseline, key=_version_key):
+            family, _ = split_xsd_name(name)
+            base_by_family[family or name] = name   # latest baseline version per family
+        for family, names in by_family.items():
+            if family in base_by_family:
+                plan.extend((f"baseline:{base_by_family[family]}", new, "baseline") for new in names)
+    for old, new in pairs or []:
+        plan.append((old, new, "explicit"))
+    return plan
+
+# worker state: name -> graph, set once per pool process
+_BATCH_GRAPHS = {}
+
+def _init_batch_worker(graphs):
+    _BATCH_GRAPHS.clear()
+    _BATCH_GRAPHS.update(graphs)
+
+def _diff_pair(pair):
+    old, new, relation = pair
+    graph1, graph2 = _BATCH_GRAPHS[old], _BATCH_GRAPHS[new]
+    paths1 = _path_index(graph1)[0]
+    paths2 = _path_index(graph2)[0]
+    matching = sum(1 for p in paths1 if p in paths2)
+    rows = diff_schema_graphs(graph1, graph2)
+    summary = {"Old Schema": old, "New Schema": new, "Relation": relation, "Matching Paths": matching,
+               "Only in Old": len(paths1) - matching, "Only in New": len(paths2) - matching,
+               "Structural Changes": len(rows)}
+    for row in rows:
+        row["Old Schema"], row["New Schema"] = old, new
+    return summary, rows
+
+def compare_batch(catalog, plan, output, baseline=None, workers=1):
+    """Diff every planned pair and write one workbook (.xlsx) or Parquet files (.parquet)."""
+    graphs = dict(catalog)
+    for name, graph in (baseline or {}).items():
+        graphs[f"baseline:{name}"] = graph
+    unknown = {n for old, new, _ in plan for n in (old, new) if n not in graphs}
+    if unknown:
+        raise ValueError(f"unknown schemas in pairs: {', '.join(sorted(unknown))}")
+
+    if workers <= 1 or len(plan) <= 1:
+        _init_batch_worker(graphs)
+        results = [_diff_pair(pair) for pair in plan]
+    else:
+        # only the graphs the plan uses are shipped, once per worker
+        used = {n: graphs[n] for old, new, _ in plan for n in (old, new)}
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_batch_worker, initargs=(used,)) as pool:
+            results = list(pool.map(_diff_pair, plan, chunksize=max(1, len(plan) // (workers * 4))))
+
+    summary = pd.DataFrame([r[0] for r in results], columns=SUMMARY_COLUMNS)
+    changes = pd.DataFrame([row for r in results for row in r[1]],
+                           columns=["Old Schema", "New Schema"] + CHANGE_COLUMNS)
+    if output.lower().endswith(".parquet"):
+        changes.to_parquet(output, index=False)
+        summary_path = output[:-len(".parquet")] + "_summary.parquet"
+        summary.to_parquet(summary_path, index=False)
+        print(f"Batch comparison saved to {output} and {summary_path} ({len(plan)} pairs, {len(changes)} changes)")
+    else:
+        with pd.ExcelWriter(output) as writer:
+            summary.to_excel(writer, sheet_name="Summary", index=False)
+            changes.to_excel(writer, sheet_name="Changes", index=False)
+        print(f"Batch comparison saved to {output} ({len(plan)} pairs, {len(changes)} changes)")
+    return summary
+
+
+def main():
+    p = argparse.ArgumentParser(description="Compare the XPaths and structure of XSD files.")
+    p.add_argument("file1", nargs="?")
+    p.add_argument("file2", nargs="?")
+    p.add_argument("-o", "--output", default="xsd_comparison.xlsx", help="Excel (.xlsx) or Parquet (.parquet) file to write")
+    p.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help="Schema graph cache directory")
+    p.add_argument("--batch-dir", help="Batch mode: compare the schemas in this folder")
+    p.add_argument("--batch-db", action="store_true", help="Batch mode: compare schemas from iso_xsd_repository")
+    p.add_argument("--db-user")
+    p.add_argument("--db-pass")
+    p.add_argument("--db-dsn")
+    p.add_argument("--db-query", default=DEFAULT_DB_QUERY, help="Query returning (file_name, xsd_content)")
+    p.add_argument("--predecessor", action="store_true", help="Compare each version with the previous one of its family")
+    p.add_argument("--baseline", help="Folder of baseline schemas; each schema is compared with its family's baseline")
+    p.add_argument("--pair", nargs=2, action="append", metavar=("OLD", "NEW"), help="Explicit pair of schema names")
+    p.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Parallel diff processes")
+    args = p.parse_args()
+
+    if args.batch_dir or args.batch_db:
+        if args.batch_db:
+            if not (args.db_user and args.db_pass and args.db_dsn):
+                p.error("--batch-db requires --db-user, --db-pass and --db-dsn")
+            catalog = load_catalog_db(args.db_user, args.db_pass, args.db_dsn, args.db_query, cache_dir=args.cache_dir)
+        else:
+            catalog = load_catalog_dir(args.batch_dir, cache_dir=args.cache_dir)
+        baseline = load_catalog_dir(args.baseline, cache_dir=args.cache_dir) if args.baseline else None
+        predecessor = args.predecessor or not (baseline or args.pair)
+        plan = plan_pairs(catalog, predecessor=predecessor, baseline=baseline, pairs=args.pair)
+        compare_batch(catalog, plan, args.output, baseline=baseline, workers=args.workers)
+    else:
+        if not (args.file1 and args.file2):
+            p.error("give two XSD files, or --batch-dir / --batch-db")
+        compare_xsd_files(args.file1, args.file2, args.output, cache_dir=args.cache_dir)
+
+
+if __name__ == "__main__":
+    main()
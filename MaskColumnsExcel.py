@@ -3,6 +3,7 @@ import re
 import random
 import string
 import hashlib
+from maskEngine import mask_series
 
 # --- Helpers ---
 
@@ -73,7 +74,7 @@ def mask_columns_across_sheets(file_path, columns_to_mask, output_file):
         for col in columns_to_mask:
             if col in df.columns:
                 print(f"🔐 Masking column: {col}")
-                df[col] = df[col].apply(mask_value)
+                df[col] = mask_series(df[col], mode="digits")
             else:
                 print(f"⚠️ Column '{col}' not found in sheet '{sheet_name}'")
 
@@ -104,6 +105,7 @@ Perfect — if you want to encrypt instead of mask, we can use AES encryption to
 from cryptography.hazmat.primitives.ciphers.aead import AESGCM
 import os
 import base64
+from maskCrypto import cipher, decrypt_series, encrypt_series
 
 # Generate a 256-bit key securely (do this once and save safely)
 # Use os.urandom(32) and store securely in env/file
@@ -114,7 +116,7 @@ def encrypt_value(value, key=ENCRYPTION_KEY):
         return value
     val_str = str(value).encode('utf-8')
     nonce = os.urandom(12)  # AESGCM requires 96-bit nonce
-    aesgcm = AESGCM(key)
+    aesgcm = cipher(key)  # built once per key, not per cell
     encrypted = aesgcm.encrypt(nonce, val_str, None)
     combined = nonce + encrypted
     return base64.b64encode(combined).decode('utf-8')
@@ -124,7 +126,7 @@ def decrypt_value(encoded_value, key=ENCRYPTION_KEY):
         return encoded_value
     decoded = base64.b64decode(encoded_value)
     nonce, ciphertext = decoded[:12], decoded[12:]
-    aesgcm = AESGCM(key)
+    aesgcm = cipher(key)
     decrypted = aesgcm.decrypt(nonce, ciphertext, None)
     return decrypted.decode('utf-8')
     
@@ -156,8 +158,13 @@ def mask_value(val, column_name=None):
     return mask_alphanumeric(val_str, seed)
 
 
-def decrypt_column(df, column_name):
-    df[column_name] = df[column_name].apply(decrypt_value)
+def encrypt_column(df, column_name, key=ENCRYPTION_KEY, mode="gcm"):
+    # whole column at once: shared cipher, bulk nonces, thread pool (maskCrypto)
+    df[column_name] = encrypt_series(df[column_name], key, mode)
+
+
+def decrypt_column(df, column_name, key=ENCRYPTION_KEY, mode="gcm"):
+    df[column_name] = decrypt_series(df[column_name], key, mode)
 
 
 columns_to_mask_or_encrypt = [
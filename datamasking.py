@@ -25,11 +25,15 @@ def random_string(length):
 # MASKING FUNCTIONS
 # --------------------------
 
+# compiled once; maskText.mask_text_series(..., kinds=("star",)) is the deterministic single-pass version
+STAR_ENCLOSED_RE = re.compile(r'\*[^*]+\*')
+TRAILING_STAR_RE = re.compile(r'(?<=\*)[^\*]+\*')
+
 def mask_every_star_enclosed_word(text):
-    return re.sub(r'\*[^*]+\*', lambda m: '*' + random_string(len(m.group(0)) - 2) + '*', text)
+    return STAR_ENCLOSED_RE.sub(lambda m: '*' + random_string(len(m.group(0)) - 2) + '*', text)
 
 def mask_trailing_star_words(text):
-    return re.sub(r'(?<=\*)[^\*]+\*', lambda m: random_string(len(m.group(0)) - 1) + '*', text)
+    return TRAILING_STAR_RE.sub(lambda m: random_string(len(m.group(0)) - 1) + '*', text)
 
 def mask_all_starred_words(text):
     if pd.isna(text):
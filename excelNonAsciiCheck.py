@@ -1,28 +1,120 @@
+"""
+excelNonAsciiCheck.py
+
+Find (and highlight) the cells of a workbook that contain non-ASCII characters.
+
+Every sheet is streamed in read-only mode and each string cell is checked
+with str.isascii(); only the hits are looked at character by character. The
+report lists each offending cell with its code points and, with
+--transliterate, an ASCII suggestion. The fills are then applied to the hit
+cells only, in one pass over the workbook, and saved once.
+
+Usage:
+  python excelNonAsciiCheck.py data.xlsx                          # data_highlighted.xlsx
+  python excelNonAsciiCheck.py data.xlsx --sheet Customers --report non_ascii.csv --transliterate
+  python excelNonAsciiCheck.py data.xlsx --report non_ascii.csv --no-highlight
+"""
+
+import re
+import csv
+import argparse
+import unicodedata
 from openpyxl import load_workbook
 from openpyxl.styles import PatternFill
+from openpyxl.utils import get_column_letter
+
+NON_ASCII_RE = re.compile(r"[^\x00-\x7F]")
+
+# characters NFKD does not reduce to ASCII
+TRANSLITERATIONS = {
+    "ß": "ss", "æ": "ae", "Æ": "AE", "ø": "o", "Ø": "O", "œ": "oe", "Œ": "OE", "ł": "l", "Ł": "L",
+    "đ": "d", "Đ": "D", "þ": "th", "Þ": "Th", "ð": "d", "Ð": "D", "ı": "i",
+    "‘": "'", "’": "'", "‚": "'", "“": '"', "”": '"', "„": '"', "–": "-", "—": "-", "−": "-",
+    "…": "...", "\u00a0": " ", "\u200b": "", "€": "EUR", "£": "GBP",
+}
+
+def transliterate(text):
+    """ASCII approximation of text (unidecode when installed, else NFKD plus TRANSLITERATIONS)."""
+    try:
+        from unidecode import unidecode
+        return unidecode(text)
+    except ImportError:
+        pass
+    text = "".join(TRANSLITERATIONS.get(ch, ch) for ch in text)
+    return unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode("ascii")
+
+def code_points(text):
+    """'U+00E9 é, U+2019 ’' for the distinct non-ASCII characters of text."""
+    return ", ".join(f"U+{ord(ch):04X} {ch}" for ch in dict.fromkeys(NON_ASCII_RE.findall(text)))
+
+def scan_non_ascii(file_path, sheet_names=None, with_transliteration=False):
+    """Yield one dict per string cell with non-ASCII characters, streaming every sheet (or sheet_names)."""
+    wb = load_workbook(file_path, read_only=True)
+    try:
+        for ws in (wb.worksheets if not sheet_names else [wb[n] for n in sheet_names]):
+            for r, row in enumerate(ws.iter_rows(values_only=True), start=1):
+                for c, value in enumerate(row, start=1):
+                    if value.__class__ is str and not value.isascii():
+                        hit = {"sheet": ws.title, "cell": f"{get_column_letter(c)}{r}", "row": r, "column": c,
+                               "value": value, "code_points": code_points(value)}
+                        if with_transliteration:
+                            hit["transliteration"] = transliterate(value)
+                        yield hit
+    finally:
+        wb.close()
+
+def write_report(hits, report_path):
+    fields = ["sheet", "cell", "row", "column", "value", "code_points", "transliteration"]
+    with open(report_path, "w", newline="", encoding="utf-8") as fh:
+        writer = csv.DictWriter(fh, fieldnames=fields, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(hits)
+
+def highlight_non_ascii(file_path, sheet_name=None, save_path=None, report_path=None, with_transliteration=False,
+                        highlight=True):
+    """
+    Highlight the non-ASCII cells of every sheet (or only sheet_name) and save
+    to save_path (default <file>_highlighted.xlsx). Returns the hits.
+    """
+    sheet_names = [sheet_name] if isinstance(sheet_name, str) else sheet_name
+    hits = list(scan_non_ascii(file_path, sheet_names, with_transliteration))
+
+    by_sheet = {}
+    for hit in hits:
+        by_sheet.setdefault(hit["sheet"], []).append(hit["cell"])
+    for sheet, cells in by_sheet.items():
+        print(f"{sheet}: {len(cells)} cell(s) with non-ASCII characters")
+    if not hits:
+        print("No non-ASCII characters found")
+
+    if report_path:
+        write_report(hits, report_path)
+        print(f"Report saved to {report_path}")
+
+    if highlight and hits:
+        # Define highlight fill (light yellow)
+        highlight_fill = PatternFill(start_color="FFFF00", end_color="FFFF00", fill_type="solid")
+        wb = load_workbook(file_path)
+        for sheet, cells in by_sheet.items():
+            ws = wb[sheet]
+            for coordinate in cells:
+                ws[coordinate].fill = highlight_fill
+        save_path = save_path or file_path.replace(".xlsx", "_highlighted.xlsx")
+        wb.save(save_path)
+        print(f"File saved to {save_path}")
+    return hits
+
+def main():
+    p = argparse.ArgumentParser(description="Report and highlight cells with non-ASCII characters.")
+    p.add_argument("file_path", help=".xlsx file")
+    p.add_argument("--sheet", action="append", help="Sheet to check (repeatable; default: all sheets)")
+    p.add_argument("-o", "--output", help="Highlighted copy (default: <file>_highlighted.xlsx)")
+    p.add_argument("--report", help="CSV report of the offending cells")
+    p.add_argument("--transliterate", action="store_true", help="Add an ASCII suggestion to the report")
+    p.add_argument("--no-highlight", action="store_true", help="Only report, do not write a highlighted copy")
+    args = p.parse_args()
+    highlight_non_ascii(args.file_path, args.sheet, args.output, args.report, args.transliterate,
+                        highlight=not args.no_highlight)
 
-def highlight_non_ascii(file_path, sheet_name=None, save_path=None):
-    # Load workbook
-    wb = load_workbook(file_path)
-    
-    # Use specified sheet or active sheet
-    ws = wb[sheet_name] if sheet_name else wb.active
-
-    # Define highlight fill (light yellow)
-    highlight_fill = PatternFill(start_color="FFFF00", end_color="FFFF00", fill_type="solid")
-
-    # Iterate over all rows and cells
-    for row in ws.iter_rows():
-        for cell in row:
-            if cell.value and isinstance(cell.value, str):
-                # Check if any character is outside ASCII range
-                if any(ord(ch) > 127 for ch in cell.value):
-                    cell.fill = highlight_fill
-
-    # Save updated workbook
-    save_path = save_path or file_path.replace(".xlsx", "_highlighted.xlsx")
-    wb.save(save_path)
-    print(f"File saved to {save_path}")
-
-# Example usage:
-highlight_non_ascii("data.xlsx")  # highlights in active sheet and saves as data_highlighted.xlsx
\ No newline at end of file
+if __name__ == "__main__":
+    main()
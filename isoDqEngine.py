@@ -0,0 +1,630 @@
+#!/usr/bin/env python3
+"""
+isoDqEngine.py
+
+Importable ISO20022 DQ rule engine. Consolidates the validator generations that
+used to live in validateIsoMessage.py (evaluate_rule, evaluate_xpath,
+evaluate_path_with_foundpath, dq_xpath_exists, check_xpath_exists) into one
+evaluator with composable lookup strategies:
+
+  strict          namespace-aware exact XPath            (check_xpath_exists / dq_xpath_exists)
+  alternate_root  expected root missing -> try group/transaction/... containers
+                                                          (adjust_xpath_for_missing_root_v2)
+  relaxed         local-name path match anywhere, reports found path
+                                                          (evaluate_xpath / evaluate_path_with_foundpath)
+  raw_regex       regex on the raw text when XML is unparseable (fallback_raw_*)
+
+Strategies run in the configured order; the first one that finds the element
+wins. Rules are compiled once per rule set, and each parsed message gets a
+local-name index, so relaxed lookups no longer run //*[local-name()=...] scans.
+
+Message versions: RuleCatalog groups rule sets by message family (pacs.008, ...)
+and stores each version as a delta against the family base, with compiled rules
+shared across versions. The version actually validated is detected from the
+message namespace (urn:iso:std:iso:20022:tech:xsd:pacs.008.001.09); the
+iso_messages.xsd_name is only the fallback.
+
+Benchmark strategies on local files:
+  python isoDqEngine.py --rules pacs.008.001.08.json --xsd-name pacs.008.001.08 msgs/*.xml
+
+Requirements:
+ - lxml
+"""
+
+import os
+import re
+import json
+import time
+import argparse
+from functools import lru_cache
+from lxml import etree
+from isoNames import split_xsd_name, xsd_name_from_namespace
+
+# -------------------------
+# Engine configuration (override per run via load_engine_config)
+# -------------------------
+ENGINE_DEFAULTS = {
+    "strategies": ["strict", "alternate_root", "relaxed", "raw_regex"],
+    "strict_structure": False,  # If True, treat mislocated required elements as missing
+    "repair": True,             # recover-parse malformed XML before falling back to regex
+    # keyed by full xsd name or by message family (applies to every version)
+    "expected_root_by_xsd": {
+        "pacs.008": "FIToFICstmrCdtTrf",
+    },
+    "alternate_root_guesses": ['group', 'transaction', 'batch', 'payments', 'transactions', 'envelope', 'data'],
+}
+
+def load_engine_config(path=None, **overrides):
+    """Defaults <- JSON config file <- keyword overrides (None values ignored)."""
+    config = dict(ENGINE_DEFAULTS)
+    if path:
+        with open(path, "r", encoding="utf-8") as fh:
+            config.update(json.load(fh))
+    for k, v in overrides.items():
+        if v is not None:
+            config[k] = v
+    unknown = [s for s in config["strategies"] if s not in STRATEGIES]
+    if unknown:
+        raise ValueError(f"Unknown strategies {unknown}; choose from {sorted(STRATEGIES)}")
+    return config
+
+# -------------------------
+# Utilities
+# -------------------------
+def lob_to_str(maybe_lob):
+    if maybe_lob is None:
+        return None
+    if hasattr(maybe_lob, "read"):
+        return maybe_lob.read()
+    return str(maybe_lob)
+
+def sanitize_xml(xml_str):
+    if xml_str is None:
+        return None
+    s = xml_str.lstrip("\ufeff").strip()
+    if "<Document" in s:
+        start = s.find("<Document")
+        end = s.rfind("</Document>")
+        if end != -1 and end > start:
+            end = end + len("</Document>")
+            s = s[start:end]
+        else:
+            s = s[start:]
+    return s
+
+def repair_and_parse(xml_str, repair=True):
+    """Returns (root_or_None, status, repaired_xml_or_None); status OK / REPAIRED / UNRECOVERABLE: ..."""
+    if not xml_str:
+        return None, "UNRECOVERABLE: empty", None
+    try:
+        root = etree.fromstring(xml_str.encode("utf-8"))
+        return root, "OK", xml_str
+    except etree.XMLSyntaxError as e:
+        if not repair:
+            return None, f"UNRECOVERABLE: {str(e)}", None
+    try:
+        parser = etree.XMLParser(recover=True, remove_comments=False)
+        root = etree.fromstring(xml_str.encode("utf-8"), parser)
+        if root is None:
+            return None, "UNRECOVERABLE: nothing recovered", None
+        repaired = etree.tostring(root, encoding="unicode")
+        return root, "REPAIRED", repaired
+    except Exception as e:
+        return None, f"UNRECOVERABLE: {str(e)}", None
+
+def normalize_rule(rule):
+    path = rule.get("path") or rule.get("xpath") or rule.get("element") or rule.get("field")
+    if "required" in rule:
+        try:
+            required = 1 if int(rule.get("required")) != 0 else 0
+        except:
+            required = 1 if bool(rule.get("required")) else 0
+    elif "minOccurs" in rule:
+        try:
+            required = 1 if int(rule.get("minOccurs", 0)) > 0 else 0
+        except:
+            required = 0
+    elif "mandatory" in rule:
+        required = 1 if rule.get("mandatory") else 0
+    else:
+        required = 0
+    return path, required
+
+def build_relaxed_localname_xpath(parts):
+    if not parts:
+        return None
+    pieces = ["*[local-name()='" + p + "']" for p in parts]
+    return "//" + "/".join(pieces)
+
+def build_localname_path(node):
+    """Local-name path from the document root down to node, e.g. /Document/group/GrpHdr/MsgId"""
+    segs = [etree.QName(node).localname]
+    for anc in node.iterancestors():
+        segs.append(etree.QName(anc).localname)
+    segs.reverse()
+    return "/" + "/".join(segs)
+
+# -------------------------
+# Cached compilation (regex / XPath)
+# -------------------------
+@lru_cache(maxsize=4096)
+def _raw_tag_regex(tag_name):
+    return re.compile(fr"<(?:\w+:)?{re.escape(tag_name)}\b[^>]*>.*?</(?:\w+:)?{re.escape(tag_name)}>",
+                      re.DOTALL | re.IGNORECASE)
+
+@lru_cache(maxsize=4096)
+def _raw_parent_child_regex(parent_tag, child_tag):
+    return re.compile(fr"<(?:\w+:)?{re.escape(parent_tag)}\b[^>]*>.*?<(?:\w+:)?{re.escape(child_tag)}\b",
+                      re.DOTALL | re.IGNORECASE)
+
+def fallback_raw_exists(xml_str, tag_name):
+    if not tag_name or not xml_str:
+        return False
+    return bool(_raw_tag_regex(tag_name).search(xml_str))
+
+def fallback_raw_parent_child(xml_str, parent_tag, child_tag):
+    if not parent_tag or not child_tag or not xml_str:
+        return False
+    return bool(_raw_parent_child_regex(parent_tag, child_tag).search(xml_str))
+
+@lru_cache(maxsize=16384)
+def _compiled_xpath(expr, ns_uri):
+    return etree.XPath(expr, namespaces={'ns': ns_uri} if ns_uri else {})
+
+# -------------------------
+# ISO20022 message versions
+# -------------------------
+_XMLNS_RE = re.compile(r'xmlns(?::\w+)?="(urn:iso:std:iso:20022:tech:xsd:[^"]+)"')
+
+def expected_root_for(config, xsd_name):
+    roots = config.get("expected_root_by_xsd", {})
+    if xsd_name in roots:
+        return roots[xsd_name]
+    family, _ = split_xsd_name(xsd_name)
+    return roots.get(family)
+
+# -------------------------
+# Rule compilation: done once per rule set, not per message
+# -------------------------
+def _compile_rule(path_raw, required):
+    parts = [p.split(":")[-1] for p in path_raw.strip("/").split("/") if p]
+    # attribute rules (.../@Ccy) are matched on their owning element
+    attr = parts.pop()[1:] if parts and parts[-1].startswith("@") else None
+    if not parts:
+        return None
+    attr_step = f"/@{attr}" if attr else ""
+    return {
+        'path': path_raw,
+        'required': required,
+        'parts': tuple(parts),
+        'attr': attr,
+        'tag': parts[-1],
+        'parent': parts[-2] if len(parts) > 1 else None,
+        'ns_xpath': "/" + "/".join("ns:" + p for p in parts) + attr_step,
+        'plain_xpath': "/" + "/".join(parts) + attr_step,
+    }
+
+def compile_rules(rules_json, shared=None):
+    """
+    rules_json: {"rules": [...]} as stored in iso_dq_rules.rule_json
+    shared: optional {(path, required): compiled rule} pool; identical rules are
+    compiled once and the same dict is reused across rule sets.
+    Returns list of compiled rule dicts (path, required, parts, tag, parent).
+    """
+    rules = rules_json.get("rules") if isinstance(rules_json, dict) else None
+    compiled = []
+    for rule in rules or []:
+        path_raw, required = normalize_rule(rule)
+        if not path_raw:
+            continue
+        key = (path_raw, required)
+        if shared is not None and key in shared:
+            c = shared[key]
+        else:
+            c = _compile_rule(path_raw, required)
+            if shared is not None:
+                shared[key] = c
+        if c is not None:
+            compiled.append(c)
+    return compiled
+
+class RuleCatalog:
+    """
+    Rule sets for many message versions, stored per family as base + version deltas.
+
+    The base of a family is the rule list of its lowest version; every other
+    version keeps only the keys it removes and the rules it adds. Compiled rule
+    dicts live once in a shared pool, so pacs.008.001.08/.09/.10 share the ~90%
+    of paths they have in common.
+    """
+
+    def __init__(self, rules_map):
+        """rules_map: {xsd_name: rule_json dict} as loaded from iso_dq_rules"""
+        self.shared = {}
+        self.families = {}     # family -> {'base_version', 'base': [keys], 'deltas': {version: (removed, added)}}
+        self.standalone = {}   # xsd names without an ISO version -> compiled list
+        self._assembled = {}
+        by_family = {}
+        names = {}             # (family, version) -> xsd_name it was loaded from
+        for xsd_name, rules_json in rules_map.items():
+            family, version = split_xsd_name(xsd_name)
+            if family is not None and (family, version) in names:
+                # '12_pacs.008.001.08.xsd' and 'pacs.008.001.08' are the same message version
+                raise ValueError(f"rules for {family}.{version} given twice: "
+                                 f"{names[family, version]} and {xsd_name}")
+            compiled = compile_rules(rules_json, shared=self.shared)
+            if family is None:
+                self.standalone[xsd_name] = compiled
+            else:
+                names[family, version] = xsd_name
+                by_family.setdefault(family, {})[version] = [(c['path'], c['required']) for c in compiled]
+        for family, versions in by_family.items():
+            base_version = min(versions)
+            base = versions[base_version]
+            base_set = set(base)
+            deltas = {}
+            for version, keys in versions.items():
+                if version == base_version:
+                    continue
+                key_set = set(keys)
+                deltas[version] = (frozenset(base_set - key_set), [k for k in keys if k not in base_set])
+            self.families[family] = {'base_version': base_version, 'base': base, 'deltas': deltas}
+
+    def versions(self, family):
+        fam = self.families.get(family)
+        return sorted([fam['base_version']] + list(fam['deltas'])) if fam else []
+
+    def rules_for(self, xsd_name):
+        """Compiled rules for xsd_name (base minus removed plus added), or None if unknown."""
+        if xsd_name in self._assembled:
+            return self._assembled[xsd_name]
+        if xsd_name in self.standalone:
+            return self.standalone[xsd_name]
+        family, version = split_xsd_name(xsd_name)
+        fam = self.families.get(family)
+        if fam is None:
+            return None
+        if version == fam['base_version']:
+            keys = fam['base']
+        elif version in fam['deltas']:
+            removed, added = fam['deltas'][version]
+            keys = [k for k in fam['base'] if k not in removed] + added
+        else:
+            return None
+        rules = [self.shared[k] for k in keys if self.shared.get(k) is not None]
+        self._assembled[xsd_name] = rules
+        return rules
+
+    def stats(self):
+        return {
+            'families': len(self.families),
+            'versions': sum(1 + len(f['deltas']) for f in self.families.values()) + len(self.standalone),
+            'compiled_rules': len(self.shared),
+            'delta_rules': sum(len(r) + len(a) for f in self.families.values() for r, a in f['deltas'].values()),
+        }
+
+def load_rule_catalog_dir(folder):
+    """RuleCatalog of the pyParseXsd_DQ rule sets in folder (.dq.bin mapped in place, .dq.json otherwise)."""
+    from pyDqMetaBin import load_rules_file, rule_files
+    return RuleCatalog({name: {"rules": load_rules_file(os.path.join(folder, fname))}
+                        for name, fname in rule_files(folder).items()})
+
+# -------------------------
+# Per-message context
+# -------------------------
+class MessageContext:
+    """Parsed message plus lazily built lookup structures shared by all rules of that message."""
+
+    def __init__(self, xml_text, xsd_name, config):
+        self.xsd_name = xsd_name
+        self.config = config
+        self.sanitized = sanitize_xml(xml_text)
+        self.root, self.status, repaired = repair_and_parse(self.sanitized, repair=config.get("repair", True))
+        self.search_xml = repaired if repaired is not None else (self.sanitized or "")
+        if self.root is not None:
+            # namespace of the root whatever its prefix: <Document xmlns=...> or <ns:Document xmlns:ns=...>
+            tag = self.root.tag
+            self.ns_uri = tag[1:tag.index("}")] if tag.startswith("{") else None
+            detected_ns = self.ns_uri if xsd_name_from_namespace(self.ns_uri) else next(
+                (uri for uri in self.root.nsmap.values() if xsd_name_from_namespace(uri)), self.ns_uri)
+        else:
+            self.ns_uri = None
+            m = _XMLNS_RE.search(self.sanitized or "")
+            detected_ns = m.group(1) if m else None
+        # version the message declares; may differ from iso_messages.xsd_name
+        self.detected_xsd_name = xsd_name_from_namespace(detected_ns)
+        self.expected_root = expected_root_for(config, self.detected_xsd_name or xsd_name)
+        self._index = None
+        self._major_present = None
+        self._doc_children = None
+
+    @property
+    def localname_index(self):
+        """localname -> [elements] in document order (one pass over the tree)."""
+        if self._index is None:
+            index = {}
+            if self.root is not None:
+                for el in self.root.iter(tag=etree.Element):
+                    index.setdefault(etree.QName(el).localname, []).append(el)
+            self._index = index
+        return self._index
+
+    @property
+    def root_localname(self):
+        return etree.QName(self.root).localname if self.root is not None else None
+
+    @property
+    def major_present(self):
+        """Is the expected major root (per XSD) present under /Document?"""
+        if self._major_present is None:
+            if not self.expected_root:
+                self._major_present = True
+            elif self.root is not None:
+                self._major_present = (self.root_localname == 'Document' and
+                                       any(etree.QName(c).localname == self.expected_root
+                                           for c in self.root.iterchildren(tag=etree.Element)))
+            else:
+                self._major_present = fallback_raw_exists(self.sanitized, self.expected_root)
+        return self._major_present
+
+    @property
+    def doc_children(self):
+        if self._doc_children is None:
+            names = []
+            if self.root is not None and self.root_localname == 'Document':
+                for c in self.root.iterchildren(tag=etree.Element):
+                    ln = etree.QName(c).localname
+                    if ln not in names:
+                        names.append(ln)
+            self._doc_children = names
+        return self._doc_children
+
+    def xpath(self, expr):
+        return _compiled_xpath(expr, self.ns_uri)(self.root)
+
+    def localname_exists(self, name):
+        if self.root is not None:
+            return name in self.localname_index
+        return fallback_raw_exists(self.search_xml, name)
+
+    def find_localname_path(self, parts, anchored=False, attr=None):
+        """
+        First element matching //*[ln=p0]/*[ln=p1]/.../*[ln=pn] using the index.
+        anchored=True requires p0 to be the document root (/*[ln=p0]/...);
+        attr requires the element to carry that attribute.
+        """
+        for cand in self.localname_index.get(parts[-1], ()):
+            if attr and cand.get(attr) is None:
+                continue
+            node = cand
+            ok = True
+            for name in reversed(parts[:-1]):
+                node = node.getparent()
+                if node is None or etree.QName(node).localname != name:
+                    ok = False
+                    break
+            if ok and anchored and node.getparent() is not None:
+                ok = False
+            if ok:
+                return cand
+        return None
+
+# -------------------------
+# Strategies: (ctx, rule) -> result dict, or None when the strategy has no verdict
+# -------------------------
+def _found(ctx, reason, node=None, in_correct_location=1, location_status='correct', mapping_info=None):
+    return {
+        'exists': 1,
+        'parent_exists': 1,
+        'in_correct_location': in_correct_location,
+        'root_missing': 0 if ctx.major_present else 1,
+        'location_status': location_status,
+        'found': build_localname_path(node) if node is not None else None,
+        'mapping_info': mapping_info,
+        'reason': reason,
+    }
+
+def strategy_strict(ctx, rule):
+    if ctx.root is None:
+        return None
+    expr = rule['ns_xpath'] if ctx.ns_uri else rule['plain_xpath']
+    try:
+        nodes = ctx.xpath(expr)
+    except etree.XPathError:
+        return None
+    if nodes:
+        node = nodes[0]
+        if not isinstance(node, etree._Element):
+            node = node.getparent()  # attribute result -> owning element
+        return _found(ctx, 'Exact XPath match', node=node)
+    return None
+
+def strategy_alternate_root(ctx, rule):
+    if ctx.root is None or ctx.major_present or ctx.expected_root not in rule['parts']:
+        return None
+    pos = rule['parts'].index(ctx.expected_root)
+    guesses = ctx.doc_children + [g for g in ctx.config.get("alternate_root_guesses", []) if g not in ctx.doc_children]
+    for candidate in guesses:
+        parts = list(rule['parts'])
+        parts[pos] = candidate
+        node = ctx.find_localname_path(parts, anchored=True, attr=rule['attr'])
+        if node is not None:
+            return _found(ctx, f'Matched under alternate root {candidate}', node=node,
+                          mapping_info={'mapped_from': ctx.expected_root, 'mapped_to': candidate})
+    return None
+
+def strategy_relaxed(ctx, rule):
+    if ctx.root is None:
+        return None
+    parts = list(rule['parts'])
+    if not ctx.major_present:
+        # expected root missing: drop /Document/<root> and match the remainder anywhere
+        parts = [p for p in parts if p.lower() != "document" and p != ctx.expected_root] or parts
+    node = ctx.find_localname_path(parts, attr=rule['attr'])
+    if node is None:
+        return None
+    return _found(ctx, 'Found via relaxed local-name search', node=node,
+                  in_correct_location=0, location_status='wrong_location')
+
+def strategy_raw_regex(ctx, rule):
+    if ctx.root is not None:
+        return None
+    if not fallback_raw_exists(ctx.search_xml, rule['tag']):
+        return None
+    parent = rule['parent']
+    correct = 1 if (not parent or fallback_raw_parent_child(ctx.search_xml, parent, rule['tag'])) else 0
+    res = _found(ctx, 'Found by raw regex' if correct else 'Tag found but not under expected parent',
+                 in_correct_location=correct, location_status='correct' if correct else 'wrong_location')
+    res['parent_exists'] = 1 if (not parent or fallback_raw_exists(ctx.search_xml, parent)) else 0
+    return res
+
+STRATEGIES = {
+    "strict": strategy_strict,
+    "alternate_root": strategy_alternate_root,
+    "relaxed": strategy_relaxed,
+    "raw_regex": strategy_raw_regex,
+}
+
+def _not_found(ctx, rule):
+    parent = rule['parent']
+    return {
+        'exists': 0,
+        'parent_exists': 1 if (not parent or ctx.localname_exists(parent)) else 0,
+        'in_correct_location': 0,
+        'root_missing': 0 if ctx.major_present else 1,
+        'location_status': 'unknown',
+        'found': None,
+        'mapping_info': None,
+        'reason': 'Tag not found' if ctx.root is not None else 'Tag not found (malformed XML)',
+    }
+
+def evaluate_rule(ctx, rule, strategies=None):
+    """Run strategies in order; returns the first verdict (with 'strategy') or a not-found result."""
+    for name in strategies or ctx.config["strategies"]:
+        res = STRATEGIES[name](ctx, rule)
+        if res is not None:
+            res['strategy'] = name
+            return res
+    res = _not_found(ctx, rule)
+    res['strategy'] = None
+    return res
+
+# -------------------------
+# Message-level API
+# -------------------------
+def validate_message(msg_id, xml_payload, xsd_name, rules, config):
+    """
+    rules: a RuleCatalog (version picked from the message namespace, xsd_name as
+           fallback) or a compiled_rules list for xsd_name (None when no rules exist)
+    Returns the per-message report dict stored in iso_message_dq_report.
+    """
+    ctx = MessageContext(lob_to_str(xml_payload), xsd_name, config)
+    validated_as = xsd_name
+    if isinstance(rules, RuleCatalog):
+        compiled_rules = rules.rules_for(ctx.detected_xsd_name) if ctx.detected_xsd_name else None
+        if compiled_rules is not None:
+            validated_as = ctx.detected_xsd_name
+        else:
+            compiled_rules = rules.rules_for(xsd_name)
+    else:
+        compiled_rules = rules
+    dq_report = []
+    if not compiled_rules:
+        dq_report.append({'error': f'No rules found for XSD {validated_as}'})
+    else:
+        strict_structure = config.get("strict_structure", False)
+        for rule in compiled_rules:
+            res = evaluate_rule(ctx, rule)
+            valid = 'ok'
+            if rule['required'] == 1 and res['exists'] == 0:
+                valid = 'missing'
+            elif rule['required'] == 1 and res['in_correct_location'] == 0 and strict_structure:
+                valid = 'missing'
+            dq_report.append({
+                'path': rule['path'],
+                'required': int(rule['required']),
+                'exists': int(res['exists']),
+                'parent_exists': int(res['parent_exists']),
+                'in_correct_location': int(res['in_correct_location']),
+                'root_missing': int(res['root_missing']),
+                'location_status': res['location_status'],
+                'found': res['found'],
+                'mapping_info': res['mapping_info'],
+                'strategy': res['strategy'],
+                'valid': valid,
+                'reason': res['reason'],
+            })
+    return {
+        'msg_id': msg_id,
+        'xsd_name': xsd_name,
+        'detected_version': ctx.detected_xsd_name,
+        'validated_as': validated_as,
+        'xml_repair_status': ctx.status,
+        'dq_report': dq_report,
+    }
+
+# -------------------------
+# Benchmarking
+# -------------------------
+def benchmark_strategies(xml_texts, compiled_rules, xsd_name, config, repeat=3):
+    """
+    Time every strategy on its own and the configured chain over the same messages.
+    Parsing is done once up front so the numbers isolate rule evaluation cost.
+    Returns a list of dicts: strategy, evaluations, hits, best_seconds, us_per_rule.
+    """
+    contexts = [MessageContext(x, xsd_name, config) for x in xml_texts]
+    for ctx in contexts:
+        ctx.localname_index  # build indexes outside the timed loop
+    candidates = [[name] for name in STRATEGIES] + [list(config["strategies"])]
+    rows = []
+    for chain in candidates:
+        best = None
+        hits = 0
+        for _ in range(repeat):
+            hits = 0
+            t0 = time.perf_counter()
+            for ctx in contexts:
+                for rule in compiled_rules:
+                    if evaluate_rule(ctx, rule, chain)['exists']:
+                        hits += 1
+            elapsed = time.perf_counter() - t0
+            best = elapsed if best is None else min(best, elapsed)
+        evaluations = len(contexts) * len(compiled_rules)
+        rows.append({
+            'strategy': "+".join(chain),
+            'evaluations': evaluations,
+            'hits': hits,
+            'best_seconds': round(best, 6),
+            'us_per_rule': round(best * 1e6 / evaluations, 3) if evaluations else 0.0,
+        })
+    return rows
+
+def main():
+    p = argparse.ArgumentParser(description="Benchmark DQ lookup strategies on local XML files.")
+    p.add_argument("xml_files", nargs="+", help="ISO20022 message files")
+    p.add_argument("--rules", required=True, help="rule_json file ({\"rules\": [...]}) or pyParseXsd_DQ .dq.bin metadata")
+    p.add_argument("--xsd-name", required=True, help="XSD name the rules belong to")
+    p.add_argument("--config", help="Engine config JSON (strategies, strict_structure, ...)")
+    p.add_argument("--strategies", help="Comma separated strategy chain, e.g. strict,relaxed")
+    p.add_argument("--repeat", type=int, default=3)
+    args = p.parse_args()
+
+    config = load_engine_config(args.config, strategies=args.strategies.split(",") if args.strategies else None)
+    if args.rules.endswith(".dq.bin"):
+        from pyDqMetaBin import DqMetaBin, metadata_to_rules
+        with DqMetaBin(args.rules) as meta:
+            compiled = compile_rules({"rules": metadata_to_rules(meta.items())})
+    else:
+        with open(args.rules, "r", encoding="utf-8") as fh:
+            compiled = compile_rules(json.load(fh))
+    xml_texts = []
+    for path in args.xml_files:
+        with open(path, "r", encoding="utf-8") as fh:
+            xml_texts.append(fh.read())
+
+    print(f"{len(xml_texts)} messages x {len(compiled)} rules")
+    for row in benchmark_strategies(xml_texts, compiled, args.xsd_name, config, repeat=args.repeat):
+        print(f"{row['strategy']:<40} hits={row['hits']:<8} {row['best_seconds']:>10.4f}s  {row['us_per_rule']:>9.2f} us/rule")
+
+if __name__ == "__main__":
+    main()
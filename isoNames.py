@@ -0,0 +1,28 @@
+"""
+isoNames.py
+
+ISO 20022 message / schema naming helpers shared by the DQ engine
+(isoDqEngine, validateIsoMessage) and the schema tools (CompareXSD). No
+dependencies, so the schema tools do not pull in the validation engine.
+
+  split_xsd_name("12_pacs.008.001.09.xsd")   -> ("pacs.008", "001.09")
+  xsd_name_from_namespace("urn:iso:std:iso:20022:tech:xsd:pacs.008.001.09") -> "pacs.008.001.09"
+"""
+
+import re
+
+ISO_NS_PREFIX = "urn:iso:std:iso:20022:tech:xsd:"
+_VERSION_RE = re.compile(r"([a-z]{4}\.\d{3})\.(\d{3}\.\d{2})")
+
+def split_xsd_name(name):
+    """'pacs.008.001.09' (or '12_pacs.008.001.09.xsd', or a namespace URI) -> ('pacs.008', '001.09'); else (None, None)"""
+    m = _VERSION_RE.search(name or "")
+    if not m:
+        return None, None
+    return m.group(1), m.group(2)
+
+def xsd_name_from_namespace(ns_uri):
+    if not ns_uri or not ns_uri.startswith(ISO_NS_PREFIX):
+        return None
+    family, version = split_xsd_name(ns_uri[len(ISO_NS_PREFIX):])
+    return f"{family}.{version}" if family else None
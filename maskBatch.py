@@ -0,0 +1,210 @@
+"""
+maskBatch.py
+
+Mask a folder (or glob) of .xlsx/.csv files in one run, with a process pool.
+
+Every sheet of every file is one job: a worker reads just that sheet in
+read-only mode and masks it chunk by chunk (maskStream.mask_sheet). For .csv and
+.parquet output the worker writes the sheet's output file itself. For .xlsx
+output it spools the masked rows to a temporary file, and once all sheets of a
+workbook are done, a second job writes the workbook with its sheets in the
+original order.
+
+With a deterministic policy (MaskPolicy.deterministic: every mask except gcm
+encryption and vault tokenization, including all -c/--digits runs) masks only
+depend on the value and the keys. Workbooks are saved with fixed timestamps
+(maskStream.normalize_xlsx), so the output is then byte-for-byte the same with
+any --workers, including maskStream.py on each file. gcm encryption draws
+random nonces, and tokens depend on the vault's contents and on which worker
+reaches it first, so those columns differ from run to run (they still decrypt
+/ detokenize to the same values).
+
+--cache names a MaskCache file shared by the workers and across runs (as
+maskStream.py --cache): each worker looks masks up in it and adds the ones it
+computed when its sheet is done.
+
+Usage:
+  python maskBatch.py extracts/ -o masked/ -c UserID -c TaxID --digits PhoneNumber --workers 8
+  python maskBatch.py "extracts/2025-*.xlsx" -o masked/ -c UserID --format parquet
+  python maskBatch.py extracts/ -o masked/ --policy masking.yaml --workers 8 --cache release.maskcache
+"""
+
+import os
+import glob
+import pickle
+import shutil
+import argparse
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from maskEngine import MaskCache
+from maskStream import (CHUNK_ROWS, CACHE_ENTRIES, OUTPUT_FORMATS, XlsxSheetWriter, column_modes, iter_sheets,
+                        mask_sheet, open_writer, output_format, policy_from_args, sheet_names)
+
+INPUT_EXTENSIONS = (".xlsx", ".csv")
+
+def find_inputs(source):
+    """Sorted input files of a folder or glob pattern (Excel lock files skipped)."""
+    paths = [os.path.join(source, f) for f in os.listdir(source)] if os.path.isdir(source) else glob.glob(source)
+    return sorted(p for p in paths
+                  if p.lower().endswith(INPUT_EXTENSIONS) and not os.path.basename(p).startswith("~$"))
+
+def output_path(input_path, outdir, fmt=None):
+    stem, ext = os.path.splitext(os.path.basename(input_path))
+    return os.path.join(outdir, stem + "." + (fmt or ext.lstrip(".").lower()))
+
+class SpoolSheetWriter:
+    """Writer interface that pickles a sheet's header and row chunks to one file."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def start_sheet(self, name, header):
+        self.fh = open(self.path, "wb")
+        pickle.dump((name, header), self.fh, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def write_rows(self, rows):
+        pickle.dump(rows, self.fh, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def end_sheet(self):
+        self.fh.close()
+
+def read_spool(path):
+    with open(path, "rb") as fh:
+        name, header = pickle.load(fh)
+        yield name, header
+        while True:
+            try:
+                yield pickle.load(fh)
+            except EOFError:
+                return
+
+# -------------------------
+# Jobs (run in the pool, or inline with one worker)
+# -------------------------
+def mask_sheet_job(job):
+    """Mask one sheet; returns (file index, sheet index, row count, log lines)."""
+    file_idx, sheet_idx, path, sheet, names, columns, target, fmt, chunk_rows, key, cache_path = job
+    lines = []
+    if fmt == "xlsx":
+        writer = SpoolSheetWriter(target)
+    else:
+        # same per-sheet file names as maskStream gives this workbook
+        writer = open_writer(target, names, fmt)
+    cache = MaskCache(cache_path, key=key, max_entries=CACHE_ENTRIES)
+    count = 0
+    try:
+        for sheet_name, header, rows in iter_sheets(path, [sheet]):
+            count = mask_sheet(sheet_name, header, rows, columns, writer, cache, chunk_rows, log=lines.append)
+    finally:
+        cache.close()
+    return file_idx, sheet_idx, count, lines
+
+def write_workbook_job(job):
+    """Write the spooled sheets of one workbook, in order, to output."""
+    output, spools = job
+    writer = XlsxSheetWriter(output)
+    for spool in spools:
+        chunks = read_spool(spool)
+        name, header = next(chunks)
+        writer.start_sheet(name, header)
+        for rows in chunks:
+            writer.write_rows(rows)
+        writer.end_sheet()
+    writer.close()
+    return output
+
+def mask_batch(source, outdir, columns, fmt=None, workers=1, chunk_rows=CHUNK_ROWS, key=None, cache_path=None):
+    """Mask every .xlsx/.csv of source into outdir (cache_path: shared MaskCache file). Returns the output paths."""
+    columns = column_modes(columns)
+    if not columns.deterministic:
+        print("⚠️ Policy has gcm encryption or tokenization: output will differ between runs")
+    inputs = find_inputs(source)
+    if not inputs:
+        print(f"⚠️ No .xlsx/.csv files found in {source}")
+        return []
+    if cache_path:
+        # create the cache file (and check its key) once, before the workers open it
+        MaskCache(cache_path, key=key).close()
+    os.makedirs(outdir, exist_ok=True)
+    spool_dir = tempfile.mkdtemp(prefix=".maskbatch_", dir=outdir)
+
+    plan = []   # per file: (input, output, format, sheet names)
+    jobs = []
+    for file_idx, path in enumerate(inputs):
+        out_fmt = output_format(output_path(path, outdir, fmt), fmt)
+        output = output_path(path, outdir, out_fmt)
+        names = sheet_names(path)
+        if any(output == planned[1] for planned in plan):
+            raise ValueError(f"{path} and another input would both be written to {output}")
+        plan.append((path, output, out_fmt, names))
+        for sheet_idx, sheet in enumerate(names):
+            target = os.path.join(spool_dir, f"{file_idx}_{sheet_idx}.pkl") if out_fmt == "xlsx" else output
+            jobs.append((file_idx, sheet_idx, path, sheet, names, columns, target, out_fmt, chunk_rows, key,
+                         cache_path))
+
+    results = {}
+    logs = {}
+
+    def collect(result):
+        file_idx, sheet_idx, count, lines = result
+        results[(file_idx, sheet_idx)] = count
+        logs[(file_idx, sheet_idx)] = lines
+
+    def workbook_job(file_idx):
+        _, output, _, names = plan[file_idx]
+        return output, [os.path.join(spool_dir, f"{file_idx}_{i}.pkl") for i in range(len(names))]
+
+    try:
+        if workers <= 1:
+            for job in jobs:
+                collect(mask_sheet_job(job))
+            for file_idx, (_, _, out_fmt, _) in enumerate(plan):
+                if out_fmt == "xlsx":
+                    write_workbook_job(workbook_job(file_idx))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                pending = {pool.submit(mask_sheet_job, job): job[0] for job in jobs}
+                remaining = {i: len(names) for i, (_, _, _, names) in enumerate(plan)}
+                writes = []
+                for future in as_completed(pending):
+                    collect(future.result())
+                    file_idx = pending[future]
+                    remaining[file_idx] -= 1
+                    if remaining[file_idx] == 0 and plan[file_idx][2] == "xlsx":
+                        writes.append(pool.submit(write_workbook_job, workbook_job(file_idx)))
+                for future in writes:
+                    future.result()
+    finally:
+        shutil.rmtree(spool_dir, ignore_errors=True)
+
+    # report in input / sheet order whatever order the jobs finished in
+    total = 0
+    for file_idx, (path, output, _, names) in enumerate(plan):
+        print(f"\n📁 {path} -> {output}")
+        for sheet_idx in range(len(names)):
+            for line in logs[(file_idx, sheet_idx)]:
+                print(line)
+            total += results[(file_idx, sheet_idx)]
+    print(f"\n✅ Batch masking complete: {len(plan)} files, {len(jobs)} sheets, {total} rows. Output in: {outdir}")
+    return [output for _, output, _, _ in plan]
+
+def main():
+    p = argparse.ArgumentParser(description="Mask a folder or glob of .xlsx/.csv files in parallel.")
+    p.add_argument("source", help="Folder, or glob pattern in quotes")
+    p.add_argument("-o", "--outdir", required=True, help="Output folder")
+    p.add_argument("-c", "--column", action="append", default=[], help="Column to mask (letters and digits)")
+    p.add_argument("--digits", action="append", default=[], help="Column to mask digits only")
+    p.add_argument("--policy", help="Masking policy (.yaml/.json, see maskPolicy.py); -c/--digits are added to it")
+    p.add_argument("--format", choices=OUTPUT_FORMATS, help="Output format (default: same as each input)")
+    p.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Worker processes")
+    p.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS, help="Rows masked and written per chunk")
+    p.add_argument("--cache", help="Mask cache file shared by the workers and across runs")
+    args = p.parse_args()
+    columns = policy_from_args(args)
+    if not columns.rules:
+        p.error("give a --policy or at least one -c/--column or --digits")
+    mask_batch(args.source, args.outdir, columns, fmt=args.format, workers=args.workers, chunk_rows=args.chunk_rows,
+               cache_path=args.cache)
+
+if __name__ == "__main__":
+    main()
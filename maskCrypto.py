@@ -0,0 +1,151 @@
+"""
+maskCrypto.py
+
+Column-level, reversible encryption for the columns that must be recoverable
+(SecretNote, AccessKey, ...), replacing the per-cell encrypt_value / decrypt_value
+of MaskColumnsExcel.py.
+
+  gcm  AES-GCM with a random 96-bit nonce per value; the text is
+       base64(nonce + ciphertext + tag), the layout encrypt_value writes, so
+       decrypt_value still reads it. Equal values give different texts.
+  siv  AES-SIV (deterministic): equal values give equal texts, so encrypted
+       columns can still be joined and compared. The SIV key is derived from
+       the same key; the text is base64(tag + ciphertext).
+
+The AEAD object is built once per key, mode and thread, not once per cell.
+Nonces for a whole chunk come from one os.urandom call. Chunks of CHUNK_SIZE
+values are encrypted on a thread pool; the cryptography library releases the
+GIL while it encrypts. In siv mode, each distinct value is encrypted once and
+broadcast back, as in maskEngine.mask_series.
+
+The key (16, 24 or 32 bytes, hex or base64) comes from $MASK_ENCRYPTION_KEY
+unless one is passed.
+
+Usage:
+  from maskCrypto import encrypt_series, decrypt_series
+  df["SecretNote"] = encrypt_series(df["SecretNote"])
+  df["AccessKey"] = encrypt_series(df["AccessKey"], mode="siv")
+  df["AccessKey"] = decrypt_series(df["AccessKey"], mode="siv")
+"""
+
+import os
+import base64
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+from maskEngine import value_text
+
+MODES = ("gcm", "siv")
+NONCE_SIZE = 12
+# values per thread-pool task
+CHUNK_SIZE = 65536
+DEFAULT_KEY_ENV = "MASK_ENCRYPTION_KEY"
+
+def load_encryption_key(env=DEFAULT_KEY_ENV):
+    """AES key from an environment variable holding hex or base64 (16, 24 or 32 bytes)."""
+    raw = os.environ.get(env)
+    if not raw:
+        raise ValueError(f"encryption key not set: export {env}=<hex or base64 AES key>")
+    raw = raw.strip()
+    try:
+        key = bytes.fromhex(raw)
+    except ValueError:
+        key = base64.b64decode(raw)
+    if len(key) not in (16, 24, 32):
+        raise ValueError(f"{env} must hold a 128, 192 or 256-bit key ({len(key)} bytes given)")
+    return key
+
+def siv_key(key):
+    """AES-SIV takes a double-length key: 64 bytes derived from key."""
+    return hashlib.blake2b(b"aes-siv", key=key, digest_size=64, person=b"mask:siv").digest()
+
+_local = threading.local()
+
+def cipher(key, mode="gcm"):
+    """AEAD object for key and mode, built once per thread and reused."""
+    ciphers = getattr(_local, "ciphers", None)
+    if ciphers is None:
+        ciphers = _local.ciphers = {}
+    aead = ciphers.get((mode, key))
+    if aead is None:
+        from cryptography.hazmat.primitives.ciphers.aead import AESGCM, AESSIV
+        if mode == "gcm":
+            aead = AESGCM(key)
+        elif mode == "siv":
+            aead = AESSIV(siv_key(key))
+        else:
+            raise ValueError(f"unknown encryption mode {mode!r} (expected one of {', '.join(MODES)})")
+        ciphers[(mode, key)] = aead
+    return aead
+
+def _encrypt_chunk(texts, key, mode):
+    aead = cipher(key, mode)
+    b64 = base64.b64encode
+    if mode == "siv":
+        return [b64(aead.encrypt(t.encode("utf-8"), None)).decode("ascii") for t in texts]
+    nonces = os.urandom(NONCE_SIZE * len(texts))
+    out = []
+    for i, t in enumerate(texts):
+        nonce = nonces[i * NONCE_SIZE:(i + 1) * NONCE_SIZE]
+        out.append(b64(nonce + aead.encrypt(nonce, t.encode("utf-8"), None)).decode("ascii"))
+    return out
+
+def _decrypt_chunk(texts, key, mode):
+    aead = cipher(key, mode)
+    b64 = base64.b64decode
+    if mode == "siv":
+        return [aead.decrypt(b64(t), None).decode("utf-8") for t in texts]
+    out = []
+    for t in texts:
+        data = b64(t)
+        out.append(aead.decrypt(data[:NONCE_SIZE], data[NONCE_SIZE:], None).decode("utf-8"))
+    return out
+
+def _run(func, texts, key, mode, workers):
+    if mode not in MODES:
+        raise ValueError(f"unknown encryption mode {mode!r} (expected one of {', '.join(MODES)})")
+    if key is None:
+        key = load_encryption_key()
+    chunks = [texts[start:start + CHUNK_SIZE] for start in range(0, len(texts), CHUNK_SIZE)]
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = min(workers, len(chunks))
+    if workers <= 1:
+        results = [func(chunk, key, mode) for chunk in chunks]
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(func, chunks, [key] * len(chunks), [mode] * len(chunks)))
+    return [v for chunk in results for v in chunk]
+
+def encrypt_texts(texts, key=None, mode="gcm", workers=None):
+    """Encrypted (base64) copy of a list of strings."""
+    return _run(_encrypt_chunk, texts, key, mode, workers)
+
+def decrypt_texts(texts, key=None, mode="gcm", workers=None):
+    """Plain texts of a list of encrypt_texts results (raises on a wrong key or tampered text)."""
+    return _run(_decrypt_chunk, texts, key, mode, workers)
+
+def _apply(func, series, key, mode, workers):
+    if mode == "siv":
+        # deterministic: each distinct value once
+        codes, uniques = pd.factorize(series, use_na_sentinel=True)
+        done = func([value_text(v) for v in uniques], key, mode, workers)
+        out = series.to_numpy(dtype=object, copy=True)
+        present = codes >= 0
+        out[present] = np.array(done, dtype=object)[codes[present]]
+    else:
+        present = series.notna().to_numpy()
+        done = func([value_text(v) for v in series[present].tolist()], key, mode, workers)
+        out = series.to_numpy(dtype=object, copy=True)
+        out[present] = np.array(done, dtype=object)
+    return pd.Series(out, index=series.index, name=series.name, dtype=object)
+
+def encrypt_series(series, key=None, mode="gcm", workers=None):
+    """Encrypted copy of a column; empty cells stay empty."""
+    return _apply(encrypt_texts, series, key, mode, workers)
+
+def decrypt_series(series, key=None, mode="gcm", workers=None):
+    """Decrypted copy of a column written by encrypt_series (or encrypt_value for gcm)."""
+    return _apply(decrypt_texts, series, key, mode, workers)
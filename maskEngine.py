@@ -0,0 +1,245 @@
+"""
+maskEngine.py
+
+Deterministic, vectorized masking for whole columns.
+
+Every value gets a keystream from keyed BLAKE2b (key from $MASK_KEY, which
+must be set: there is no default key; the masking mode is the personalization). Characters are replaced class by class with
+NumPy over a (values x characters) code-point matrix:
+  digit -> digit, upper -> upper, lower -> lower, anything else kept.
+In "digits" mode only digits are replaced (MaskColumnsExcel behaviour).
+The only per-value Python work left is hashing: one copy of a pre-keyed BLAKE2b
+state per value and 32 characters.
+
+The same value always gives the same mask for the same key and mode, so joins
+across sheets and files still line up. There is no per-character reseeding of
+the global random module. The masks differ from the ones the old
+random.seed(seed_base + i) scheme produced.
+
+mask_series factorizes a column and masks each distinct value once. A MaskCache
+carries masks across columns, sheets and files. With a path it is also kept in
+SQLite, so one release of test data reuses one masking dictionary. The file
+holds keyed digests of the originals, never the originals themselves, and is
+only valid with the key it was written with.
+
+Usage:
+  from maskEngine import mask_series, MaskCache
+  df["UserID"] = mask_series(df["UserID"])
+  df["PhoneNumber"] = mask_series(df["PhoneNumber"], mode="digits")
+  with MaskCache("release_2025_10.maskcache") as cache:
+      df["TaxID"] = mask_series(df["TaxID"], cache=cache)
+"""
+
+import os
+import sqlite3
+import hashlib
+import numpy as np
+import pandas as pd
+
+MODES = ("alnum", "digits")
+
+# characters (values x width) per NumPy block; values are grouped by length, so one
+# long value does not widen the matrix of every short value next to it
+BLOCK_CELLS = 1 << 22
+
+def mask_key(key=None):
+    """
+    Masking key: key, else $MASK_KEY (utf-8); BLAKE2b keys longer than 64 bytes
+    are hashed down. There is no default: without a secret key, masks of
+    small-domain values (ids, SSNs, card tails) could be reversed by anyone
+    with this code by masking every candidate value.
+    """
+    if key is None:
+        key = os.environ.get("MASK_KEY")
+    if isinstance(key, str):
+        key = key.encode("utf-8")
+    if not key:
+        raise ValueError("masking key not set: export MASK_KEY=<secret> (or pass key=...)")
+    if len(key) > hashlib.blake2b.MAX_KEY_SIZE:
+        key = hashlib.blake2b(key).digest()
+    return key
+
+def value_text(val):
+    """The text a cell is masked as (None for empty cells); integral floats drop their '.0'."""
+    if val is None or (not isinstance(val, str) and pd.isnull(val)):
+        return None
+    if isinstance(val, float) and val.is_integer():
+        return str(int(val))
+    return str(val).strip()
+
+def _digests(data, key, person, block):
+    """64-byte BLAKE2b digests of each of data for one keystream block, concatenated."""
+    # the keyed state is set up once and copied per value (saves one compression per value)
+    copy = hashlib.blake2b(digest_size=64, key=key, person=person, salt=block.to_bytes(16, "little")).copy
+    out = []
+    append = out.append
+    for d in data:
+        h = copy()
+        h.update(d)
+        append(h.digest())
+    return b"".join(out)
+
+def keystream(texts, width, key=b"", mode="alnum"):
+    """
+    (len(texts), width) uint16 keystream matrix, one row per text: 2 bytes per
+    character from BLAKE2b(text, key, salt=index of the 64-byte block), zero
+    past the text's length. Digests are computed block by block over all texts
+    at once and land in the matrix as whole arrays.
+    """
+    person = f"mask:{mode}".encode("ascii")
+    n = len(texts)
+    lengths = np.fromiter(map(len, texts), dtype=np.int64, count=n)
+    data = [t.encode("utf-8") for t in texts]
+    n_blocks = max(1, -(-width // 32))
+    ks = np.zeros((n, 32 * n_blocks), dtype="<u2")
+    for block in range(n_blocks):
+        rows = np.flatnonzero(lengths > 32 * block)
+        if not len(rows):
+            break
+        part = data if len(rows) == n else [data[i] for i in rows]
+        ks[rows, 32 * block:32 * (block + 1)] = np.frombuffer(_digests(part, key, person, block),
+                                                             dtype="<u2").reshape(len(rows), 32)
+    ks = ks[:, :width]
+    ks[np.arange(width) >= lengths[:, None]] = 0
+    return ks
+
+def _mask_block(texts, mode, key, width=None):
+    width = width or max(1, max(len(t) for t in texts))
+    codes = np.array(texts, dtype=f"<U{width}").view(np.uint32).reshape(len(texts), width)
+    ks = keystream(texts, width, key, mode).astype(np.uint32)
+    out = codes.copy()
+    digit = (codes >= 48) & (codes <= 57)
+    out[digit] = 48 + ks[digit] % 10
+    if mode == "alnum":
+        upper = (codes >= 65) & (codes <= 90)
+        lower = (codes >= 97) & (codes <= 122)
+        out[upper] = 65 + ks[upper] % 26
+        out[lower] = 97 + ks[lower] % 26
+    return out.view(f"<U{width}").ravel().tolist()
+
+def mask_texts(texts, mode="alnum", key=None):
+    """Masked copy of a list of strings."""
+    if mode not in MODES:
+        raise ValueError(f"unknown masking mode {mode!r} (expected one of {', '.join(MODES)})")
+    key = mask_key(key)
+    n = len(texts)
+    lengths = np.fromiter(map(len, texts), dtype=np.int64, count=n)
+    order = np.argsort(lengths, kind="stable")
+    widths = np.maximum(1, lengths[order])
+    masked = np.empty(n, dtype=object)
+    start = 0
+    while start < n:
+        # shortest first: the block's width is the length of its last value
+        stop = min(n, start + BLOCK_CELLS)
+        cells = np.arange(1, stop - start + 1) * widths[start:stop]
+        end = start + max(1, int(np.count_nonzero(cells <= BLOCK_CELLS)))
+        idx = order[start:end]
+        masked[idx] = _mask_block([texts[i] for i in idx], mode, key, int(widths[end - 1]))
+        start = end
+    return masked.tolist()
+
+# -------------------------
+# Mask cache: (mode, value) -> mask, optionally persisted
+# -------------------------
+SQL_BATCH = 500
+
+class MaskCache:
+    """
+    Masks already computed, keyed by (mode, value text). With path, masks are
+    looked up in / added to a SQLite file keyed by a keyed digest of the value.
+    max_entries bounds the in-memory part (it is flushed and emptied when full).
+    """
+
+    def __init__(self, path=None, key=None, max_entries=None):
+        self.key = mask_key(key)
+        self.max_entries = max_entries
+        self.memory = {}
+        self.pending = []
+        self.conn = None
+        if path:
+            # maskBatch workers share one cache file: wait for another writer's flush
+            self.conn = sqlite3.connect(path, timeout=60)
+            self.conn.execute("CREATE TABLE IF NOT EXISTS mask_meta (name TEXT PRIMARY KEY, value TEXT)")
+            self.conn.execute("CREATE TABLE IF NOT EXISTS mask_cache (digest BLOB PRIMARY KEY, masked TEXT NOT NULL)"
+                              " WITHOUT ROWID")
+            fingerprint = hashlib.blake2b(b"mask-cache", key=self.key, digest_size=16).hexdigest()
+            row = self.conn.execute("SELECT value FROM mask_meta WHERE name = 'key'").fetchone()
+            if row is None:
+                self.conn.execute("INSERT INTO mask_meta (name, value) VALUES ('key', ?)", (fingerprint,))
+                self.conn.commit()
+            elif row[0] != fingerprint:
+                self.conn.close()
+                raise ValueError(f"mask cache {path} was written with a different masking key")
+
+    def _digest(self, mode, text):
+        return hashlib.blake2b(text.encode("utf-8"), digest_size=16, key=self.key,
+                               person=f"cache:{mode}".encode("ascii")).digest()
+
+    def mask(self, texts, mode="alnum"):
+        """Masks of distinct texts, computing only the ones not cached yet."""
+        if self.max_entries and len(self.memory) >= self.max_entries:
+            self.flush()
+            self.memory = {}
+        memory = self.memory
+        missing = [t for t in texts if (mode, t) not in memory]
+        if missing and self.conn is not None:
+            digests = {self._digest(mode, t): t for t in missing}
+            found = {}
+            keys = list(digests)
+            for start in range(0, len(keys), SQL_BATCH):
+                batch = keys[start:start + SQL_BATCH]
+                sql = f"SELECT digest, masked FROM mask_cache WHERE digest IN ({','.join('?' * len(batch))})"
+                found.update(self.conn.execute(sql, batch).fetchall())
+            for digest, masked in found.items():
+                memory[(mode, digests[digest])] = masked
+            missing = [t for t in missing if (mode, t) not in memory]
+            new = mask_texts(missing, mode, self.key)
+            self.pending.extend((self._digest(mode, t), m) for t, m in zip(missing, new))
+        else:
+            new = mask_texts(missing, mode, self.key)
+        for t, m in zip(missing, new):
+            memory[(mode, t)] = m
+        return [memory[(mode, t)] for t in texts]
+
+    def flush(self):
+        if self.conn is not None and self.pending:
+            self.conn.executemany("INSERT OR IGNORE INTO mask_cache (digest, masked) VALUES (?, ?)", self.pending)
+            self.conn.commit()
+        self.pending = []
+
+    def close(self):
+        self.flush()
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def mask_value(val, mode="alnum", key=None):
+    text = value_text(val)
+    if text is None:
+        return val
+    return mask_texts([text], mode, key)[0]
+
+def mask_series(series, mode="alnum", key=None, cache=None):
+    """
+    Masked copy of a column; empty cells stay empty, everything else becomes text.
+    Each distinct value is masked once (pd.factorize) and broadcast back; with a
+    MaskCache, values masked before (in any column or file) are not masked again.
+    """
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    texts = [value_text(v) for v in uniques]
+    if cache is not None:
+        if key is not None and mask_key(key) != cache.key:
+            raise ValueError("cache was opened with a different masking key")
+        masked = cache.mask(texts, mode)
+    else:
+        masked = mask_texts(texts, mode, key)
+    out = series.to_numpy(dtype=object, copy=True)
+    present = codes >= 0
+    out[present] = np.array(masked, dtype=object)[codes[present]]
+    return pd.Series(out, index=series.index, name=series.name, dtype=object)
@@ -0,0 +1,304 @@
+"""
+maskPolicy.py
+
+One declarative masking policy instead of the custom_column_rules dicts of
+MaskColumnsExcel.py, MaskColumnsExcelNumAlpha.py, MaskExcelColsWithCustomRules.py,
+datamasking.py and maskIdsExcelColumn.
+
+A policy (YAML or JSON) is an ordered list of rules. Each rule names the
+columns it applies to and the mask to use; the first rule matching a column
+wins. Column patterns are exact names, shell globs ("*Phone*"), or regular
+expressions prefixed with "re:". Names are matched after stripping blanks.
+
+  rules:
+    - columns: [PhoneNumber, "*Mobile*"]
+      mask: keep_last_4
+    - columns: [SSN]
+      mask: ssn
+    - columns: [Email]
+      mask: email
+    - columns: [UserID, CustomerRef]
+      mask: format_preserving        # letters -> letters, digits -> digits
+    - columns: [AccountNo]
+      mask: digits                   # digits only
+    - columns: [TaxID]
+      mask: regex
+      pattern: '\\d{2}-\\d{7}'
+      replace: 'XX-XXXXXXX'
+    - columns: [Notes]
+      mask: star_words               # *word* -> *xxxx*
+    - columns: ["re:.*Comment.*"]
+      mask: embedded_numbers         # each digit run inside the text, the same run the same way
+    - columns: [Remarks]
+      mask: free_text                # emails, cards, SSNs, *words*, digit runs in one pass (maskText.py)
+      patterns: [email, card, digits]
+    - columns: [SecretNote]
+      mask: encrypt                  # AES-GCM, key (hex/base64) from $MASK_ENCRYPTION_KEY
+      key_env: MASK_ENCRYPTION_KEY
+    - columns: [AccessKey]
+      mask: encrypt
+      mode: siv                      # deterministic (joinable) encryption, see maskCrypto.py
+    - columns: [IBAN, CardNumber]
+      mask: tokenize                 # reversible, same format (maskVault.py)
+      vault: release.vault
+      domain: account
+
+A policy is compiled once (patterns, regexes, keys). Each mask then works on a
+whole column (pandas Series) at a time, through maskEngine for the deterministic
+masks and maskCrypto for encrypt. Unlike the old random-based email and
+star-word masks, every mask except gcm encrypt is deterministic. A "decrypt"
+rule (same key and mode) turns encrypted columns back into plain text, and
+"detokenize" (same vault and domain) reverses "tokenize".
+maskStream.py / maskBatch.py accept --policy, so one run applies every rule
+to a file.
+
+Usage:
+  python maskPolicy.py extract.xlsx -o masked.xlsx --policy masking.yaml
+  python maskPolicy.py --check masking.yaml --columns UserID "Mobile Phone" Notes
+"""
+
+import re
+import json
+import fnmatch
+import argparse
+import pandas as pd
+from maskEngine import mask_series, value_text
+from maskCrypto import DEFAULT_KEY_ENV, MODES as ENCRYPTION_MODES, decrypt_series, encrypt_series, load_encryption_key
+from maskVault import open_vault
+from maskText import TEXT_KINDS, mask_text_series, text_pattern
+
+MASKS = ("keep_last_4", "ssn", "email", "format_preserving", "digits", "regex", "star_words", "free_text",
+         "embedded_numbers", "encrypt", "decrypt", "tokenize", "detokenize")
+
+SSN_RE = re.compile(r"\d{3}-\d{2}-(\d{4})")
+
+def _texts(series):
+    """Non-empty cells of a column as stripped text, and where they are."""
+    present = series.notna().to_numpy()
+    texts = pd.Series([value_text(v) for v in series[present].tolist()], dtype=object)
+    return present, texts
+
+def _put(series, present, texts):
+    out = series.to_numpy(dtype=object, copy=True)
+    out[present] = texts.to_numpy(dtype=object)
+    return pd.Series(out, index=series.index, name=series.name, dtype=object)
+
+# -------------------------
+# Column masks: (series, rule, cache) -> series; empty cells stay empty
+# -------------------------
+def mask_keep_last(series, rule, cache=None):
+    keep = int(rule.options.get("keep", 4))
+    char = rule.options.get("char", "X")
+    present, texts = _texts(series)
+    masked = [char * (len(t) - keep) + t[len(t) - keep:] if len(t) > keep else t for t in texts]
+    return _put(series, present, pd.Series(masked, dtype=object))
+
+def mask_ssn(series, rule, cache=None):
+    present, texts = _texts(series)
+    return _put(series, present, texts.str.replace(SSN_RE, r"XXX-XX-\1", regex=True))
+
+def mask_email(series, rule, cache=None):
+    present, texts = _texts(series)
+    parts = texts.str.split("@")
+    valid = (parts.str.len() == 2).to_numpy()
+    users = parts[valid].str[0]
+    domains = parts[valid].str[1]
+    masked = texts.copy()
+    masked[valid] = mask_series(users, mode="alnum", cache=cache).to_numpy(dtype=object) + "@" + \
+        domains.to_numpy(dtype=object)
+    return _put(series, present, masked)
+
+def mask_format_preserving(series, rule, cache=None):
+    return mask_series(series, mode="alnum", cache=cache)
+
+def mask_digits(series, rule, cache=None):
+    return mask_series(series, mode="digits", cache=cache)
+
+def mask_regex(series, rule, cache=None):
+    present, texts = _texts(series)
+    return _put(series, present, texts.str.replace(rule.pattern, rule.options.get("replace", ""), regex=True))
+
+def mask_star_words(series, rule, cache=None):
+    return mask_text_series(series, ("star",), cache)
+
+def mask_embedded_numbers(series, rule, cache=None):
+    return mask_text_series(series, ("digits",), cache)
+
+def mask_free_text(series, rule, cache=None):
+    return mask_text_series(series, tuple(rule.options.get("patterns", TEXT_KINDS)), cache)
+
+def mask_encrypt(series, rule, cache=None):
+    return encrypt_series(series, rule.key, rule.options.get("mode", "gcm"), rule.options.get("workers"))
+
+def mask_decrypt(series, rule, cache=None):
+    return decrypt_series(series, rule.key, rule.options.get("mode", "gcm"), rule.options.get("workers"))
+
+def _vault(rule, cache):
+    return open_vault(rule.options["vault"], cache.key if cache is not None else None)
+
+def mask_tokenize(series, rule, cache=None):
+    return _vault(rule, cache).tokenize_series(series, rule.options.get("domain", "default"))
+
+def mask_detokenize(series, rule, cache=None):
+    return _vault(rule, cache).detokenize_series(series, rule.options.get("domain", "default"))
+
+MASK_FUNCTIONS = {
+    "keep_last_4": mask_keep_last,
+    "ssn": mask_ssn,
+    "email": mask_email,
+    "format_preserving": mask_format_preserving,
+    "digits": mask_digits,
+    "regex": mask_regex,
+    "star_words": mask_star_words,
+    "free_text": mask_free_text,
+    "embedded_numbers": mask_embedded_numbers,
+    "encrypt": mask_encrypt,
+    "decrypt": mask_decrypt,
+    "tokenize": mask_tokenize,
+    "detokenize": mask_detokenize,
+}
+
+# maskEngine modes as policy masks (maskStream's -c / --digits)
+MODE_MASKS = {"alnum": "format_preserving", "digits": "digits"}
+
+# -------------------------
+# Policy
+# -------------------------
+class MaskRule:
+    def __init__(self, columns, mask, options=None):
+        if mask not in MASK_FUNCTIONS:
+            raise ValueError(f"unknown mask {mask!r} (expected one of {', '.join(MASKS)})")
+        if isinstance(columns, str):
+            columns = [columns]
+        self.columns = list(columns)
+        self.mask = mask
+        self.options = dict(options or {})
+        self.exact = {c for c in self.columns if not c.startswith("re:") and not any(ch in c for ch in "*?[")}
+        # globs and "re:" patterns as compiled regexes (compiled patterns pickle, for maskBatch workers)
+        self.patterns = [re.compile(c[3:]) if c.startswith("re:") else re.compile(fnmatch.translate(c))
+                         for c in self.columns if c not in self.exact]
+        if mask == "regex" and "pattern" not in self.options:
+            raise ValueError("regex mask needs a pattern")
+        self.pattern = re.compile(self.options["pattern"]) if mask == "regex" else None
+        if mask == "free_text":
+            text_pattern(tuple(self.options.get("patterns", TEXT_KINDS)))   # validates the pattern names
+        if mask in ("tokenize", "detokenize") and "vault" not in self.options:
+            raise ValueError(f"{mask} mask needs a vault file")
+        self.key = None
+        if mask in ("encrypt", "decrypt"):
+            if self.options.get("mode", "gcm") not in ENCRYPTION_MODES:
+                raise ValueError(f"unknown encryption mode {self.options['mode']!r} "
+                                 f"(expected one of {', '.join(ENCRYPTION_MODES)})")
+            self.key = load_encryption_key(self.options.get("key_env", DEFAULT_KEY_ENV))
+
+    def matches(self, column):
+        return column in self.exact or any(p.fullmatch(column) for p in self.patterns)
+
+    def apply(self, series, cache=None):
+        return MASK_FUNCTIONS[self.mask](series, self, cache)
+
+    @property
+    def deterministic(self):
+        """
+        Whether the output only depends on the value and the keys: not for gcm
+        encryption (random nonces), nor for tokenize, whose tokens depend on
+        what the vault already holds and on the order values reach it.
+        """
+        if self.mask == "encrypt":
+            return self.options.get("mode", "gcm") != "gcm"
+        return self.mask != "tokenize"
+
+class MaskPolicy:
+    def __init__(self, rules):
+        self.rules = list(rules)
+
+    @classmethod
+    def from_dict(cls, data):
+        rules = []
+        for i, spec in enumerate(data.get("rules", [])):
+            spec = dict(spec)
+            try:
+                columns = spec.pop("columns")
+                mask = spec.pop("mask")
+            except KeyError as e:
+                raise ValueError(f"policy rule {i + 1} has no {e.args[0]!r}")
+            options = spec.pop("options", {})
+            options.update(spec)
+            rules.append(MaskRule(columns, mask, options))
+        return cls(rules)
+
+    @classmethod
+    def from_modes(cls, columns):
+        """Policy for {column: maskEngine mode} (exact column names)."""
+        return cls([MaskRule([col], MODE_MASKS.get(mode, mode)) for col, mode in columns.items()])
+
+    @property
+    def deterministic(self):
+        return all(rule.deterministic for rule in self.rules)
+
+    def rule_for(self, column):
+        for rule in self.rules:
+            if rule.matches(column):
+                return rule
+        return None
+
+    def resolve(self, header):
+        """{column index: (column name, rule)} for the columns of header any rule applies to."""
+        targets = {}
+        for idx, name in enumerate(header or []):
+            if isinstance(name, str):
+                rule = self.rule_for(name.strip())
+                if rule is not None:
+                    targets[idx] = (name.strip(), rule)
+        return targets
+
+    def expected_columns(self):
+        """Exact column names the policy names (reported when a sheet lacks them)."""
+        seen = []
+        for rule in self.rules:
+            seen.extend(c for c in rule.columns if c in rule.exact and c not in seen)
+        return seen
+
+    def apply(self, df, cache=None, log=print):
+        """Mask a DataFrame in place (column names are stripped first)."""
+        df.columns = [c.strip() if isinstance(c, str) else c for c in df.columns]
+        for idx, (name, rule) in self.resolve(list(df.columns)).items():
+            log(f"🔐 Masking column: {name} ({rule.mask})")
+            df[name] = rule.apply(df[name], cache)
+        return df
+
+def load_policy(path):
+    with open(path, "r", encoding="utf-8") as fh:
+        text = fh.read()
+    if path.lower().endswith((".yaml", ".yml")):
+        try:
+            import yaml
+        except Exception:
+            raise RuntimeError("PyYAML not installed. Install with: pip install pyyaml (or use a .json policy)")
+        data = yaml.safe_load(text)
+    else:
+        data = json.loads(text)
+    return MaskPolicy.from_dict(data or {})
+
+def main():
+    p = argparse.ArgumentParser(description="Mask a .xlsx/.csv file with a declarative masking policy.")
+    p.add_argument("input", nargs="?", help=".xlsx or .csv file")
+    p.add_argument("-o", "--output", help="Output .xlsx, .csv or .parquet")
+    p.add_argument("--policy", help="Policy file (.yaml/.yml or .json)")
+    p.add_argument("--check", metavar="POLICY", help="Only show which rule each of --columns gets")
+    p.add_argument("--columns", nargs="*", default=[], help="Column names for --check")
+    args = p.parse_args()
+
+    if args.check:
+        policy = load_policy(args.check)
+        for col in args.columns:
+            rule = policy.rule_for(col.strip())
+            print(f"{col}: {rule.mask if rule else '(not masked)'}")
+        return
+    if not (args.input and args.output and args.policy):
+        p.error("give an input file, -o/--output and --policy (or --check POLICY)")
+    from maskStream import mask_file_streaming
+    mask_file_streaming(args.input, load_policy(args.policy), args.output)
+
+if __name__ == "__main__":
+    main()
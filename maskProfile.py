@@ -0,0 +1,240 @@
+"""
+maskProfile.py
+
+Find the PII columns of an extract before masking it, and propose a masking
+policy (maskPolicy.py) for them.
+
+Hard-coded columns_to_mask lists miss every column that is named differently
+on some sheet ("Mobile Phone" vs "PhoneNumber"). Instead, each column is
+profiled from a sample of its values. Sheets are read in read-only mode, only
+until every column has --rows non-empty values (or --scan-rows rows were
+read), so even huge workbooks are profiled in seconds.
+
+Each sampled value is classified by the first detector it matches:
+  email  user@domain.tld
+  iban   country code, check digits, BBAN of the country's length, mod-97 check
+  bic    8 or 11 characters, known country code; a column only counts as bic
+         when its header says BIC/SWIFT, some location codes have digits, or it
+         has many distinct values (so a Status column of ACCEPTED is not one)
+  pan    13-19 digit card number (spaces/dashes allowed) with a valid Luhn digit
+  ssn    123-45-6789 (no 000/666/9xx area, 00 group or 0000 serial)
+  phone  7-15 digits with a leading + or separators
+A column is PII when at least --threshold of its sampled values are of one
+kind. Columns whose header looks like PII (NAME_HINTS) but whose values do not
+match are listed too.
+
+The proposed policy uses exact column names and is meant to be reviewed before
+use with --policy.
+
+Usage:
+  python maskProfile.py extract.xlsx
+  python maskProfile.py extracts/*.xlsx --rows 2000 -o masking.yaml
+"""
+
+import re
+import json
+import argparse
+from maskEngine import value_text
+from maskStream import iter_sheets
+
+SAMPLE_ROWS = 1000
+# rows read per sheet at most while collecting samples
+SCAN_ROWS = 20000
+THRESHOLD = 0.8
+# distinct values (count and share of the sample) a bic column needs without other evidence
+BIC_MIN_DISTINCT = 10
+BIC_MIN_DISTINCT_SHARE = 0.5
+
+# IBAN length per country (ISO 13616 registry)
+IBAN_LENGTHS = {
+    "AD": 24, "AE": 23, "AL": 28, "AT": 20, "AZ": 28, "BA": 20, "BE": 16, "BG": 22, "BH": 22, "BR": 29,
+    "BY": 28, "CH": 21, "CR": 22, "CY": 28, "CZ": 24, "DE": 22, "DK": 18, "DO": 28, "EE": 20, "EG": 29,
+    "ES": 24, "FI": 18, "FO": 18, "FR": 27, "GB": 22, "GE": 22, "GI": 23, "GL": 18, "GR": 27, "GT": 28,
+    "HR": 21, "HU": 28, "IE": 22, "IL": 23, "IQ": 23, "IS": 26, "IT": 27, "JO": 30, "KW": 30, "KZ": 20,
+    "LB": 28, "LC": 32, "LI": 21, "LT": 20, "LU": 20, "LV": 21, "MC": 27, "MD": 24, "ME": 22, "MK": 19,
+    "MR": 27, "MT": 31, "MU": 30, "NL": 18, "NO": 15, "PK": 24, "PL": 28, "PS": 29, "PT": 25, "QA": 29,
+    "RO": 24, "RS": 22, "SA": 24, "SC": 31, "SE": 24, "SI": 19, "SK": 24, "SM": 27, "ST": 25, "SV": 28,
+    "TL": 23, "TN": 24, "TR": 26, "UA": 29, "VA": 22, "VG": 24, "XK": 20,
+}
+# BIC countries: the IBAN countries plus large non-IBAN banking markets
+BIC_COUNTRIES = set(IBAN_LENGTHS) | {"US", "CA", "AU", "NZ", "JP", "CN", "HK", "SG", "IN", "ZA", "MX", "KR",
+                                     "TW", "MY", "TH", "ID", "PH", "AR", "CL", "CO", "PE", "NG", "KE", "RU"}
+
+EMAIL_RE = re.compile(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9-]+(?:\.[A-Za-z0-9-]+)*\.[A-Za-z]{2,}")
+IBAN_RE = re.compile(r"[A-Z]{2}\d{2}[A-Z0-9]{11,30}")
+BIC_RE = re.compile(r"[A-Z]{4}([A-Z]{2})[A-Z0-9]{2}(?:[A-Z0-9]{3})?")
+PAN_RE = re.compile(r"\d(?:[ -]?\d){12,18}")
+SSN_RE = re.compile(r"(?!000|666|9\d\d)\d{3}-(?!00)\d{2}-(?!0000)\d{4}")
+PHONE_RE = re.compile(r"\+?\(?\d[\d ().-]{5,20}\d")
+NUMBER_RE = re.compile(r"[+-]?\d+(?:\.\d+)?")
+DATE_RE = re.compile(r"\d{4}[./-]\d{1,2}[./-]\d{1,2}|\d{1,2}[./-]\d{1,2}[./-]\d{2,4}")
+SEPARATORS_RE = re.compile(r"[ -]")
+
+BIC_HINTS = re.compile(r"bic|swift", re.IGNORECASE)
+
+# header names that suggest PII even when the sampled values do not match
+NAME_HINTS = re.compile(r"phone|mobile|fax|e-?mail|ssn|social|tax|iban|account|card|bic|swift|birth|dob|"
+                        r"passport|license|name|address|street|zip|postal", re.IGNORECASE)
+
+# proposed maskPolicy mask per kind
+KIND_MASKS = {
+    "email": "email",
+    "iban": "format_preserving",
+    "bic": "format_preserving",
+    "pan": "keep_last_4",
+    "ssn": "ssn",
+    "phone": "keep_last_4",
+    "name": "format_preserving",
+}
+
+def luhn_ok(digits):
+    total = 0
+    for i, ch in enumerate(reversed(digits)):
+        d = ord(ch) - 48
+        if i % 2:
+            d *= 2
+            if d > 9:
+                d -= 9
+        total += d
+    return total % 10 == 0
+
+def iban_ok(text):
+    text = text.replace(" ", "").upper()
+    if not IBAN_RE.fullmatch(text) or IBAN_LENGTHS.get(text[:2]) != len(text):
+        return False
+    rearranged = text[4:] + text[:4]
+    return int("".join(str(int(ch, 36)) for ch in rearranged)) % 97 == 1
+
+def classify(text):
+    """PII kind of one value, or None."""
+    if "@" in text:
+        return "email" if EMAIL_RE.fullmatch(text) else None
+    if iban_ok(text):
+        return "iban"
+    m = BIC_RE.fullmatch(text)
+    if m and m.group(1) in BIC_COUNTRIES:
+        return "bic"
+    if PAN_RE.fullmatch(text):
+        digits = SEPARATORS_RE.sub("", text)
+        if luhn_ok(digits):
+            return "pan"
+    if SSN_RE.fullmatch(text):
+        return "ssn"
+    # plain numbers are amounts or ids unless written as +<digits>
+    plain_number = NUMBER_RE.fullmatch(text) and not (text[0] == "+" and text[1:].isdigit())
+    if PHONE_RE.fullmatch(text) and not plain_number and not DATE_RE.fullmatch(text) \
+            and 7 <= sum(ch.isdigit() for ch in text) <= 15:
+        return "phone"
+    return None
+
+# -------------------------
+# Sampling and profiling
+# -------------------------
+def sample_sheet(header, rows, sample_rows=SAMPLE_ROWS, scan_rows=SCAN_ROWS):
+    """{column index: sampled non-empty texts}, reading rows only until every column has sample_rows."""
+    samples = {i: [] for i, h in enumerate(header or []) if h is not None}
+    open_cols = set(samples)
+    for n, row in enumerate(rows):
+        if n >= scan_rows or not open_cols:
+            break
+        for i in list(open_cols):
+            text = value_text(row[i]) if i < len(row) else None
+            if text:
+                samples[i].append(text)
+                if len(samples[i]) >= sample_rows:
+                    open_cols.discard(i)
+    return samples
+
+def bic_column(name, bics):
+    """
+    Whether the values classified as bic are BICs: 8-letter words such as
+    ACCEPTED (country "PT") look like BICs too, so the header must say so, a
+    location code (characters 7-8) must have a digit, or the values must be
+    mostly distinct, which status and code columns are not.
+    """
+    if isinstance(name, str) and BIC_HINTS.search(name):
+        return True
+    if any(not b[6:8].isalpha() for b in bics):
+        return True
+    distinct = len(set(bics))
+    return distinct >= BIC_MIN_DISTINCT and distinct >= BIC_MIN_DISTINCT_SHARE * len(bics)
+
+def profile_column(name, texts, threshold=THRESHOLD):
+    """Profile entry of one column: its kind (None if no PII found), share and sample size."""
+    counts = {}
+    bics = []
+    for text in texts:
+        kind = classify(text)
+        if kind:
+            counts[kind] = counts.get(kind, 0) + 1
+            if kind == "bic":
+                bics.append(text)
+    if bics and not bic_column(name, bics):
+        del counts["bic"]
+    kind, hits = max(counts.items(), key=lambda kv: kv[1]) if counts else (None, 0)
+    share = hits / len(texts) if texts else 0.0
+    if share < threshold:
+        kind = "name" if isinstance(name, str) and NAME_HINTS.search(name) else None
+    return {"column": name, "kind": kind, "share": round(share, 3), "sampled": len(texts)}
+
+def profile_file(path, sample_rows=SAMPLE_ROWS, scan_rows=SCAN_ROWS, threshold=THRESHOLD):
+    """Profile entries (with file and sheet) of every column of every sheet of path."""
+    profile = []
+    for sheet_name, header, rows in iter_sheets(path):
+        samples = sample_sheet(header, rows, sample_rows, scan_rows)
+        for idx, texts in samples.items():
+            name = header[idx].strip() if isinstance(header[idx], str) else header[idx]
+            entry = profile_column(name, texts, threshold)
+            entry.update(file=path, sheet=sheet_name)
+            profile.append(entry)
+    return profile
+
+def propose_policy(profile):
+    """maskPolicy policy dict with one rule per proposed mask (exact column names)."""
+    by_mask = {}
+    for entry in profile:
+        if entry["kind"] and isinstance(entry["column"], str):
+            columns = by_mask.setdefault(KIND_MASKS[entry["kind"]], [])
+            if entry["column"] not in columns:
+                columns.append(entry["column"])
+    return {"version": 1, "rules": [{"columns": cols, "mask": mask} for mask, cols in by_mask.items()]}
+
+def write_policy(policy, path):
+    with open(path, "w", encoding="utf-8") as fh:
+        if path.lower().endswith((".yaml", ".yml")):
+            try:
+                import yaml
+            except Exception:
+                raise RuntimeError("PyYAML not installed. Install with: pip install pyyaml (or write a .json policy)")
+            yaml.safe_dump(policy, fh, sort_keys=False, allow_unicode=True)
+        else:
+            json.dump(policy, fh, indent=2, ensure_ascii=False)
+
+def main():
+    p = argparse.ArgumentParser(description="Detect PII columns by sampling and propose a masking policy.")
+    p.add_argument("inputs", nargs="+", help=".xlsx or .csv files")
+    p.add_argument("--rows", type=int, default=SAMPLE_ROWS, help="Non-empty values sampled per column")
+    p.add_argument("--scan-rows", type=int, default=SCAN_ROWS, help="Rows read per sheet at most")
+    p.add_argument("--threshold", type=float, default=THRESHOLD, help="Share of sampled values of one kind")
+    p.add_argument("-o", "--output", help="Write the proposed policy (.yaml/.yml or .json)")
+    args = p.parse_args()
+
+    profile = []
+    for path in args.inputs:
+        profile.extend(profile_file(path, args.rows, args.scan_rows, args.threshold))
+    for entry in profile:
+        if entry["kind"] == "name":
+            print(f"{entry['file']} [{entry['sheet']}] {entry['column']}: header looks like PII "
+                  f"({entry['sampled']} sampled, no pattern matched)")
+        elif entry["kind"]:
+            print(f"{entry['file']} [{entry['sheet']}] {entry['column']}: {entry['kind']} "
+                  f"({entry['share']:.0%} of {entry['sampled']} sampled)")
+    policy = propose_policy(profile)
+    if args.output:
+        write_policy(policy, args.output)
+        print(f"\n✅ Proposed policy ({len(policy['rules'])} rules) saved to: {args.output}")
+    else:
+        print("\n" + json.dumps(policy, indent=2, ensure_ascii=False))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,300 @@
+"""
+maskStream.py
+
+Streaming, chunked version of mask_columns_across_sheets for extracts too big
+for pd.read_excel(sheet_name=None).
+
+Sheets are read row by row with openpyxl read-only mode (or csv.reader for a
+.csv input). Every CHUNK_ROWS rows, the masked columns of the chunk are masked
+with maskEngine (distinct values once per chunk, or once per run with a mask
+cache), or with the rules of a maskPolicy policy (--policy). The rows are then written out straight away: openpyxl write-only
+workbook, CSV, or Parquet row groups. Only one chunk is held at a time, so
+memory does not grow with the size of the workbook.
+
+Output:
+  .xlsx     same sheets, same order
+  .csv      one file per sheet (<stem>_<sheet>.csv when there are several)
+  .parquet  as .csv; every column is written as text
+
+Usage:
+  python maskStream.py extract.xlsx -o masked.xlsx -c UserID -c TaxID --digits PhoneNumber
+  python maskStream.py extract.xlsx -o masked.parquet -c UserID --cache release.maskcache
+  python maskStream.py extract.xlsx -o masked.xlsx --policy masking.yaml
+"""
+
+import os
+import re
+import csv
+import zipfile
+import argparse
+import datetime
+import pandas as pd
+from maskEngine import MaskCache
+from maskPolicy import MaskPolicy, load_policy
+
+CHUNK_ROWS = 50000
+OUTPUT_FORMATS = ("xlsx", "csv", "parquet")
+# in-memory mask cache entries kept while streaming (older ones stay in the cache file)
+CACHE_ENTRIES = 1000000
+
+# -------------------------
+# Readers: yield (sheet name, header, row iterator)
+# -------------------------
+def iter_xlsx_sheets(path, names=None):
+    from openpyxl import load_workbook
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        for ws in (wb.worksheets if names is None else [wb[n] for n in names]):
+            rows = ws.iter_rows(values_only=True)
+            header = next(rows, None)
+            yield ws.title, (list(header) if header is not None else None), rows
+    finally:
+        wb.close()
+
+def iter_csv_sheets(path):
+    with open(path, "r", newline="", encoding="utf-8") as fh:
+        rows = csv.reader(fh)
+        header = next(rows, None)
+        yield os.path.splitext(os.path.basename(path))[0], header, rows
+
+def iter_sheets(path, names=None):
+    """(sheet name, header, rows) for every sheet of path, or only the sheets in names."""
+    if path.lower().endswith(".csv"):
+        return iter_csv_sheets(path)
+    return iter_xlsx_sheets(path, names)
+
+def sheet_names(path):
+    if path.lower().endswith(".csv"):
+        return [os.path.splitext(os.path.basename(path))[0]]
+    from openpyxl import load_workbook
+    wb = load_workbook(path, read_only=True)
+    names = wb.sheetnames
+    wb.close()
+    return names
+
+# -------------------------
+# Writers: one sheet at a time
+# -------------------------
+class XlsxSheetWriter:
+    def __init__(self, path):
+        from openpyxl import Workbook
+        self.path = path
+        self.wb = Workbook(write_only=True)
+        self.ws = None
+
+    def start_sheet(self, name, header):
+        self.ws = self.wb.create_sheet(name)
+        if header is not None:
+            self.ws.append(header)
+
+    def write_rows(self, rows):
+        for row in rows:
+            self.ws.append(row)
+
+    def end_sheet(self):
+        self.ws = None
+
+    def close(self):
+        if not self.wb.worksheets:
+            self.wb.create_sheet("Sheet1")
+        self.wb.save(self.path)
+        normalize_xlsx(self.path)
+
+# fixed timestamp for workbook properties and zip entries ($SOURCE_DATE_EPOCH if set)
+def _fixed_time():
+    epoch = os.environ.get("SOURCE_DATE_EPOCH")
+    when = datetime.datetime.fromtimestamp(int(epoch), datetime.timezone.utc) if epoch else \
+        datetime.datetime(1980, 1, 1, tzinfo=datetime.timezone.utc)
+    return when
+
+def normalize_xlsx(path):
+    """
+    Rewrite a saved workbook with fixed save timestamps (docProps/core.xml and
+    zip entry times), so the same rows always give the same bytes.
+    """
+    when = _fixed_time()
+    stamp = when.strftime("%Y-%m-%dT%H:%M:%SZ").encode("ascii")
+    with zipfile.ZipFile(path) as zin:
+        entries = [(info, zin.read(info.filename)) for info in zin.infolist()]
+    tmp = path + ".tmp"
+    with zipfile.ZipFile(tmp, "w", zipfile.ZIP_DEFLATED, allowZip64=True) as zout:
+        for info, data in entries:
+            if info.filename == "docProps/core.xml":
+                data = re.sub(rb"(<dcterms:(?:created|modified)[^>]*>)[^<]*(<)", rb"\g<1>" + stamp + rb"\g<2>", data)
+            fixed = zipfile.ZipInfo(info.filename, date_time=when.timetuple()[:6])
+            fixed.compress_type = zipfile.ZIP_DEFLATED
+            fixed.external_attr = info.external_attr
+            zout.writestr(fixed, data)
+    os.replace(tmp, path)
+
+class _PerSheetWriter:
+    """Base for formats with one output file per sheet."""
+
+    def __init__(self, path, names):
+        self.path = path
+        self.several = len(names) > 1
+
+    def sheet_path(self, name):
+        if not self.several:
+            return self.path
+        stem, ext = os.path.splitext(self.path)
+        safe = "".join(ch if ch.isalnum() or ch in "-_." else "_" for ch in name)
+        return f"{stem}_{safe}{ext}"
+
+    def close(self):
+        pass
+
+class CsvSheetWriter(_PerSheetWriter):
+    def start_sheet(self, name, header):
+        self.fh = open(self.sheet_path(name), "w", newline="", encoding="utf-8")
+        self.writer = csv.writer(self.fh)
+        if header is not None:
+            self.writer.writerow(header)
+
+    def write_rows(self, rows):
+        self.writer.writerows(rows)
+
+    def end_sheet(self):
+        self.fh.close()
+
+class ParquetSheetWriter(_PerSheetWriter):
+    def start_sheet(self, name, header):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        self.pa = pa
+        self.columns = [str(h) if h is not None else f"column_{i + 1}" for i, h in enumerate(header or [])]
+        self.schema = pa.schema([(c, pa.string()) for c in self.columns])
+        self.writer = pq.ParquetWriter(self.sheet_path(name), self.schema)
+
+    def write_rows(self, rows):
+        n = len(self.columns)
+        cols = [[] for _ in range(n)]
+        for row in rows:
+            for i in range(n):
+                v = row[i] if i < len(row) else None
+                cols[i].append(None if v is None else str(v))
+        self.writer.write_table(self.pa.Table.from_arrays([self.pa.array(c, type=self.pa.string()) for c in cols],
+                                                          schema=self.schema))
+
+    def end_sheet(self):
+        self.writer.close()
+
+def output_format(path, fmt=None):
+    if fmt:
+        return fmt
+    ext = os.path.splitext(path)[1].lower().lstrip(".")
+    return ext if ext in OUTPUT_FORMATS else "xlsx"
+
+def open_writer(path, names, fmt=None):
+    fmt = output_format(path, fmt)
+    if fmt == "csv":
+        return CsvSheetWriter(path, names)
+    if fmt == "parquet":
+        return ParquetSheetWriter(path, names)
+    return XlsxSheetWriter(path)
+
+# -------------------------
+# Masking
+# -------------------------
+def mask_chunk(rows, targets, cache=None):
+    """Mask columns {index: maskPolicy rule} of a list of rows in place (rows become lists)."""
+    rows[:] = [list(r) for r in rows]
+    for idx, rule in targets.items():
+        values = pd.Series([r[idx] if idx < len(r) else None for r in rows], dtype=object)
+        masked = rule.apply(values, cache).tolist()
+        for r, v in zip(rows, masked):
+            if idx < len(r):
+                r[idx] = v
+    return rows
+
+def _chunks(rows, size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def column_modes(columns):
+    """
+    MaskPolicy for columns: a MaskPolicy as is, {column name: mode or policy mask},
+    or a list of names (all "alnum").
+    """
+    if isinstance(columns, MaskPolicy):
+        return columns
+    if not isinstance(columns, dict):
+        columns = {c: "alnum" for c in columns}
+    return MaskPolicy.from_modes(columns)
+
+def mask_sheet(sheet_name, header, rows, policy, writer, cache=None, chunk_rows=CHUNK_ROWS, log=print):
+    """Mask one sheet's rows into writer with a MaskPolicy, chunk by chunk. Returns the row count."""
+    log(f"\n📄 Processing sheet: {sheet_name}")
+    if header is not None:
+        header = [h.strip() if isinstance(h, str) else h for h in header]
+    resolved = policy.resolve(header)
+    targets = {}
+    for idx, (col, rule) in resolved.items():
+        log(f"🔐 Masking column: {col}" + ("" if rule.mask in ("format_preserving", "digits") else f" ({rule.mask})"))
+        targets[idx] = rule
+    found = {col for col, _ in resolved.values()}
+    for col in policy.expected_columns():
+        if col not in found:
+            log(f"⚠️ Column '{col}' not found in sheet '{sheet_name}'")
+    writer.start_sheet(sheet_name, header)
+    count = 0
+    for chunk in _chunks(rows, chunk_rows):
+        writer.write_rows(mask_chunk(chunk, targets, cache) if targets else chunk)
+        count += len(chunk)
+    writer.end_sheet()
+    log(f"   {count} rows")
+    return count
+
+def mask_file_streaming(file_path, columns, output_file, fmt=None, cache_path=None, chunk_rows=CHUNK_ROWS,
+                        key=None):
+    """
+    Mask columns (a MaskPolicy, {column name: mode}, or a list of names for
+    "alnum") of every sheet of file_path into output_file, one chunk of rows at a time.
+    """
+    columns = column_modes(columns)
+    cache = MaskCache(cache_path, key=key, max_entries=CACHE_ENTRIES)
+    writer = open_writer(output_file, sheet_names(file_path), fmt)
+    total = 0
+    try:
+        for sheet_name, header, rows in iter_sheets(file_path):
+            total += mask_sheet(sheet_name, header, rows, columns, writer, cache, chunk_rows)
+        writer.close()
+    finally:
+        cache.close()
+    print(f"\n✅ Streaming masking complete ({total} rows). Output saved to: {output_file}")
+    return total
+
+def policy_from_args(args):
+    """MaskPolicy from --policy plus -c/--column and --digits (which take precedence)."""
+    columns = {c: "alnum" for c in args.column}
+    columns.update({c: "digits" for c in args.digits})
+    policy = MaskPolicy.from_modes(columns)
+    if args.policy:
+        policy.rules.extend(load_policy(args.policy).rules)
+    return policy
+
+def main():
+    p = argparse.ArgumentParser(description="Mask columns of a large .xlsx/.csv without loading it into memory.")
+    p.add_argument("input", help=".xlsx or .csv file")
+    p.add_argument("-o", "--output", required=True, help="Output .xlsx, .csv or .parquet")
+    p.add_argument("-c", "--column", action="append", default=[], help="Column to mask (letters and digits)")
+    p.add_argument("--digits", action="append", default=[], help="Column to mask digits only")
+    p.add_argument("--policy", help="Masking policy (.yaml/.json, see maskPolicy.py); -c/--digits are added to it")
+    p.add_argument("--format", choices=OUTPUT_FORMATS, help="Output format (default: from the output extension)")
+    p.add_argument("--cache", help="Mask cache file shared across runs")
+    p.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS, help="Rows masked and written per chunk")
+    args = p.parse_args()
+    columns = policy_from_args(args)
+    if not columns.rules:
+        p.error("give a --policy or at least one -c/--column or --digits")
+    mask_file_streaming(args.input, columns, args.output, fmt=args.format, cache_path=args.cache,
+                        chunk_rows=args.chunk_rows)
+
+if __name__ == "__main__":
+    main()
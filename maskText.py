@@ -0,0 +1,130 @@
+"""
+maskText.py
+
+Single-pass masking of free-text columns (Notes, Comments, ...).
+
+datamasking.mask_all_starred_words, mask_numbers_inside_text and
+mask_regex_format each run their own re.sub over every cell, one after the
+other. Here all the free-text patterns are one compiled alternation of named
+groups, and each distinct cell is scanned once:
+
+  email   john.doe@bank.com    -> username masked, domain kept
+  card    4111-1111-1111-1111  -> ****-****-****-1111 (separators kept)
+  ssn     123-45-6789          -> XXX-XX-6789
+  star    *secret*             -> *letters/digits masked*
+  digits  ref 12345            -> ref 80417
+
+Starred spans are the ones datamasking.mask_every_star_enclosed_word finds
+(they may cross line breaks), but only their letters and digits are masked:
+spaces, punctuation and line breaks inside the stars are kept, where the old
+random mask replaced every character. datamasking's second pass, which also
+masked the text between two starred words ("*a* b *c*" -> " b *"), is not
+repeated.
+
+Earlier kinds win where patterns overlap (a card number is not also a digit
+run). Usernames, starred words and digit runs are masked with maskEngine
+(deterministic, one call per distinct piece, shared MaskCache if given), so the
+same account number is masked the same way in a note as in its own column.
+
+Usage:
+  from maskText import mask_text_series
+  df["Notes"] = mask_text_series(df["Notes"])
+  df["Notes"] = mask_text_series(df["Notes"], kinds=("star",))
+"""
+
+import re
+import functools
+import numpy as np
+import pandas as pd
+from maskEngine import mask_texts, value_text
+
+# kind -> regex, in alternation (priority) order
+TEXT_PATTERNS = {
+    "email": r"[A-Za-z0-9._%+-]+@[A-Za-z0-9-]+(?:\.[A-Za-z0-9-]+)+",
+    "card": r"\b\d{4}(?:[- ]?\d{4}){3}\b",
+    "ssn": r"\b\d{3}-\d{2}-\d{4}\b",
+    "star": r"\*[^*]+\*",
+    "digits": r"\d+",
+}
+TEXT_KINDS = tuple(TEXT_PATTERNS)
+
+CARD_DIGIT_RE = re.compile(r"\d")
+
+@functools.lru_cache(maxsize=None)
+def text_pattern(kinds=TEXT_KINDS):
+    """One compiled alternation of the patterns of kinds (priority order of TEXT_PATTERNS)."""
+    unknown = set(kinds) - set(TEXT_PATTERNS)
+    if unknown:
+        raise ValueError(f"unknown text pattern(s) {', '.join(sorted(unknown))} "
+                         f"(expected some of {', '.join(TEXT_KINDS)})")
+    return re.compile("|".join(f"(?P<{k}>{p})" for k, p in TEXT_PATTERNS.items() if k in kinds))
+
+def _piece(kind, text):
+    """(maskEngine mode, part to mask) of a match; mode None for fixed masks."""
+    if kind == "email":
+        return "alnum", text[:text.index("@")]
+    if kind == "star":
+        return "alnum", text[1:-1]
+    if kind == "digits":
+        return "digits", text
+    return None, text
+
+def _fixed(kind, text):
+    if kind == "ssn":
+        return "XXX-XX-" + text[-4:]
+    return CARD_DIGIT_RE.sub("*", text[:-4]) + text[-4:]
+
+def _build(kind, text, masked):
+    if kind == "email":
+        return masked + text[text.index("@"):]
+    if kind == "star":
+        return "*" + masked + "*"
+    return masked
+
+def mask_free_text(texts, kinds=TEXT_KINDS, cache=None, key=None):
+    """Masked copy of a list of strings: every match of kinds replaced, the rest kept."""
+    pattern = text_pattern(tuple(kinds))
+    # one scan per text: (kind, start, end, matched text)
+    found = [[(m.lastgroup, m.start(), m.end(), m.group()) for m in pattern.finditer(t)] for t in texts]
+
+    # replacement of each distinct (kind, match), engine masks computed in bulk per mode
+    distinct = {(kind, text): None for matches in found for kind, _, _, text in matches}
+    parts = {"alnum": {}, "digits": {}}
+    for kind, text in distinct:
+        mode, part = _piece(kind, text)
+        if mode is not None:
+            parts[mode][part] = None
+    masks = {}
+    for mode, pending in parts.items():
+        if pending:
+            pending = list(pending)
+            masked = cache.mask(pending, mode) if cache is not None else mask_texts(pending, mode, key)
+            masks[mode] = dict(zip(pending, masked))
+    repl = {}
+    for kind, text in distinct:
+        mode, part = _piece(kind, text)
+        repl[kind, text] = _fixed(kind, text) if mode is None else _build(kind, text, masks[mode][part])
+
+    out = []
+    for t, matches in zip(texts, found):
+        if not matches:
+            out.append(t)
+            continue
+        pieces = []
+        pos = 0
+        for kind, start, end, text in matches:
+            pieces.append(t[pos:start])
+            pieces.append(repl[kind, text])
+            pos = end
+        pieces.append(t[pos:])
+        out.append("".join(pieces))
+    return out
+
+def mask_text_series(series, kinds=TEXT_KINDS, cache=None, key=None):
+    """Masked copy of a free-text column; each distinct cell is scanned once, empty cells stay empty."""
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    masked = mask_free_text([value_text(v) for v in uniques], kinds, cache, key)
+    out = series.to_numpy(dtype=object, copy=True)
+    present = codes >= 0
+    out[present] = np.array(masked, dtype=object)[codes[present]]
+    return pd.Series(out, index=series.index, name=series.name, dtype=object)
@@ -0,0 +1,245 @@
+"""
+maskVault.py
+
+Reversible, format-preserving tokens for identifiers that test environments
+must be able to map back (IBANs, card numbers, customer ids).
+
+maskEngine masks cannot be reversed. maskCrypto ciphertexts can, but they are
+long base64 that no longer fits the column's format. A TokenVault gives each
+distinct value a token with the value's format: digit -> digit,
+upper -> upper, lower -> lower, everything else kept. So
+"DE89 3704 0044 0532 0130 00" stays a 22-character IBAN-shaped string. The
+original -> token pairs are kept in SQLite, so tokens are stable across runs
+and files and can be looked up in both directions.
+
+Tokens come from the maskEngine keystream ($MASK_KEY). When a candidate token
+already belongs to another value of the same domain, the next candidate is
+tried, so every token maps back to exactly one value. Domains ("iban", "card",
+...) are separate token spaces.
+
+Lookups go through an in-memory LRU front cache (cache_size entries each way).
+Misses are resolved in SQL batches, and new tokens are written in one
+transaction per call. preload() fills the cache from the vault in bulk.
+Writes take SQLite's write lock (BEGIN IMMEDIATE), so maskBatch workers can
+share one vault file.
+
+The vault holds the original values: keep it as secure as the production
+data it was built from.
+
+Usage:
+  from maskVault import TokenVault
+  with TokenVault("release.vault") as vault:
+      df["IBAN"] = vault.tokenize_series(df["IBAN"], domain="iban")
+      df["IBAN"] = vault.detokenize_series(df["IBAN"], domain="iban")
+
+  python maskVault.py release.vault --stats
+  python maskVault.py release.vault --domain iban --detokenize "GB29 NWBK 6016 1331 9268 19"
+"""
+
+import sqlite3
+import hashlib
+import argparse
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from maskEngine import mask_key, mask_texts, value_text
+
+CACHE_SIZE = 1000000
+SQL_BATCH = 500
+# candidate tokens tried per value before giving up (tiny token spaces, e.g. one digit)
+MAX_ATTEMPTS = 64
+
+class LRUCache:
+    """Bounded mapping that forgets the least recently used entries."""
+
+    def __init__(self, size=CACHE_SIZE):
+        self.size = size
+        self.data = OrderedDict()
+
+    def get(self, key):
+        value = self.data.get(key)
+        if value is not None:
+            self.data.move_to_end(key)
+        return value
+
+    def put(self, key, value):
+        self.data[key] = value
+        self.data.move_to_end(key)
+        if len(self.data) > self.size:
+            self.data.popitem(last=False)
+
+class TokenVault:
+    """
+    original <-> token store. path None keeps the vault in memory only.
+    cache_size bounds each direction of the LRU front cache.
+    """
+
+    def __init__(self, path=None, key=None, cache_size=CACHE_SIZE):
+        self.path = path
+        self.key = mask_key(key)
+        self.conn = sqlite3.connect(path or ":memory:", timeout=60, isolation_level=None)
+        self.conn.execute("CREATE TABLE IF NOT EXISTS vault (domain TEXT NOT NULL, original TEXT NOT NULL,"
+                          " token TEXT NOT NULL, PRIMARY KEY (domain, original)) WITHOUT ROWID")
+        self.conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS vault_token ON vault (domain, token)")
+        self.tokens = LRUCache(cache_size)
+        self.originals = LRUCache(cache_size)
+
+    def _remember(self, domain, original, token):
+        self.tokens.put((domain, original), token)
+        self.originals.put((domain, token), original)
+
+    def _select(self, column, other, domain, values):
+        """{column value: other column value} for the values found in the vault."""
+        found = {}
+        for start in range(0, len(values), SQL_BATCH):
+            batch = values[start:start + SQL_BATCH]
+            sql = (f"SELECT {column}, {other} FROM vault WHERE domain = ? AND {column} IN "
+                   f"({','.join('?' * len(batch))})")
+            found.update(self.conn.execute(sql, [domain] + batch).fetchall())
+        return found
+
+    def _candidates(self, texts, attempt):
+        key = self.key if attempt == 0 else \
+            hashlib.blake2b(f"vault:{attempt}".encode("ascii"), key=self.key).digest()
+        return mask_texts(texts, "alnum", key)
+
+    def _create(self, domain, texts):
+        """New tokens for texts not in the vault yet (caller holds the write lock)."""
+        new = {}
+        taken = set()
+        pending = texts
+        for attempt in range(MAX_ATTEMPTS):
+            if not pending:
+                break
+            candidates = dict(zip(pending, self._candidates(pending, attempt)))
+            in_vault = set(self._select("token", "original", domain, list(set(candidates.values()))))
+            retry = []
+            for text, token in candidates.items():
+                if token in in_vault or token in taken:
+                    retry.append(text)
+                else:
+                    new[text] = token
+                    taken.add(token)
+            pending = retry
+        if pending:
+            raise ValueError(f"no free token left in domain {domain!r} for {len(pending)} value(s) "
+                             f"such as {pending[0]!r}")
+        self.conn.executemany("INSERT INTO vault (domain, original, token) VALUES (?, ?, ?)",
+                              [(domain, t, tok) for t, tok in new.items()])
+        return new
+
+    def tokenize(self, texts, domain="default"):
+        """Tokens of a list of strings, creating (and storing) the ones not known yet."""
+        out = {}
+        missing = []
+        for t in dict.fromkeys(texts):
+            token = self.tokens.get((domain, t))
+            if token is None:
+                missing.append(t)
+            else:
+                out[t] = token
+        if missing:
+            found = self._select("original", "token", domain, missing)
+            unknown = [t for t in missing if t not in found]
+            if unknown:
+                self.conn.execute("BEGIN IMMEDIATE")
+                try:
+                    # another process may have added some meanwhile
+                    found.update(self._select("original", "token", domain, unknown))
+                    found.update(self._create(domain, [t for t in unknown if t not in found]))
+                    self.conn.execute("COMMIT")
+                except BaseException:
+                    self.conn.execute("ROLLBACK")
+                    raise
+            for t, token in found.items():
+                self._remember(domain, t, token)
+            out.update(found)
+        return [out[t] for t in texts]
+
+    def detokenize(self, tokens, domain="default"):
+        """Original values of a list of tokens; strings that are no token of domain are returned unchanged."""
+        out = {}
+        missing = []
+        for t in dict.fromkeys(tokens):
+            original = self.originals.get((domain, t))
+            if original is None:
+                missing.append(t)
+            else:
+                out[t] = original
+        if missing:
+            found = self._select("token", "original", domain, missing)
+            for token, original in found.items():
+                self._remember(domain, original, token)
+            out.update(found)
+        return [out.get(t, t) for t in tokens]
+
+    def preload(self, domain=None, limit=None):
+        """Fill the front cache from the vault (one domain, or all); returns the entries loaded."""
+        limit = limit or self.tokens.size
+        sql = "SELECT domain, original, token FROM vault" + (" WHERE domain = ?" if domain else "") + " LIMIT ?"
+        count = 0
+        for d, original, token in self.conn.execute(sql, ([domain] if domain else []) + [limit]):
+            self._remember(d, original, token)
+            count += 1
+        return count
+
+    def _series(self, func, series, domain):
+        codes, uniques = pd.factorize(series, use_na_sentinel=True)
+        done = func([value_text(v) for v in uniques], domain)
+        out = series.to_numpy(dtype=object, copy=True)
+        present = codes >= 0
+        out[present] = np.array(done, dtype=object)[codes[present]]
+        return pd.Series(out, index=series.index, name=series.name, dtype=object)
+
+    def tokenize_series(self, series, domain="default"):
+        """Tokenized copy of a column; empty cells stay empty."""
+        return self._series(self.tokenize, series, domain)
+
+    def detokenize_series(self, series, domain="default"):
+        return self._series(self.detokenize, series, domain)
+
+    def stats(self):
+        """{domain: number of tokens}."""
+        return dict(self.conn.execute("SELECT domain, COUNT(*) FROM vault GROUP BY domain ORDER BY domain"))
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+# vaults opened by policy rules, one per (path, key) and process
+_OPEN_VAULTS = {}
+
+def open_vault(path, key=None):
+    """Shared TokenVault for path (kept open for the life of the process)."""
+    vault_key = (path, mask_key(key))
+    vault = _OPEN_VAULTS.get(vault_key)
+    if vault is None:
+        vault = _OPEN_VAULTS[vault_key] = TokenVault(path, key)
+    return vault
+
+def main():
+    p = argparse.ArgumentParser(description="Inspect a token vault or look tokens up.")
+    p.add_argument("vault", help="Vault file")
+    p.add_argument("--domain", default="default", help="Token domain")
+    p.add_argument("--stats", action="store_true", help="Tokens per domain")
+    p.add_argument("--tokenize", nargs="*", default=[], metavar="VALUE", help="Values to tokenize")
+    p.add_argument("--detokenize", nargs="*", default=[], metavar="TOKEN", help="Tokens to look up")
+    args = p.parse_args()
+    with TokenVault(args.vault) as vault:
+        if args.stats:
+            for domain, count in vault.stats().items():
+                print(f"{domain}: {count}")
+        for value, token in zip(args.tokenize, vault.tokenize(args.tokenize, args.domain)):
+            print(f"{value} -> {token}")
+        for token, value in zip(args.detokenize, vault.detokenize(args.detokenize, args.domain)):
+            print(f"{token} -> {value}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""
+pyDqMetaBin.py
+
+Compact, memory-mappable form of the DQ rule metadata that pyParseXsd_DQ writes
+as pretty-printed .dq.json. The same metadata as a .dq.bin file is:
+
+  header     magic "DQMB", format version, string/record counts, section offsets
+  strings    one interned string table (u32 offsets + utf-8 blob); paths, type
+             names, kinds and constraint sets (as compact JSON) each stored once
+  columns    one array per field, n_records long:
+               key, path, type, kind, constraints, extra   u32 string ids
+               minOccurs, maxOccurs                        i32
+               flags                                       u8
+
+Everything is little-endian and 4-byte aligned, so DqMetaBin maps the file and
+casts the columns in place; nothing is decoded until a record is asked for.
+Several validator processes opening the same file share one copy through the
+OS page cache.
+
+Usage:
+  python pyDqMetaBin.py dq_rules/pacs.008.001.08.dq.json      # -> .dq.bin
+  python pyDqMetaBin.py dq_rules/pacs.008.001.08.dq.bin       # summary
+"""
+
+import os
+import sys
+import json
+import mmap
+import struct
+import argparse
+from collections import OrderedDict
+
+MAGIC = b"DQMB"
+FORMAT_VERSION = 1
+NONE_ID = 0xFFFFFFFF
+
+# magic, version, reserved, n_strings, n_records, strings_off, blob_off, columns_off
+HEADER = struct.Struct("<4sHHIIIII")
+
+# u32 string-id columns, then the i32 and u8 columns
+STRING_COLUMNS = ("key", "path", "type", "kind", "constraints", "extra")
+INT_COLUMNS = ("minOccurs", "maxOccurs")
+
+# the entry fields stored in their own column; anything else goes to "extra" as JSON
+FIELD_ORDER = ("path", "minOccurs", "maxOccurs", "required", "inChoice", "type", "kind", "constraints")
+
+F_REQUIRED = 0x01
+F_HAS_REQUIRED = 0x02
+F_IN_CHOICE = 0x04
+F_HAS_IN_CHOICE = 0x08
+F_HAS_MIN = 0x10
+F_HAS_MAX = 0x20
+F_MAX_NULL = 0x40   # maxOccurs present as null (unbounded)
+F_KIND_FIRST = 0x80 # "kind" came before "type" (attribute entries: path, kind, type, use)
+
+def _pad4(n):
+    return (n + 3) & ~3
+
+def _dumps(value):
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+class _StringTable:
+    def __init__(self):
+        self.ids = {}
+        self.strings = []
+
+    def intern(self, s):
+        if s is None:
+            return NONE_ID
+        sid = self.ids.get(s)
+        if sid is None:
+            sid = len(self.strings)
+            self.ids[s] = sid
+            self.strings.append(s)
+        return sid
+
+# Encode a metadata dict ({key: entry}) to the binary layout
+def encode_metadata(metadata):
+    strings = _StringTable()
+    cols = {name: [] for name in STRING_COLUMNS + INT_COLUMNS}
+    flags = bytearray()
+    for key, entry in metadata.items():
+        f = 0
+        if "required" in entry:
+            f |= F_HAS_REQUIRED | (F_REQUIRED if entry["required"] else 0)
+        if "inChoice" in entry:
+            f |= F_HAS_IN_CHOICE | (F_IN_CHOICE if entry["inChoice"] else 0)
+        minocc, maxocc = entry.get("minOccurs"), entry.get("maxOccurs")
+        if "minOccurs" in entry:
+            f |= F_HAS_MIN
+        if "maxOccurs" in entry:
+            f |= F_HAS_MAX | (F_MAX_NULL if maxocc is None else 0)
+        if "kind" in entry and "type" in entry and list(entry).index("kind") < list(entry).index("type"):
+            f |= F_KIND_FIRST
+        extra = OrderedDict((k, v) for k, v in entry.items() if k not in FIELD_ORDER)
+        # non-int occurrence values or non-string names do not fit a column; keep them verbatim
+        for k in ("minOccurs", "maxOccurs"):
+            v = entry.get(k)
+            if v is not None and (not isinstance(v, int) or isinstance(v, bool)):
+                extra[k] = v
+        for k in ("path", "type", "kind"):
+            if k in entry and not isinstance(entry[k], str):
+                extra[k] = entry[k]
+        cols["key"].append(strings.intern(key))
+        cols["path"].append(strings.intern(entry["path"] if isinstance(entry.get("path"), str) else None))
+        cols["type"].append(strings.intern(entry["type"] if isinstance(entry.get("type"), str) else None))
+        cols["kind"].append(strings.intern(entry["kind"] if isinstance(entry.get("kind"), str) else None))
+        cols["constraints"].append(strings.intern(_dumps(entry["constraints"]) if "constraints" in entry else None))
+        cols["extra"].append(strings.intern(_dumps(extra) if extra else None))
+        cols["minOccurs"].append(minocc if isinstance(minocc, int) and not isinstance(minocc, bool) else 0)
+        cols["maxOccurs"].append(maxocc if isinstance(maxocc, int) and not isinstance(maxocc, bool) else 0)
+        flags.append(f)
+
+    blob = bytearray()
+    offsets = [0]
+    for s in strings.strings:
+        blob += s.encode("utf-8")
+        offsets.append(len(blob))
+
+    n = len(flags)
+    strings_off = HEADER.size
+    blob_off = strings_off + 4 * len(offsets)
+    columns_off = _pad4(blob_off + len(blob))
+    out = bytearray(HEADER.pack(MAGIC, FORMAT_VERSION, 0, len(strings.strings), n, strings_off, blob_off, columns_off))
+    out += struct.pack(f"<{len(offsets)}I", *offsets)
+    out += blob
+    out += b"\0" * (columns_off - len(out))
+    for name in STRING_COLUMNS:
+        out += struct.pack(f"<{n}I", *cols[name])
+    for name in INT_COLUMNS:
+        out += struct.pack(f"<{n}i", *cols[name])
+    out += flags
+    return bytes(out)
+
+def save_metadata_bin(metadata, outpath):
+    data = encode_metadata(metadata)
+    tmp = outpath + ".tmp"
+    with open(tmp, "wb") as fh:
+        fh.write(data)
+    # atomic replace: readers that already mapped the old file keep a consistent view
+    os.replace(tmp, outpath)
+
+class DqMetaBin:
+    """
+    Read-only view over a .dq.bin file (or bytes). Records are decoded on access;
+    decoded strings and constraint sets are cached per instance.
+    """
+
+    def __init__(self, source):
+        self._fh = None
+        self._mm = None
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            buf = memoryview(source)
+        else:
+            self._fh = open(source, "rb")
+            self._mm = mmap.mmap(self._fh.fileno(), 0, access=mmap.ACCESS_READ)
+            buf = memoryview(self._mm)
+        self._buf = buf
+        magic, version, _, n_strings, n, strings_off, blob_off, columns_off = HEADER.unpack_from(buf, 0)
+        if magic != MAGIC:
+            raise ValueError(f"not a DQ metadata binary (magic {magic!r})")
+        if version != FORMAT_VERSION:
+            raise ValueError(f"unsupported DQ metadata binary version {version}")
+        self._n = n
+        self._blob_off = blob_off
+        self._offsets = self._column(strings_off, n_strings + 1, "I")
+        pos = columns_off
+        self._cols = {}
+        for name in STRING_COLUMNS:
+            self._cols[name] = self._column(pos, n, "I")
+            pos += 4 * n
+        for name in INT_COLUMNS:
+            self._cols[name] = self._column(pos, n, "i")
+            pos += 4 * n
+        self._flags = buf[pos:pos + n]
+        self._strings = {}
+        self._json = {}
+
+    def _column(self, off, count, fmt):
+        view = self._buf[off:off + 4 * count]
+        if sys.byteorder == "little":
+            return view.cast(fmt)
+        return struct.unpack(f"<{count}{fmt}", view)
+
+    def close(self):
+        for name in list(self._cols):
+            col = self._cols.pop(name)
+            if isinstance(col, memoryview):
+                col.release()
+        for view in (self._offsets, self._flags, self._buf):
+            if isinstance(view, memoryview):
+                view.release()
+        if self._mm is not None:
+            self._mm.close()
+            self._fh.close()
+            self._mm = self._fh = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self._n
+
+    def string(self, sid):
+        if sid == NONE_ID:
+            return None
+        s = self._strings.get(sid)
+        if s is None:
+            start = self._blob_off + self._offsets[sid]
+            end = self._blob_off + self._offsets[sid + 1]
+            s = bytes(self._buf[start:end]).decode("utf-8")
+            self._strings[sid] = s
+        return s
+
+    def _json_value(self, sid):
+        if sid == NONE_ID:
+            return None
+        v = self._json.get(sid)
+        if v is None:
+            v = json.loads(self.string(sid), object_pairs_hook=OrderedDict)
+            self._json[sid] = v
+        return v
+
+    def key(self, i):
+        return self.string(self._cols["key"][i])
+
+    def keys(self):
+        return [self.key(i) for i in range(self._n)]
+
+    def record(self, i):
+        """Entry i as the dict pyParseXsd_DQ produced, keys in the same order (constraint dicts are shared; do not mutate)."""
+        cols = self._cols
+        f = self._flags[i]
+        md = OrderedDict()
+        path = self.string(cols["path"][i])
+        if path is not None:
+            md["path"] = path
+        if f & F_HAS_MIN:
+            md["minOccurs"] = cols["minOccurs"][i]
+        if f & F_HAS_MAX:
+            md["maxOccurs"] = None if f & F_MAX_NULL else cols["maxOccurs"][i]
+        if f & F_HAS_REQUIRED:
+            md["required"] = bool(f & F_REQUIRED)
+        if f & F_HAS_IN_CHOICE:
+            md["inChoice"] = bool(f & F_IN_CHOICE)
+        for name in (("kind", "type") if f & F_KIND_FIRST else ("type", "kind")):
+            v = self.string(cols[name][i])
+            if v is not None:
+                md[name] = v
+        constraints = self._json_value(cols["constraints"][i])
+        if constraints is not None:
+            md["constraints"] = constraints
+        extra = self._json_value(cols["extra"][i])
+        if extra:
+            md.update(extra)
+        return md
+
+    def items(self):
+        for i in range(self._n):
+            yield self.key(i), self.record(i)
+
+    def to_metadata(self):
+        return OrderedDict(self.items())
+
+def load_metadata_bin(path):
+    with DqMetaBin(path) as meta:
+        return meta.to_metadata()
+
+# metadata entries -> iso_dq_rules rule list (shared by pyLoad_iso_dq_rules and isoDqEngine)
+def metadata_to_rules(items):
+    rules = []
+    for path, info in items:
+        rule = {
+            "path": path,
+            "required": info.get("required", False),
+            "datatype": info.get("type"),
+            "minOccurs": info.get("minOccurs"),
+            "maxOccurs": info.get("maxOccurs"),
+            "constraints": info.get("constraints", {})
+        }
+        rules.append(rule)
+    return rules
+
+# rule set files written by pyParseXsd_DQ (shared by pyLoad_iso_dq_rules and isoDqEngine)
+def rule_files(folder):
+    """{rule set name: file name} of the metadata files in folder; a .dq.bin is used in preference to the .dq.json."""
+    files = {}
+    for fname in sorted(os.listdir(folder)):
+        if fname.endswith(".dq.bin"):
+            files[fname[:-len(".dq.bin")]] = fname
+        elif fname.endswith(".dq.json"):
+            files.setdefault(fname[:-len(".dq.json")], fname)
+    return files
+
+def load_rules_file(path):
+    """iso_dq_rules rule list of one .dq.bin (read in place) or .dq.json metadata file."""
+    if path.endswith(".dq.bin"):
+        with DqMetaBin(path) as meta:
+            return metadata_to_rules(meta.items())
+    with open(path, "r", encoding="utf-8") as fh:
+        return metadata_to_rules(json.load(fh, object_pairs_hook=OrderedDict).items())
+
+def main():
+    p = argparse.ArgumentParser(description="Convert .dq.json metadata to .dq.bin, or summarize a .dq.bin file.")
+    p.add_argument("files", nargs="+", help=".dq.json files to convert or .dq.bin files to inspect")
+    args = p.parse_args()
+    for path in args.files:
+        if path.endswith(".dq.bin"):
+            with DqMetaBin(path) as meta:
+                kinds = {}
+                for _, md in meta.items():
+                    kinds[md.get("kind")] = kinds.get(md.get("kind"), 0) + 1
+                print(f"{path}: {len(meta)} entries, {os.path.getsize(path)} bytes, kinds {kinds}")
+        else:
+            with open(path, "r", encoding="utf-8") as fh:
+                metadata = json.load(fh, object_pairs_hook=OrderedDict)
+            outpath = (path[:-len(".dq.json")] if path.endswith(".dq.json") else os.path.splitext(path)[0]) + ".dq.bin"
+            save_metadata_bin(metadata, outpath)
+            print(f"{path} -> {outpath} ({len(metadata)} entries, {os.path.getsize(path)} -> {os.path.getsize(outpath)} bytes)")
+
+if __name__ == "__main__":
+    main()
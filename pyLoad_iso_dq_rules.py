@@ -1,53 +1,61 @@
 import os
 import json
+import argparse
 import cx_Oracle
+from pyDqMetaBin import load_rules_file, rule_files
+from pyParseXsd_DQ import mark_loaded
 
 DB_USER = "YOUR_USER"
 DB_PASS = "YOUR_PASS"
 DB_DSN  = "host:1521/service"
 
 INPUT_FOLDER = "./dq_rules"
+# written by pyParseXsd_DQ; "changed" lists the rule sets regenerated and not loaded yet
+MANIFEST_NAME = "dq_manifest.json"
 
-def load_rules():
+def changed_rule_sets(folder=INPUT_FOLDER):
+    with open(os.path.join(folder, MANIFEST_NAME), "r", encoding="utf-8") as f:
+        return set(json.load(f).get("changed", []))
+
+def load_rules(changed_only=False):
     conn = cx_Oracle.connect(DB_USER, DB_PASS, DB_DSN)
     cur  = conn.cursor()
 
-    for fname in sorted(os.listdir(INPUT_FOLDER)):
-        if not fname.endswith(".dq.json"):
-            continue
-
-        xsd_name = fname.replace(".dq.json", "")
-        full_path = os.path.join(INPUT_FOLDER, fname)
+    # one rule set per XSD; the compact .dq.bin is read in preference to the .dq.json
+    files = rule_files(INPUT_FOLDER)
 
-        with open(full_path, "r", encoding="utf-8") as f:
-            metadata = json.load(f)
+    if changed_only:
+        changed = changed_rule_sets()
+        files = {k: v for k, v in files.items() if k in changed}
+        print(f"Loading {len(files)} changed rule sets")
 
+    for xsd_name, fname in sorted(files.items()):
         # Convert metadata dict to rules list
-        rules = []
-        for path, info in metadata.items():
-            rule = {
-                "path": path,
-                "required": info.get("required", False),
-                "datatype": info.get("type"),
-                "minOccurs": info.get("minOccurs"),
-                "maxOccurs": info.get("maxOccurs"),
-                "constraints": info.get("constraints", {})
-            }
-            rules.append(rule)
+        rules = load_rules_file(os.path.join(INPUT_FOLDER, fname))
 
         final_json = json.dumps({"rules": rules}, ensure_ascii=False)
 
         print(f"Loading rules for {xsd_name} ({len(rules)} rules)")
 
+        # upsert, so reloading a regenerated rule set replaces it
         cur.execute("""
-            INSERT INTO iso_dq_rules (xsd_name, rule_json)
-            VALUES (:1, :2)
-        """, (xsd_name, final_json))
+            MERGE INTO iso_dq_rules r
+            USING (SELECT :xsd_name xsd_name FROM dual) s
+            ON (r.xsd_name = s.xsd_name)
+            WHEN MATCHED THEN UPDATE SET r.rule_json = :rule_json
+            WHEN NOT MATCHED THEN INSERT (xsd_name, rule_json) VALUES (s.xsd_name, :rule_json)
+        """, xsd_name=xsd_name, rule_json=final_json)
 
     conn.commit()
     cur.close()
     conn.close()
+    # only now are they in iso_dq_rules; a failed load leaves them pending for the next run
+    mark_loaded(INPUT_FOLDER, files)
     print("Done.")
 
 if __name__ == "__main__":
-    load_rules()
\ No newline at end of file
+    p = argparse.ArgumentParser(description="Load DQ rule metadata into iso_dq_rules.")
+    p.add_argument("--changed-only", action="store_true",
+                   help=f"Only load rule sets listed as changed in {MANIFEST_NAME} (pyParseXsd_DQ --incremental)")
+    args = p.parse_args()
+    load_rules(changed_only=args.changed_only)
\ No newline at end of file
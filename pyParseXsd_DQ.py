@@ -12,341 +12,280 @@ Author: ChatGPT (GPT-5 Thinking mini)
 """
 
 import os
-import re
 import json
 import argparse
-from collections import OrderedDict
-from lxml import etree
-
-# XML Schema namespace
-XSD_NS = "http://www.w3.org/2001/XMLSchema"
-NSMAP = {"xs": XSD_NS}
-
-# Utility: safe get attribute with default
-def _attr(el, name, default=None):
-    v = el.get(name)
-    return default if v is None else v
-
-# Normalize maxOccurs text
-def norm_maxocc(val):
-    if val is None:
-        return 1
-    if val == "unbounded":
-        return -1
-    try:
-        return int(val)
-    except:
-        return -1
-
-# Parse simpleType restriction -> dict of constraints
-def parse_simpletype_constraints(simpleTypeEl):
-    constraints = {}
-    # look for xs:restriction
-    restr = simpleTypeEl.find("xs:restriction", namespaces=NSMAP)
-    if restr is None:
-        # could be xs:list or xs:union (rare for ISO)
-        return constraints
-
-    base = _attr(restr, "base")
-    if base:
-        constraints["base"] = base
-
-    enums = []
-    for e in restr.findall("xs:enumeration", namespaces=NSMAP):
-        v = e.get("value")
-        if v is not None:
-            enums.append(v)
-    if enums:
-        constraints["enumeration"] = enums
-
-    pat = restr.find("xs:pattern", namespaces=NSMAP)
-    if pat is not None and pat.get("value"):
-        constraints["pattern"] = pat.get("value")
-
-    length = restr.find("xs:length", namespaces=NSMAP)
-    if length is not None and length.get("value"):
-        constraints["length"] = int(length.get("value"))
-
-    minlen = restr.find("xs:minLength", namespaces=NSMAP)
-    if minlen is not None and minlen.get("value"):
-        constraints["minLength"] = int(minlen.get("value"))
-
-    maxlen = restr.find("xs:maxLength", namespaces=NSMAP)
-    if maxlen is not None and maxlen.get("value"):
-        constraints["maxLength"] = int(maxlen.get("value"))
-
-    minincl = restr.find("xs:minInclusive", namespaces=NSMAP)
-    if minincl is not None and minincl.get("value"):
-        constraints["minInclusive"] = minincl.get("value")
-
-    maxincl = restr.find("xs:maxInclusive", namespaces=NSMAP)
-    if maxincl is not None and maxincl.get("value"):
-        constraints["maxInclusive"] = maxincl.get("value")
-
-    return constraints
-
-# Resolve a named type (simple or complex) by QName local name within schema element
-def find_named_type(schema_root, type_local_name, kind="complexType"):
-    # type_local_name may include prefix (like ns:Type). We only match local part
-    if ":" in type_local_name:
-        type_local = type_local_name.split(":")[-1]
-    else:
-        type_local = type_local_name
-
-    xpath = f"xs:{kind}[@name='{type_local}']"
-    res = schema_root.find(xpath, namespaces=NSMAP)
-    return res
-
-# Recursively process complexType (sequence/choice/all) and return list of element descriptors
-def process_complex_type(schema_root, complexEl, path_prefix, metadata, parent_types_stack):
-    """
-    schema_root: root <xs:schema>
-    complexEl: <xs:complexType ...> element (can be named or anonymous)
-    path_prefix: current xpath prefix (like 'Document/GrpHdr')
-    metadata: dict to append to
-    parent_types_stack: list of type names to avoid recursion
-    """
-    # handle attributes on complex type
-    for attr in complexEl.findall("xs:attribute", namespaces=NSMAP):
-        name = _attr(attr, "name")
-        if not name:
-            continue
-        xpath = f"{path_prefix}/@{name}"
-        md = {
-            "path": xpath,
-            "kind": "attribute",
-            "type": _attr(attr, "type"),
-            "use": _attr(attr, "use", "optional")
-        }
-        metadata[xpath] = md
-
-    # sequences, choices, all
-    for model in ("xs:sequence", "xs:choice", "xs:all"):
-        for modelEl in complexEl.findall(model, namespaces=NSMAP):
-            for child in modelEl.findall("xs:element", namespaces=NSMAP):
-                process_element(schema_root, child, path_prefix, metadata, parent_types_stack, in_choice = (model.endswith("choice")))
-
-    # Also check direct element children (sometimes complexType has element directly)
-    for child in complexEl.findall("xs:element", namespaces=NSMAP):
-        process_element(schema_root, child, path_prefix, metadata, parent_types_stack, in_choice=False)
-
-# Process an xs:element
-def process_element(schema_root, elementEl, path_prefix, metadata, parent_types_stack, in_choice=False):
-    # Determine name (or ref)
-    ref = elementEl.get("ref")
-    if ref:
-        # if ref used, local name is after colon
-        name = ref.split(":")[-1]
-    else:
-        name = elementEl.get("name")
-
-    if not name:
-        return
-
-    minocc = int(elementEl.get("minOccurs")) if elementEl.get("minOccurs") is not None else 1
-    maxocc = norm_maxocc(elementEl.get("maxOccurs"))
-
-    xpath = f"{path_prefix}/{name}" if path_prefix else name
-
-    # Prepare metadata base
-    md = OrderedDict()
-    md["path"] = xpath
-    md["minOccurs"] = minocc
-    md["maxOccurs"] = (None if maxocc == -1 else maxocc)
-    md["required"] = (minocc > 0)
-    md["inChoice"] = bool(in_choice)
-
-    # If the element has a type attribute
-    type_attr = elementEl.get("type")
-    if type_attr:
-        md["type"] = type_attr
-        # try to resolve named simpleType or complexType
-        # check simpleType
-        simple = find_named_type(schema_root, type_attr, kind="simpleType")
-        complex_ = find_named_type(schema_root, type_attr, kind="complexType")
-        if simple is not None:
-            md["kind"] = "simple"
-            md["constraints"] = parse_simpletype_constraints(simple)
-        elif complex_ is not None:
-            md["kind"] = "complex"
-            # avoid recursive loop
-            type_local = type_attr.split(":")[-1]
-            if type_local in parent_types_stack:
-                md["note"] = f"recursion detected for type {type_local}"
-            else:
-                parent_types_stack.append(type_local)
-                process_complex_type(schema_root, complex_, xpath, metadata, parent_types_stack)
-                parent_types_stack.pop()
-        else:
-            md["kind"] = "simple"  # assume built-in simple type (xs:string etc.)
-    else:
-        # Check inline simpleType
-        simple_inline = elementEl.find("xs:simpleType", namespaces=NSMAP)
-        if simple_inline is not None:
-            md["kind"] = "simple"
-            md["constraints"] = parse_simpletype_constraints(simple_inline)
-        else:
-            # Check inline complexType
-            complex_inline = elementEl.find("xs:complexType", namespaces=NSMAP)
-            if complex_inline is not None:
-                md["kind"] = "complex"
-                process_complex_type(schema_root, complex_inline, xpath, metadata, parent_types_stack)
-            else:
-                # element references or missing type -> might be an element ref to global element; try to resolve
-                # try finding a global element with this name
-                ge = schema_root.find(f"xs:element[@name='{name}']", namespaces=NSMAP)
-                if ge is not None and ge is not elementEl:
-                    # avoid infinite loop
-                    # fallback: if ge has type, process type
-                    t = ge.get("type")
-                    if t:
-                        md["type"] = t
-                        simple = find_named_type(schema_root, t, kind="simpleType")
-                        complex_ = find_named_type(schema_root, t, kind="complexType")
-                        if simple is not None:
-                            md["kind"] = "simple"
-                            md["constraints"] = parse_simpletype_constraints(simple)
-                        elif complex_ is not None:
-                            md["kind"] = "complex"
-                            type_local = t.split(":")[-1]
-                            if type_local not in parent_types_stack:
-                                parent_types_stack.append(type_local)
-                                process_complex_type(schema_root, complex_, xpath, metadata, parent_types_stack)
-                                parent_types_stack.pop()
-                        else:
-                            md["kind"] = "simple"
-                    else:
-                        md["kind"] = "unknown"
-                        md["note"] = "global element reference without explicit type"
-                else:
-                    md["kind"] = "simple"
-    # record element-level documentation (if any)
-    doc = None
-    ann = elementEl.find("xs:annotation/xs:documentation", namespaces=NSMAP)
-    if ann is not None and ann.text:
-        doc = ann.text.strip()
-        md["documentation"] = doc
-
-    # Add to metadata if this entry is an actual element (we always add)
-    # For complex types, child elements are added as separate keys
-    metadata[xpath] = md
+from concurrent.futures import ProcessPoolExecutor
+from pyDqMetaBin import save_metadata_bin
+# schema resolution and the path walker live in xsdSchemaGraph (shared with CompareXSD / xpathAllFields)
+from xsdSchemaGraph import (_DB_SCHEMAS, _DB_HASHES, sha256_hex, build_schema_graph, schema_graph_from_bytes,
+                            graph_metadata)
 
 # Parse a schema file (lxml etree) and produce metadata dict
-def parse_schema(tree, base_filename=None, schema_map=None, follow_includes=True):
+def parse_schema(tree, base_filename=None, schema_map=None, follow_includes=True, dep_hashes=None):
     """
     tree: lxml parsed xml tree (ElementTree)
     base_filename: used to resolve includes/imports
     schema_map: dict to avoid re-parsing included/imported schemas {location: tree}
     follow_includes: if True, attempts to read included/imported schemas from local folder
+    dep_hashes: optional dict filled with the content hash of every include/import
+
+    The schema set is resolved into a graph (xsdSchemaGraph.build_schema_graph)
+    and the metadata is the graph's path expansion (graph_metadata).
     """
-    root = tree.getroot()
-    # build a map of global named complex/simple types for quick lookup (we use find_named_type function)
-    metadata = OrderedDict()
-
-    # Try to find the root element name (global element named Document or similar)
-    # We'll iterate global xs:element elements
-    globals_elems = root.findall("xs:element", namespaces=NSMAP)
-    if not globals_elems:
-        # maybe xsi prefix is different; fallback
-        globals_elems = root.findall(".//{http://www.w3.org/2001/XMLSchema}element")
-
-    for ge in globals_elems:
-        # only consider top-level elements (those with parent xs:schema)
-        parent = ge.getparent()
-        if parent is not None and parent.tag == f"{{{XSD_NS}}}schema":
-            # top-level element
-            name = ge.get("name")
-            if not name:
-                continue
-            # start recursion
-            process_element(root, ge, "", metadata, parent_types_stack=[])
-    # Optionally: parse xs:include and xs:import to merge referenced schemas
-    if follow_includes:
-        for inc in root.findall("xs:include", namespaces=NSMAP) + root.findall("xs:import", namespaces=NSMAP):
-            schema_loc = inc.get("schemaLocation")
-            if schema_loc:
-                # try to read local file relative to base_filename
-                if base_filename:
-                    base_dir = os.path.dirname(base_filename)
-                    candidate = os.path.join(base_dir, schema_loc)
-                    if os.path.exists(candidate):
-                        if schema_map is None:
-                            schema_map = {}
-                        if candidate not in schema_map:
-                            try:
-                                t = etree.parse(candidate)
-                                schema_map[candidate] = t
-                                # recursively parse included schema and merge metadata (prefix with nothing: global names unique)
-                                submeta = parse_schema(t, base_filename=candidate, schema_map=schema_map, follow_includes=False)
-                                # merge (but do not override existing keys)
-                                for k,v in submeta.items():
-                                    if k not in metadata:
-                                        metadata[k] = v
-                            except Exception as e:
-                                metadata[f"_include_error_{schema_loc}"] = {"note": f"failed to load include/import '{schema_loc}': {str(e)}"}
-                    else:
-                        metadata[f"_include_missing_{schema_loc}"] = {"note": f"schemaLocation '{schema_loc}' not found relative to {base_filename}"}
-                else:
-                    metadata[f"_include_ref_{schema_loc}"] = {"note": f"schemaLocation '{schema_loc}' present but base file unknown"}
-    return metadata
+    graph = build_schema_graph(tree, base_filename, schema_map, follow_includes)
+    if dep_hashes is not None:
+        dep_hashes.update(graph["deps"])
+    return graph_metadata(graph)
 
 # Helper: pretty-print and save JSON
 def save_metadata_json(metadata, outpath):
     with open(outpath, "w", encoding="utf-8") as fh:
         json.dump(metadata, fh, indent=2, ensure_ascii=False)
 
+# Output formats: "json" (.dq.json), "bin" (.dq.bin, see pyDqMetaBin) or "both"
+OUTPUT_FORMATS = ("json", "bin", "both")
+
+def save_metadata(metadata, outdir, stem, fmt="json"):
+    if fmt in ("json", "both"):
+        save_metadata_json(metadata, os.path.join(outdir, stem + ".dq.json"))
+    if fmt in ("bin", "both"):
+        save_metadata_bin(metadata, os.path.join(outdir, stem + ".dq.bin"))
+
+def output_label(stem, fmt="json"):
+    return {"json": stem + ".dq.json", "bin": stem + ".dq.bin"}.get(fmt, f"{stem}.dq.json + {stem}.dq.bin")
+
+# Incremental mode: outdir/dq_manifest.json remembers, per output stem, the hash of
+# the schema and of every include/import it resolved when its metadata was written.
+# A schema is reparsed only when one of those hashes (or its output) changed.
+MANIFEST_NAME = "dq_manifest.json"
+MANIFEST_VERSION = 1
+
+def load_manifest(outdir):
+    path = os.path.join(outdir, MANIFEST_NAME)
+    try:
+        with open(path, "r", encoding="utf-8") as fh:
+            manifest = json.load(fh)
+        if manifest.get("version") == MANIFEST_VERSION:
+            return manifest
+    except (OSError, ValueError):
+        pass
+    return {"version": MANIFEST_VERSION, "schemas": {}, "changed": []}
+
+def save_manifest(outdir, manifest):
+    path = os.path.join(outdir, MANIFEST_NAME)
+    with open(path + ".tmp", "w", encoding="utf-8") as fh:
+        json.dump(manifest, fh, indent=2, ensure_ascii=False, sort_keys=True)
+    os.replace(path + ".tmp", path)
+
+def output_files(stem, fmt="json"):
+    return {"json": [stem + ".dq.json"], "bin": [stem + ".dq.bin"]}.get(fmt, [stem + ".dq.json", stem + ".dq.bin"])
+
+# Why stem must be reparsed, or None if its metadata is current.
+# current_dep_hash(location) -> hash now (None if missing)
+def reparse_reason(entry, sha256, fmt, outdir, stem, current_dep_hash):
+    if not entry:
+        return "new"
+    if entry.get("sha256") != sha256:
+        return "schema changed"
+    if entry.get("format") != fmt or not all(os.path.exists(os.path.join(outdir, f)) for f in output_files(stem, fmt)):
+        return "output missing"
+    for location, h in entry.get("deps", {}).items():
+        if current_dep_hash(location) != h:
+            return f"dependency changed: {location}"
+    return None
+
+# Record the results of a run in the manifest; failed schemas are dropped so they are retried.
+# "changed" is the pending list of rule sets to (re)load into iso_dq_rules: stems parsed by
+# this run are added to it, and only pyLoad_iso_dq_rules removes them (mark_loaded) once loaded.
+def update_manifest(manifest, results, hashes, sources, fmt, current_stems):
+    schemas = manifest["schemas"]
+    for stem in list(schemas):
+        if stem not in current_stems:
+            del schemas[stem]
+    changed = [stem for stem in manifest.get("changed", []) if stem in current_stems]
+    for label, stem, count, error, deps in results:
+        if error is None:
+            schemas[stem] = {"source": sources[stem], "sha256": hashes[stem], "deps": deps,
+                             "format": fmt, "entries": count}
+            if stem not in changed:
+                changed.append(stem)
+        else:
+            schemas.pop(stem, None)
+    # stems whose rule sets must be (re)loaded into iso_dq_rules (pyLoad_iso_dq_rules --changed-only)
+    manifest["changed"] = changed
+    return manifest
+
+# Called by pyLoad_iso_dq_rules after its commit: the loaded stems are no longer pending
+def mark_loaded(outdir, stems):
+    if not os.path.exists(os.path.join(outdir, MANIFEST_NAME)):
+        return
+    manifest = load_manifest(outdir)
+    loaded = set(stems)
+    manifest["changed"] = [stem for stem in manifest.get("changed", []) if stem not in loaded]
+    save_manifest(outdir, manifest)
+
+# Parse one XSD document and write its metadata; runs in the parent or in a pool worker.
+# Returns (label, output stem, entry count, error message or None, {dependency: hash}).
+# graph_cache: optional xsdSchemaGraph cache directory shared with the other XSD tools
+def parse_one(data, base_filename, outdir, stem, label, fmt="json", graph_cache=None):
+    deps = {}
+    try:
+        graph = schema_graph_from_bytes(data, base_filename, source=label, cache_dir=graph_cache)
+        deps = dict(graph["deps"])
+        metadata = graph_metadata(graph)
+        save_metadata(metadata, outdir, stem, fmt)
+        return label, stem, len(metadata), None, deps
+    except Exception as e:
+        return label, stem, 0, str(e), deps
+
+def _parse_one_job(job):
+    return parse_one(*job)
+
+def _init_db_worker(db_schemas, db_hashes=None):
+    _DB_SCHEMAS.clear()
+    _DB_SCHEMAS.update(db_schemas)
+    _DB_HASHES.clear()
+    _DB_HASHES.update(db_hashes or {})
+
+# Run parse_one over jobs, in a process pool when workers > 1.
+# Results come back in job order, so the log reads the same either way.
+def run_parse_jobs(jobs, workers=1, initializer=None, initargs=()):
+    if workers <= 1 or len(jobs) <= 1:
+        if initializer:
+            initializer(*initargs)
+        return [parse_one(*job) for job in jobs]
+    # jobs sharing includes are adjacent (sorted names), so chunking keeps them on one worker's cache
+    chunksize = max(1, len(jobs) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers, initializer=initializer, initargs=initargs) as pool:
+        return list(pool.map(_parse_one_job, jobs, chunksize=chunksize))
+
+def _report_results(results, stats, fmt):
+    for label, stem, count, error, _ in results:
+        if error is None:
+            print(f"Parsed {label} -> {output_label(stem, fmt)} ({count} entries)")
+            stats["parsed"] += 1
+        else:
+            print(f"ERROR parsing {label}: {error}")
+            stats["errors"] += 1
+
 # Load from folder
-def parse_folder(folder, outdir):
-    stats = {"files": 0, "parsed": 0, "errors": 0}
+def parse_folder(folder, outdir, workers=1, fmt="json", incremental=False, graph_cache=None):
+    stats = {"files": 0, "parsed": 0, "skipped": 0, "errors": 0}
+    manifest = load_manifest(outdir)
+    file_hashes = {}
+
+    def current_dep_hash(location):
+        if location not in file_hashes:
+            try:
+                with open(location, "rb") as fh:
+                    file_hashes[location] = sha256_hex(fh.read())
+            except OSError:
+                file_hashes[location] = None
+        return file_hashes[location]
+
+    jobs, hashes, sources = [], {}, {}
     for fname in sorted(os.listdir(folder)):
         if not fname.lower().endswith(".xsd"):
             continue
         stats["files"] += 1
         path = os.path.join(folder, fname)
+        # save metadata named after xsd
+        stem = os.path.splitext(fname)[0]
         try:
-            tree = etree.parse(path)
-            metadata = parse_schema(tree, base_filename=path)
-            # save json file named after xsd
-            outname = os.path.splitext(fname)[0] + ".dq.json"
-            save_metadata_json(metadata, os.path.join(outdir, outname))
-            print(f"Parsed {fname} -> {outname} ({len(metadata)} entries)")
-            stats["parsed"] += 1
+            with open(path, "rb") as fh:
+                data = fh.read()
         except Exception as e:
             print(f"ERROR parsing {fname}: {e}")
             stats["errors"] += 1
+            continue
+        hashes[stem] = file_hashes[os.path.normpath(path)] = sha256_hex(data)
+        sources[stem] = fname
+        if incremental and reparse_reason(manifest["schemas"].get(stem), hashes[stem], fmt, outdir, stem,
+                                          current_dep_hash) is None:
+            stats["skipped"] += 1
+            continue
+        jobs.append((data, path, outdir, stem, fname, fmt, graph_cache))
+    results = run_parse_jobs(jobs, workers)
+    _report_results(results, stats, fmt)
+    save_manifest(outdir, update_manifest(manifest, results, hashes, sources, fmt, set(sources)))
     return stats
 
 # Load from Oracle iso_xsd_repository (requires cx_Oracle)
-def parse_from_db(db_user, db_pass, db_dsn, outdir, table="iso_xsd_repository"):
+def parse_from_db(db_user, db_pass, db_dsn, outdir, table="iso_xsd_repository", workers=1, fmt="json",
+                  incremental=False, graph_cache=None):
+    """
+    All rows are read up front; includes/imports are resolved against the other
+    rows by file_name (latest xsd_id wins), so DB mode sees the same schema set
+    as folder mode.
+    incremental: reparse only rows whose sha256_hash, or the hash of a row they
+    include, differs from the manifest. When every row has sha256_hash and none
+    changed, xsd_content is not fetched at all.
+    """
     try:
         import cx_Oracle
     except Exception:
         raise RuntimeError("cx_Oracle not installed. Install with: pip install cx_Oracle")
+    manifest = load_manifest(outdir)
     conn = cx_Oracle.connect(db_user, db_pass, db_dsn)
     cur = conn.cursor()
-    cur.execute(f"SELECT xsd_id, file_name, xsd_content FROM {table} ORDER BY xsd_id")
+
+    def stem_for(xsd_id, file_name):
+        return f"{xsd_id}_{os.path.splitext(file_name)[0]}"
+
+    # schemas: [(stem, file_name, hash)] -> stems that need a reparse
+    def plan(schemas):
+        db_hashes = {os.path.basename(file_name): h for _, file_name, h in schemas if h}
+        current = lambda location: db_hashes.get(location[3:]) if location.startswith("db:") else None
+        return {stem for stem, _, h in schemas
+                if not h or reparse_reason(manifest["schemas"].get(stem), h, fmt, outdir, stem, current) is not None}
+
+    if incremental:
+        cur.execute(f"SELECT xsd_id, file_name, sha256_hash FROM {table} ORDER BY xsd_id")
+        meta_rows = cur.fetchall()
+        if not plan([(stem_for(xsd_id, file_name), file_name, h) for xsd_id, file_name, h in meta_rows]):
+            cur.close()
+            conn.close()
+            print(f"All {len(meta_rows)} schemas unchanged; nothing to parse.")
+            return {"rows": len(meta_rows), "parsed": 0, "skipped": len(meta_rows), "errors": 0}
+
+    cur.execute(f"SELECT xsd_id, file_name, sha256_hash, xsd_content FROM {table} ORDER BY xsd_id")
     rows = cur.fetchall()
-    stats = {"rows": len(rows), "parsed": 0, "errors": 0}
-    for xsd_id, file_name, xsd_content in rows:
+    stats = {"rows": len(rows), "parsed": 0, "skipped": 0, "errors": 0}
+    candidates = []
+    db_schemas, db_hashes = {}, {}
+    for xsd_id, file_name, sha256_hash, xsd_content in rows:
+        label = f"DB row {xsd_id} ({file_name})"
         try:
             # xsd_content may be cx_Oracle LOB or string
             if hasattr(xsd_content, "read"):
                 xsd_text = xsd_content.read()
             else:
                 xsd_text = str(xsd_content)
-            tree = etree.fromstring(xsd_text.encode("utf-8"))
-            # lxml expects Element, turn into ElementTree
-            tree_et = etree.ElementTree(tree)
-            metadata = parse_schema(tree_et, base_filename=None)
-            outname = f"{xsd_id}_{os.path.splitext(file_name)[0]}.dq.json"
-            save_metadata_json(metadata, os.path.join(outdir, outname))
-            print(f"Parsed DB row {xsd_id} ({file_name}) -> {outname} ({len(metadata)} entries)")
-            stats["parsed"] += 1
+            data = xsd_text.encode("utf-8")
+            h = sha256_hash or sha256_hex(data)
+            db_schemas[os.path.basename(file_name)] = data
+            db_hashes[os.path.basename(file_name)] = h
+            stem = stem_for(xsd_id, file_name)
+            job = (data, f"db:{os.path.basename(file_name)}", outdir, stem, label, fmt, graph_cache)
+            candidates.append((stem, file_name, h, job))
         except Exception as e:
-            print(f"ERROR parsing DB row {xsd_id} ({file_name}): {e}")
+            print(f"ERROR parsing {label}: {e}")
             stats["errors"] += 1
     cur.close()
     conn.close()
+
+    todo = plan([c[:3] for c in candidates]) if incremental else None
+    jobs, hashes, sources = [], {}, {}
+    for stem, _, h, job in candidates:
+        hashes[stem] = h
+        sources[stem] = job[4]
+        if todo is not None and stem not in todo:
+            stats["skipped"] += 1
+            continue
+        jobs.append(job)
+    results = run_parse_jobs(jobs, workers, initializer=_init_db_worker, initargs=(db_schemas, db_hashes))
+    _report_results(results, stats, fmt)
+    save_manifest(outdir, update_manifest(manifest, results, hashes, sources, fmt, set(sources)))
     return stats
 
 # CLI
@@ -358,6 +297,14 @@ def main():
     p.add_argument("--db-user", help="DB user (for --db)")
     p.add_argument("--db-pass", help="DB pass (for --db)")
     p.add_argument("--db-dsn", help="DB dsn (for --db), e.g. host:1521/service")
+    p.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                   help="Parallel parser processes (default: CPU count; 1 = sequential)")
+    p.add_argument("--format", choices=OUTPUT_FORMATS, default="json",
+                   help="Write .dq.json, compact .dq.bin (pyDqMetaBin) or both")
+    p.add_argument("--incremental", action="store_true",
+                   help="Reparse only schemas whose content or include/import hashes changed since the last run "
+                        f"(tracked in <outdir>/{MANIFEST_NAME})")
+    p.add_argument("--graph-cache", help="xsdSchemaGraph cache directory to reuse resolved schema graphs")
     args = p.parse_args()
 
     os.makedirs(args.outdir, exist_ok=True)
@@ -366,13 +313,15 @@ def main():
         if not (args.db_user and args.db_pass and args.db_dsn):
             print("DB mode requires --db-user, --db-pass and --db-dsn")
             return
-        stats = parse_from_db(args.db_user, args.db_pass, args.db_dsn, args.outdir)
+        stats = parse_from_db(args.db_user, args.db_pass, args.db_dsn, args.outdir, workers=args.workers,
+                              fmt=args.format, incremental=args.incremental, graph_cache=args.graph_cache)
         print("DB parse stats:", stats)
     else:
         if not args.folder:
             print("Local folder mode requires --folder <path>")
             return
-        stats = parse_folder(args.folder, args.outdir)
+        stats = parse_folder(args.folder, args.outdir, workers=args.workers, fmt=args.format,
+                             incremental=args.incremental, graph_cache=args.graph_cache)
         print("Folder parse stats:", stats)
 
 if __name__ == "__main__":
@@ -0,0 +1,12 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(autouse=True)
+def mask_key(monkeypatch):
+    """Every test runs with a masking key unless it removes it."""
+    monkeypatch.setenv("MASK_KEY", "test-masking-key")
@@ -0,0 +1,95 @@
+import os
+import sys
+import subprocess
+import pytest
+import CompareXSD
+
+XSD = """<?xml version="1.0" encoding="UTF-8"?>
+<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema"
+           xmlns="urn:iso:std:iso:20022:tech:xsd:{name}"
+           targetNamespace="urn:iso:std:iso:20022:tech:xsd:{name}" elementFormDefault="qualified">
+  <xs:element name="Document">
+    <xs:complexType><xs:sequence><xs:element name="MsgId" type="xs:string"/></xs:sequence></xs:complexType>
+  </xs:element>
+</xs:schema>
+"""
+
+def _write(folder, fname, name):
+    (folder / fname).write_text(XSD.format(name=name), encoding="utf-8")
+
+def test_schema_tools_do_not_import_the_engine():
+    code = "import sys, CompareXSD; sys.exit('isoDqEngine' in sys.modules)"
+    assert subprocess.run([sys.executable, "-c", code], cwd=os.path.dirname(CompareXSD.__file__)).returncode == 0
+
+def test_load_catalog_dir(tmp_path):
+    _write(tmp_path, "pacs.008.001.08.xsd", "pacs.008.001.08")
+    _write(tmp_path, "pacs.008.001.09.xsd", "pacs.008.001.09")
+    catalog = CompareXSD.load_catalog_dir(str(tmp_path), cache_dir=str(tmp_path / "cache"))
+    assert list(catalog) == ["pacs.008.001.08", "pacs.008.001.09"]
+
+def test_load_catalog_dir_rejects_duplicate_schema_names(tmp_path):
+    # a renamed copy still carries the namespace of the original version
+    _write(tmp_path, "pacs.008.001.08.xsd", "pacs.008.001.08")
+    _write(tmp_path, "pacs.008.001.08_copy.xsd", "pacs.008.001.08")
+    with pytest.raises(ValueError, match=r"pacs\.008\.001\.08 defined twice: "
+                                         r"pacs\.008\.001\.08\.xsd and pacs\.008\.001\.08_copy\.xsd"):
+        CompareXSD.load_catalog_dir(str(tmp_path), cache_dir=str(tmp_path / "cache"))
+
+VERSIONED_XSD = """<?xml version="1.0" encoding="UTF-8"?>
+<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema" xmlns="urn:iso:std:iso:20022:tech:xsd:{name}"
+           targetNamespace="urn:iso:std:iso:20022:tech:xsd:{name}" elementFormDefault="qualified">
+  <xs:element name="Document" type="Document"/>
+  <xs:complexType name="Document">
+    <xs:sequence>
+      <xs:element name="GrpHdr" type="GroupHeader"/>
+      <xs:element name="Tx" type="Transaction" maxOccurs="unbounded"/>
+    </xs:sequence>
+  </xs:complexType>
+  <xs:complexType name="GroupHeader">
+    <xs:sequence><xs:element name="MsgId" type="Max35Text"/><xs:element name="Nm" type="Max35Text"/></xs:sequence>
+  </xs:complexType>
+  <xs:complexType name="Transaction">
+    <xs:sequence>
+      <xs:element name="EndToEndId" type="Max35Text"/>
+      <xs:element name="Ref" type="Max35Text"/>
+      <xs:element name="Amt" type="ActiveCurrencyAndAmount"/>
+    </xs:sequence>
+  </xs:complexType>
+  <xs:complexType name="ActiveCurrencyAndAmount">
+    <xs:simpleContent><xs:extension base="xs:decimal">
+      <xs:attribute name="Ccy" type="ActiveCurrencyCode" use="required"/>
+    </xs:extension></xs:simpleContent>
+  </xs:complexType>
+  <xs:simpleType name="Max35Text">
+    <xs:restriction base="xs:string"><xs:minLength value="1"/><xs:maxLength value="{max_length}"/></xs:restriction>
+  </xs:simpleType>
+  <xs:simpleType name="ActiveCurrencyCode">
+    <xs:restriction base="xs:string"><xs:pattern value="{ccy_pattern}"/></xs:restriction>
+  </xs:simpleType>
+</xs:schema>
+"""
+
+def _graph(tmp_path, name, max_length=35, ccy_pattern="[A-Z]{3,3}"):
+    path = tmp_path / f"{name}.xsd"
+    path.write_text(VERSIONED_XSD.format(name=name, max_length=max_length, ccy_pattern=ccy_pattern),
+                    encoding="utf-8")
+    return CompareXSD.load_schema_graph(str(path), cache_dir=None)
+
+def _changes(rows):
+    return [(r["Change"], r["Type"], r["Item"], r["Old"], r["New"], r["Paths"]) for r in rows]
+
+def test_versions_differing_only_in_namespace_have_no_changes(tmp_path):
+    assert CompareXSD.diff_schema_graphs(_graph(tmp_path, "pacs.008.001.08"),
+                                         _graph(tmp_path, "pacs.008.001.09")) == []
+
+def test_shared_simple_type_facet_change_reported_once(tmp_path):
+    rows = CompareXSD.diff_schema_graphs(_graph(tmp_path, "pacs.008.001.08"),
+                                         _graph(tmp_path, "pacs.008.001.09", max_length=70))
+    # 4 elements in 2 complex types use Max35Text
+    assert _changes(rows) == [("constraint maxLength", "Max35Text", "Max35Text", "35", "70", 4)]
+
+def test_attribute_type_facet_change_reported(tmp_path):
+    rows = CompareXSD.diff_schema_graphs(_graph(tmp_path, "pacs.008.001.08"),
+                                         _graph(tmp_path, "pacs.008.001.09", ccy_pattern="[A-Z]{3}"))
+    assert _changes(rows) == [("constraint pattern", "ActiveCurrencyCode", "ActiveCurrencyCode",
+                               "[A-Z]{3,3}", "[A-Z]{3}", 1)]
@@ -0,0 +1,29 @@
+import pytest
+from isoDqEngine import MessageContext, RuleCatalog, load_engine_config, validate_message
+
+NS = "urn:iso:std:iso:20022:tech:xsd:pacs.008.001.08"
+RULES = {"rules": [{"path": "/Document/FIToFICstmrCdtTrf/GrpHdr/MsgId", "required": 1}]}
+
+DEFAULT_NS_MSG = f"""<Document xmlns="{NS}"><FIToFICstmrCdtTrf><GrpHdr><MsgId>M1</MsgId></GrpHdr>
+</FIToFICstmrCdtTrf></Document>"""
+PREFIXED_MSG = f"""<ns:Document xmlns:ns="{NS}"><ns:FIToFICstmrCdtTrf><ns:GrpHdr><ns:MsgId>M1</ns:MsgId>
+</ns:GrpHdr></ns:FIToFICstmrCdtTrf></ns:Document>"""
+OTHER_PREFIX_MSG = f"""<iso:Document xmlns:iso="{NS}" xmlns:ns="urn:example:other"><iso:FIToFICstmrCdtTrf>
+<iso:GrpHdr><iso:MsgId>M1</iso:MsgId></iso:GrpHdr></iso:FIToFICstmrCdtTrf></iso:Document>"""
+
+@pytest.mark.parametrize("xml", [DEFAULT_NS_MSG, PREFIXED_MSG, OTHER_PREFIX_MSG])
+def test_version_detected_whatever_the_prefix(xml):
+    ctx = MessageContext(xml, "pacs.008.001.07", load_engine_config())
+    assert ctx.ns_uri == NS
+    assert ctx.detected_xsd_name == "pacs.008.001.08"
+
+def test_prefixed_message_validated_as_its_version():
+    catalog = RuleCatalog({"pacs.008.001.07": {"rules": []}, "pacs.008.001.08": RULES})
+    report = validate_message(1, PREFIXED_MSG, "pacs.008.001.07", catalog, load_engine_config())
+    assert report["validated_as"] == "pacs.008.001.08"
+    assert [(r["valid"], r["strategy"]) for r in report["dq_report"]] == [("ok", "strict")]
+
+def test_catalog_rejects_two_rule_sets_for_one_version():
+    with pytest.raises(ValueError, match=r"pacs\.008\.001\.08 given twice: pacs\.008\.001\.08 and "
+                                         r"12_pacs\.008\.001\.08\.xsd"):
+        RuleCatalog({"pacs.008.001.08": RULES, "12_pacs.008.001.08.xsd": RULES})
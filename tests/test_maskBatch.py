@@ -0,0 +1,82 @@
+import csv
+import os
+import sqlite3
+
+import pytest
+from openpyxl import Workbook
+
+from maskBatch import mask_batch
+from maskPolicy import MaskPolicy
+
+POLICY = {
+    "rules": [
+        {"columns": ["UserID"], "mask": "format_preserving"},
+        {"columns": ["*Phone*"], "mask": "keep_last_4"},
+        {"columns": ["Email"], "mask": "email"},
+        {"columns": ["TaxID"], "mask": "regex", "pattern": r"\d{2}-\d{7}", "replace": "XX-XXXXXXX"},
+        {"columns": ["re:Notes?"], "mask": "free_text"},
+        {"columns": ["AccountNo"], "mask": "digits"},
+        {"columns": ["Secret"], "mask": "encrypt", "mode": "siv"},
+    ]
+}
+
+
+@pytest.fixture
+def inputs(tmp_path, monkeypatch):
+    monkeypatch.setenv("MASK_ENCRYPTION_KEY", "00" * 32)
+    src = tmp_path / "in"
+    src.mkdir()
+    header = ["UserID", "Mobile Phone", "Email", "TaxID", "Notes", "AccountNo", "Secret", "Other"]
+    for f in range(3):
+        wb = Workbook()
+        wb.remove(wb.active)
+        for s in range(2):
+            ws = wb.create_sheet(f"s{s}")
+            ws.append(header)
+            for i in range(300):
+                ws.append([f"U{i:05d}", f"+44 7700 {i:06d}", f"user{i}@bank.com", f"{i % 90 + 10}-{i:07d}",
+                           f"call *ref {i}* or 4111-1111-1111-{i:04d}", i * 7, f"s{i % 5}", None if i % 3 else "x"])
+        wb.save(src / f"f{f}.xlsx")
+    with open(src / "g.csv", "w", newline="") as fh:
+        w = csv.writer(fh)
+        w.writerow(header)
+        for i in range(50):
+            w.writerow([f"U{i}", "555-0100", "a@b.com", "12-3456789", "*x*", i, "s", ""])
+    return src
+
+
+def read_outputs(outdir):
+    return {name: open(os.path.join(outdir, name), "rb").read() for name in sorted(os.listdir(outdir))}
+
+
+def test_deterministic_policy_gives_same_bytes_with_any_workers(inputs, tmp_path):
+    policy = MaskPolicy.from_dict(POLICY)
+    assert policy.deterministic
+    mask_batch(str(inputs), str(tmp_path / "w1"), policy, workers=1, chunk_rows=100)
+    mask_batch(str(inputs), str(tmp_path / "w3"), policy, workers=3, chunk_rows=70)
+    one, three = read_outputs(tmp_path / "w1"), read_outputs(tmp_path / "w3")
+    assert list(one) == ["f0.xlsx", "f1.xlsx", "f2.xlsx", "g.csv"]
+    assert one == three
+
+
+def test_gcm_and_tokenize_are_not_deterministic(monkeypatch, tmp_path):
+    monkeypatch.setenv("MASK_ENCRYPTION_KEY", "00" * 32)
+    assert not MaskPolicy.from_dict({"rules": [{"columns": ["a"], "mask": "encrypt"}]}).deterministic
+    assert not MaskPolicy.from_dict(
+        {"rules": [{"columns": ["a"], "mask": "tokenize", "vault": str(tmp_path / "v")}]}).deterministic
+
+
+def test_shared_cache_is_filled_and_reused(inputs, tmp_path):
+    policy = MaskPolicy.from_dict(POLICY)
+    cache_path = str(tmp_path / "release.maskcache")
+    mask_batch(str(inputs), str(tmp_path / "plain"), policy, workers=1)
+    mask_batch(str(inputs), str(tmp_path / "first"), policy, workers=2, cache_path=cache_path)
+    with sqlite3.connect(cache_path) as conn:
+        entries = conn.execute("SELECT COUNT(*) FROM mask_cache").fetchone()[0]
+    assert entries > 0
+    mask_batch(str(inputs), str(tmp_path / "second"), policy, workers=2, cache_path=cache_path)
+    with sqlite3.connect(cache_path) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM mask_cache").fetchone()[0] == entries
+    plain = read_outputs(tmp_path / "plain")
+    assert read_outputs(tmp_path / "first") == plain
+    assert read_outputs(tmp_path / "second") == plain
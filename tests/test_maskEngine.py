@@ -0,0 +1,56 @@
+import hashlib
+import tracemalloc
+
+import numpy as np
+import pytest
+
+from maskEngine import keystream, mask_key, mask_texts
+
+
+def test_long_outlier_does_not_widen_every_block():
+    ids = [f"U{i:07d}" for i in range(100000)]
+    texts = ["A1" * 2500] + ids
+    tracemalloc.start()
+    masked = mask_texts(texts)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    # one (100k x 5000) code-point matrix alone would be 2 GB
+    assert peak < 200 * 1024 * 1024
+    assert masked[0] == mask_texts([texts[0]])[0]
+    assert masked[1:4] == mask_texts(ids[:3])
+    assert [len(m) for m in masked] == [len(t) for t in texts]
+
+
+def test_masks_do_not_depend_on_block_layout():
+    texts = ["abc", "", "x" * 300, "Z9-1", "abc"]
+    assert mask_texts(texts) == [mask_texts([t])[0] for t in texts]
+
+
+def test_missing_key_is_an_error(monkeypatch):
+    monkeypatch.delenv("MASK_KEY")
+    with pytest.raises(ValueError, match="MASK_KEY"):
+        mask_key()
+    with pytest.raises(ValueError):
+        mask_texts(["123"])
+    assert mask_key("explicit") == b"explicit"
+
+
+def _reference_keystream(text, width, key, person):
+    # one keyed BLAKE2b call per value and 64-byte block, as masks have always been derived
+    need = 2 * len(text)
+    out = b""
+    block = 0
+    while len(out) < need:
+        out += hashlib.blake2b(text.encode("utf-8"), digest_size=64, key=key, person=person,
+                               salt=block.to_bytes(16, "little")).digest()
+        block += 1
+    return np.frombuffer(out[:need] + b"\0" * (2 * width - need), dtype="<u2")
+
+
+@pytest.mark.parametrize("mode", ["alnum", "digits"])
+def test_keystream_matches_per_value_blake2b(mode):
+    texts = ["", "a", "é€", "x" * 32, "y" * 33, "Z9-" * 40]
+    key = mask_key()
+    ks = keystream(texts, 120, key, mode)
+    for row, text in zip(ks, texts):
+        assert (row == _reference_keystream(text, 120, key, f"mask:{mode}".encode("ascii"))).all()
@@ -0,0 +1,17 @@
+import pandas as pd
+from maskEngine import mask_texts
+from maskPolicy import MaskPolicy
+
+def _apply(mask, values):
+    policy = MaskPolicy.from_dict({"rules": [{"columns": ["Comment"], "mask": mask}]})
+    return policy.apply(pd.DataFrame({"Comment": values}))["Comment"].tolist()
+
+def test_embedded_numbers_masks_each_digit_run():
+    out = _apply("embedded_numbers", ["ref 123 paid 4567, again 123", "no digits", None])
+    run_123, run_4567 = mask_texts(["123", "4567"], "digits")
+    assert out[:2] == [f"ref {run_123} paid {run_4567}, again {run_123}", "no digits"]
+    assert pd.isna(out[2])
+
+def test_embedded_numbers_differs_from_digits():
+    text = "ref 123 paid 4567, again 123"
+    assert _apply("embedded_numbers", [text]) != _apply("digits", [text])
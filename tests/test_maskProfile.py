@@ -0,0 +1,49 @@
+import pytest
+from maskProfile import classify, iban_ok, luhn_ok, profile_column, propose_policy
+
+def test_luhn():
+    assert luhn_ok("4111111111111111")
+    assert luhn_ok("79927398713")
+    assert not luhn_ok("4111111111111112")
+
+def test_iban_mod97_and_length():
+    assert iban_ok("DE89370400440532013000")
+    assert iban_ok("GB29 NWBK 6016 1331 9268 19")
+    assert not iban_ok("DE89370400440532013001")     # check digits
+    assert not iban_ok("DE8937040044053201300")      # German IBANs have 22 characters
+    assert not iban_ok("XX89370400440532013000")     # unknown country
+
+@pytest.mark.parametrize("text, kind", [
+    ("john.doe@bank.com", "email"),
+    ("DE89 3704 0044 0532 0130 00", "iban"),
+    ("DEUTDEFF", "bic"),
+    ("4111-1111-1111-1111", "pan"),
+    ("4111-1111-1111-1112", None),
+    ("123-45-6789", "ssn"),
+    ("+49 170 1234567", "phone"),
+    ("(212) 555-0199", "phone"),
+    ("+491701234567", "phone"),
+    ("2024-01-31", None),
+    ("31.01.2024", None),
+    ("1234567.89", None),
+    ("12345678", None),
+])
+def test_classify(text, kind):
+    assert classify(text) == kind
+
+def test_invalid_ssn_area_is_not_ssn():
+    assert classify("666-45-6789") != "ssn"
+
+def test_low_cardinality_bic_lookalikes_are_not_bics():
+    entry = profile_column("Status", ["ACCEPTED"] * 40 + ["REJECTED"] * 10)
+    assert entry["kind"] is None
+    assert propose_policy([entry])["rules"] == []
+
+@pytest.mark.parametrize("name, values", [
+    ("Counterparty BIC", ["DEUTDEFF"] * 20),                            # header
+    ("Counterparty", ["DEUTDEFF", "NWBKGB2L", "COBADEFF"] * 10),        # digit in a location code
+    ("Counterparty", [f"BANK{cc}XX" for cc in ("DE", "FR", "GB", "IT", "ES", "NL", "BE", "AT", "CH", "SE",
+                                              "NO", "DK")]),          # mostly distinct
+])
+def test_bic_columns(name, values):
+    assert profile_column(name, values)["kind"] == "bic"
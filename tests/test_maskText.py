@@ -0,0 +1,29 @@
+import re
+
+from maskText import mask_free_text
+
+
+def star(texts):
+    return mask_free_text(texts, kinds=("star",))
+
+
+def test_star_span_may_cross_line_breaks():
+    out, = star(["see *first\nsecond* end"])
+    assert re.fullmatch(r"see \*[a-z]{5}\n[a-z]{6}\* end", out)
+    assert "first" not in out and "second" not in out
+
+
+def test_star_keeps_inner_whitespace_and_punctuation():
+    out, = star(["* Ab 12, x *"])
+    assert re.fullmatch(r"\* [A-Z][a-z] \d\d, [a-z] \*", out)
+
+
+def test_text_between_starred_words_is_not_masked():
+    out, = star(["*a* b *c*"])
+    assert out[3:6] == " b "
+    assert out[0] == out[2] == out[6] == out[8] == "*"
+
+
+def test_same_starred_word_same_mask():
+    a, b = star(["*secret* one", "two *secret*"])
+    assert a[:8] == b[4:]
@@ -0,0 +1,50 @@
+import json
+from collections import OrderedDict
+import isoDqEngine
+import pyParseXsd_DQ
+from pyDqMetaBin import DqMetaBin, encode_metadata, load_rules_file
+from xsdSchemaGraph import graph_metadata, schema_graph_from_bytes
+
+NS = "urn:iso:std:iso:20022:tech:xsd:pacs.008.001.08"
+XSD = f"""<?xml version="1.0" encoding="UTF-8"?>
+<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema" xmlns="{NS}" targetNamespace="{NS}"
+           elementFormDefault="qualified">
+  <xs:element name="Document" type="Document"/>
+  <xs:complexType name="Document">
+    <xs:sequence><xs:element name="Amt" type="ActiveCurrencyAndAmount"/>
+      <xs:choice><xs:element name="Id" type="Max35Text"/><xs:element name="Nm" type="Max35Text" minOccurs="0"/>
+      </xs:choice></xs:sequence>
+  </xs:complexType>
+  <xs:complexType name="ActiveCurrencyAndAmount">
+    <xs:simpleContent><xs:extension base="xs:decimal">
+      <xs:attribute name="Ccy" type="xs:string" use="required"/>
+    </xs:extension></xs:simpleContent>
+  </xs:complexType>
+  <xs:simpleType name="Max35Text">
+    <xs:restriction base="xs:string"><xs:minLength value="1"/><xs:maxLength value="35"/></xs:restriction>
+  </xs:simpleType>
+</xs:schema>
+""".encode("utf-8")
+
+def _metadata():
+    # through JSON, as the .dq.json writer sees it
+    metadata = graph_metadata(schema_graph_from_bytes(XSD, "pacs.008.001.08.xsd"))
+    return json.loads(json.dumps(metadata), object_pairs_hook=OrderedDict)
+
+def test_bin_round_trips_entries_in_json_key_order():
+    metadata = _metadata()
+    assert any(md.get("kind") == "attribute" for md in metadata.values())
+    with DqMetaBin(encode_metadata(metadata)) as meta:
+        decoded = meta.to_metadata()
+    # same text as the .dq.json writer produces, key order included
+    assert json.dumps(decoded, indent=2) == json.dumps(metadata, indent=2)
+
+def test_rule_catalog_from_dir_prefers_bin(tmp_path):
+    metadata = _metadata()
+    pyParseXsd_DQ.save_metadata(metadata, str(tmp_path), "pacs.008.001.08", fmt="bin")
+    # a stale .dq.json next to the .dq.bin is ignored
+    (tmp_path / "pacs.008.001.08.dq.json").write_text("{}", encoding="utf-8")
+    catalog = isoDqEngine.load_rule_catalog_dir(str(tmp_path))
+    rules = catalog.rules_for("pacs.008.001.08")
+    assert [r["path"] for r in rules] == [r["path"] for r in load_rules_file(str(tmp_path / "pacs.008.001.08.dq.bin"))]
+    assert "Document/Amt/@Ccy" in [r["path"] for r in rules]
@@ -0,0 +1,36 @@
+import json
+import pyParseXsd_DQ
+
+XSD = """<?xml version="1.0" encoding="UTF-8"?>
+<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema" targetNamespace="urn:t" elementFormDefault="qualified">
+  <xs:element name="{root}" type="xs:string"/>
+</xs:schema>
+"""
+
+def _pending(outdir):
+    with open(outdir / pyParseXsd_DQ.MANIFEST_NAME, encoding="utf-8") as fh:
+        return json.load(fh)["changed"]
+
+def test_changed_stays_pending_until_loaded(tmp_path):
+    src, out = tmp_path / "xsd", tmp_path / "dq_rules"
+    src.mkdir()
+    out.mkdir()
+    (src / "x.xsd").write_text(XSD.format(root="X"), encoding="utf-8")
+    (src / "y.xsd").write_text(XSD.format(root="Y"), encoding="utf-8")
+    pyParseXsd_DQ.parse_folder(str(src), str(out), incremental=True, graph_cache=None)
+    assert _pending(out) == ["x", "y"]
+
+    # nothing changed, but nothing was loaded either
+    stats = pyParseXsd_DQ.parse_folder(str(src), str(out), incremental=True, graph_cache=None)
+    assert stats["skipped"] == 2
+    assert _pending(out) == ["x", "y"]
+
+    pyParseXsd_DQ.mark_loaded(str(out), ["x"])
+    (src / "y.xsd").write_text(XSD.format(root="Y2"), encoding="utf-8")
+    pyParseXsd_DQ.parse_folder(str(src), str(out), incremental=True, graph_cache=None)
+    assert _pending(out) == ["y"]
+
+    # schemas removed from the source are no longer pending
+    (src / "y.xsd").unlink()
+    pyParseXsd_DQ.parse_folder(str(src), str(out), incremental=True, graph_cache=None)
+    assert _pending(out) == []
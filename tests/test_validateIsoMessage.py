@@ -0,0 +1,87 @@
+import json
+import pytest
+import isoDqEngine
+import validateIsoMessage
+
+NS = "urn:iso:std:iso:20022:tech:xsd:pacs.008.001.08"
+MSG = f'<Document xmlns="{NS}"><FIToFICstmrCdtTrf><GrpHdr><MsgId>M1</MsgId></GrpHdr></FIToFICstmrCdtTrf></Document>'
+
+class FakeCursor:
+    def __init__(self, rows=(), error=None):
+        self.rows = list(rows)
+        self.error = error
+        self.executed = []
+        self.rowcount = 1
+        self.arraysize = 100
+        self.prefetchrows = 2
+        self.closed = False
+
+    def execute(self, sql, **binds):
+        if self.error:
+            raise self.error
+        self.executed.append((sql, binds))
+
+    def __iter__(self):
+        return iter(self.rows)
+
+    def fetchall(self):
+        raise AssertionError("bucket rows must be streamed, not fetched at once")
+
+    def close(self):
+        self.closed = True
+
+class FakeConnection:
+    def __init__(self, read_cur):
+        self.read_cur = read_cur
+        self.commits = 0
+
+    def cursor(self):
+        return self.read_cur
+
+    def commit(self):
+        self.commits += 1
+
+def test_process_bucket_streams_rows_and_writes_with_its_own_cursor():
+    rows = [(f"m{i}", MSG, "pacs.008.001.08") for i in range(3)]
+    read_cur, write_cur = FakeCursor(rows), FakeCursor()
+    catalog = isoDqEngine.RuleCatalog({"pacs.008.001.08": {"rules": [{"path": "/Document/FIToFICstmrCdtTrf"}]}})
+    count = validateIsoMessage.process_bucket(FakeConnection(read_cur), write_cur, catalog,
+                                              isoDqEngine.load_engine_config(), 5, 64)
+    assert count == 3
+    assert read_cur.closed
+    assert read_cur.arraysize == read_cur.prefetchrows == validateIsoMessage.FETCH_ARRAYSIZE
+    [(sql, binds)] = read_cur.executed
+    assert "ORA_HASH(msg_id, 63)" in sql and binds == {"b": 5, "fetch_lobs": False}
+    written = [b["mid"] for sql, b in write_cur.executed if sql.startswith("UPDATE iso_message_dq_report")]
+    assert written == ["m0", "m1", "m2"]
+    assert json.loads(write_cur.executed[0][1]["dq"])["validated_as"] == "pacs.008.001.08"
+
+def test_ensure_report_tables_raises_ddl_errors():
+    with pytest.raises(RuntimeError, match="ORA-01031"):
+        validateIsoMessage.ensure_report_tables(FakeCursor(error=RuntimeError("ORA-01031: insufficient privileges")))
+
+class RuleRowsCursor:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def execute(self, sql, **binds):
+        pass
+
+    def fetchall(self):
+        return self.rows
+
+def test_duplicate_rule_rows_keep_the_plain_name(capsys):
+    other = json.dumps({"rules": [{"path": "/Document/Other", "required": 1}]})
+    rows = [("12_pacs.008.001.08", other),
+            ("pacs.008.001.08", json.dumps({"rules": [{"path": "/Document/FIToFICstmrCdtTrf", "required": 1}]})),
+            ("pacs.008.001.09", other)]
+    catalog = validateIsoMessage.load_rule_catalog(RuleRowsCursor(rows))
+    assert [r["path"] for r in catalog.rules_for("pacs.008.001.08")] == ["/Document/FIToFICstmrCdtTrf"]
+    assert catalog.versions("pacs.008") == ["001.08", "001.09"]
+    assert "using pacs.008.001.08, ignoring 12_pacs.008.001.08" in capsys.readouterr().out
+
+def test_duplicate_rule_rows_without_plain_name_pick_the_first():
+    rows = [("20_pacs.008.001.08", json.dumps({"rules": [{"path": "/Document/B"}]})),
+            ("12_pacs.008.001.08", json.dumps({"rules": [{"path": "/Document/A"}]}))]
+    catalog = validateIsoMessage.load_rule_catalog(RuleRowsCursor(rows))
+    assert [r["path"] for r in catalog.rules_for("pacs.008.001.08")] == ["/Document/A"]
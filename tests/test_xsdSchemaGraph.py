@@ -0,0 +1,36 @@
+import xsdSchemaGraph
+from xsdSchemaGraph import graph_metadata, schema_graph_from_bytes
+
+# T reaches the global element E (anonymous type) again: E/t/E is cut by E's guard
+RECURSIVE_XSD = b"""<?xml version="1.0" encoding="UTF-8"?>
+<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema" xmlns="urn:t" targetNamespace="urn:t"
+           elementFormDefault="qualified">
+  <xs:element name="Document" type="Doc"/>
+  <xs:complexType name="Doc">
+    <xs:sequence><xs:element name="A" type="T"/><xs:element ref="E"/></xs:sequence>
+  </xs:complexType>
+  <xs:element name="E">
+    <xs:complexType><xs:sequence><xs:element name="t" type="T"/></xs:sequence></xs:complexType>
+  </xs:element>
+  <xs:complexType name="T">
+    <xs:sequence><xs:element name="V" type="xs:string"/><xs:element ref="E" minOccurs="0"/></xs:sequence>
+  </xs:complexType>
+</xs:schema>
+"""
+
+def _expand_unmemoized(ctx, type_local, type_id, xpath, metadata, parent_types_stack):
+    parent_types_stack.append(type_local)
+    expansion = {}
+    xsdSchemaGraph._type_metadata(ctx, type_id, "", expansion, parent_types_stack)
+    parent_types_stack.pop()
+    for rel_path, md in expansion.items():
+        md = dict(md, path=f"{xpath}/{rel_path}")
+        metadata[md["path"]] = md
+
+def test_expansion_memo_respects_element_guards(monkeypatch):
+    graph = schema_graph_from_bytes(RECURSIVE_XSD, "recursive.xsd")
+    memoized = graph_metadata(graph)
+    monkeypatch.setattr(xsdSchemaGraph, "_expand_named", _expand_unmemoized)
+    unmemoized = graph_metadata(graph)
+    assert list(memoized) == list(unmemoized)
+    assert "Document/E/t/E" in memoized and "Document/E/t/E/t" not in memoized
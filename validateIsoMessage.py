@@ -1,3789 +1,33 @@
 #!/usr/bin/env python3
 """
-dq_validator_options1_2.py
-
-Final DQ validator:
- - Supports standard and non-standard roots (multi-root payloads)
- - Namespace-insensitive (matches by local-name)
- - Wraps multi-root payloads internally (RootWrapper) then removes it from output
- - Returns both full-path and tail-match results (Options 2 and 1)
- - Writes JSON per-message DQ report into iso_message_dq_report (CLOB)
-
-Requirements:
- - lxml
- - cx_Oracle (or adjust to oracledb)
-"""
-
-import json
-import traceback
-import re
-from lxml import etree
-import cx_Oracle
-
-# -------- CONFIGURE --------
-DB_USER = "YOUR_USER"
-DB_PASS = "YOUR_PASS"
-DB_DSN  = "YOUR_HOST:1521/YOUR_SERVICE"
-BATCH_COMMIT = 100
-DRY_RUN = False
-# --------------------------
-
-def lob_to_str(x):
-    if x is None:
-        return ""
-    if hasattr(x, "read"):
-        return x.read()
-    return str(x)
-
-def sanitize_xml(s):
-    return s.lstrip("\ufeff").strip() if s else ""
-
-# parse or wrap multi-root text into a single Element
-def parse_with_wrapper(xml_text):
-    """
-    Returns (root_element, status, repaired_text)
-    root_element: an Element that is the parsing root (may be a wrapped RootWrapper)
-    status: 'OK', 'REPAIRED', 'WRAPPED_MULTIROOT', 'UNRECOVERABLE', ...
-    repaired_text: string representation (useful for regex fallback)
-    """
-    if not xml_text:
-        return None, "EMPTY", None
-
-    xml_text = xml_text.strip()
-    # quick attempt to parse directly
-    try:
-        root = etree.fromstring(xml_text.encode("utf-8"))
-        return root, "OK", xml_text
-    except etree.XMLSyntaxError:
-        pass
-
-    # detect multiple top-level tags by counting probable top tags (simple heuristic)
-    # We look for patterns like <header ...> or <group ...> at start of lines
-    top_tags = re.findall(r'<([A-Za-z0-9_]+)(?:\s|>)', xml_text)
-    # If we have more than one top-level tag before a single root completes, wrap
-    # Heuristic: if more than one top tag and there is not a single enclosing root, wrap.
-    # We'll conservatively wrap whenever we see >1 top tag and no enclosing single root.
-    if len(top_tags) > 1:
-        wrapped = "<RootWrapper>" + xml_text + "</RootWrapper>"
-        try:
-            parser = etree.XMLParser(recover=True)
-            root = etree.fromstring(wrapped.encode("utf-8"), parser)
-            repaired = etree.tostring(root, encoding="unicode")
-            return root, "WRAPPED_MULTIROOT", repaired
-        except Exception:
-            # fall back to recover parse of original
-            try:
-                parser = etree.XMLParser(recover=True)
-                root = etree.fromstring(xml_text.encode("utf-8"), parser)
-                repaired = etree.tostring(root, encoding="unicode")
-                return root, "REPAIRED", repaired
-            except Exception as e:
-                return None, f"UNRECOVERABLE: {str(e)}", None
-
-    # else try recover parse
-    try:
-        parser = etree.XMLParser(recover=True)
-        root = etree.fromstring(xml_text.encode("utf-8"), parser)
-        repaired = etree.tostring(root, encoding="unicode")
-        return root, "REPAIRED", repaired
-    except Exception as e:
-        return None, f"UNRECOVERABLE: {str(e)}", None
-
-def build_ancestor_localnames(node):
-    """
-    Return list of local-names from the top of parsed tree down to node inclusive.
-    If the top is RootWrapper, it will be included here; removal happens later.
-    """
-    if node is None:
-        return []
-    parts = []
-    for a in node.iterancestors():
-        parts.append(etree.QName(a).localname)
-    parts.reverse()
-    parts.append(etree.QName(node).localname)
-    return parts
-
-def build_found_path(node, synthetic_wrapper_name="RootWrapper"):
-    """
-    Build /local-name path from top down to node.
-    If the topmost element equals synthetic_wrapper_name, remove it from returned path.
-    """
-    parts = build_ancestor_localnames(node)
-    if not parts:
-        return None
-    # remove synthetic wrapper if present as first element
-    if parts[0] == synthetic_wrapper_name:
-        parts = parts[1:]
-    return "/" + "/".join(parts) if parts else None
-
-def fallback_raw_exists(xml_text, tag):
-    if not tag:
-        return False
-    patt = fr"<(?:\w+:)?{re.escape(tag)}\b[^>]*>.*?</(?:\w+:)?{re.escape(tag)}>"
-    return bool(re.search(patt, xml_text, flags=re.DOTALL | re.IGNORECASE))
-
-def normalize_rule(rule):
-    path = rule.get("path") or rule.get("xpath") or rule.get("element")
-    # required detection
-    if "required" in rule:
-        try:
-            required = 1 if int(rule.get("required")) != 0 else 0
-        except:
-            required = 1 if bool(rule.get("required")) else 0
-    elif "minOccurs" in rule:
-        try:
-            required = 1 if int(rule.get("minOccurs", 0)) > 0 else 0
-        except:
-            required = 0
-    else:
-        required = 0
-    return path, required
-
-def find_candidates(root, localname):
-    """Return list of elements whose local-name equals localname (namespace-insensitive)."""
-    if root is None:
-        return []
-    matches = []
-    for el in root.iter():
-        if etree.QName(el).localname == localname:
-            matches.append(el)
-    return matches
-
-def is_tail_match(expected_parts, found_parts, tail_length=None):
-    """
-    Returns True if trailing segments match.
-    If tail_length is provided, compare last tail_length segments.
-    If tail_length is None, compares minimal trailing segments: at least last 2 segments if available,
-    otherwise compares last 1.
-    """
-    if not expected_parts or not found_parts:
-        return False
-    if tail_length is None:
-        # default: compare at least last 2 segments if expected has >=2, else last 1
-        tail_length = 2 if len(expected_parts) >= 2 else 1
-    if tail_length > len(expected_parts):
-        tail_length = len(expected_parts)
-    if tail_length > len(found_parts):
-        return False
-    return expected_parts[-tail_length:] == found_parts[-tail_length:]
-
-def evaluate_rule(root, xml_text, path_raw, synthetic_wrapper_name="RootWrapper"):
-    """
-    Evaluate a single rule and return a dictionary with:
-      'exists' (0/1),
-      'expected' (path_raw),
-      'found' (string or None),
-      'full_match' (bool),
-      'tail_match' (bool),
-      'location_status' (one of: 'correct','tail_match','wrong_location','unknown'),
-      'reason' (text)
-    """
-    out = {
-        'exists': 0,
-        'expected': path_raw,
-        'found': None,
-        'full_match': False,
-        'tail_match': False,
-        'location_status': 'unknown',
-        'reason': None
-    }
-    if not path_raw:
-        out['reason'] = "no path"
-        return out
-
-    expected_parts = [p.split(":")[-1] for p in path_raw.strip("/").split("/") if p]
-    if not expected_parts:
-        out['reason'] = "empty expected_parts"
-        return out
-
-    target = expected_parts[-1]
-
-    # 1) find candidate nodes
-    candidates = find_candidates(root, target) if root is not None else []
-
-    # 2) evaluate candidates: prefer full match, then tail match, then first candidate
-    best = None
-    for cand in candidates:
-        found_parts = build_ancestor_localnames(cand)
-        # remove synthetic wrapper if present
-        if found_parts and found_parts[0] == synthetic_wrapper_name:
-            cmp_found_parts = found_parts[1:]
-        else:
-            cmp_found_parts = found_parts[:]
-
-        # full match?
-        if cmp_found_parts == expected_parts:
-            out['exists'] = 1
-            out['found'] = "/" + "/".join(cmp_found_parts) if cmp_found_parts else None
-            out['full_match'] = True
-            out['tail_match'] = True  # full implies tail
-            out['location_status'] = 'correct'
-            out['reason'] = 'exact full path match'
-            return out
-
-    # second pass: tail match check (pick first candidate that matches tail)
-    for cand in candidates:
-        found_parts = build_ancestor_localnames(cand)
-        if found_parts and found_parts[0] == synthetic_wrapper_name:
-            cmp_found_parts = found_parts[1:]
-        else:
-            cmp_found_parts = found_parts[:]
-        # default tail_length = 2 if expected has 2+, else 1
-        tail_ok = is_tail_match(expected_parts, cmp_found_parts, tail_length=2 if len(expected_parts) >= 2 else 1)
-        if tail_ok:
-            out['exists'] = 1
-            out['found'] = "/" + "/".join(cmp_found_parts) if cmp_found_parts else None
-            out['full_match'] = False
-            out['tail_match'] = True
-            out['location_status'] = 'tail_match'
-            out['reason'] = 'tail segments match'
-            return out
-
-    # third: candidate exists but no tail/full match — return first candidate as wrong_location
-    if candidates:
-        cand = candidates[0]
-        found_parts = build_ancestor_localnames(cand)
-        if found_parts and found_parts[0] == synthetic_wrapper_name:
-            cmp_found_parts = found_parts[1:]
-        else:
-            cmp_found_parts = found_parts[:]
-        out['exists'] = 1
-        out['found'] = "/" + "/".join(cmp_found_parts) if cmp_found_parts else None
-        out['full_match'] = False
-        out['tail_match'] = False
-        out['location_status'] = 'wrong_location'
-        out['reason'] = 'element found but path differs'
-        return out
-
-    # fallback: regex search
-    if fallback_raw_exists(xml_text, target):
-        out['exists'] = 1
-        out['found'] = None
-        out['full_match'] = False
-        out['tail_match'] = False
-        out['location_status'] = 'unknown'
-        out['reason'] = 'found by raw regex (no parsed match)'
-        return out
-
-    out['reason'] = 'not found'
-    return out
-
-# DB helper to ensure report table
-def ensure_report_table(cur):
-    cur.execute("""
-    BEGIN
-      EXECUTE IMMEDIATE '
-        CREATE TABLE iso_message_dq_report (
-          msg_id VARCHAR2(64) PRIMARY KEY,
-          dq_report CLOB,
-          created_at TIMESTAMP DEFAULT SYSTIMESTAMP
-        )';
-    EXCEPTION WHEN OTHERS THEN
-      IF SQLCODE != -955 THEN RAISE; END IF;
-    END;
-    """)
-
-def process_all():
-    conn = cx_Oracle.connect(DB_USER, DB_PASS, DB_DSN)
-    cur = conn.cursor()
-    ensure_report_table(cur)
-
-    # load rules
-    cur.execute("SELECT xsd_name, rule_json FROM iso_dq_rules")
-    rules_map = {}
-    for xsd_name, rule_json in cur.fetchall():
-        try:
-            rules_map[xsd_name] = json.loads(lob_to_str(rule_json)) if rule_json else {}
-        except Exception:
-            rules_map[xsd_name] = {}
-
-    # fetch messages
-    cur.execute("SELECT msg_id, xml_payload, xsd_name FROM iso_messages")
-    processed = 0
-    for msg_id, xml_lob, xsd_name in cur.fetchall():
-        processed += 1
-        try:
-            xml_text = sanitize_xml(lob_to_str(xml_lob))
-            # parse with wrapper if needed
-            root, status, repaired = parse_with_wrapper(xml_text)
-            xml_for_regex = repaired if repaired is not None else xml_text
-
-            rules_json = rules_map.get(xsd_name, {}) or {}
-            rules = rules_json.get("rules") or []
-
-            dq_report = []
-            for rule in rules:
-                path_raw, required = normalize_rule(rule)
-                res = evaluate_rule(root, xml_for_regex, path_raw, synthetic_wrapper_name="RootWrapper")
-                valid = 'ok' if res['exists'] == 1 else 'missing' if required == 1 else 'ok'
-                entry = {
-                    'path': path_raw,
-                    'expected': path_raw,
-                    'required': int(required),
-                    'exists': int(res['exists']),
-                    'found': res['found'],
-                    'full_match': bool(res['full_match']),
-                    'tail_match': bool(res['tail_match']),
-                    'location_status': res['location_status'],
-                    'valid': valid,
-                    'reason': res['reason']
-                }
-                dq_report.append(entry)
-
-            out = {
-                'msg_id': msg_id,
-                'xsd_name': xsd_name,
-                'xml_status': status,
-                'dq_report': dq_report
-            }
-            out_json = json.dumps(out, ensure_ascii=False)
-
-            if not DRY_RUN:
-                cur.execute("UPDATE iso_message_dq_report SET dq_report = :dq, created_at = SYSTIMESTAMP WHERE msg_id = :mid",
-                            dq=out_json, mid=msg_id)
-                if cur.rowcount == 0:
-                    cur.execute("INSERT INTO iso_message_dq_report (msg_id, dq_report) VALUES (:mid, :dq)",
-                                mid=msg_id, dq=out_json)
-
-            if not DRY_RUN and (processed % BATCH_COMMIT == 0):
-                conn.commit()
-
-        except Exception as e:
-            tb = traceback.format_exc()
-            err = json.dumps({'msg_id': msg_id, 'error': str(e), 'trace': tb}, ensure_ascii=False)
-            if not DRY_RUN:
-                try:
-                    cur.execute("UPDATE iso_message_dq_report SET dq_report = :dq, created_at = SYSTIMESTAMP WHERE msg_id = :mid",
-                                dq=err, mid=msg_id)
-                    if cur.rowcount == 0:
-                        cur.execute("INSERT INTO iso_message_dq_report (msg_id, dq_report) VALUES (:mid, :dq)",
-                                    mid=msg_id, dq=err)
-                except Exception:
-                    print("Failed to write error for msg_id", msg_id)
-                    print(err)
-            print("Error processing msg_id", msg_id, ":", str(e))
-
-    if not DRY_RUN:
-        conn.commit()
-    cur.close()
-    conn.close()
-    print(f"Processed {processed} messages")
-
-if __name__ == "__main__":
-    process_all()
-    
-    
-
-
-
-#!/usr/bin/env python3
-"""
-dq_validator_correct_paths.py
-
-Namespace-insensitive ISO XML DQ validator.
-Finds candidate nodes by final element local-name, reconstructs actual ancestor path,
-and compares it to expected XSD path to determine correct vs wrong_location.
-
-Outputs per-message JSON DQ report into table iso_message_dq_report (CLOB).
-
-Requirements:
-  - lxml
-  - cx_Oracle (or change to oracledb if you prefer)
-"""
-
-import json
-import traceback
-import re
-from lxml import etree
-import cx_Oracle
-
-# -------- CONFIG --------
-DB_USER = "YOUR_USER"
-DB_PASS = "YOUR_PASS"
-DB_DSN  = "YOUR_HOST:1521/YOUR_SERVICE"
-
-# Optional: mapping if you want to know expected root per XSD (not strictly required)
-EXPECTED_ROOT_BY_XSD = {
-    "pacs.008.001.08": "FIToFICstmrCdtTrf"
-}
-
-BATCH_COMMIT = 100
-DRY_RUN = False
-# ------------------------
-
-def lob_to_str(maybe_lob):
-    if maybe_lob is None:
-        return ""
-    if hasattr(maybe_lob, "read"):
-        return maybe_lob.read()
-    return str(maybe_lob)
-
-def sanitize_xml(s):
-    return s.lstrip("\ufeff").strip() if s else ""
-
-def repair_and_parse(xml_text):
-    """
-    Parse XML. If SyntaxError, try recover=True.
-    Returns (root_element, status, repaired_text)
-    root_element is the parsed root element (Element) or None.
-    """
-    if not xml_text:
-        return None, "EMPTY", None
-    try:
-        root = etree.fromstring(xml_text.encode("utf-8"))
-        return root, "OK", xml_text
-    except etree.XMLSyntaxError:
-        try:
-            parser = etree.XMLParser(recover=True)
-            root = etree.fromstring(xml_text.encode("utf-8"), parser)
-            repaired = etree.tostring(root, encoding="unicode")
-            return root, "REPAIRED", repaired
-        except Exception as e:
-            return None, f"UNRECOVERABLE: {str(e)}", None
-
-def build_localname_ancestor_list(node):
-    """
-    Return list of local-names from document root down to the node (inclusive).
-    Example: ['Document','group','GrpHdr','MsgId']
-    """
-    if node is None:
-        return []
-    ancestors = []
-    # iterancestors returns ancestors from parent up to root (not including node)
-    for a in node.iterancestors():
-        ancestors.append(etree.QName(a).localname)
-    ancestors.reverse()
-    # now append the node itself
-    ancestors.append(etree.QName(node).localname)
-    return ancestors
-
-def build_found_path_from_node(node):
-    """
-    Build a /local-name path from actual XML (root..node).
-    Example: /Document/group/GrpHdr/MsgId or /group/GrpHdr/MsgId
-    """
-    parts = build_localname_ancestor_list(node)
-    if not parts:
-        return None
-    return "/" + "/".join(parts)
-
-def fallback_raw_exists(xml_text, tag):
-    if not tag:
-        return False
-    patt = fr"<(?:\w+:)?{re.escape(tag)}\b[^>]*>.*?</(?:\w+:)?{re.escape(tag)}>"
-    return bool(re.search(patt, xml_text, flags=re.DOTALL | re.IGNORECASE))
-
-def normalize_rule(rule):
-    path = rule.get("path") or rule.get("xpath") or rule.get("element")
-    # compute required
-    if "required" in rule:
-        try:
-            required = 1 if int(rule.get("required")) != 0 else 0
-        except:
-            required = 1 if bool(rule.get("required")) else 0
-    elif "minOccurs" in rule:
-        try:
-            required = 1 if int(rule.get("minOccurs", 0)) > 0 else 0
-        except:
-            required = 0
-    else:
-        required = 0
-    return path, required
-
-def find_candidates_by_localname(root, localname):
-    """
-    Returns a list of Element nodes in the tree rooted at `root` whose localname == localname.
-    This traverses all descendants and matches localname (namespace-insensitive).
-    """
-    if root is None:
-        return []
-    matches = []
-    # iterate over all elements
-    for el in root.iter():
-        if etree.QName(el).localname == localname:
-            matches.append(el)
-    return matches
-
-def evaluate_rule(root, xml_text, path_raw):
-    """
-    Evaluate a single rule.
-    - root: parsed lxml root (Element) — can be None
-    - xml_text: original or repaired xml string for regex fallback
-    - path_raw: expected path string like /Document/FIToFICstmrCdtTrf/GrpHdr/MsgId
-
-    Returns:
-      {
-        'exists': 0/1,
-        'expected': path_raw,
-        'found': found_path or None,
-        'location_status': 'correct'|'wrong_location'|'unknown',
-        'reason': text
-      }
-    """
-    out = {'exists': 0, 'expected': path_raw, 'found': None, 'location_status': 'unknown', 'reason': None}
-
-    if not path_raw:
-        out['reason'] = "No path specified"
-        return out
-
-    parts = [p.split(":")[-1] for p in path_raw.strip("/").split("/") if p]
-    if not parts:
-        out['reason'] = "Empty path parts"
-        return out
-
-    target = parts[-1]  # final tag to search for
-    # 1) If we have a parsed root, find candidate nodes whose localname == target
-    candidates = find_candidates_by_localname(root, target) if root is not None else []
-
-    # 2) For each candidate, reconstruct ancestor local-name sequence and compare with expected
-    for cand in candidates:
-        ancestor_parts = build_localname_ancestor_list(cand)  # list from root->...->cand
-        # Compare exact equality
-        if ancestor_parts == parts:
-            out['exists'] = 1
-            out['found'] = "/" + "/".join(ancestor_parts)
-            out['location_status'] = "correct"
-            out['reason'] = "Exact path match"
-            return out
-    # 3) If no exact match, but there is at least one candidate, pick the best candidate (first)
-    if candidates:
-        cand = candidates[0]
-        ancestor_parts = build_localname_ancestor_list(cand)
-        out['exists'] = 1
-        out['found'] = "/" + "/".join(ancestor_parts)
-        out['location_status'] = "wrong_location"
-        out['reason'] = "Found element but path differs from expected"
-        return out
-
-    # 4) Fallback: raw regex search on xml_text
-    if fallback_raw_exists(xml_text, target):
-        out['exists'] = 1
-        out['found'] = None
-        out['location_status'] = "unknown"
-        out['reason'] = "Found via raw regex (no parsed node)"
-        return out
-
-    # Not found
-    out['reason'] = "Element not found"
-    return out
-
-def ensure_report_table(cur):
-    cur.execute("""
-    BEGIN
-      EXECUTE IMMEDIATE '
-        CREATE TABLE iso_message_dq_report (
-          msg_id VARCHAR2(64) PRIMARY KEY,
-          dq_report CLOB,
-          created_at TIMESTAMP DEFAULT SYSTIMESTAMP
-        )';
-    EXCEPTION WHEN OTHERS THEN
-      IF SQLCODE != -955 THEN RAISE; END IF;
-    END;
-    """)
-
-def process_all_messages():
-    conn = cx_Oracle.connect(DB_USER, DB_PASS, DB_DSN)
-    cur = conn.cursor()
-
-    ensure_report_table(cur)
-
-    # Load rules into memory
-    cur.execute("SELECT xsd_name, rule_json FROM iso_dq_rules")
-    rules_map = {}
-    for xsd_name, rule_json in cur.fetchall():
-        s = lob_to_str(rule_json)
-        try:
-            rules_map[xsd_name] = json.loads(s) if s else {}
-        except Exception:
-            rules_map[xsd_name] = {}
-
-    # Fetch messages
-    cur.execute("SELECT msg_id, xml_payload, xsd_name FROM iso_messages")
-    processed = 0
-    for msg_id, xml_lob, xsd_name in cur.fetchall():
-        processed += 1
-        try:
-            xml_text = sanitize_xml(lob_to_str(xml_lob))
-            root, status, repaired = repair_and_parse(xml_text)
-            xml_for_regex = repaired if repaired is not None else xml_text
-
-            rules_json = rules_map.get(xsd_name, {})
-            rules = rules_json.get("rules") if isinstance(rules_json, dict) else []
-
-            dq_report = []
-            for rule in rules:
-                path_raw, required = normalize_rule(rule)
-                res = evaluate_rule(root, xml_for_regex, path_raw)
-                valid = 'ok' if res['exists'] == 1 else 'missing' if required == 1 else 'ok'
-                entry = {
-                    'path': path_raw,
-                    'expected': path_raw,
-                    'required': int(required),
-                    'exists': int(res['exists']),
-                    'found': res['found'],
-                    'location_status': res['location_status'],
-                    'valid': valid,
-                    'reason': res['reason']
-                }
-                dq_report.append(entry)
-
-            out = {
-                'msg_id': msg_id,
-                'xsd_name': xsd_name,
-                'xml_status': status,
-                'dq_report': dq_report
-            }
-            out_json = json.dumps(out, ensure_ascii=False)
-
-            if not DRY_RUN:
-                cur.execute("UPDATE iso_message_dq_report SET dq_report = :dq, created_at = SYSTIMESTAMP WHERE msg_id = :mid",
-                            dq=out_json, mid=msg_id)
-                if cur.rowcount == 0:
-                    cur.execute("INSERT INTO iso_message_dq_report (msg_id, dq_report) VALUES (:mid, :dq)",
-                                mid=msg_id, dq=out_json)
-
-            if not DRY_RUN and (processed % BATCH_COMMIT == 0):
-                conn.commit()
-
-        except Exception as e:
-            tb = traceback.format_exc()
-            err_json = json.dumps({'msg_id': msg_id, 'error': str(e), 'trace': tb}, ensure_ascii=False)
-            if not DRY_RUN:
-                try:
-                    cur.execute("UPDATE iso_message_dq_report SET dq_report = :dq, created_at = SYSTIMESTAMP WHERE msg_id = :mid",
-                                dq=err_json, mid=msg_id)
-                    if cur.rowcount == 0:
-                        cur.execute("INSERT INTO iso_message_dq_report (msg_id, dq_report) VALUES (:mid, :dq)",
-                                    mid=msg_id, dq=err_json)
-                except Exception:
-                    print("Failed to write error for msg_id", msg_id)
-                    print(err_json)
-            print("Error processing msg_id", msg_id, ":", str(e))
-
-    if not DRY_RUN:
-        conn.commit()
-    cur.close()
-    conn.close()
-    print(f"Processed {processed} messages.")
-
-if __name__ == "__main__":
-    process_all_messages()
-
-
-
-
-#!/usr/bin/env python3
-"""
-Namespace-insensitive ISO XML DQ validator (final version).
-
-Features:
-- Handles standard and non-standard roots
-- Ignores namespaces for matching (local-name)
-- Recursive search across all descendants
-- Builds 'found' paths reflecting actual XML
-- Option B/C: wrong-location nodes are valid
-- JSON output ready for Oracle CLOB storage
-"""
-
-import json
-import traceback
-from lxml import etree
-import cx_Oracle
-import re
-
-# --------------------
-# DB config
-# --------------------
-DB_USER = "YOUR_USER"
-DB_PASS = "YOUR_PASS"
-DB_DSN  = "YOUR_HOST:1521/YOUR_SERVICE"
-
-# --------------------
-# Utility functions
-# --------------------
-def lob_to_str(maybe_lob):
-    if hasattr(maybe_lob, "read"):
-        return maybe_lob.read()
-    return maybe_lob
-
-def sanitize_xml(xml_str):
-    return xml_str.lstrip("\ufeff").strip() if xml_str else ""
-
-def repair_and_parse(xml_str):
-    """Parse or recover XML. Returns list of top-level elements."""
-    try:
-        root = etree.fromstring(xml_str.encode("utf-8"))
-        return [root], "OK", xml_str
-    except etree.XMLSyntaxError:
-        try:
-            parser = etree.XMLParser(recover=True)
-            root = etree.fromstring(xml_str.encode("utf-8"), parser)
-            repaired = etree.tostring(root, encoding="unicode")
-            return [root], "REPAIRED", repaired
-        except Exception as e:
-            return None, f"UNRECOVERABLE: {str(e)}", None
-
-def build_found_path(node):
-    """Build /local-name path from node to root."""
-    if node is None:
-        return None
-    segments = []
-    current = node
-    while current is not None:
-        segments.append(etree.QName(current).localname)
-        current = current.getparent()
-    segments.reverse()
-    return "/" + "/".join(segments)
-
-def fallback_raw_exists(xml_text, tag):
-    if not tag:
-        return False
-    patt = fr"<(?:\w+:)?{tag}\b.*?>.*?</(?:\w+:)?{tag}>"
-    return bool(re.search(patt, xml_text, flags=re.DOTALL | re.IGNORECASE))
-
-def normalize_rule(rule):
-    path = rule.get("path") or rule.get("xpath")
-    required = 1 if rule.get("required") in (True, "1", 1) else 0
-    return path, required
-
-# --------------------
-# Recursive local-name search
-# --------------------
-def find_node_recursive(node, path_parts, depth=0):
-    """
-    Recursively find node matching path_parts by local-name.
-    At depth 0, search entire tree for first segment match (supports non-standard roots)
-    """
-    if node is None:
-        return None
-    if depth >= len(path_parts):
-        return node
-    target = path_parts[depth]
-    # Iterate all descendants
-    for child in node.iter():
-        if etree.QName(child).localname == target:
-            # Recurse to next depth
-            if depth + 1 == len(path_parts):
-                return child
-            found = find_node_recursive(child, path_parts, depth + 1)
-            if found is not None:
-                return found
-    # If first depth (non-standard root) not found, skip it
-    if depth == 0:
-        return find_node_recursive(node, path_parts, depth + 1)
-    return None
-
-def evaluate_rule(xml_text, root_elements, path_raw):
-    """
-    Evaluate a rule recursively across top-level elements.
-    Returns dict with exists, location_status, found_path, reason
-    """
-    result = {
-        "exists": 0,
-        "location_status": "unknown",
-        "found_path": None,
-        "reason": None
-    }
-    if not root_elements or not path_raw:
-        return result
-    path_parts = [p.split(":")[-1] for p in path_raw.strip("/").split("/")]
-
-    # Search recursively starting from all top-level elements
-    found_node = None
-    for top in root_elements:
-        found_node = find_node_recursive(top, path_parts)
-        if found_node is not None:
-            break
-
-    if found_node is not None:
-        result["exists"] = 1
-        result["found_path"] = build_found_path(found_node)
-        result["location_status"] = "wrong_location"  # Option B/C
-        result["reason"] = "Found via recursive local-name search"
-        return result
-
-    # Fallback: raw regex search
-    tag = path_parts[-1]
-    if fallback_raw_exists(xml_text, tag):
-        result.update({
-            "exists": 1,
-            "found_path": None,
-            "location_status": "unknown",
-            "reason": "Found via raw regex"
-        })
-    return result
-
-# --------------------
-# Main processing
-# --------------------
-def process_messages():
-    conn = cx_Oracle.connect(DB_USER, DB_PASS, DB_DSN)
-    cur = conn.cursor()
-
-    # Ensure DQ report table exists
-    cur.execute("""
-    BEGIN
-        EXECUTE IMMEDIATE '
-        CREATE TABLE iso_message_dq_report (
-            msg_id VARCHAR2(64) PRIMARY KEY,
-            dq_report CLOB,
-            created_at TIMESTAMP DEFAULT SYSTIMESTAMP
-        )';
-    EXCEPTION WHEN OTHERS THEN
-        IF SQLCODE != -955 THEN RAISE; END IF;
-    END;
-    """)
-
-    # Load rules
-    rules_by_xsd = {}
-    cur.execute("SELECT xsd_name, rule_json FROM iso_dq_rules")
-    for xsd_name, rjson in cur.fetchall():
-        rules_by_xsd[xsd_name] = json.loads(lob_to_str(rjson))
-
-    # Process each message
-    cur.execute("SELECT msg_id, xml_payload, xsd_name FROM iso_messages")
-    for msg_id, xml_lob, xsd_name in cur.fetchall():
-        try:
-            xml_text = sanitize_xml(lob_to_str(xml_lob))
-            root_elements, status, repaired = repair_and_parse(xml_text)
-            xml_final = repaired if repaired else xml_text
-            if not root_elements:
-                raise ValueError("Cannot parse XML")
-
-            rules = rules_by_xsd.get(xsd_name, {}).get("rules", [])
-            dq = []
-
-            for rule in rules:
-                path_raw, required = normalize_rule(rule)
-                eva = evaluate_rule(xml_final, root_elements, path_raw)
-                valid = "missing" if required == 1 and eva["exists"] == 0 else "ok"
-                dq.append({
-                    "path": path_raw,
-                    "expected": path_raw,
-                    "required": required,
-                    "exists": eva["exists"],
-                    "location_status": eva["location_status"],
-                    "found": eva["found_path"],
-                    "valid": valid,
-                    "reason": eva["reason"]
-                })
-
-            out = json.dumps({
-                "msg_id": msg_id,
-                "xsd": xsd_name,
-                "repair": status,
-                "dq_report": dq
-            }, ensure_ascii=False)
-
-            cur.execute("""
-                MERGE INTO iso_message_dq_report d
-                USING (SELECT :m AS msg_id FROM dual) s
-                ON (d.msg_id = s.msg_id)
-                WHEN MATCHED THEN UPDATE SET dq_report = :r, created_at = SYSTIMESTAMP
-                WHEN NOT MATCHED THEN INSERT (msg_id, dq_report) VALUES (:m, :r)
-            """, m=msg_id, r=out)
-
-        except Exception as e:
-            tb = traceback.format_exc()
-            err = json.dumps({"msg_id": msg_id, "error": str(e), "trace": tb})
-            cur.execute("""
-                MERGE INTO iso_message_dq_report d
-                USING (SELECT :m AS msg_id FROM dual) s
-                ON (d.msg_id = s.msg_id)
-                WHEN MATCHED THEN UPDATE SET dq_report = :r
-                WHEN NOT MATCHED THEN INSERT (msg_id, dq_report) VALUES (:m, :r)
-            """, m=msg_id, r=err)
-
-    conn.commit()
-    cur.close()
-    conn.close()
-
-# --------------------
-# Entry point
-# --------------------
-if __name__ == "__main__":
-    process_messages()
-    
-
-
-
-#!/usr/bin/env python3
-"""
-Namespace-insensitive, recursive ISO XML DQ validator with synthetic Document wrapper.
-
-Features:
-- Handles multiple top-level elements and default namespaces
-- Non-standard roots are accepted
-- Recursive local-name search
-- Produces 'found' paths reflecting actual XML structure
-- Option B + C: wrong-location is valid
-- JSON output ready for Oracle CLOB storage
-"""
-
-import json
-import traceback
-from lxml import etree
-import cx_Oracle
-import re
-
-# --------------------
-# DB config
-# --------------------
-DB_USER = "YOUR_USER"
-DB_PASS = "YOUR_PASS"
-DB_DSN  = "YOUR_HOST:1521/YOUR_SERVICE"
-
-# --------------------
-# Utility functions
-# --------------------
-def lob_to_str(maybe_lob):
-    if hasattr(maybe_lob, "read"):
-        return maybe_lob.read()
-    return maybe_lob
-
-def sanitize_xml(xml_str):
-    if not xml_str:
-        return ""
-    return xml_str.lstrip("\ufeff").strip()
-
-def repair_and_parse(xml_str):
-    """Parse or recover XML"""
-    try:
-        root = etree.fromstring(xml_str.encode("utf-8"))
-        return [root], "OK", xml_str
-    except etree.XMLSyntaxError:
-        try:
-            parser = etree.XMLParser(recover=True)
-            root = etree.fromstring(xml_str.encode("utf-8"), parser)
-            repaired = etree.tostring(root, encoding="unicode")
-            return [root], "REPAIRED", repaired
-        except Exception as e:
-            return None, f"UNRECOVERABLE: {str(e)}", None
-
-def wrap_document(root_elements):
-    """Wrap all top-level elements under a synthetic <Document>"""
-    doc = etree.Element("Document")
-    for r in root_elements:
-        doc.append(r)
-    return doc
-
-def build_found_path(node):
-    """Build /local-name path from node to root"""
-    if node is None:
-        return None
-    segments = []
-    current = node
-    while current is not None and etree.QName(current).localname != "Document":
-        segments.append(etree.QName(current).localname)
-        current = current.getparent()
-    segments.reverse()
-    return "/" + "/".join(segments) if segments else None
-
-def fallback_raw_exists(xml_text, tag):
-    if not tag:
-        return False
-    patt = fr"<(?:\w+:)?{tag}\b.*?>.*?</(?:\w+:)?{tag}>"
-    return bool(re.search(patt, xml_text, flags=re.DOTALL | re.IGNORECASE))
-
-def normalize_rule(rule):
-    path = rule.get("path") or rule.get("xpath")
-    required = 1 if rule.get("required") in (True, "1", 1) else 0
-    return path, required
-
-# --------------------
-# Recursive search
-# --------------------
-def find_node_recursive(node, path_parts, depth=0):
-    """
-    Recursively find node matching path_parts by local-name.
-    Iterates all descendants using node.iter()
-    """
-    if node is None:
-        return None
-    if depth >= len(path_parts):
-        return node
-    target = path_parts[depth]
-    for child in node.iter():
-        if etree.QName(child).localname == target:
-            if depth + 1 == len(path_parts):
-                return child
-            found = find_node_recursive(child, path_parts, depth + 1)
-            if found is not None:
-                return found
-    return None
-
-def evaluate_rule(xml_text, wrapped_root, path_raw):
-    """
-    Evaluate a rule recursively
-    Returns dict with exists, location_status, found_path, reason
-    """
-    result = {
-        "exists": 0,
-        "in_correct_location": 0,
-        "found_path": None,
-        "location_status": "unknown",
-        "reason": None
-    }
-
-    if wrapped_root is None or not path_raw:
-        return result
-
-    parts = [p.split(":")[-1] for p in path_raw.strip("/").split("/")]
-    node = find_node_recursive(wrapped_root, parts)
-
-    if node is not None:
-        result["exists"] = 1
-        result["in_correct_location"] = 0
-        result["location_status"] = "wrong_location"
-        result["found_path"] = build_found_path(node)
-        result["reason"] = "Found via recursive local-name search"
-        # If top-level node matches first part
-        if etree.QName(node.getroottree().getroot()).localname == "Document":
-            result["in_correct_location"] = 1
-            result["location_status"] = "wrong_location"  # keep Option B/C
-        return result
-
-    # Fallback raw regex
-    tag = parts[-1]
-    if fallback_raw_exists(xml_text, tag):
-        result.update({
-            "exists": 1,
-            "found_path": None,
-            "location_status": "unknown",
-            "reason": "Found via raw regex"
-        })
-
-    return result
-
-# --------------------
-# Main processing
-# --------------------
-def process_messages():
-    conn = cx_Oracle.connect(DB_USER, DB_PASS, DB_DSN)
-    cur = conn.cursor()
-
-    # Ensure DQ report table exists
-    cur.execute("""
-    BEGIN
-        EXECUTE IMMEDIATE '
-        CREATE TABLE iso_message_dq_report (
-            msg_id VARCHAR2(64) PRIMARY KEY,
-            dq_report CLOB,
-            created_at TIMESTAMP DEFAULT SYSTIMESTAMP
-        )';
-    EXCEPTION WHEN OTHERS THEN
-        IF SQLCODE != -955 THEN RAISE; END IF;
-    END;
-    """)
-
-    # Load rules
-    rules_by_xsd = {}
-    cur.execute("SELECT xsd_name, rule_json FROM iso_dq_rules")
-    for xsd_name, rjson in cur.fetchall():
-        rules_by_xsd[xsd_name] = json.loads(lob_to_str(rjson))
-
-    # Process each message
-    cur.execute("SELECT msg_id, xml_payload, xsd_name FROM iso_messages")
-    for msg_id, xml_lob, xsd_name in cur.fetchall():
-        try:
-            xml_text = sanitize_xml(lob_to_str(xml_lob))
-            root_elements, status, repaired = repair_and_parse(xml_text)
-            xml_final = repaired if repaired else xml_text
-            if not root_elements:
-                raise ValueError("Cannot parse XML")
-
-            wrapped_root = wrap_document(root_elements)
-
-            rules = rules_by_xsd.get(xsd_name, {}).get("rules", [])
-            dq = []
-
-            for rule in rules:
-                path_raw, required = normalize_rule(rule)
-                eva = evaluate_rule(xml_final, wrapped_root, path_raw)
-
-                valid = "missing" if required == 1 and eva["exists"] == 0 else "ok"
-                dq.append({
-                    "path": path_raw,
-                    "expected": path_raw,
-                    "required": required,
-                    "exists": eva["exists"],
-                    "location_status": eva["location_status"],
-                    "found": eva["found_path"],
-                    "valid": valid,
-                    "reason": eva["reason"]
-                })
-
-            out = json.dumps({
-                "msg_id": msg_id,
-                "xsd": xsd_name,
-                "repair": status,
-                "dq_report": dq
-            }, ensure_ascii=False)
-
-            cur.execute("""
-                MERGE INTO iso_message_dq_report d
-                USING (SELECT :m AS msg_id FROM dual) s
-                ON (d.msg_id = s.msg_id)
-                WHEN MATCHED THEN UPDATE SET dq_report = :r, created_at = SYSTIMESTAMP
-                WHEN NOT MATCHED THEN INSERT (msg_id, dq_report) VALUES (:m, :r)
-            """, m=msg_id, r=out)
-
-        except Exception as e:
-            tb = traceback.format_exc()
-            err = json.dumps({"msg_id": msg_id, "error": str(e), "trace": tb})
-            cur.execute("""
-                MERGE INTO iso_message_dq_report d
-                USING (SELECT :m AS msg_id FROM dual) s
-                ON (d.msg_id = s.msg_id)
-                WHEN MATCHED THEN UPDATE SET dq_report = :r
-                WHEN NOT MATCHED THEN INSERT (msg_id, dq_report) VALUES (:m, :r)
-            """, m=msg_id, r=err)
-
-    conn.commit()
-    cur.close()
-    conn.close()
-
-# --------------------
-# Entry point
-# --------------------
-if __name__ == "__main__":
-    process_messages()
-
-
-
-#!/usr/bin/env python3
-"""
-Namespace-insensitive, recursive ISO XML DQ validator.
-
-Features:
-- Handles multiple default namespaces (header/group/transaction)
-- Non-standard roots are accepted
-- Recursive search by local-name instead of XPath
-- Builds 'found' paths reflecting actual XML hierarchy
-- Option B + C: wrong-location is valid
-- Outputs JSON ready for Oracle CLOB storage
-"""
-
-import json
-import traceback
-from lxml import etree
-import cx_Oracle
-import re
-
-# --------------------
-# DB config
-# --------------------
-DB_USER = "YOUR_USER"
-DB_PASS = "YOUR_PASS"
-DB_DSN  = "YOUR_HOST:1521/YOUR_SERVICE"
-
-# --------------------
-# Utility functions
-# --------------------
-def lob_to_str(maybe_lob):
-    if hasattr(maybe_lob, "read"):
-        return maybe_lob.read()
-    return maybe_lob
-
-def sanitize_xml(xml_str):
-    if not xml_str:
-        return ""
-    return xml_str.lstrip("\ufeff").strip()
-
-def repair_and_parse(xml_str):
-    try:
-        root = etree.fromstring(xml_str.encode("utf-8"))
-        return root, "OK", xml_str
-    except etree.XMLSyntaxError:
-        try:
-            parser = etree.XMLParser(recover=True)
-            root = etree.fromstring(xml_str.encode("utf-8"), parser)
-            repaired = etree.tostring(root, encoding="unicode")
-            return root, "REPAIRED", repaired
-        except Exception as e:
-            return None, f"UNRECOVERABLE: {str(e)}", None
-
-def build_found_path(node):
-    """Build /local-name path from node to root"""
-    if node is None:
-        return None
-    segments = []
-    current = node
-    while current is not None:
-        segments.append(etree.QName(current).localname)
-        current = current.getparent()
-    segments.reverse()
-    return "/" + "/".join(segments)
-
-def fallback_raw_exists(xml_text, tag):
-    if not tag:
-        return False
-    patt = fr"<(?:\w+:)?{tag}\b.*?>.*?</(?:\w+:)?{tag}>"
-    return bool(re.search(patt, xml_text, flags=re.DOTALL | re.IGNORECASE))
-
-def normalize_rule(rule):
-    path = rule.get("path") or rule.get("xpath")
-    required = 1 if rule.get("required") in (True, "1", 1) else 0
-    return path, required
-
-# --------------------
-# Recursive search
-# --------------------
-def find_node_recursive(node, path_parts, depth=0):
-    """
-    Recursively find node matching path_parts[depth:] by local-name
-    Returns the first matching node or None
-    """
-    if node is None:
-        return None
-    if depth >= len(path_parts):
-        return node
-    target = path_parts[depth]
-    for child in node:
-        if etree.QName(child).localname == target:
-            result = find_node_recursive(child, path_parts, depth + 1)
-            if result is not None:
-                return result
-    return None
-
-def evaluate_rule_recursive(xml_text, root_obj, path_raw):
-    """
-    Evaluate a rule recursively by local-name
-    Returns dict with exists, location_status, found_path, reason
-    """
-    result = {
-        "exists": 0,
-        "in_correct_location": 0,
-        "found_path": None,
-        "location_status": "unknown",
-        "reason": None
-    }
-
-    if root_obj is None or not path_raw:
-        return result
-
-    parts = [p.split(":")[-1] for p in path_raw.strip("/").split("/")]
-    node = find_node_recursive(root_obj, parts)
-
-    if node is not None:
-        result["exists"] = 1
-        result["in_correct_location"] = 0  # default: wrong-location
-        result["location_status"] = "wrong_location"
-        result["found_path"] = build_found_path(node)
-        result["reason"] = "Found via recursive local-name search"
-        # Optionally, mark correct location if top-level matches
-        if etree.QName(root_obj).localname == parts[0]:
-            result["in_correct_location"] = 1
-            result["location_status"] = "correct"
-        return result
-
-    # fallback regex
-    tag = parts[-1]
-    if fallback_raw_exists(xml_text, tag):
-        result.update({
-            "exists": 1,
-            "found_path": None,
-            "location_status": "unknown",
-            "reason": "Found via raw regex"
-        })
-
-    return result
-
-# --------------------
-# Main processing
-# --------------------
-def process_messages():
-    conn = cx_Oracle.connect(DB_USER, DB_PASS, DB_DSN)
-    cur = conn.cursor()
-
-    # Ensure DQ report table exists
-    cur.execute("""
-    BEGIN
-        EXECUTE IMMEDIATE '
-        CREATE TABLE iso_message_dq_report (
-            msg_id VARCHAR2(64) PRIMARY KEY,
-            dq_report CLOB,
-            created_at TIMESTAMP DEFAULT SYSTIMESTAMP
-        )';
-    EXCEPTION WHEN OTHERS THEN
-        IF SQLCODE != -955 THEN RAISE; END IF;
-    END;
-    """)
-
-    # Load rules
-    rules_by_xsd = {}
-    cur.execute("SELECT xsd_name, rule_json FROM iso_dq_rules")
-    for xsd_name, rjson in cur.fetchall():
-        rules_by_xsd[xsd_name] = json.loads(lob_to_str(rjson))
-
-    # Process each message
-    cur.execute("SELECT msg_id, xml_payload, xsd_name FROM iso_messages")
-    for msg_id, xml_lob, xsd_name in cur.fetchall():
-        try:
-            xml_text = sanitize_xml(lob_to_str(xml_lob))
-            root, status, repaired = repair_and_parse(xml_text)
-            xml_final = repaired if repaired else xml_text
-
-            rules = rules_by_xsd.get(xsd_name, {}).get("rules", [])
-            dq = []
-
-            for rule in rules:
-                path_raw, required = normalize_rule(rule)
-                eva = evaluate_rule_recursive(xml_text, root, path_raw)
-
-                valid = "missing" if required == 1 and eva["exists"] == 0 else "ok"
-                dq.append({
-                    "path": path_raw,
-                    "expected": path_raw,
-                    "required": required,
-                    "exists": eva["exists"],
-                    "location_status": eva["location_status"],
-                    "found": eva["found_path"],
-                    "valid": valid,
-                    "reason": eva["reason"]
-                })
-
-            out = json.dumps({
-                "msg_id": msg_id,
-                "xsd": xsd_name,
-                "repair": status,
-                "dq_report": dq
-            }, ensure_ascii=False)
-
-            cur.execute("""
-                MERGE INTO iso_message_dq_report d
-                USING (SELECT :m AS msg_id FROM dual) s
-                ON (d.msg_id = s.msg_id)
-                WHEN MATCHED THEN UPDATE SET dq_report = :r, created_at = SYSTIMESTAMP
-                WHEN NOT MATCHED THEN INSERT (msg_id, dq_report) VALUES (:m, :r)
-            """, m=msg_id, r=out)
-
-        except Exception as e:
-            tb = traceback.format_exc()
-            err = json.dumps({"msg_id": msg_id, "error": str(e), "trace": tb})
-            cur.execute("""
-                MERGE INTO iso_message_dq_report d
-                USING (SELECT :m AS msg_id FROM dual) s
-                ON (d.msg_id = s.msg_id)
-                WHEN MATCHED THEN UPDATE SET dq_report = :r
-                WHEN NOT MATCHED THEN INSERT (msg_id, dq_report) VALUES (:m, :r)
-            """, m=msg_id, r=err)
-
-    conn.commit()
-    cur.close()
-    conn.close()
-
-# --------------------
-# Entry point
-# --------------------
-if __name__ == "__main__":
-    process_messages()
-
-
-
-#!/usr/bin/env python3
-"""
-Namespace-aware, multi-default-namespace ISO XML DQ validator.
-
-Features:
-- Handles missing / non-standard roots
-- Handles multiple default namespaces per element (header/group/transaction)
-- XPath evaluation using local-name() and namespace-uri()
-- Builds 'found' paths reflecting actual XML hierarchy (synthetic wrapper excluded)
-- Option B + C: wrong-location is valid
-- Outputs JSON report ready for Oracle storage
-"""
-
-import json
-import traceback
-from lxml import etree
-import cx_Oracle
-import re
-
-# --------------------
-# Database config
-# --------------------
-DB_USER = "YOUR_USER"
-DB_PASS = "YOUR_PASS"
-DB_DSN  = "YOUR_HOST:1521/YOUR_SERVICE"
-
-EXPECTED_ROOT_BY_XSD = {
-    "pacs.008.001.08": "FIToFICstmrCdtTrf"
-}
-
-# --------------------
-# Utility functions
-# --------------------
-def lob_to_str(maybe_lob):
-    if hasattr(maybe_lob, "read"):
-        return maybe_lob.read()
-    return maybe_lob
-
-def sanitize_xml(xml_str):
-    if not xml_str:
-        return ""
-    return xml_str.lstrip("\ufeff").strip()
-
-def repair_and_parse(xml_str):
-    """Parse or recover XML"""
-    try:
-        root = etree.fromstring(xml_str.encode("utf-8"))
-        return root, "OK", xml_str
-    except etree.XMLSyntaxError:
-        try:
-            parser = etree.XMLParser(recover=True)
-            root = etree.fromstring(xml_str.encode("utf-8"), parser)
-            repaired = etree.tostring(root, encoding="unicode")
-            return root, "REPAIRED", repaired
-        except Exception as e:
-            return None, f"UNRECOVERABLE: {str(e)}", None
-
-def wrap_document_if_missing(root_obj):
-    """Wrap in <Document> if root is not <Document>"""
-    if root_obj is None:
-        return None, None
-    if etree.QName(root_obj).localname == "Document":
-        return root_obj, None
-    doc = etree.Element("Document")
-    doc.append(root_obj)
-    return doc, doc  # synthetic wrapper
-
-def build_found_path(node, synthetic_wrapper=None):
-    """
-    Build /local-name path excluding synthetic wrapper.
-    """
-    if node is None:
-        return None
-    segments = []
-    current = node
-    while current is not None:
-        segments.append(etree.QName(current).localname)
-        current = current.getparent()
-    segments.reverse()
-    if synthetic_wrapper and segments[0] == etree.QName(synthetic_wrapper).localname:
-        segments = segments[1:]
-    return "/" + "/".join(segments)
-
-def fallback_raw_exists(xml_text, tag):
-    if not tag:
-        return False
-    patt = fr"<(?:\w+:)?{tag}\b.*?>.*?</(?:\w+:)?{tag}>"
-    return bool(re.search(patt, xml_text, flags=re.DOTALL | re.IGNORECASE))
-
-def normalize_rule(rule):
-    path = rule.get("path") or rule.get("xpath")
-    required = 1 if rule.get("required") in (True, "1", 1) else 0
-    return path, required
-
-# --------------------
-# XPath evaluation with namespace support
-# --------------------
-def evaluate_rule(xml_text, root_obj, path_raw, synthetic_wrapper=None):
-    """
-    Evaluate a single rule with namespace-aware XPath.
-    Returns dict with exists, location_status, found_path, reason.
-    """
-    result = {
-        "exists": 0,
-        "in_correct_location": 0,
-        "found_path": None,
-        "location_status": "unknown",
-        "reason": None
-    }
-
-    if root_obj is None or not path_raw:
-        return result
-
-    # Split path parts
-    parts = [p.split(":")[-1] for p in path_raw.strip("/").split("/")]
-
-    # Build namespace-aware local-name XPath recursively
-    xpath_expr = ""
-    for p in parts:
-        if xpath_expr == "":
-            xpath_expr = f"*[(local-name()='{p}')]"
-        else:
-            xpath_expr += f"/*[(local-name()='{p}')]"
-
-    try:
-        nodes = root_obj.xpath("//" + xpath_expr)
-    except Exception:
-        nodes = []
-
-    if nodes:
-        node = nodes[0]
-        result["exists"] = 1
-        # Check location
-        expected_root = parts[0] if parts else None
-        if etree.QName(node.getroottree().getroot()).localname == expected_root:
-            result["in_correct_location"] = 1
-            result["location_status"] = "correct"
-        else:
-            result["in_correct_location"] = 0
-            result["location_status"] = "wrong_location"
-        result["found_path"] = build_found_path(node, synthetic_wrapper=synthetic_wrapper)
-        result["reason"] = "Found via namespace-aware local-name XPath"
-        return result
-
-    # Fallback raw regex
-    tag = parts[-1]
-    if fallback_raw_exists(xml_text, tag):
-        result.update({
-            "exists": 1,
-            "found_path": None,
-            "location_status": "unknown",
-            "reason": "Found via raw regex"
-        })
-    return result
-
-# --------------------
-# Main processing
-# --------------------
-def process_messages():
-    conn = cx_Oracle.connect(DB_USER, DB_PASS, DB_DSN)
-    cur = conn.cursor()
-
-    # Ensure DQ report table exists
-    cur.execute("""
-    BEGIN
-        EXECUTE IMMEDIATE '
-        CREATE TABLE iso_message_dq_report (
-            msg_id VARCHAR2(64) PRIMARY KEY,
-            dq_report CLOB,
-            created_at TIMESTAMP DEFAULT SYSTIMESTAMP
-        )';
-    EXCEPTION WHEN OTHERS THEN
-        IF SQLCODE != -955 THEN RAISE; END IF;
-    END;
-    """)
-
-    # Load rules
-    rules_by_xsd = {}
-    cur.execute("SELECT xsd_name, rule_json FROM iso_dq_rules")
-    for xsd_name, rjson in cur.fetchall():
-        rules_by_xsd[xsd_name] = json.loads(lob_to_str(rjson))
-
-    # Process each message
-    cur.execute("SELECT msg_id, xml_payload, xsd_name FROM iso_messages")
-    for msg_id, xml_lob, xsd_name in cur.fetchall():
-        try:
-            xml_text = sanitize_xml(lob_to_str(xml_lob))
-            root, status, repaired = repair_and_parse(xml_text)
-            xml_final = repaired if repaired else xml_text
-
-            wrapped_root, synthetic_wrapper = wrap_document_if_missing(root)
-
-            rules = rules_by_xsd.get(xsd_name, {}).get("rules", [])
-            dq = []
-
-            for rule in rules:
-                path_raw, required = normalize_rule(rule)
-                eva = evaluate_rule(xml_final, wrapped_root, path_raw, synthetic_wrapper=synthetic_wrapper)
-
-                valid = "missing" if required == 1 and eva["exists"] == 0 else "ok"
-                dq.append({
-                    "path": path_raw,
-                    "expected": path_raw,
-                    "required": required,
-                    "exists": eva["exists"],
-                    "location_status": eva["location_status"],
-                    "found": eva["found_path"],
-                    "valid": valid,
-                    "reason": eva["reason"]
-                })
-
-            out = json.dumps({
-                "msg_id": msg_id,
-                "xsd": xsd_name,
-                "repair": status,
-                "dq_report": dq
-            }, ensure_ascii=False)
-
-            cur.execute("""
-                MERGE INTO iso_message_dq_report d
-                USING (SELECT :m AS msg_id FROM dual) s
-                ON (d.msg_id = s.msg_id)
-                WHEN MATCHED THEN UPDATE SET dq_report = :r, created_at = SYSTIMESTAMP
-                WHEN NOT MATCHED THEN INSERT (msg_id, dq_report) VALUES (:m, :r)
-            """, m=msg_id, r=out)
-
-        except Exception as e:
-            tb = traceback.format_exc()
-            err = json.dumps({"msg_id": msg_id, "error": str(e), "trace": tb})
-            cur.execute("""
-                MERGE INTO iso_message_dq_report d
-                USING (SELECT :m AS msg_id FROM dual) s
-                ON (d.msg_id = s.msg_id)
-                WHEN MATCHED THEN UPDATE SET dq_report = :r
-                WHEN NOT MATCHED THEN INSERT (msg_id, dq_report) VALUES (:m, :r)
-            """, m=msg_id, r=err)
-
-    conn.commit()
-    cur.close()
-    conn.close()
-
-# --------------------
-# Entry point
-# --------------------
-if __name__ == "__main__":
-    process_messages()
-    
-
-
-
-
-#!/usr/bin/env python3
-"""
-Namespace-aware, root-tolerant ISO XML DQ validator.
-
-Features:
-- Handles missing / non-standard roots
-- Wraps messages in synthetic <Document> for XPath evaluation
-- Returns 'found' paths reflecting actual XML structure (synthetic wrapper excluded)
-- Local-name based XPath to handle default namespaces
-- Option B + C: wrong-location is valid
-- Stores JSON report in Oracle table iso_message_dq_report
-"""
-
-import json
-import traceback
-import re
-from lxml import etree
-import cx_Oracle  # or oracledb
-
-# --------------------
-# Database config
-# --------------------
-DB_USER = "YOUR_USER"
-DB_PASS = "YOUR_PASS"
-DB_DSN  = "YOUR_HOST:1521/YOUR_SERVICE"
-
-EXPECTED_ROOT_BY_XSD = {
-    "pacs.008.001.08": "FIToFICstmrCdtTrf"
-}
-
-# --------------------
-# Utility functions
-# --------------------
-def lob_to_str(maybe_lob):
-    if hasattr(maybe_lob, "read"):
-        return maybe_lob.read()
-    return maybe_lob
-
-def sanitize_xml(xml_str):
-    if not xml_str:
-        return ""
-    return xml_str.lstrip("\ufeff").strip()
-
-def repair_and_parse(xml_str):
-    """Parse or recover XML"""
-    try:
-        root = etree.fromstring(xml_str.encode("utf-8"))
-        return root, "OK", xml_str
-    except etree.XMLSyntaxError:
-        pass
-    try:
-        parser = etree.XMLParser(recover=True)
-        root = etree.fromstring(xml_str.encode("utf-8"), parser)
-        repaired = etree.tostring(root, encoding="unicode")
-        return root, "REPAIRED", repaired
-    except Exception as e:
-        return None, f"UNRECOVERABLE: {str(e)}", None
-
-def wrap_document_if_missing(root_obj):
-    """
-    Wrap in <Document> if root is not <Document>.
-    Returns (wrapped_root, synthetic_wrapper) where synthetic_wrapper is None if not wrapped.
-    """
-    if root_obj is None:
-        return None, None
-    if etree.QName(root_obj).localname == "Document":
-        return root_obj, None
-    doc = etree.Element("Document")
-    doc.append(root_obj)
-    return doc, doc  # synthetic wrapper
-
-def build_localname_path(node, synthetic_wrapper=None):
-    """
-    Build /local-name path. Excludes synthetic_wrapper from path.
-    """
-    segments = []
-    current = node
-    while current is not None:
-        segments.append(etree.QName(current).localname)
-        current = current.getparent()
-    segments.reverse()
-    # Remove synthetic wrapper
-    if synthetic_wrapper and segments[0] == etree.QName(synthetic_wrapper).localname:
-        segments = segments[1:]
-    return "/" + "/".join(segments)
-
-def build_relaxed_localname_xpath(parts):
-    """
-    Build XPath using local-name() for each part
-    """
-    return "//" + "/".join([f"*[(local-name()='{p}')]" for p in parts])
-
-def fallback_raw_exists(xml_text, tag):
-    if not tag:
-        return False
-    patt = fr"<(?:\w+:)?{tag}\b.*?>.*?</(?:\w+:)?{tag}>"
-    return bool(re.search(patt, xml_text, flags=re.DOTALL | re.IGNORECASE))
-
-def normalize_rule(rule):
-    path = rule.get("path") or rule.get("xpath")
-    required = 1 if rule.get("required") in (True, "1", 1) else 0
-    return path, required
-
-# --------------------
-# XPath evaluation
-# --------------------
-def evaluate_xpath(xml_text, root_obj, strict_xpath, relaxed_xpath):
-    """
-    Evaluate rule: returns dict with exists, location_status, found_path, reason
-    """
-    result = {
-        "exists": 0,
-        "parent_exists": 0,
-        "in_correct_location": 0,
-        "found_path": None,
-        "location_status": "unknown",
-        "reason": None
-    }
-
-    # Strict XPath
-    if root_obj is not None:
-        try:
-            nodes = root_obj.xpath(strict_xpath)
-            if nodes:
-                node = nodes[0]
-                result.update({
-                    "exists": 1,
-                    "parent_exists": 1,
-                    "in_correct_location": 1,
-                    "found_path": build_localname_path(node),
-                    "location_status": "correct",
-                    "reason": "Exact match"
-                })
-                return result
-        except:
-            pass
-
-    # Relaxed local-name XPath
-    if root_obj is not None:
-        try:
-            nodes = root_obj.xpath(relaxed_xpath)
-        except:
-            nodes = []
-        if nodes:
-            node = nodes[0]
-            result.update({
-                "exists": 1,
-                "parent_exists": 1,
-                "in_correct_location": 0,
-                "found_path": build_localname_path(node),
-                "location_status": "wrong_location",
-                "reason": "Found via relaxed local-name search"
-            })
-            return result
-
-    # Raw regex fallback
-    parts = strict_xpath.strip("/").split("/")
-    tag = parts[-1]
-    raw_exists = fallback_raw_exists(xml_text, tag)
-    if raw_exists:
-        result.update({
-            "exists": 1,
-            "found_path": None,
-            "location_status": "unknown",
-            "reason": "Found via raw regex"
-        })
-    return result
-
-# --------------------
-# Main processing
-# --------------------
-def process_messages():
-    conn = cx_Oracle.connect(DB_USER, DB_PASS, DB_DSN)
-    cur = conn.cursor()
-
-    # Ensure DQ report table exists
-    cur.execute("""
-    BEGIN
-        EXECUTE IMMEDIATE '
-        CREATE TABLE iso_message_dq_report (
-            msg_id VARCHAR2(64) PRIMARY KEY,
-            dq_report CLOB,
-            created_at TIMESTAMP DEFAULT SYSTIMESTAMP
-        )';
-    EXCEPTION WHEN OTHERS THEN
-        IF SQLCODE != -955 THEN RAISE; END IF;
-    END;
-    """)
-
-    # Load rules
-    rules_by_xsd = {}
-    cur.execute("SELECT xsd_name, rule_json FROM iso_dq_rules")
-    for xsd_name, rjson in cur.fetchall():
-        rules_by_xsd[xsd_name] = json.loads(lob_to_str(rjson))
-
-    # Process each message
-    cur.execute("SELECT msg_id, xml_payload, xsd_name FROM iso_messages")
-    for msg_id, xml_lob, xsd_name in cur.fetchall():
-        try:
-            xml_text = sanitize_xml(lob_to_str(xml_lob))
-            root, status, repaired = repair_and_parse(xml_text)
-            xml_final = repaired if repaired else xml_text
-
-            wrapped_root, synthetic_wrapper = wrap_document_if_missing(root)
-
-            rules = rules_by_xsd.get(xsd_name, {}).get("rules", [])
-            dq = []
-
-            for rule in rules:
-                path_raw, required = normalize_rule(rule)
-                if not path_raw:
-                    continue
-
-                parts = [p.split(":")[-1] for p in path_raw.strip("/").split("/")]
-                relaxed_xpath = build_relaxed_localname_xpath(parts)
-                strict_xpath = "/" + "/".join(parts)  # namespace-insensitive
-
-                eva = evaluate_xpath(xml_final, wrapped_root, strict_xpath, relaxed_xpath)
-
-                # Build found_path excluding synthetic wrapper
-                if eva["found_path"]:
-                    eva["found_path"] = build_localname_path(
-                        wrapped_root.xpath(relaxed_xpath)[0] if wrapped_root.xpath(relaxed_xpath) else None,
-                        synthetic_wrapper=synthetic_wrapper
-                    )
-
-                valid = "missing" if required == 1 and eva["exists"] == 0 else "ok"
-
-                dq.append({
-                    "path": path_raw,
-                    "expected": path_raw,
-                    "required": required,
-                    "exists": eva["exists"],
-                    "location_status": eva["location_status"],
-                    "found": eva["found_path"],
-                    "valid": valid,
-                    "reason": eva["reason"]
-                })
-
-            out = json.dumps({
-                "msg_id": msg_id,
-                "xsd": xsd_name,
-                "repair": status,
-                "dq_report": dq
-            }, ensure_ascii=False)
-
-            cur.execute("""
-                MERGE INTO iso_message_dq_report d
-                USING (SELECT :m AS msg_id FROM dual) s
-                ON (d.msg_id = s.msg_id)
-                WHEN MATCHED THEN UPDATE SET dq_report = :r, created_at = SYSTIMESTAMP
-                WHEN NOT MATCHED THEN INSERT (msg_id, dq_report) VALUES (:m, :r)
-            """, m=msg_id, r=out)
-
-        except Exception as e:
-            tb = traceback.format_exc()
-            err = json.dumps({"msg_id": msg_id, "error": str(e), "trace": tb})
-            cur.execute("""
-                MERGE INTO iso_message_dq_report d
-                USING (SELECT :m AS msg_id FROM dual) s
-                ON (d.msg_id = s.msg_id)
-                WHEN MATCHED THEN UPDATE SET dq_report = :r
-                WHEN NOT MATCHED THEN INSERT (msg_id, dq_report) VALUES (:m, :r)
-            """, m=msg_id, r=err)
-
-    conn.commit()
-    cur.close()
-    conn.close()
-
-# --------------------
-# Entry point
-# --------------------
-if __name__ == "__main__":
-    process_messages()
-
-
-
-
-
-#!/usr/bin/env python3
-"""
-DQ Validator for ISO XML messages (pacs.008, pacs.009, etc.)
-Namespace-aware, root-tolerant, and produces JSON DQ reports.
-
-Features:
-- Handles missing / non-standard XML roots
-- Wraps messages in synthetic <Document> if needed
-- Supports default namespaces in group/transaction/batch roots
-- Generates 'found' paths using local-name(), ignoring namespace prefixes
-- Option B + C validation: wrong location is valid
-- Stores JSON report in Oracle table iso_message_dq_report
-"""
-
-import json
-import traceback
-import re
-from lxml import etree
-import cx_Oracle  # or oracledb if you prefer
-
-# --------------------
-# Database config
-# --------------------
-DB_USER = "YOUR_USER"
-DB_PASS = "YOUR_PASS"
-DB_DSN  = "YOUR_HOST:1521/YOUR_SERVICE"
-
-# Mapping XSD -> expected root element
-EXPECTED_ROOT_BY_XSD = {
-    "pacs.008.001.08": "FIToFICstmrCdtTrf"
-}
-
-# --------------------
-# Utility functions
-# --------------------
-
-def lob_to_str(maybe_lob):
-    """Convert CLOB/Lob to string"""
-    if hasattr(maybe_lob, "read"):
-        return maybe_lob.read()
-    return maybe_lob
-
-def sanitize_xml(xml_str):
-    """Strip BOM/whitespace"""
-    if not xml_str:
-        return ""
-    return xml_str.lstrip("\ufeff").strip()
-
-def repair_and_parse(xml_str):
-    """
-    Try parsing XML; if broken, attempt recovery using lxml.XMLParser(recover=True)
-    Returns: root_obj, status, repaired_text
-    """
-    try:
-        root = etree.fromstring(xml_str.encode("utf-8"))
-        return root, "OK", xml_str
-    except etree.XMLSyntaxError:
-        pass
-    try:
-        parser = etree.XMLParser(recover=True)
-        root = etree.fromstring(xml_str.encode("utf-8"), parser)
-        repaired = etree.tostring(root, encoding="unicode")
-        return root, "REPAIRED", repaired
-    except Exception as e:
-        return None, f"UNRECOVERABLE: {str(e)}", None
-
-def wrap_document_if_missing(root_obj):
-    """
-    If XML root is not <Document>, wrap it in <Document>.
-    Ensures found paths start with /Document/...
-    """
-    if root_obj is None:
-        return None
-    if etree.QName(root_obj).localname == "Document":
-        return root_obj
-    new_doc = etree.Element("Document")
-    new_doc.append(root_obj)
-    return new_doc
-
-def build_localname_path(node):
-    """
-    Build path using local-names only.
-    Ignores namespace prefixes.
-    Example: /Document/group/GrpHdr/MsgId
-    """
-    try:
-        segments = []
-        current = node
-        segments.append(etree.QName(current).localname)
-        for a in current.iterancestors():
-            segments.append(etree.QName(a).localname)
-        segments.reverse()
-        return "/" + "/".join(segments)
-    except:
-        return None
-
-def build_relaxed_localname_xpath(parts):
-    """
-    Build XPath that matches nodes by local-name only (ignores namespaces)
-    Example: //Document/*[local-name()='group']/*[local-name()='GrpHdr']/*[local-name()='MsgId']
-    """
-    return "//" + "/".join([f"*[(local-name()='{p}')]" for p in parts])
-
-def fallback_raw_exists(xml_text, tag):
-    """Fallback check using regex if XPath fails"""
-    if not tag:
-        return False
-    patt = fr"<(?:\w+:)?{tag}\b.*?>.*?</(?:\w+:)?{tag}>"
-    return bool(re.search(patt, xml_text, flags=re.DOTALL | re.IGNORECASE))
-
-def normalize_rule(rule):
-    """Extract path and required flag"""
-    path = rule.get("path") or rule.get("xpath")
-    required = 1 if rule.get("required") in (True, "1", 1) else 0
-    return path, required
-
-# --------------------
-# XPath evaluation
-# --------------------
-def evaluate_xpath(xml_text, root_obj, strict_xpath, relaxed_xpath, expected_root=None):
-    """
-    Evaluate a single rule.
-    Returns dict:
-    {
-        exists: 1/0,
-        parent_exists: 1/0,
-        in_correct_location: 1/0,
-        found_path: str or None,
-        location_status: correct/wrong_location/unknown,
-        reason: explanation
-    }
-    """
-    result = {
-        "exists": 0,
-        "parent_exists": 0,
-        "in_correct_location": 0,
-        "found_path": None,
-        "location_status": "unknown",
-        "reason": None
-    }
-
-    # Strict XPath match
-    if root_obj is not None:
-        try:
-            nodes = root_obj.xpath(strict_xpath)
-            if nodes:
-                node = nodes[0]
-                result.update({
-                    "exists": 1,
-                    "parent_exists": 1,
-                    "in_correct_location": 1,
-                    "found_path": build_localname_path(node),
-                    "location_status": "correct",
-                    "reason": "Exact match"
-                })
-                return result
-        except:
-            pass
-
-    # Relaxed local-name XPath
-    if root_obj is not None:
-        try:
-            nodes = root_obj.xpath(relaxed_xpath)
-        except:
-            nodes = []
-        if nodes:
-            node = nodes[0]
-            result.update({
-                "exists": 1,
-                "parent_exists": 1,  # best-effort
-                "in_correct_location": 0,
-                "found_path": build_localname_path(node),
-                "location_status": "wrong_location",
-                "reason": "Found via relaxed local-name search"
-            })
-            return result
-
-    # Raw regex fallback
-    parts = strict_xpath.strip("/").split("/")
-    tag = parts[-1]
-    raw_exists = fallback_raw_exists(xml_text, tag)
-    if raw_exists:
-        result.update({
-            "exists": 1,
-            "found_path": None,
-            "location_status": "unknown",
-            "reason": "Found via raw regex"
-        })
-    return result
-
-# --------------------
-# Main processing
-# --------------------
-def process_messages():
-    conn = cx_Oracle.connect(DB_USER, DB_PASS, DB_DSN)
-    cur = conn.cursor()
-
-    # Ensure DQ report table exists
-    cur.execute("""
-    BEGIN
-        EXECUTE IMMEDIATE '
-        CREATE TABLE iso_message_dq_report (
-            msg_id VARCHAR2(64) PRIMARY KEY,
-            dq_report CLOB,
-            created_at TIMESTAMP DEFAULT SYSTIMESTAMP
-        )';
-    EXCEPTION WHEN OTHERS THEN
-        IF SQLCODE != -955 THEN RAISE; END IF;
-    END;
-    """)
-
-    # Load rules
-    rules_by_xsd = {}
-    cur.execute("SELECT xsd_name, rule_json FROM iso_dq_rules")
-    for xsd_name, rjson in cur.fetchall():
-        rules_by_xsd[xsd_name] = json.loads(lob_to_str(rjson))
-
-    # Process each message
-    cur.execute("SELECT msg_id, xml_payload, xsd_name FROM iso_messages")
-    for msg_id, xml_lob, xsd_name in cur.fetchall():
-        try:
-            xml_text = sanitize_xml(lob_to_str(xml_lob))
-            root, status, repaired = repair_and_parse(xml_text)
-            xml_final = repaired if repaired else xml_text
-
-            # Wrap in <Document> if missing
-            wrapped_root = wrap_document_if_missing(root)
-
-            rules = rules_by_xsd.get(xsd_name, {}).get("rules", [])
-            dq = []
-
-            for rule in rules:
-                path_raw, required = normalize_rule(rule)
-                if not path_raw:
-                    continue
-
-                # Strict XPath (namespace-insensitive for now)
-                parts = [p.split(":")[-1] for p in path_raw.strip("/").split("/")]
-                relaxed_xpath = build_relaxed_localname_xpath(parts)
-                strict_xpath = "/" + "/".join(parts)  # lxml will resolve local-name search anyway
-
-                eva = evaluate_xpath(xml_final, wrapped_root, strict_xpath, relaxed_xpath,
-                                     expected_root=EXPECTED_ROOT_BY_XSD.get(xsd_name))
-
-                valid = "missing" if required == 1 and eva["exists"] == 0 else "ok"
-
-                dq.append({
-                    "path": path_raw,
-                    "expected": path_raw,
-                    "required": required,
-                    "exists": eva["exists"],
-                    "location_status": eva["location_status"],
-                    "found": eva["found_path"],
-                    "valid": valid,
-                    "reason": eva["reason"]
-                })
-
-            out = json.dumps({
-                "msg_id": msg_id,
-                "xsd": xsd_name,
-                "repair": status,
-                "dq_report": dq
-            }, ensure_ascii=False)
-
-            cur.execute("""
-                MERGE INTO iso_message_dq_report d
-                USING (SELECT :m AS msg_id FROM dual) s
-                ON (d.msg_id = s.msg_id)
-                WHEN MATCHED THEN UPDATE SET dq_report = :r, created_at = SYSTIMESTAMP
-                WHEN NOT MATCHED THEN INSERT (msg_id, dq_report) VALUES (:m, :r)
-            """, m=msg_id, r=out)
-
-        except Exception as e:
-            tb = traceback.format_exc()
-            err = json.dumps({"msg_id": msg_id, "error": str(e), "trace": tb})
-            cur.execute("""
-                MERGE INTO iso_message_dq_report d
-                USING (SELECT :m AS msg_id FROM dual) s
-                ON (d.msg_id = s.msg_id)
-                WHEN MATCHED THEN UPDATE SET dq_report = :r
-                WHEN NOT MATCHED THEN INSERT (msg_id, dq_report) VALUES (:m, :r)
-            """, m=msg_id, r=err)
-
-    conn.commit()
-    cur.close()
-    conn.close()
-
-# --------------------
-# ENTRY POINT
-# --------------------
-if __name__ == "__main__":
-    process_messages()
-
-
-
-#!/usr/bin/env python3
-
-import re
-import json
-import traceback
-from lxml import etree
-import oracledb
-
-# --------------------
-# CONFIGURE THESE
-# --------------------
-DB_USER = "YOUR_USER"
-DB_PASS = "YOUR_PASS"
-DB_DSN  = "YOUR_HOST:1521/YOUR_SERVICE"
-
-EXPECTED_ROOT_BY_XSD = {
-    "pacs.008.001.08": "FIToFICstmrCdtTrf"
-}
-
-STRICT_STRUCTURE = False   # wrong-location counts as valid (per your request)
-BATCH_COMMIT = 100
-DRY_RUN = False
-
-
-# --------------------
-# Utility
-# --------------------
-def lob_to_str(maybe_lob):
-    if hasattr(maybe_lob, "read"):
-        return maybe_lob.read()
-    return maybe_lob
-
-
-def sanitize_xml(s):
-    if not s:
-        return ""
-    s = s.lstrip("\ufeff").strip()
-    return s
-
-
-def repair_and_parse(xml_str):
-    """Try normal parse, else repair."""
-    try:
-        root = etree.fromstring(xml_str.encode("utf-8"))
-        return root, "OK", xml_str
-    except etree.XMLSyntaxError:
-        pass
-
-    try:
-        parser = etree.XMLParser(recover=True)
-        root = etree.fromstring(xml_str.encode("utf-8"), parser)
-        repaired = etree.tostring(root, encoding="unicode")
-        return root, "REPAIRED", repaired
-    except Exception as e:
-        return None, f"UNRECOVERABLE: {str(e)}", None
-
-
-def wrap_document_if_missing(root_obj):
-    """
-    If XML has no <Document>, wrap inside <Document>.
-    This ensures found localname paths come out as:
-        /Document/group/GrpHdr/MsgId
-    """
-    if root_obj is None:
-        return None
-
-    # Check for existing Document
-    try:
-        doc_found = root_obj.xpath("/*[local-name()='Document']")
-        if doc_found:
-            return root_obj
-    except:
-        pass
-
-    # Create wrapper
-    new_doc = etree.Element("Document")
-
-    # If parsed root was <group> or something else, make it a child of <Document>
-    new_doc.append(root_obj)
-
-    return new_doc
-
-
-def build_localname_path(node):
-    """Return a /local-name path from root."""
-    try:
-        segs = []
-        current = node
-        segs.append(etree.QName(current).localname)
-        for a in current.iterancestors():
-            segs.append(etree.QName(a).localname)
-        segs.reverse()
-        return "/" + "/".join(segs)
-    except:
-        return None
-
-
-def fallback_raw_exists(xml_text, tag):
-    if not tag:
-        return False
-    patt = fr"<(?:\w+:)?{tag}\b.*?>.*?</(?:\w+:)?{tag}>"
-    return bool(re.search(patt, xml_text, flags=re.DOTALL | re.IGNORECASE))
-
-
-def build_relaxed_xpath(parts):
-    return "//" + "/".join([f"*[(local-name()='{p}')]" for p in parts])
-
-
-def normalize_rule(rule):
-    path = rule.get("path") or rule.get("xpath")
-    required = 1 if rule.get("required") in (True, "1", 1) else 0
-    return path, required
-
-
-# --------------------
-# Main XPath evaluator with found-path support
-# --------------------
-def evaluate_xpath(search_xml, root_obj, strict_xpath, relaxed_xpath, expected_root=None):
-    """
-    Returns dict containing exists, found_path, parent_exists, etc.
-    """
-    result = {
-        "exists": 0,
-        "parent_exists": 0,
-        "in_correct_location": 0,
-        "root_missing": 0,
-        "reason": None,
-        "found_path": None,
-        "location_status": "unknown"
-    }
-
-    # Try strict match first
-    if root_obj is not None:
-        try:
-            nodes = root_obj.xpath(strict_xpath)
-            if nodes:
-                node = nodes[0]
-                fp = build_localname_path(node)
-                result.update({
-                    "exists": 1,
-                    "parent_exists": 1,
-                    "in_correct_location": 1,
-                    "reason": "Exact match",
-                    "found_path": fp,
-                    "location_status": "correct"
-                })
-                return result
-        except:
-            pass
-
-    # Try relaxed (descendant) search
-    if root_obj is not None:
-        try:
-            rnodes = root_obj.xpath(relaxed_xpath)
-        except:
-            rnodes = []
-
-        if rnodes:
-            node = rnodes[0]
-            fp = build_localname_path(node)
-
-            parts = strict_xpath.strip("/").split("/")
-            parent = parts[-2] if len(parts) > 1 else None
-            parent_exists = 1 if parent and root_obj.xpath(f"//*[local-name()='{parent}']") else 0
-
-            result.update({
-                "exists": 1,
-                "parent_exists": parent_exists,
-                "in_correct_location": 0,
-                "reason": "Found via relaxed local-name search",
-                "found_path": fp,
-                "location_status": "wrong_location"
-            })
-            return result
-
-    # Raw fallback
-    parts = strict_xpath.strip("/").split("/")
-    tag = parts[-1]
-    parent = parts[-2] if len(parts) > 1 else None
-
-    raw_exists = fallback_raw_exists(search_xml, tag)
-
-    if not raw_exists:
-        result["exists"] = 0
-        return result
-
-    result.update({
-        "exists": 1,
-        "reason": "Found via raw regex",
-        "location_status": "unknown",  # cannot determine
-    })
-    return result
-
-
-# --------------------
-# Main processing
-# --------------------
-def process_messages():
-    conn = oracledb.connect(user=DB_USER, password=DB_PASS, dsn=DB_DSN)
-    cur = conn.cursor()
-
-    # Ensure reports table exists
-    cur.execute("""
-    BEGIN
-        EXECUTE IMMEDIATE '
-        CREATE TABLE iso_message_dq_report (
-            msg_id VARCHAR2(64) PRIMARY KEY,
-            dq_report CLOB,
-            created_at TIMESTAMP DEFAULT SYSTIMESTAMP
-        )';
-    EXCEPTION WHEN OTHERS THEN
-        IF SQLCODE != -955 THEN RAISE; END IF;
-    END;
-    """)
-
-    # Load rules
-    rules_by_xsd = {}
-    cur.execute("SELECT xsd_name, rule_json FROM iso_dq_rules")
-    for xsd_name, rjson in cur.fetchall():
-        s = lob_to_str(rjson)
-        rules_by_xsd[xsd_name] = json.loads(s)
-
-    # Process each message
-    cur.execute("SELECT msg_id, xml_payload, xsd_name FROM iso_messages")
-
-    for msg_id, xml_lob, xsd_name in cur.fetchall():
-        try:
-            xml_text = sanitize_xml(lob_to_str(xml_lob))
-
-            root, status, repaired = repair_and_parse(xml_text)
-            xml_final = repaired if repaired else xml_text
-
-            # Inject synthetic Document if missing
-            wrapped_root = wrap_document_if_missing(root)
-
-            # namespace
-            ns_uri = wrapped_root.nsmap.get(None)
-            ns_map = {"ns": ns_uri} if ns_uri else {}
-
-            rules = rules_by_xsd.get(xsd_name, {}).get("rules", [])
-
-            dq = []
-
-            for rule in rules:
-                path_raw, required = normalize_rule(rule)
-                if not path_raw:
-                    continue
-
-                # Build strict XPath
-                strict = "/" + "/".join([("ns:" + p) if ns_uri else p for p in path_raw.strip("/").split("/")])
-
-                # Build relaxed
-                parts = [p.split(":")[-1] for p in path_raw.strip("/").split("/")]
-                relaxed = build_relaxed_xpath(parts)
-
-                # Evaluate
-                eva = evaluate_xpath(xml_final, wrapped_root, strict, relaxed, expected_root=EXPECTED_ROOT_BY_XSD.get(xsd_name))
-
-                # Determine valid
-                if required == 1 and eva["exists"] == 0:
-                    valid = "missing"
-                else:
-                    valid = "ok"
-
-                dq.append({
-                    "path": path_raw,
-                    "expected": path_raw,
-                    "required": required,
-                    "exists": eva["exists"],
-                    "location_status": eva["location_status"],
-                    "found": eva["found_path"],
-                    "valid": valid,
-                    "reason": eva["reason"]
-                })
-
-            # Store
-            out = json.dumps({
-                "msg_id": msg_id,
-                "xsd": xsd_name,
-                "repair": status,
-                "dq_report": dq
-            }, ensure_ascii=False)
-
-            cur.execute("""
-                MERGE INTO iso_message_dq_report d
-                USING (SELECT :m AS msg_id FROM dual) s
-                ON (d.msg_id = s.msg_id)
-                WHEN MATCHED THEN UPDATE SET dq_report = :r, created_at = SYSTIMESTAMP
-                WHEN NOT MATCHED THEN INSERT (msg_id, dq_report) VALUES (:m, :r)
-            """, m=msg_id, r=out)
-
-        except Exception as e:
-            tb = traceback.format_exc()
-            err = json.dumps({"msg_id": msg_id, "error": str(e), "trace": tb})
-            cur.execute("""
-                MERGE INTO iso_message_dq_report d
-                USING (SELECT :m AS msg_id FROM dual) s
-                ON (d.msg_id = s.msg_id)
-                WHEN MATCHED THEN UPDATE SET dq_report = :r
-                WHEN NOT MATCHED THEN INSERT (msg_id, dq_report) VALUES (:m, :r)
-            """, m=msg_id, r=err)
-
-    conn.commit()
-    cur.close()
-    conn.close()
-
-
-if __name__ == "__main__":
-    process_messages()
-
-
-
-
-#!/usr/bin/env python3
-"""
-dq_validator_root_tolerant_with_foundpath.py
-
-ISO20022 DQ validator — strict when expected root present, tolerant otherwise,
-reports detailed 'found' path when element exists but in the wrong location.
-"""
-
-import re
-import json
-import traceback
-from lxml import etree
-import oracledb
-
-# -------------------------
-# CONFIG - edit these
-# -------------------------
-DB_USER = "YOUR_USER"
-DB_PASS = "YOUR_PASS"
-DB_DSN  = "YOUR_HOST:1521/YOUR_SERVICE"
-
-BATCH_COMMIT = 100
-DRY_RUN = False
-STRICT_STRUCTURE = False  # If True, treat mislocated required elements as missing
-
-EXPECTED_ROOT_BY_XSD = {
-    "pacs.008.001.08": "FIToFICstmrCdtTrf"
-}
-
-# -------------------------
-# DB connection
-# -------------------------
-def get_connection():
-    return oracledb.connect(user=DB_USER, password=DB_PASS, dsn=DB_DSN)
-
-# -------------------------
-# Utils
-# -------------------------
-def lob_to_str(maybe_lob):
-    if maybe_lob is None:
-        return None
-    if hasattr(maybe_lob, "read"):
-        return maybe_lob.read()
-    return str(maybe_lob)
-
-def sanitize_xml(xml_str):
-    if xml_str is None:
-        return None
-    s = xml_str.lstrip("\ufeff").strip()
-    if "<Document" in s:
-        start = s.find("<Document")
-        end = s.rfind("</Document>")
-        if end != -1 and end > start:
-            end = end + len("</Document>")
-            s = s[start:end]
-        else:
-            s = s[start:]
-    return s
-
-def repair_and_parse(xml_str):
-    if not xml_str:
-        return None, "UNRECOVERABLE: empty", None
-    try:
-        root = etree.fromstring(xml_str.encode("utf-8"))
-        return root, "OK", xml_str
-    except etree.XMLSyntaxError:
-        pass
-    try:
-        parser = etree.XMLParser(recover=True, remove_comments=False)
-        root = etree.fromstring(xml_str.encode("utf-8"), parser)
-        repaired = etree.tostring(root, encoding="unicode")
-        return root, "REPAIRED", repaired
-    except Exception as e:
-        return None, f"UNRECOVERABLE: {str(e)}", None
-
-def fallback_raw_exists(xml_str, tag_name):
-    if not tag_name:
-        return False
-    pattern = fr"<(?:\w+:)?{re.escape(tag_name)}\b[^>]*>.*?</(?:\w+:)?{re.escape(tag_name)}>"
-    return bool(re.search(pattern, xml_str, flags=re.DOTALL | re.IGNORECASE))
-
-def fallback_raw_parent_child(xml_str, parent_tag, child_tag):
-    if not parent_tag or not child_tag:
-        return False
-    pattern = fr"<(?:\w+:)?{re.escape(parent_tag)}\b[^>]*>.*?<(?:\w+:)?{re.escape(child_tag)}\b"
-    return bool(re.search(pattern, xml_str, flags=re.DOTALL | re.IGNORECASE))
-
-def build_relaxed_localname_xpath(parts):
-    if not parts:
-        return None
-    pieces = ["*[local-name()='" + p + "']" for p in parts]
-    return "//" + "/".join(pieces)
-
-def find_best_alternate_root(root_obj, strict_xpath, expected_root_localname, ns_map):
-    if root_obj is None or not expected_root_localname:
-        return None, None
-    try:
-        doc_children = root_obj.xpath("/*[local-name()='Document']/*")
-        child_names = []
-        for c in doc_children:
-            ln = etree.QName(c).localname
-            if ln not in child_names:
-                child_names.append(ln)
-    except Exception:
-        child_names = []
-    guess_names = ['group', 'transaction', 'batch', 'payments', 'transactions', 'envelope', 'data']
-    for g in guess_names:
-        if g not in child_names:
-            child_names.append(g)
-    for candidate in child_names:
-        parts = strict_xpath.strip("/").split("/")
-        new_parts = []
-        replaced = False
-        for p in parts:
-            p_local = p.split(":")[-1]
-            if (not replaced) and p_local == expected_root_localname:
-                new_parts.append(candidate)
-                replaced = True
-            else:
-                new_parts.append(p)
-        if not replaced:
-            continue
-        variant = "/" + "/".join(new_parts)
-        try:
-            nodes = root_obj.xpath(variant, namespaces=ns_map)
-            if nodes and len(nodes) > 0:
-                return variant, candidate
-        except Exception:
-            continue
-    return None, None
-
-def adjust_xpath_for_missing_root_v2(root_obj, raw_xml_str, xsd_name, strict_xpath):
-    expected_root = EXPECTED_ROOT_BY_XSD.get(xsd_name)
-    if not expected_root:
-        return strict_xpath, False, None
-    major_present = False
-    try:
-        if root_obj is not None:
-            major_present = True if root_obj.xpath("/*[local-name()='Document']/*[local-name()='" + expected_root + "']") else False
-        else:
-            major_present = True if fallback_raw_exists(raw_xml_str, expected_root) else False
-    except Exception:
-        major_present = False
-    if major_present:
-        return strict_xpath, False, None
-    mapped_variant, mapped_to = None, None
-    try:
-        mapped_variant, mapped_to = find_best_alternate_root(root_obj, strict_xpath, expected_root, {})
-    except Exception:
-        mapped_variant, mapped_to = None, None
-    if mapped_variant:
-        return mapped_variant, True, {'mapped_from': expected_root, 'mapped_to': mapped_to}
-    parts = [p for p in strict_xpath.strip("/").split("/") if p and p.lower() != "document" and p.split(":")[-1] != expected_root]
-    if not parts:
-        return strict_xpath, True, None
-    relaxed = build_relaxed_localname_xpath([p.split(":")[-1] for p in parts])
-    return relaxed, True, None
-
-def normalize_rule(rule):
-    path = rule.get("path") or rule.get("xpath") or rule.get("element") or rule.get("field")
-    if "required" in rule:
-        try:
-            required = 1 if int(rule.get("required")) != 0 else 0
-        except:
-            required = 1 if bool(rule.get("required")) else 0
-    elif "minOccurs" in rule:
-        try:
-            required = 1 if int(rule.get("minOccurs", 0)) > 0 else 0
-        except:
-            required = 0
-    elif "mandatory" in rule:
-        required = 1 if rule.get("mandatory") else 0
-    else:
-        required = 0
-    return path, required
-
-# ---------- NEW: compute a simple local-name path for a found node ----------
-def build_localname_path(node):
-    """
-    Build a path of local-names from the document root to the given node.
-    Example: /Document/group/GrpHdr/MsgId
-    Works with lxml Element nodes.
-    """
-    segs = []
-    # include the node itself
-    try:
-        current = node
-        segs.append(etree.QName(current).localname)
-        for anc in current.iterancestors():
-            segs.append(etree.QName(anc).localname)
-        segs.reverse()
-        return "/" + "/".join(segs)
-    except Exception:
-        return None
-
-# -------------------------
-# Enhanced existence check using root when available, else fallback
-# -------------------------
-def evaluate_path_with_foundpath(search_xml, root_obj, strict_xpath, relaxed_xpath, ns_map, expected_root_localname=None):
-    """
-    Return a dict with:
-      exists, parent_exists, in_correct_location, root_missing, reason,
-      found_path (if found), location_status: 'correct'|'wrong_location'|'unknown'
-    Behavior:
-      - Try strict_xpath on parsed root if available
-      - If strict match -> found_path = actual path -> location_status = correct
-      - If not, try relaxed (local-name) search to find node(s)
-      - If found via relaxed -> produce found_path (first node) and location_status wrong_location
-      - If no parsed root (malformed), use regex fallback and set found_path to None (we can try to use simple parent-child regex but keep it simple)
-    """
-    result = {'exists':0, 'parent_exists':0, 'in_correct_location':0, 'root_missing':0, 'reason':None, 'found_path':None, 'location_status':'unknown'}
-
-    # Prefer parsed root for XPath evaluation
-    if root_obj is not None:
-        try:
-            # Try strict
-            nodes = root_obj.xpath(strict_xpath, namespaces=ns_map)
-            if nodes and len(nodes) > 0:
-                # exact match found
-                node = nodes[0]
-                found_path = build_localname_path(node)
-                result.update({'exists':1, 'parent_exists':1, 'in_correct_location':1, 'root_missing':0, 'reason':'Exact XPath match', 'found_path':found_path, 'location_status':'correct'})
-                return result
-            # strict failed: try relaxed local-name search for tag (descendant)
-            if relaxed_xpath:
-                try:
-                    # relaxed_xpath is e.g. //*[local-name()='GrpHdr']/*[local-name()='MsgId'] or similar
-                    rnodes = root_obj.xpath(relaxed_xpath, namespaces=ns_map)
-                except Exception:
-                    rnodes = []
-                if rnodes and len(rnodes) > 0:
-                    node = rnodes[0]
-                    found_path = build_localname_path(node)
-                    # parent existence: check presence of parent element local-name anywhere
-                    # infer parent from strict_xpath
-                    parts = strict_xpath.strip("/").split("/")
-                    parent = parts[-2] if len(parts) > 1 else None
-                    parent_exists = 1 if (parent and root_obj.xpath("//*[local-name()='" + parent + "']", namespaces=ns_map)) else (1 if not parent else 0)
-                    # major root presence
-                    major_root_exists = 1 if (expected_root_localname and root_obj.xpath("/*[local-name()='" + expected_root_localname + "']")) else 0
-                    result.update({'exists':1, 'parent_exists': int(parent_exists), 'in_correct_location': 0, 'root_missing': 0 if major_root_exists else 1, 'reason':'Found via relaxed local-name search', 'found_path':found_path, 'location_status':'wrong_location'})
-                    return result
-            # not found
-            # compute parent_exists by local-name
-            parts = strict_xpath.strip("/").split("/")
-            parent = parts[-2] if len(parts) > 1 else None
-            parent_exists = 1 if (parent and root_obj.xpath("//*[local-name()='" + parent + "']", namespaces=ns_map)) else (1 if not parent else 0)
-            major_root_exists = 1 if (expected_root_localname and root_obj.xpath("/*[local-name()='" + expected_root_localname + "']")) else 0
-            result.update({'exists':0, 'parent_exists':int(parent_exists), 'in_correct_location':0, 'root_missing':0 if major_root_exists else 1, 'reason':'Tag not found'})
-            return result
-        except Exception as e:
-            # fallback to regex if something unexpected occurred
-            # continue to below
-            pass
-
-    # root_obj is None or XPath evaluation failed -> fallback to raw regex
-    # try to find tag anywhere
-    parts = strict_xpath.strip("/").split("/")
-    tag = parts[-1] if parts else None
-    parent = parts[-2] if len(parts) > 1 else None
-    raw_exists = fallback_raw_exists(search_xml, tag)
-    if not raw_exists:
-        parent_exists = 1 if (parent and fallback_raw_exists(search_xml, parent)) else (1 if not parent else 0)
-        major_root_exists = 1 if (expected_root_localname and fallback_raw_exists(search_xml, expected_root_localname)) else 0
-        result.update({'exists':0, 'parent_exists':int(parent_exists), 'in_correct_location':0, 'root_missing':0 if major_root_exists else 1, 'reason':'Tag not found (raw fallback)'})
-        return result
-    # raw found -> we don't have a clean node to compute path; set found_path to None but set location_status
-    parent_exists = 1 if (parent and fallback_raw_exists(search_xml, parent)) else (1 if not parent else 0)
-    major_root_exists = 1 if (expected_root_localname and fallback_raw_exists(search_xml, expected_root_localname)) else 0
-    # try parent-child raw to decide correct location
-    correct_location = 1 if (parent and fallback_raw_parent_child(search_xml, parent, tag)) else (1 if not parent else 0)
-    result.update({'exists':1, 'parent_exists':int(parent_exists), 'in_correct_location':int(correct_location), 'root_missing':0 if major_root_exists else 1, 'reason':'Found by raw regex', 'found_path':None, 'location_status':'correct' if correct_location else 'wrong_location'})
-    return result
-
-# -------------------------
-# Main processing
-# -------------------------
-def process_all_messages():
-    conn = get_connection()
-    cur = conn.cursor()
-
-    try:
-        cur.execute("""
-        BEGIN
-            EXECUTE IMMEDIATE '
-            CREATE TABLE iso_message_dq_report (
-                msg_id VARCHAR2(64) PRIMARY KEY,
-                dq_report CLOB,
-                created_at TIMESTAMP DEFAULT SYSTIMESTAMP
-            )';
-        EXCEPTION WHEN OTHERS THEN
-            IF SQLCODE != -955 THEN RAISE; END IF;
-        END;
-        """)
-        conn.commit()
-    except Exception:
-        pass
-
-    # load rules
-    rules_map = {}
-    cur.execute("SELECT xsd_name, rule_json FROM iso_dq_rules")
-    for xsd_name, rule_json in cur.fetchall():
-        s = lob_to_str(rule_json)
-        try:
-            rules_map[xsd_name] = json.loads(s) if s else {}
-        except Exception:
-            rules_map[xsd_name] = {}
-
-    # fetch messages
-    cur.execute("SELECT msg_id, xml_payload, xsd_name FROM iso_messages")
-    processed = 0
-    for msg_id, xml_payload, xsd_name in cur.fetchall():
-        processed += 1
-        try:
-            xml_text = lob_to_str(xml_payload)
-            xml_text_sanitized = sanitize_xml(xml_text)
-
-            root, status, repaired_xml = repair_and_parse(xml_text_sanitized)
-            search_xml = repaired_xml if repaired_xml is not None else xml_text_sanitized
-
-            ns_map = {}
-            if root is not None:
-                ns_uri = root.nsmap.get(None)
-                if ns_uri:
-                    ns_map = {'ns': ns_uri}
-
-            dq_report = []
-            rules_json = rules_map.get(xsd_name, {})
-            rules = rules_json.get("rules") if isinstance(rules_json, dict) else None
-            if not rules:
-                dq_report.append({'error': f'No rules found for XSD {xsd_name}'})
-            else:
-                for rule in rules:
-                    path_raw, required = normalize_rule(rule)
-                    if not path_raw:
-                        continue
-
-                    # strict xpath (ns-aware if possible)
-                    if ns_map and not path_raw.startswith("/ns:"):
-                        strict_xpath = "/" + "/".join([("ns:" + p) for p in path_raw.strip("/").split("/")])
-                    elif not path_raw.startswith("/"):
-                        strict_xpath = "/" + path_raw
-                    else:
-                        strict_xpath = path_raw
-
-                    adjusted_xpath, was_relaxed, mapping_info = adjust_xpath_for_missing_root_v2(
-                        root, xml_text_sanitized, xsd_name, strict_xpath
-                    )
-
-                    # create relaxed local-name xpath for use when needed
-                    parts = [p.split(":")[-1] for p in strict_xpath.strip("/").split("/") if p]
-                    relaxed_xpath = build_relaxed_localname_xpath(parts)
-
-                    # Evaluate and get found_path if possible
-                    eval_res = evaluate_path_with_foundpath(search_xml, root, adjusted_xpath, relaxed_xpath, ns_map, expected_root_localname=EXPECTED_ROOT_BY_XSD.get(xsd_name))
-
-                    # Determine validity per your request: B (detailed) + C (treat wrong location as ok)
-                    # So by default wrong_location is ok, but include details
-                    valid = 'ok'
-                    if required == 1 and eval_res['exists'] == 0:
-                        valid = 'missing'
-                    elif required == 1 and eval_res['exists'] == 1 and eval_res['in_correct_location'] == 0 and STRICT_STRUCTURE:
-                        valid = 'missing'
-
-                    entry = {
-                        'path': path_raw,
-                        'required': int(required),
-                        'exists': int(eval_res['exists']),
-                        'parent_exists': int(eval_res.get('parent_exists', 0)),
-                        'in_correct_location': int(eval_res.get('in_correct_location', 0)),
-                        'root_missing': int(eval_res.get('root_missing', 0)) or int(was_relaxed),
-                        'location_status': eval_res.get('location_status'),
-                        'expected': path_raw,
-                        'found': eval_res.get('found_path'),  # may be None for raw-fallback matches
-                        'mapping_info': mapping_info,
-                        'valid': valid,
-                        'reason': eval_res.get('reason')
-                    }
-                    dq_report.append(entry)
-
-            out = {
-                'msg_id': msg_id,
-                'xsd_name': xsd_name,
-                'xml_repair_status': status,
-                'dq_report': dq_report
-            }
-            out_json = json.dumps(out, ensure_ascii=False)
-
-            if not DRY_RUN:
-                cur.execute("UPDATE iso_message_dq_report SET dq_report = :dq, created_at = SYSTIMESTAMP WHERE msg_id = :mid",
-                            dq=out_json, mid=msg_id)
-                if cur.rowcount == 0:
-                    cur.execute("INSERT INTO iso_message_dq_report (msg_id, dq_report) VALUES (:mid, :dq)",
-                                mid=msg_id, dq=out_json)
-
-            if not DRY_RUN and (processed % BATCH_COMMIT == 0):
-                conn.commit()
-
-        except Exception as e:
-            tb = traceback.format_exc()
-            err_json = json.dumps({'msg_id': msg_id, 'error': str(e), 'trace': tb}, ensure_ascii=False)
-            if not DRY_RUN:
-                try:
-                    cur.execute("UPDATE iso_message_dq_report SET dq_report = :dq, created_at = SYSTIMESTAMP WHERE msg_id = :mid",
-                                dq=err_json, mid=msg_id)
-                    if cur.rowcount == 0:
-                        cur.execute("INSERT INTO iso_message_dq_report (msg_id, dq_report) VALUES (:mid, :dq)",
-                                    mid=msg_id, dq=err_json)
-                except Exception:
-                    print("Failed to write error for msg_id", msg_id)
-                    print(err_json)
-            print("Error processing msg_id", msg_id, ":", str(e))
-
-    if not DRY_RUN:
-        conn.commit()
-    cur.close()
-    conn.close()
-    print(f"Processed {processed} messages. Output written to iso_message_dq_report.")
-
-# -------------------------
-# Run
-# -------------------------
-if __name__ == "__main__":
-    process_all_messages()
-
-
-
-
-#!/usr/bin/env python3
-"""
-dq_validator_root_tolerant.py
-
-ISO20022 DQ validator — strict when expected root present, tolerant otherwise,
-with mapping for non-standard containers like <group> and <transaction>.
-
-Features:
-- Auto-repair malformed XML (recover mode)
-- Namespace aware XPath checks
-- If expected root (per XSD) missing -> try to map to actual container (group/transaction/batch...)
-- If mapping fails -> relaxed local-name descendant search
-- Regex fallback for very malformed XML
-- Writes DQ JSON per message into iso_message_dq_report (upsert)
-- Handles Oracle CLOBs via oracledb
-"""
-
-import re
-import json
-import traceback
-from lxml import etree
-import oracledb
-
-# -------------------------
-# CONFIG - edit these
-# -------------------------
-DB_USER = "YOUR_USER"
-DB_PASS = "YOUR_PASS"
-DB_DSN  = "YOUR_HOST:1521/YOUR_SERVICE"
-
-BATCH_COMMIT = 100
-DRY_RUN = False
-STRICT_STRUCTURE = False  # If True, treat mislocated required elements as missing
-
-# Map XSD name (must match values in iso_messages.xsd_name / iso_dq_rules.xsd_name)
-EXPECTED_ROOT_BY_XSD = {
-    "pacs.008.001.08": "FIToFICstmrCdtTrf"
-    # add more mappings if needed, e.g. "pacs.009.001.08": "SomeRoot"
-}
-
-# -------------------------
-# DB connection
-# -------------------------
-def get_connection():
-    return oracledb.connect(user=DB_USER, password=DB_PASS, dsn=DB_DSN)
-
-# -------------------------
-# Utility: read possible LOB to string
-# -------------------------
-def lob_to_str(maybe_lob):
-    if maybe_lob is None:
-        return None
-    if hasattr(maybe_lob, "read"):
-        return maybe_lob.read()
-    return str(maybe_lob)
-
-# -------------------------
-# LEVEL 1: sanitize raw XML
-# -------------------------
-def sanitize_xml(xml_str):
-    if xml_str is None:
-        return None
-    s = xml_str.lstrip("\ufeff").strip()
-    if "<Document" in s:
-        start = s.find("<Document")
-        end = s.rfind("</Document>")
-        if end != -1 and end > start:
-            end = end + len("</Document>")
-            s = s[start:end]
-        else:
-            s = s[start:]
-    return s
-
-# -------------------------
-# LEVEL 2: strict parse then recover
-# -------------------------
-def repair_and_parse(xml_str):
-    if not xml_str:
-        return None, "UNRECOVERABLE: empty", None
-    try:
-        root = etree.fromstring(xml_str.encode("utf-8"))
-        return root, "OK", xml_str
-    except etree.XMLSyntaxError:
-        pass
-    try:
-        parser = etree.XMLParser(recover=True, remove_comments=False)
-        root = etree.fromstring(xml_str.encode("utf-8"), parser)
-        repaired = etree.tostring(root, encoding="unicode")
-        return root, "REPAIRED", repaired
-    except Exception as e:
-        return None, f"UNRECOVERABLE: {str(e)}", None
-
-# -------------------------
-# Fallback regex based checks for malformed XML
-# -------------------------
-def fallback_raw_exists(xml_str, tag_name):
-    if not tag_name:
-        return False
-    pattern = fr"<(?:\w+:)?{re.escape(tag_name)}\b[^>]*>.*?</(?:\w+:)?{re.escape(tag_name)}>"
-    return bool(re.search(pattern, xml_str, flags=re.DOTALL | re.IGNORECASE))
-
-def fallback_raw_parent_child(xml_str, parent_tag, child_tag):
-    if not parent_tag or not child_tag:
-        return False
-    pattern = fr"<(?:\w+:)?{re.escape(parent_tag)}\b[^>]*>.*?<(?:\w+:)?{re.escape(child_tag)}\b"
-    return bool(re.search(pattern, xml_str, flags=re.DOTALL | re.IGNORECASE))
-
-# -------------------------
-# Build a namespace-insensitive relaxed XPath using local-name()
-# -------------------------
-def build_relaxed_localname_xpath(parts):
-    if not parts:
-        return None
-    # create expression like "//*[local-name()='A']//*[local-name()='B']//*[local-name()='C']"
-    pieces = ["*[local-name()='" + p + "']" for p in parts]
-    return "//" + "/".join(pieces)
-
-# -------------------------
-# find_best_alternate_root: try to map expected root to actual container names
-# -------------------------
-def find_best_alternate_root(root_obj, strict_xpath, expected_root_localname, ns_map):
-    """
-    Try to find an alternative container under /Document that can act as expected_root.
-    Returns: (mapped_xpath, mapped_root_name) or (None, None)
-    """
-    if root_obj is None or not expected_root_localname:
-        return None, None
-
-    # collect direct children local-names under /Document
-    try:
-        doc_children = root_obj.xpath("/*[local-name()='Document']/*")
-        child_names = []
-        for c in doc_children:
-            ln = etree.QName(c).localname
-            if ln not in child_names:
-                child_names.append(ln)
-    except Exception:
-        child_names = []
-
-    # common guesses to try (extendable)
-    guess_names = ['group', 'transaction', 'batch', 'payments', 'transactions', 'envelope', 'data']
-    for g in guess_names:
-        if g not in child_names:
-            child_names.append(g)
-
-    # Try each candidate by substituting expected_root in the strict xpath
-    for candidate in child_names:
-        parts = strict_xpath.strip("/").split("/")
-        new_parts = []
-        replaced = False
-        for p in parts:
-            p_local = p.split(":")[-1]
-            if (not replaced) and p_local == expected_root_localname:
-                new_parts.append(candidate)
-                replaced = True
-            else:
-                new_parts.append(p)
-        if not replaced:
-            continue
-        variant = "/" + "/".join(new_parts)
-        try:
-            nodes = root_obj.xpath(variant, namespaces=ns_map)
-            if nodes and len(nodes) > 0:
-                return variant, candidate
-        except Exception:
-            continue
-
-    return None, None
-
-# -------------------------
-# Improved adjuster that maps or relaxes when expected root missing
-# -------------------------
-def adjust_xpath_for_missing_root_v2(root_obj, raw_xml_str, xsd_name, strict_xpath):
-    """
-    returns (adjusted_xpath, was_relaxed, mapping_info)
-    mapping_info is {'mapped_from': <expected>, 'mapped_to': <candidate>} or None
-    """
-    expected_root = EXPECTED_ROOT_BY_XSD.get(xsd_name)
-    if not expected_root:
-        return strict_xpath, False, None
-
-    # check presence of expected major root
-    major_present = False
-    try:
-        if root_obj is not None:
-            major_present = True if root_obj.xpath("/*[local-name()='Document']/*[local-name()='" + expected_root + "']") else False
-        else:
-            major_present = True if fallback_raw_exists(raw_xml_str, expected_root) else False
-    except Exception:
-        major_present = False
-
-    if major_present:
-        return strict_xpath, False, None
-
-    # try mapping to alternate container
-    mapped_variant, mapped_to = None, None
-    try:
-        mapped_variant, mapped_to = find_best_alternate_root(root_obj, strict_xpath, expected_root, {})
-    except Exception:
-        mapped_variant, mapped_to = None, None
-
-    if mapped_variant:
-        return mapped_variant, True, {'mapped_from': expected_root, 'mapped_to': mapped_to}
-
-    # build relaxed local-name xpath by removing /Document and expected_root
-    parts = [p for p in strict_xpath.strip("/").split("/") if p and p.lower() != "document" and p.split(":")[-1] != expected_root]
-    if not parts:
-        return strict_xpath, True, None
-
-    relaxed = build_relaxed_localname_xpath([p.split(":")[-1] for p in parts])
-    return relaxed, True, None
-
-# -------------------------
-# DQ existence checker (strict then relaxed)
-# -------------------------
-def dq_xpath_exists(xml_str, xpath, ns_map, search_root_localname=None, relaxed_xpath=None):
-    """
-    Returns dict:
-      exists, parent_exists, in_correct_location, root_missing, reason
-    """
-    parts = xpath.strip("/").split("/") if xpath else []
-    tag = parts[-1] if parts else xpath
-    parent = parts[-2] if len(parts) > 1 else None
-    major_root = parts[1] if len(parts) > 1 and parts[0].lower() == "document" else (parts[0] if parts else None)
-
-    try:
-        root = etree.fromstring(xml_str.encode("utf-8"))
-        nodes = root.xpath(xpath, namespaces=ns_map)
-        if nodes and len(nodes) > 0:
-            return {'exists':1, 'parent_exists':1, 'in_correct_location':1, 'root_missing':0, 'reason':'Exact XPath match'}
-
-        parent_exists = 0
-        if parent:
-            parent_exists = 1 if root.xpath("//*[local-name()='" + parent + "']", namespaces=ns_map) else 0
-
-        major_root_exists = 1 if (major_root and root.xpath("/*[local-name()='" + major_root + "']")) else 0
-        loose = root.xpath("//*[local-name()='" + tag + "']", namespaces=ns_map)
-        if loose:
-            return {
-                'exists':1,
-                'parent_exists': parent_exists,
-                'in_correct_location': parent_exists if not STRICT_STRUCTURE else 0,
-                'root_missing': 0 if major_root_exists else 1,
-                'reason': 'Tag exists but not under expected hierarchy'
-            }
-
-        return {'exists':0, 'parent_exists':parent_exists, 'in_correct_location':0, 'root_missing':0 if major_root_exists else 1, 'reason':'Tag not found'}
-    except etree.XMLSyntaxError:
-        raw_exists = fallback_raw_exists(xml_str, tag)
-        if not raw_exists:
-            parent_exists = 1 if (parent and fallback_raw_exists(xml_str, parent)) else (1 if not parent else 0)
-            major_root_exists = 1 if (search_root_localname and fallback_raw_exists(xml_str, search_root_localname)) else 0
-            return {'exists':0, 'parent_exists':parent_exists, 'in_correct_location':0, 'root_missing':0 if major_root_exists else 1, 'reason':'Tag not found (malformed XML)'}
-        parent_exists = 1 if (parent and fallback_raw_exists(xml_str, parent)) else (1 if not parent else 0)
-        correct_location = 1 if (parent and fallback_raw_parent_child(xml_str, parent, tag)) else (1 if not parent else 0)
-        major_root_exists = 1 if (search_root_localname and fallback_raw_exists(xml_str, search_root_localname)) else 0
-        reason = 'Tag found in malformed XML'
-        if not correct_location:
-            reason = 'Tag found but not under expected parent'
-        return {'exists':1, 'parent_exists':1 if parent_exists else 0, 'in_correct_location':1 if correct_location else 0, 'root_missing':0 if major_root_exists else 1, 'reason':reason}
-    except Exception as e:
-        return {'exists':0, 'parent_exists':0, 'in_correct_location':0, 'root_missing':0, 'reason':f'Error: {str(e)}'}
-
-# -------------------------
-# Normalize rule keys (path/xpath and required/minOccurs)
-# -------------------------
-def normalize_rule(rule):
-    path = rule.get("path") or rule.get("xpath") or rule.get("element") or rule.get("field")
-    if "required" in rule:
-        try:
-            required = 1 if int(rule.get("required")) != 0 else 0
-        except:
-            required = 1 if bool(rule.get("required")) else 0
-    elif "minOccurs" in rule:
-        try:
-            required = 1 if int(rule.get("minOccurs", 0)) > 0 else 0
-        except:
-            required = 0
-    elif "mandatory" in rule:
-        required = 1 if rule.get("mandatory") else 0
-    else:
-        required = 0
-    return path, required
-
-# -------------------------
-# Main processing
-# -------------------------
-def process_all_messages():
-    conn = get_connection()
-    cur = conn.cursor()
-
-    # create report table if missing
-    try:
-        cur.execute("""
-        BEGIN
-            EXECUTE IMMEDIATE '
-            CREATE TABLE iso_message_dq_report (
-                msg_id VARCHAR2(64) PRIMARY KEY,
-                dq_report CLOB,
-                created_at TIMESTAMP DEFAULT SYSTIMESTAMP
-            )';
-        EXCEPTION WHEN OTHERS THEN
-            IF SQLCODE != -955 THEN RAISE; END IF;
-        END;
-        """)
-        conn.commit()
-    except Exception:
-        pass
-
-    # load rules
-    rules_map = {}
-    cur.execute("SELECT xsd_name, rule_json FROM iso_dq_rules")
-    for xsd_name, rule_json in cur.fetchall():
-        s = lob_to_str(rule_json)
-        try:
-            rules_map[xsd_name] = json.loads(s) if s else {}
-        except Exception:
-            rules_map[xsd_name] = {}
-
-    # fetch messages
-    cur.execute("SELECT msg_id, xml_payload, xsd_name FROM iso_messages")
-    processed = 0
-    for msg_id, xml_payload, xsd_name in cur.fetchall():
-        processed += 1
-        try:
-            xml_text = lob_to_str(xml_payload)
-            xml_text_sanitized = sanitize_xml(xml_text)
-
-            root, status, repaired_xml = repair_and_parse(xml_text_sanitized)
-            search_xml = repaired_xml if repaired_xml is not None else xml_text_sanitized
-
-            ns_map = {}
-            if root is not None:
-                ns_uri = root.nsmap.get(None)
-                if ns_uri:
-                    ns_map = {'ns': ns_uri}
-
-            dq_report = []
-            rules_json = rules_map.get(xsd_name, {})
-            rules = rules_json.get("rules") if isinstance(rules_json, dict) else None
-            if not rules:
-                dq_report.append({'error': f'No rules found for XSD {xsd_name}'})
-            else:
-                for rule in rules:
-                    path_raw, required = normalize_rule(rule)
-                    if not path_raw:
-                        continue
-
-                    # Build strict XPath (namespace aware if possible)
-                    if ns_map and not path_raw.startswith("/ns:"):
-                        strict_xpath = "/" + "/".join([("ns:" + p) for p in path_raw.strip("/").split("/")])
-                    elif not path_raw.startswith("/"):
-                        strict_xpath = "/" + path_raw
-                    else:
-                        strict_xpath = path_raw
-
-                    adjusted_xpath, was_relaxed, mapping_info = adjust_xpath_for_missing_root_v2(
-                        root, xml_text_sanitized, xsd_name, strict_xpath
-                    )
-
-                    res = dq_xpath_exists(search_xml, adjusted_xpath, ns_map, search_root_localname=EXPECTED_ROOT_BY_XSD.get(xsd_name))
-
-                    valid = 'ok'
-                    if required == 1 and res['exists'] == 0:
-                        valid = 'missing'
-                    elif required == 1 and res['exists'] == 1 and res['in_correct_location'] == 0 and STRICT_STRUCTURE:
-                        valid = 'missing'
-
-                    entry = {
-                        'path': path_raw,
-                        'required': int(required),
-                        'exists': int(res['exists']),
-                        'parent_exists': int(res.get('parent_exists', 0)),
-                        'in_correct_location': int(res.get('in_correct_location', 0)),
-                        'root_missing': int(res.get('root_missing', 0)) or int(was_relaxed),
-                        'mapping_info': mapping_info,
-                        'valid': valid,
-                        'reason': res.get('reason')
-                    }
-                    dq_report.append(entry)
-
-            out = {
-                'msg_id': msg_id,
-                'xsd_name': xsd_name,
-                'xml_repair_status': status,
-                'dq_report': dq_report
-            }
-            out_json = json.dumps(out, ensure_ascii=False)
-
-            if not DRY_RUN:
-                cur.execute("UPDATE iso_message_dq_report SET dq_report = :dq, created_at = SYSTIMESTAMP WHERE msg_id = :mid",
-                            dq=out_json, mid=msg_id)
-                if cur.rowcount == 0:
-                    cur.execute("INSERT INTO iso_message_dq_report (msg_id, dq_report) VALUES (:mid, :dq)",
-                                mid=msg_id, dq=out_json)
-
-            if not DRY_RUN and (processed % BATCH_COMMIT == 0):
-                conn.commit()
-
-        except Exception as e:
-            tb = traceback.format_exc()
-            err_json = json.dumps({'msg_id': msg_id, 'error': str(e), 'trace': tb}, ensure_ascii=False)
-            if not DRY_RUN:
-                try:
-                    cur.execute("UPDATE iso_message_dq_report SET dq_report = :dq, created_at = SYSTIMESTAMP WHERE msg_id = :mid",
-                                dq=err_json, mid=msg_id)
-                    if cur.rowcount == 0:
-                        cur.execute("INSERT INTO iso_message_dq_report (msg_id, dq_report) VALUES (:mid, :dq)",
-                                    mid=msg_id, dq=err_json)
-                except Exception:
-                    print("Failed to write error for msg_id", msg_id)
-                    print(err_json)
-            print("Error processing msg_id", msg_id, ":", str(e))
-
-    if not DRY_RUN:
-        conn.commit()
-    cur.close()
-    conn.close()
-    print(f"Processed {processed} messages. Output written to iso_message_dq_report.")
-
-# -------------------------
-# Run
-# -------------------------
-if __name__ == "__main__":
-    process_all_messages()
-
-
-
-
-
-#!/usr/bin/env python3
-"""
-ISO20022 DQ validator — strict when expected root present, tolerant otherwise.
-
-Features:
-- Auto-repair malformed XML (recover mode)
-- Namespace aware XPath checks
-- If expected root (per XSD) missing -> relax XPaths and validate child elements anywhere
-- Regex fallback for malformed XML
-- Writes DQ JSON per message into iso_message_dq_report (upsert)
-- Handles Oracle CLOBs via oracledb
-
-Edit DB_USER/DB_PASS/DB_DSN and run.
-"""
-
-import re
-import json
-import traceback
-from lxml import etree
-import oracledb
-
-# -------------------------
-# CONFIG - edit these
-# -------------------------
-DB_USER = "YOUR_USER"
-DB_PASS = "YOUR_PASS"
-DB_DSN  = "YOUR_HOST:1521/YOUR_SERVICE"
-
-BATCH_COMMIT = 100
-DRY_RUN = False
-STRICT_STRUCTURE = False  # If True, treat mislocated required elements as missing
-
-# Map XSD name (as stored in iso_messages.xsd_name / iso_dq_rules.xsd_name)
-# to the expected major root local-name used inside /Document/<ROOT>...
-EXPECTED_ROOT_BY_XSD = {
-    # common ISO20022 payment families - adjust to your naming convention
-    "pacs.008": "FIToFICstmrCdtTrf",
-    "pacs.009": "FIToFIPmtCxlReq",   # example - change if needed
-    # add others as necessary
-}
-
-# -------------------------
-# DB connection
-# -------------------------
-def get_connection():
-    return oracledb.connect(user=DB_USER, password=DB_PASS, dsn=DB_DSN)
-
-# -------------------------
-# Utility: read possible LOB to string
-# -------------------------
-def lob_to_str(maybe_lob):
-    if maybe_lob is None:
-        return None
-    if hasattr(maybe_lob, "read"):
-        return maybe_lob.read()
-    return str(maybe_lob)
-
-# -------------------------
-# LEVEL 1: sanitize raw XML
-# -------------------------
-def sanitize_xml(xml_str):
-    if xml_str is None:
-        return None
-    s = xml_str.lstrip("\ufeff").strip()
-    if "<Document" in s:
-        start = s.find("<Document")
-        end = s.rfind("</Document>")
-        if end != -1 and end > start:
-            end = end + len("</Document>")
-            s = s[start:end]
-        else:
-            s = s[start:]
-    return s
-
-# -------------------------
-# LEVEL 2: strict parse then recover
-# -------------------------
-def repair_and_parse(xml_str):
-    if not xml_str:
-        return None, "UNRECOVERABLE: empty", None
-    try:
-        root = etree.fromstring(xml_str.encode("utf-8"))
-        return root, "OK", xml_str
-    except etree.XMLSyntaxError:
-        pass
-    try:
-        parser = etree.XMLParser(recover=True, remove_comments=False)
-        root = etree.fromstring(xml_str.encode("utf-8"), parser)
-        repaired = etree.tostring(root, encoding="unicode")
-        return root, "REPAIRED", repaired
-    except Exception as e:
-        return None, f"UNRECOVERABLE: {str(e)}", None
-
-# -------------------------
-# Fallback regex based checks for malformed XML
-# -------------------------
-def fallback_raw_exists(xml_str, tag_name):
-    if not tag_name:
-        return False
-    pattern = fr"<(?:\w+:)?{re.escape(tag_name)}\b[^>]*>.*?</(?:\w+:)?{re.escape(tag_name)}>"
-    return bool(re.search(pattern, xml_str, flags=re.DOTALL | re.IGNORECASE))
-
-def fallback_raw_parent_child(xml_str, parent_tag, child_tag):
-    if not parent_tag or not child_tag:
-        return False
-    pattern = fr"<(?:\w+:)?{re.escape(parent_tag)}\b[^>]*>.*?<(?:\w+:)?{re.escape(child_tag)}\b"
-    return bool(re.search(pattern, xml_str, flags=re.DOTALL | re.IGNORECASE))
-
-# -------------------------
-# Build a namespace-insensitive relaxed XPath using local-name()
-# Example: parts = ['GrpHdr','MsgId'] -> "//*[local-name()='GrpHdr']//*[local-name()='MsgId']"
-# or with direct child: "//*[local-name()='GrpHdr']/*[local-name()='MsgId']"
-# We'll use descendant search '//' between parts to be tolerant.
-# -------------------------
-def build_relaxed_localname_xpath(parts):
-    if not parts:
-        return None
-    # create expression like "//*[local-name()='A']//*[local-name()='B']//*[local-name()='C']"
-    pieces = ["//*[" + "local-name()='" + p + "'" + "]" for p in parts]
-    return "//" + "/".join([p.strip("/*") for p in pieces]).replace("//", "//*")  # ensure starting //
-
-# -------------------------
-# DQ existence checker (strict then relaxed)
-# Returns dict with exists,parent_exists,in_correct_location,root_missing,reason
-# -------------------------
-def dq_xpath_exists(xml_str, xpath, ns_map, search_root_localname=None, relaxed_xpath=None):
-    """
-    - xpath: strict xpath (may include ns: prefixes if ns_map used)
-    - relaxed_xpath: precomputed relaxed xpath (local-name based) to use if root missing
-    - search_root_localname: the major root localname (e.g. FIToFICstmrCdtTrf) for root detection
-    """
-    parts = xpath.strip("/").split("/") if xpath else []
-    tag = parts[-1] if parts else xpath
-    parent = parts[-2] if len(parts) > 1 else None
-    major_root = parts[1] if len(parts) > 1 and parts[0].lower() == "document" else (parts[0] if parts else None)
-
-    # 1) Try proper parsing & strict XPath
-    try:
-        root = etree.fromstring(xml_str.encode("utf-8"))
-        nodes = root.xpath(xpath, namespaces=ns_map)
-        if nodes and len(nodes) > 0:
-            return {'exists':1, 'parent_exists':1, 'in_correct_location':1, 'root_missing':0, 'reason':'Exact XPath match'}
-        # If strict failed, check parent existence and loose search
-        parent_exists = 0
-        if parent:
-            # use local-name search for parent to be namespace-insensitive for existence check
-            parent_exists = 1 if root.xpath("//*[local-name()='" + parent + "']", namespaces=ns_map) else 0
-        # major root exists?
-        major_root_exists = 1 if (major_root and root.xpath("/*[local-name()='" + major_root + "']")) else 0
-        # loose search for tag anywhere (namespace-insensitive)
-        loose = root.xpath("//*[local-name()='" + tag + "']", namespaces=ns_map)
-        if loose:
-            return {
-                'exists':1,
-                'parent_exists': parent_exists,
-                'in_correct_location': parent_exists if not STRICT_STRUCTURE else 0,
-                'root_missing': 0 if major_root_exists else 1,
-                'reason': 'Tag exists but not under expected hierarchy'
-            }
-        return {'exists':0, 'parent_exists':parent_exists, 'in_correct_location':0, 'root_missing':0 if major_root_exists else 1, 'reason':'Tag not found'}
-    except etree.XMLSyntaxError:
-        # Malformed -> fallback using regex. Use relaxed_xpath if provided to find nodes by local-name
-        raw_exists = fallback_raw_exists(xml_str, tag)
-        if not raw_exists:
-            # determine parent/major root raw existence
-            parent_exists = 1 if (parent and fallback_raw_exists(xml_str, parent)) else (1 if not parent else 0)
-            major_root_exists = 1 if (search_root_localname and fallback_raw_exists(xml_str, search_root_localname)) else 0
-            return {'exists':0, 'parent_exists':parent_exists, 'in_correct_location':0, 'root_missing':0 if major_root_exists else 1, 'reason':'Tag not found (malformed XML)'}
-        parent_exists = 1 if (parent and fallback_raw_exists(xml_str, parent)) else (1 if not parent else 0)
-        correct_location = 1 if (parent and fallback_raw_parent_child(xml_str, parent, tag)) else (1 if not parent else 0)
-        major_root_exists = 1 if (search_root_localname and fallback_raw_exists(xml_str, search_root_localname)) else 0
-        reason = 'Tag found in malformed XML'
-        if not correct_location:
-            reason = 'Tag found but not under expected parent'
-        return {'exists':1, 'parent_exists':1 if parent_exists else 0, 'in_correct_location':1 if correct_location else 0, 'root_missing':0 if major_root_exists else 1, 'reason':reason}
-    except Exception as e:
-        return {'exists':0, 'parent_exists':0, 'in_correct_location':0, 'root_missing':0, 'reason':f'Error: {str(e)}'}
-
-# -------------------------
-# Normalize rule keys (path/xpath and required/minOccurs)
-# -------------------------
-def normalize_rule(rule):
-    path = rule.get("path") or rule.get("xpath") or rule.get("element") or rule.get("field")
-    # compute required
-    if "required" in rule:
-        try:
-            required = 1 if int(rule.get("required")) != 0 else 0
-        except:
-            required = 1 if bool(rule.get("required")) else 0
-    elif "minOccurs" in rule:
-        try:
-            required = 1 if int(rule.get("minOccurs", 0)) > 0 else 0
-        except:
-            required = 0
-    elif "mandatory" in rule:
-        required = 1 if rule.get("mandatory") else 0
-    else:
-        required = 0
-    return path, required
-
-# -------------------------
-# Adjust XPath when expected root is missing:
-# - If expected major root present -> return strict XPath (unchanged)
-# - If missing -> return a relaxed, local-name based XPath which searches descendants anywhere
-# -------------------------
-def adjust_xpath_for_missing_root(root_obj, raw_xml_str, xsd_name, strict_xpath):
-    """
-    root_obj: parsed root element (or None if not parsed)
-    raw_xml_str: sanitized raw XML text
-    xsd_name: value from iso_messages.xsd_name (used to lookup expected root)
-    strict_xpath: the original XPath (may include ns: prefixes)
-    """
-    # Determine expected root for this xsd_name
-    expected_root = EXPECTED_ROOT_BY_XSD.get(xsd_name)
-    # If we don't know expected root, do not adjust (use strict)
-    if not expected_root:
-        return strict_xpath, False  # False -> root not considered missing (no adjust)
-
-    # Check presence of expected root in parsed root if available
-    major_present = False
-    try:
-        if root_obj is not None:
-            # check Document/expected_root existence by local-name
-            major_present = True if root_obj.xpath("/*[local-name()='Document']/*[local-name()='" + expected_root + "']") else False
-        else:
-            # fallback: raw text search
-            major_present = True if fallback_raw_exists(raw_xml_str, expected_root) else False
-    except Exception:
-        major_present = False
-
-    if major_present:
-        return strict_xpath, False
-    # major root missing -> build relaxed xpath (strip /Document/<expected_root> if present)
-    # build parts removing Document and expected_root
-    parts = [p for p in strict_xpath.strip("/").split("/") if p and p.lower() != "document" and p != expected_root]
-    if not parts:
-        return strict_xpath, True
-    # create relaxed local-name based xpath
-    relaxed = build_relaxed_localname_xpath(parts)
-    return relaxed, True
-
-# -------------------------
-# Main processing
-# -------------------------
-def process_all_messages():
-    conn = get_connection()
-    cur = conn.cursor()
-
-    # create report table if missing
-    try:
-        cur.execute("""
-        BEGIN
-            EXECUTE IMMEDIATE '
-            CREATE TABLE iso_message_dq_report (
-                msg_id VARCHAR2(64) PRIMARY KEY,
-                dq_report CLOB,
-                created_at TIMESTAMP DEFAULT SYSTIMESTAMP
-            )';
-        EXCEPTION WHEN OTHERS THEN
-            IF SQLCODE != -955 THEN RAISE; END IF;
-        END;
-        """)
-        conn.commit()
-    except Exception:
-        pass
-
-    # Load rules
-    rules_map = {}
-    cur.execute("SELECT xsd_name, rule_json FROM iso_dq_rules")
-    for xsd_name, rule_json in cur.fetchall():
-        s = lob_to_str(rule_json)
-        try:
-            rules_map[xsd_name] = json.loads(s) if s else {}
-        except Exception:
-            rules_map[xsd_name] = {}
-
-    # Fetch messages
-    cur.execute("SELECT msg_id, xml_payload, xsd_name FROM iso_messages")
-    processed = 0
-    for msg_id, xml_payload, xsd_name in cur.fetchall():
-        processed += 1
-        try:
-            xml_text = lob_to_str(xml_payload)
-            xml_text_sanitized = sanitize_xml(xml_text)
-
-            # Attempt repair/parse
-            root, status, repaired_xml = repair_and_parse(xml_text_sanitized)
-            # pick search XML (prefer repaired textual serialization if available)
-            search_xml = repaired_xml if repaired_xml is not None else xml_text_sanitized
-
-            # Build ns_map if parsed root available
-            ns_map = {}
-            if root is not None:
-                ns_uri = root.nsmap.get(None)
-                if ns_uri:
-                    ns_map = {'ns': ns_uri}
-
-            dq_report = []
-            rules_json = rules_map.get(xsd_name, {})
-            rules = rules_json.get("rules") if isinstance(rules_json, dict) else None
-            if not rules:
-                dq_report.append({'error': f'No rules found for XSD {xsd_name}'})
-            else:
-                for rule in rules:
-                    path_raw, required = normalize_rule(rule)
-                    if not path_raw:
-                        continue
-
-                    # Build strict XPath for evaluation (namespace aware if ns_map exists)
-                    if ns_map and not path_raw.startswith("/ns:"):
-                        strict_xpath = "/" + "/".join([("ns:" + p) for p in path_raw.strip("/").split("/")])
-                    elif not path_raw.startswith("/"):
-                        strict_xpath = "/" + path_raw
-                    else:
-                        strict_xpath = path_raw
-
-                    # Adjust xpath if expected root missing
-                    adjusted_xpath, root_was_missing = adjust_xpath_for_missing_root(root, xml_text_sanitized, xsd_name, strict_xpath)
-
-                    # Evaluate existence using dq_xpath_exists
-                    res = dq_xpath_exists(search_xml, adjusted_xpath, ns_map, search_root_localname=EXPECTED_ROOT_BY_XSD.get(xsd_name), relaxed_xpath=None)
-
-                    # Determine validity
-                    valid = 'ok'
-                    if required == 1 and res['exists'] == 0:
-                        valid = 'missing'
-                    elif required == 1 and res['exists'] == 1 and res['in_correct_location'] == 0 and STRICT_STRUCTURE:
-                        valid = 'missing'
-
-                    entry = {
-                        'path': path_raw,
-                        'required': int(required),
-                        'exists': int(res['exists']),
-                        'parent_exists': int(res.get('parent_exists', 0)),
-                        'in_correct_location': int(res.get('in_correct_location', 0)),
-                        'root_missing': int(res.get('root_missing', 0)) or int(root_was_missing),
-                        'valid': valid,
-                        'reason': res.get('reason')
-                    }
-                    dq_report.append(entry)
-
-            out = {
-                'msg_id': msg_id,
-                'xsd_name': xsd_name,
-                'xml_repair_status': status,
-                'dq_report': dq_report
-            }
-            out_json = json.dumps(out, ensure_ascii=False)
-
-            # Upsert into report table
-            if not DRY_RUN:
-                cur.execute("UPDATE iso_message_dq_report SET dq_report = :dq, created_at = SYSTIMESTAMP WHERE msg_id = :mid",
-                            dq=out_json, mid=msg_id)
-                if cur.rowcount == 0:
-                    cur.execute("INSERT INTO iso_message_dq_report (msg_id, dq_report) VALUES (:mid, :dq)",
-                                mid=msg_id, dq=out_json)
-
-            if not DRY_RUN and (processed % BATCH_COMMIT == 0):
-                conn.commit()
-
-        except Exception as e:
-            tb = traceback.format_exc()
-            err_json = json.dumps({'msg_id': msg_id, 'error': str(e), 'trace': tb}, ensure_ascii=False)
-            if not DRY_RUN:
-                try:
-                    cur.execute("UPDATE iso_message_dq_report SET dq_report = :dq, created_at = SYSTIMESTAMP WHERE msg_id = :mid",
-                                dq=err_json, mid=msg_id)
-                    if cur.rowcount == 0:
-                        cur.execute("INSERT INTO iso_message_dq_report (msg_id, dq_report) VALUES (:mid, :dq)",
-                                    mid=msg_id, dq=err_json)
-                except Exception:
-                    print("Failed to write error for msg_id", msg_id)
-                    print(err_json)
-            print("Error processing msg_id", msg_id, ":", str(e))
-
-    # final commit
-    if not DRY_RUN:
-        conn.commit()
-    cur.close()
-    conn.close()
-    print(f"Processed {processed} messages. Output written to iso_message_dq_report.")
-
-# -------------------------
-# Run
-# -------------------------
-if __name__ == "__main__":
-    process_all_messages()
-
+validateIsoMessage.py
 
+ISO20022 DQ validator runner.
 
+Rule evaluation lives in isoDqEngine.py; this script only handles Oracle I/O:
+ - loads rule sets from iso_dq_rules (or, with --rules-dir, straight from the
+   pyParseXsd_DQ .dq.bin/.dq.json files) into a version-aware RuleCatalog; the rule
+   set is picked from the message namespace version, iso_messages.xsd_name is the fallback
+ - validates iso_messages in ORA_HASH(msg_id) buckets with checkpoints in
+   iso_dq_checkpoint (--shard-index/--shard-count, --resume)
+ - writes DQ JSON per message into iso_message_dq_report (upsert)
 
+The lookup strategy chain (strict, alternate_root, relaxed, raw_regex) is chosen
+per run with --strategies or an engine config file (--config); see isoDqEngine.py.
 
-
-#!/usr/bin/env python3
-"""
-ISO20022 DQ validator (path-tolerant).
-- Repairs malformed XML where possible
-- Tries exact XPath, then loose search if parent/root missing
-- Writes per-message DQ JSON into iso_message_dq_report
+Edit DB_USER/DB_PASS/DB_DSN and run.
 """
 
-import re
+import argparse
 import json
+import socket
 import traceback
-from lxml import etree
 import oracledb
 
+import isoDqEngine
+from isoDqEngine import lob_to_str
+from isoNames import split_xsd_name
+
 # -------------------------
 # CONFIG - edit these
 # -------------------------
@@ -3792,8 +36,9 @@ DB_PASS = "YOUR_PASS"
 DB_DSN  = "YOUR_HOST:1521/YOUR_SERVICE"
 
 BATCH_COMMIT = 100
-DRY_RUN = False  # True for testing (no DB writes)
-STRICT_STRUCTURE = False  # If True, treat missing parent as fail; else tolerant
+# rows per fetch round trip when reading iso_messages (payload CLOBs come inline)
+FETCH_ARRAYSIZE = 200
+DRY_RUN = False
 
 # -------------------------
 # DB connection
@@ -3802,175 +47,108 @@ def get_connection():
     return oracledb.connect(user=DB_USER, password=DB_PASS, dsn=DB_DSN)
 
 # -------------------------
-# Utility: read possible LOB to string
-# -------------------------
-def lob_to_str(maybe_lob):
-    if maybe_lob is None:
-        return None
-    if hasattr(maybe_lob, "read"):
-        return maybe_lob.read()
-    return str(maybe_lob)
-
-# -------------------------
-# LEVEL 1: sanitize incoming raw XML string
-# -------------------------
-def sanitize_xml(xml_str):
-    if xml_str is None:
-        return None
-    s = xml_str.lstrip("\ufeff").strip()
-    if "<Document" in s:
-        start = s.find("<Document")
-        end = s.rfind("</Document>")
-        if end != -1 and end > start:
-            end = end + len("</Document>")
-            s = s[start:end]
-        else:
-            s = s[start:]
-    return s
-
-# -------------------------
-# LEVEL 2: attempt strict parse, then recover parse if needed
-# -------------------------
-def repair_and_parse(xml_str):
-    if not xml_str:
-        return None, "UNRECOVERABLE: empty", None
-    try:
-        root = etree.fromstring(xml_str.encode("utf-8"))
-        return root, "OK", xml_str
-    except etree.XMLSyntaxError:
-        pass
-    try:
-        parser = etree.XMLParser(recover=True, remove_comments=False)
-        root = etree.fromstring(xml_str.encode("utf-8"), parser)
-        repaired = etree.tostring(root, encoding="unicode")
-        return root, "REPAIRED", repaired
-    except Exception as e:
-        return None, f"UNRECOVERABLE: {str(e)}", None
-
-# -------------------------
-# Fallback regex-based checks for malformed XML
-# -------------------------
-def fallback_raw_exists(xml_str, tag_name):
-    if not tag_name:
-        return False
-    pattern = fr"<(?:\w+:)?{re.escape(tag_name)}\b[^>]*>.*?</(?:\w+:)?{re.escape(tag_name)}>"
-    return bool(re.search(pattern, xml_str, flags=re.DOTALL | re.IGNORECASE))
-
-def fallback_raw_parent_child(xml_str, parent_tag, child_tag):
-    if not parent_tag or not child_tag:
-        return False
-    pattern = fr"<(?:\w+:)?{re.escape(parent_tag)}\b[^>]*>.*?<(?:\w+:)?{re.escape(child_tag)}\b"
-    return bool(re.search(pattern, xml_str, flags=re.DOTALL | re.IGNORECASE))
-
-# -------------------------
-# Path-tolerant DQ checker
-# -------------------------
-def dq_xpath_exists(xml_str, xpath, ns_map):
-    """
-    Returns dict:
-      exists: 0/1
-      parent_exists: 0/1
-      in_correct_location: 0/1
-      root_missing: 0/1  (if the expected major root element is missing)
-      reason: text
-    """
-    parts = xpath.strip("/").split("/") if xpath else []
-    tag = parts[-1] if parts else xpath
-    parent = parts[-2] if len(parts) > 1 else None
-    # detect major root (first element)
-    major_root = parts[0] if len(parts) > 0 else None
-
-    # Try proper parsing & XPath search
-    try:
-        root = etree.fromstring(xml_str.encode("utf-8"))
-        # exact path
-        nodes = root.xpath(xpath, namespaces=ns_map)
-        if nodes:
-            return {'exists':1, 'parent_exists':1, 'in_correct_location':1, 'root_missing':0, 'reason':'Exact XPath match'}
-        # exact failed -> check parents and loose presence
-        parent_exists = 0
-        if parent:
-            parent_exists = 1 if root.xpath("//" + parent, namespaces=ns_map) else 0
-        # major root exists?
-        major_root_exists = 1 if major_root and root.xpath("/*[local-name()='" + major_root + "']") else 0
-        # loose search for tag anywhere
-        loose = root.xpath("//*[local-name()='" + tag + "']", namespaces=ns_map)
-        if loose:
-            return {
-                'exists':1,
-                'parent_exists': parent_exists,
-                'in_correct_location': parent_exists if not STRICT_STRUCTURE else 0,
-                'root_missing': 0 if major_root_exists else 1,
-                'reason': 'Tag exists but not under expected hierarchy'
-            }
-        # not found anywhere
-        return {'exists':0, 'parent_exists':parent_exists, 'in_correct_location':0, 'root_missing':0 if major_root_exists else 1, 'reason':'Tag not found'}
-    except etree.XMLSyntaxError:
-        # malformed -> fallback regex approach
-        raw_exists = fallback_raw_exists(xml_str, tag)
-        if not raw_exists:
-            parent_exists = 1 if (parent and fallback_raw_exists(xml_str, parent)) else (1 if not parent else 0)
-            # check if major root present raw
-            major_root_exists = 1 if (major_root and fallback_raw_exists(xml_str, major_root)) else 0
-            return {'exists':0, 'parent_exists':parent_exists, 'in_correct_location':0, 'root_missing':0 if major_root_exists else 1, 'reason':'Tag not found (malformed XML)'}
-        parent_exists = 1 if (parent and fallback_raw_exists(xml_str, parent)) else (1 if not parent else 0)
-        correct_location = 1 if (parent and fallback_raw_parent_child(xml_str, parent, tag)) else (1 if not parent else 0)
-        major_root_exists = 1 if (major_root and fallback_raw_exists(xml_str, major_root)) else 0
-        reason = 'Tag found in malformed XML'
-        if not correct_location:
-            reason = 'Tag found but not under expected parent'
-        return {'exists':1, 'parent_exists':1 if parent_exists else 0, 'in_correct_location':1 if correct_location else 0, 'root_missing':0 if major_root_exists else 1, 'reason':reason}
-    except Exception as e:
-        return {'exists':0, 'parent_exists':0, 'in_correct_location':0, 'root_missing':0, 'reason':f'Error: {str(e)}'}
-
-# -------------------------
-# Helper: normalize rule keys
-# -------------------------
-def normalize_rule(rule):
-    path = rule.get("path") or rule.get("xpath") or rule.get("element") or rule.get("field")
-    # compute required from available keys
-    if "required" in rule:
-        try:
-            required = 1 if int(rule.get("required")) != 0 else 0
-        except:
-            required = 1 if bool(rule.get("required")) else 0
-    elif "minOccurs" in rule:
-        try:
-            required = 1 if int(rule.get("minOccurs", 0)) > 0 else 0
-        except:
-            required = 0
-    elif "mandatory" in rule:
-        required = 1 if rule.get("mandatory") else 0
-    else:
-        required = 0
-    return path, required
-
-# -------------------------
-# Main processing
+# Sharding / checkpointing
+# Work is partitioned into SHARD_BUCKETS buckets by ORA_HASH(msg_id).
+# Each host takes the buckets where bucket % shard_count == shard_index,
+# and every finished bucket is recorded in iso_dq_checkpoint together with
+# its report rows (same commit), so a crash only loses the current bucket.
+# For large iso_messages tables add a matching function-based index:
+#   CREATE INDEX iso_messages_hash_ix ON iso_messages (ORA_HASH(msg_id, 63));
+# (63 = SHARD_BUCKETS - 1)
 # -------------------------
-def process_all_messages():
-    conn = get_connection()
-    cur = conn.cursor()
+SHARD_BUCKETS = 64
+DEFAULT_RUN_ID = "default"
 
-    # create report table if missing
-    try:
+def ensure_report_tables(cur):
+    for ddl in (
+        """
+        CREATE TABLE iso_message_dq_report (
+            msg_id VARCHAR2(64) PRIMARY KEY,
+            dq_report CLOB,
+            created_at TIMESTAMP DEFAULT SYSTIMESTAMP
+        )""",
+        """
+        CREATE TABLE iso_dq_checkpoint (
+            run_id       VARCHAR2(64) NOT NULL,
+            bucket       NUMBER NOT NULL,
+            bucket_count NUMBER NOT NULL,
+            status       VARCHAR2(16) NOT NULL,
+            msg_count    NUMBER,
+            host         VARCHAR2(128),
+            started_at   TIMESTAMP,
+            finished_at  TIMESTAMP,
+            CONSTRAINT pk_iso_dq_checkpoint PRIMARY KEY (run_id, bucket)
+        )""",
+    ):
+        # only ORA-00955 (table already exists) is ignored
         cur.execute("""
         BEGIN
-            EXECUTE IMMEDIATE '
-            CREATE TABLE iso_message_dq_report (
-                msg_id VARCHAR2(64) PRIMARY KEY,
-                dq_report CLOB,
-                created_at TIMESTAMP DEFAULT SYSTIMESTAMP
-            )';
+            EXECUTE IMMEDIATE :ddl;
         EXCEPTION WHEN OTHERS THEN
             IF SQLCODE != -955 THEN RAISE; END IF;
         END;
-        """)
-        conn.commit()
-    except Exception:
-        pass
+        """, ddl=ddl)
+
+def buckets_for_shard(bucket_count, shard_count, shard_index):
+    if bucket_count < 1 or shard_count < 1 or not (0 <= shard_index < shard_count):
+        raise ValueError(f"invalid shard {shard_index} of {shard_count} over {bucket_count} buckets")
+    return [b for b in range(bucket_count) if b % shard_count == shard_index]
+
+def load_done_buckets(cur, run_id, bucket_count):
+    cur.execute("SELECT bucket, bucket_count FROM iso_dq_checkpoint WHERE run_id = :rid AND status = 'DONE'",
+                rid=run_id)
+    done = set()
+    for bucket, stored_count in cur.fetchall():
+        if int(stored_count) != bucket_count:
+            raise RuntimeError(f"run {run_id} was checkpointed with {int(stored_count)} buckets, not {bucket_count}; "
+                               f"use the same --buckets or a new --run-id")
+        done.add(int(bucket))
+    return done
+
+def mark_bucket(cur, run_id, bucket, bucket_count, status, host, msg_count=None):
+    cur.execute("""
+        MERGE INTO iso_dq_checkpoint c
+        USING (SELECT :rid run_id, :b bucket FROM dual) s
+        ON (c.run_id = s.run_id AND c.bucket = s.bucket)
+        WHEN MATCHED THEN UPDATE SET
+            c.status = :st, c.msg_count = :cnt, c.host = :host, c.bucket_count = :bc,
+            c.started_at = CASE WHEN :st = 'RUNNING' THEN SYSTIMESTAMP ELSE c.started_at END,
+            c.finished_at = CASE WHEN :st = 'DONE' THEN SYSTIMESTAMP ELSE NULL END
+        WHEN NOT MATCHED THEN INSERT (run_id, bucket, bucket_count, status, msg_count, host, started_at)
+            VALUES (:rid, :b, :bc, :st, :cnt, :host, SYSTIMESTAMP)
+    """, rid=run_id, b=bucket, bc=bucket_count, st=status, cnt=msg_count, host=host)
+
+# -------------------------
+# Main processing
+# -------------------------
+def unique_rule_sets(rules_map):
+    """
+    One rule set per message version. DB mode can store the same version under
+    the file name and the plain name ('12_pacs.008.001.08', 'pacs.008.001.08');
+    the plain name is kept (else the first name in sorted order) with a warning,
+    rather than failing the whole run.
+    """
+    chosen = {}
+    for xsd_name in sorted(rules_map):
+        family, version = split_xsd_name(xsd_name)
+        if family is None:
+            continue
+        kept = chosen.get((family, version))
+        if kept is None or (xsd_name == f"{family}.{version}" and kept != xsd_name):
+            chosen[family, version] = xsd_name
+    keep = set(chosen.values())
+    unique = {}
+    for xsd_name, rules in rules_map.items():
+        family, version = split_xsd_name(xsd_name)
+        if family is not None and xsd_name not in keep:
+            print(f"Warning: iso_dq_rules has {family}.{version} twice: using {chosen[family, version]}, "
+                  f"ignoring {xsd_name}")
+            continue
+        unique[xsd_name] = rules
+    return unique
 
-    # load rules
+def load_rule_catalog(cur):
+    """All iso_dq_rules rows as one isoDqEngine.RuleCatalog (compiled once per run, shared across versions)."""
     rules_map = {}
     cur.execute("SELECT xsd_name, rule_json FROM iso_dq_rules")
     for xsd_name, rule_json in cur.fetchall():
@@ -3979,447 +157,97 @@ def process_all_messages():
             rules_map[xsd_name] = json.loads(s) if s else {}
         except Exception:
             rules_map[xsd_name] = {}
-
-    # fetch messages
-    cur.execute("SELECT msg_id, xml_payload, xsd_name FROM iso_messages")
+    return isoDqEngine.RuleCatalog(unique_rule_sets(rules_map))
+
+def write_report(cur, msg_id, out_json):
+    cur.execute("UPDATE iso_message_dq_report SET dq_report = :dq, created_at = SYSTIMESTAMP WHERE msg_id = :mid",
+                dq=out_json, mid=msg_id)
+    if cur.rowcount == 0:
+        cur.execute("INSERT INTO iso_message_dq_report (msg_id, dq_report) VALUES (:mid, :dq)",
+                    mid=msg_id, dq=out_json)
+
+def iter_bucket_messages(conn, bucket, bucket_count):
+    """
+    Yield (msg_id, xml_payload, xsd_name) of a bucket, FETCH_ARRAYSIZE rows per
+    round trip. Payloads are fetched as strings with their rows (fetch_lobs=False)
+    instead of one LOB read per message, and only one fetch batch is held in memory.
+    Uses its own cursor, so the caller's cursor stays free for writes.
+    """
+    read_cur = conn.cursor()
+    read_cur.arraysize = FETCH_ARRAYSIZE
+    read_cur.prefetchrows = FETCH_ARRAYSIZE
+    try:
+        # ORA_HASH takes max_bucket as a literal; bucket_count was validated as an int by the caller
+        read_cur.execute(f"SELECT msg_id, xml_payload, xsd_name FROM iso_messages "
+                         f"WHERE ORA_HASH(msg_id, {int(bucket_count) - 1}) = :b", b=bucket, fetch_lobs=False)
+        yield from read_cur
+    finally:
+        read_cur.close()
+
+def process_bucket(conn, cur, catalog, config, bucket, bucket_count):
+    """Validate every message whose ORA_HASH(msg_id) falls in bucket (reports written with cur). Returns message count."""
     processed = 0
-    for msg_id, xml_payload, xsd_name in cur.fetchall():
+    for msg_id, xml_payload, xsd_name in iter_bucket_messages(conn, bucket, bucket_count):
         processed += 1
         try:
-            xml_text = lob_to_str(xml_payload)
-            xml_text_sanitized = sanitize_xml(xml_text)
-
-            root, status, repaired_xml = repair_and_parse(xml_text_sanitized)
-
-            # build ns_map from repaired or original parse
-            ns_map = {}
-            if root is not None:
-                ns_uri = root.nsmap.get(None)
-                if ns_uri:
-                    ns_map = {'ns': ns_uri}
-
-            dq_report = []
-            # meta
-            meta = {'xml_repair_status': status}
-
-            rules_json = rules_map.get(xsd_name, {})
-            rules = rules_json.get("rules") if isinstance(rules_json, dict) else None
-            if not rules:
-                dq_report.append({'error': f'No rules found for XSD {xsd_name}'})
-            else:
-                for rule in rules:
-                    path_raw, required = normalize_rule(rule)
-                    if not path_raw:
-                        continue
-                    # create XPath for evaluation; prefer unprefixed raw path for regex fallback
-                    # For namespace-aware XML, prefix with ns:
-                    if ns_map and not path_raw.startswith("/ns:"):
-                        xpath_eval = "/" + "/".join([("ns:" + p) for p in path_raw.strip("/").split("/")])
-                    elif not path_raw.startswith("/"):
-                        xpath_eval = "/" + path_raw
-                    else:
-                        xpath_eval = path_raw
-
-                    search_xml = repaired_xml if repaired_xml is not None else xml_text_sanitized
-                    res = dq_xpath_exists(search_xml, xpath_eval, ns_map)
-
-                    valid = 'ok'
-                    if required == 1 and res['exists'] == 0:
-                        valid = 'missing'
-                    elif required == 1 and res['exists'] == 1 and res['in_correct_location'] == 0 and STRICT_STRUCTURE:
-                        valid = 'missing'
-
-                    entry = {
-                        'path': path_raw,
-                        'required': int(required),
-                        'exists': int(res['exists']),
-                        'parent_exists': int(res.get('parent_exists', 0)),
-                        'in_correct_location': int(res.get('in_correct_location', 0)),
-                        'root_missing': int(res.get('root_missing', 0)),
-                        'valid': valid,
-                        'reason': res.get('reason')
-                    }
-                    dq_report.append(entry)
-
-            out = {
-                'msg_id': msg_id,
-                'xsd_name': xsd_name,
-                'xml_repair_status': status,
-                'dq_report': dq_report
-            }
+            out = isoDqEngine.validate_message(msg_id, xml_payload, xsd_name, catalog, config)
             out_json = json.dumps(out, ensure_ascii=False)
-
-            # upsert into report table
             if not DRY_RUN:
-                cur.execute("UPDATE iso_message_dq_report SET dq_report = :dq, created_at = SYSTIMESTAMP WHERE msg_id = :mid",
-                            dq=out_json, mid=msg_id)
-                if cur.rowcount == 0:
-                    cur.execute("INSERT INTO iso_message_dq_report (msg_id, dq_report) VALUES (:mid, :dq)",
-                                mid=msg_id, dq=out_json)
-
+                write_report(cur, msg_id, out_json)
             if not DRY_RUN and (processed % BATCH_COMMIT == 0):
                 conn.commit()
-
         except Exception as e:
             tb = traceback.format_exc()
             err_json = json.dumps({'msg_id': msg_id, 'error': str(e), 'trace': tb}, ensure_ascii=False)
             if not DRY_RUN:
                 try:
-                    cur.execute("UPDATE iso_message_dq_report SET dq_report = :dq, created_at = SYSTIMESTAMP WHERE msg_id = :mid",
-                                dq=err_json, mid=msg_id)
-                    if cur.rowcount == 0:
-                        cur.execute("INSERT INTO iso_message_dq_report (msg_id, dq_report) VALUES (:mid, :dq)",
-                                    mid=msg_id, dq=err_json)
+                    write_report(cur, msg_id, err_json)
                 except Exception:
                     print("Failed to write error for msg_id", msg_id)
                     print(err_json)
             print("Error processing msg_id", msg_id, ":", str(e))
+    return processed
 
-    if not DRY_RUN:
-        conn.commit()
-    cur.close()
-    conn.close()
-    print(f"Processed {processed} messages. Output written to iso_message_dq_report.")
-
-# -------------------------
-# Run
-# -------------------------
-if __name__ == "__main__":
-    process_all_messages()
-
-
-
-
-#!/usr/bin/env python3
-"""
-ISO20022 DQ validator with auto-repair for malformed XML.
-Writes per-message DQ JSON into iso_message_dq_report.
-
-Author: ChatGPT
-"""
-
-import re
-import json
-import traceback
-from lxml import etree
-import oracledb
-
-# -------------------------
-# CONFIG - edit these
-# -------------------------
-DB_USER = "YOUR_USER"
-DB_PASS = "YOUR_PASS"
-DB_DSN  = "YOUR_HOST:1521/YOUR_SERVICE"
-
-BATCH_COMMIT = 100  # how many messages to process before commit
-DRY_RUN = False     # if True, don't write to DB (useful for testing)
-
-# -------------------------
-# DB connection
-# -------------------------
-def get_connection():
-    return oracledb.connect(user=DB_USER, password=DB_PASS, dsn=DB_DSN)
-
-# -------------------------
-# Utility: read possible LOB to string
-# -------------------------
-def lob_to_str(maybe_lob):
-    if maybe_lob is None:
-        return None
-    if hasattr(maybe_lob, "read"):
-        return maybe_lob.read()
-    return str(maybe_lob)
-
-# -------------------------
-# LEVEL 1: sanitize incoming raw XML string
-# - remove BOM
-# - extract first <Document>...</Document> chunk if possible
-# -------------------------
-def sanitize_xml(xml_str):
-    if xml_str is None:
-        return None
-    s = xml_str.lstrip("\ufeff").strip()
-    # If there's at least one <Document tag, prefer the first <Document>...</Document> block
-    if "<Document" in s:
-        start = s.find("<Document")
-        # find last closing </Document> after start
-        end = s.rfind("</Document>")
-        if end != -1 and end > start:
-            end = end + len("</Document>")
-            s = s[start:end]
-        else:
-            # if no closing tag found, keep from start to end (repair step will attempt to recover)
-            s = s[start:]
-    return s
-
-# -------------------------
-# LEVEL 2: attempt strict parse, then recover parse if needed
-# Returns: (root_element_or_None, status_string, repaired_xml_string_or_original)
-# status_string: "OK", "REPAIRED", "UNRECOVERABLE"
-# -------------------------
-def repair_and_parse(xml_str):
-    if not xml_str:
-        return None, "UNRECOVERABLE: empty", None
-
-    # Try strict parse first
-    try:
-        root = etree.fromstring(xml_str.encode("utf-8"))
-        return root, "OK", xml_str
-    except etree.XMLSyntaxError:
-        pass
-
-    # Try lxml recovery mode (best-effort)
-    try:
-        parser = etree.XMLParser(recover=True, remove_comments=False)
-        root = etree.fromstring(xml_str.encode("utf-8"), parser)
-        # get a serialized repaired XML (unicode)
-        repaired = etree.tostring(root, encoding="unicode")
-        return root, "REPAIRED", repaired
-    except Exception as e:
-        return None, f"UNRECOVERABLE: {str(e)}", None
-
-# -------------------------
-# LEVEL 3: normalize default namespace (if desired)
-# This function rewrites element tags to ensure consistent namespace usage.
-# Note: It returns a new Element whose tags are bound to the supplied ns (if given).
-# -------------------------
-def normalize_namespaces(root, target_ns_uri):
-    if root is None or not target_ns_uri:
-        return root
-    # Create new tree with same structure but tags bound to target_ns_uri
-    def rewrite(elem):
-        local = etree.QName(elem).localname
-        new_tag = f"{{{target_ns_uri}}}{local}"
-        new_elem = etree.Element(new_tag)
-        # copy attributes (ignoring namespace declarations)
-        for k, v in elem.attrib.items():
-            new_elem.set(k, v)
-        # copy text and children recursively
-        if elem.text:
-            new_elem.text = elem.text
-        for child in elem:
-            new_child = rewrite(child)
-            new_elem.append(new_child)
-        if elem.tail:
-            new_elem.tail = elem.tail
-        return new_elem
-
-    return rewrite(root)
-
-# -------------------------
-# Fallback regex-based checks for malformed XML
-# -------------------------
-def fallback_raw_exists(xml_str, tag_name):
-    pattern = fr"<(?:\w+:)?{re.escape(tag_name)}\b[^>]*>.*?</(?:\w+:)?{re.escape(tag_name)}>"
-    return bool(re.search(pattern, xml_str, flags=re.DOTALL | re.IGNORECASE))
-
-def fallback_raw_parent_child(xml_str, parent_tag, child_tag):
-    pattern = fr"<(?:\w+:)?{re.escape(parent_tag)}\b[^>]*>.*?<(?:\w+:)?{re.escape(child_tag)}\b"
-    return bool(re.search(pattern, xml_str, flags=re.DOTALL | re.IGNORECASE))
-
-# -------------------------
-# DQ existence checker (namespace-aware; falls back when XML malformed)
-# Returns dict with detailed info
-# -------------------------
-def dq_xpath_exists(xml_str, xpath, ns_map):
+def process_all_messages(run_id=DEFAULT_RUN_ID, bucket_count=SHARD_BUCKETS, shard_count=1, shard_index=0,
+                         resume=False, host=None, config=None, rules_dir=None):
     """
-    Returns:
-      {
-        'exists': 0/1,
-        'parent_exists': 0/1,
-        'in_correct_location': 0/1,
-        'reason': '...'
-      }
+    Validate the buckets owned by this shard.
+    With resume=True, buckets already marked DONE for run_id are skipped.
+    config: isoDqEngine config (defaults to isoDqEngine.ENGINE_DEFAULTS)
+    rules_dir: pyParseXsd_DQ output folder to take the rule sets from instead of iso_dq_rules
     """
-    parts = xpath.strip("/").split("/")
-    tag = parts[-1] if parts else xpath
-    parent = parts[-2] if len(parts) > 1 else None
+    config = config or isoDqEngine.load_engine_config()
+    host = host or socket.gethostname()
+    my_buckets = buckets_for_shard(bucket_count, shard_count, shard_index)
 
-    # Try proper parsing & XPath
-    try:
-        root = etree.fromstring(xml_str.encode("utf-8"))
-        nodes = root.xpath(xpath, namespaces=ns_map)
-        if nodes:
-            return {'exists': 1, 'parent_exists': 1, 'in_correct_location': 1, 'reason': 'OK (well-formed XML)'}
-        else:
-            # check parent existence
-            parent_exists = 0
-            if parent:
-                parent_exists = 1 if root.xpath("//" + parent, namespaces=ns_map) else 0
-            return {'exists': 0, 'parent_exists': parent_exists, 'in_correct_location': 0, 'reason': 'Tag missing in well-formed XML'}
-    except etree.XMLSyntaxError:
-        # fallback mode
-        raw_exists = fallback_raw_exists(xml_str, tag)
-        if not raw_exists:
-            return {'exists': 0, 'parent_exists': 0, 'in_correct_location': 0, 'reason': 'Tag not found (malformed XML)'}
-        parent_exists = 1 if (parent and fallback_raw_exists(xml_str, parent)) else (1 if not parent else 0)
-        correct_location = 1 if (parent and fallback_raw_parent_child(xml_str, parent, tag)) else (1 if not parent else 0)
-        reason = 'Tag found in malformed XML'
-        if not correct_location:
-            reason = 'Tag found but not under expected parent'
-        return {'exists': 1, 'parent_exists': 1 if parent_exists else 0, 'in_correct_location': 1 if correct_location else 0, 'reason': reason}
-    except Exception as e:
-        return {'exists': 0, 'parent_exists': 0, 'in_correct_location': 0, 'reason': f'Error in XPath eval: {str(e)}'}
-
-# -------------------------
-# Helper: convert rule keys flexibly
-# Accepts rules where path may be 'path' or 'xpath', and required may be 'required' or 'minOccurs'.
-# -------------------------
-def normalize_rule(rule):
-    path = rule.get("path") or rule.get("xpath") or rule.get("element") or rule.get("field")
-    # prefer explicit required boolean/int; fall back to minOccurs
-    required = None
-    if "required" in rule:
-        required = int(bool(rule.get("required")))
-    elif "minOccurs" in rule:
-        try:
-            required = 1 if int(rule.get("minOccurs", 0)) > 0 else 0
-        except Exception:
-            required = 0
-    elif "mandatory" in rule:
-        required = 1 if rule.get("mandatory") else 0
-    else:
-        required = 0
-    return path, required
-
-# -------------------------
-# Main processor
-# -------------------------
-def process_all_messages():
     conn = get_connection()
     cur = conn.cursor()
 
-    # ensure DQ table exists - try to create if not present (safe attempt)
-    try:
-        cur.execute("""
-        BEGIN
-            EXECUTE IMMEDIATE 'CREATE TABLE iso_message_dq_report (
-                msg_id VARCHAR2(64) PRIMARY KEY,
-                dq_report CLOB,
-                created_at TIMESTAMP DEFAULT SYSTIMESTAMP
-            )';
-        EXCEPTION WHEN OTHERS THEN
-            IF SQLCODE != -955 THEN RAISE; END IF; -- ORA-00955: name already used by an existing object
-        END;
-        """)
-        conn.commit()
-    except Exception:
-        # ignore create-if-exists errors
-        pass
-
-    # load rules into memory
-    rules_map = {}
-    cur.execute("SELECT xsd_name, rule_json FROM iso_dq_rules")
-    rows = cur.fetchall()
-    for xsd_name, rule_json in rows:
-        s = lob_to_str(rule_json)
-        try:
-            rules_map[xsd_name] = json.loads(s) if s else {}
-        except Exception:
-            # if rule JSON malformed, keep raw text as fallback
-            rules_map[xsd_name] = {}
-
-    # fetch messages
-    cur.execute("SELECT msg_id, xml_payload, xsd_name FROM iso_messages")
-    processed = 0
-    for msg_id, xml_payload, xsd_name in cur.fetchall():
-        processed += 1
-        try:
-            xml_text = lob_to_str(xml_payload)
-            xml_text_sanitized = sanitize_xml(xml_text)
-
-            # Try repair & parse
-            root, status, repaired_xml = repair_and_parse(xml_text_sanitized)
-
-            # prepare namespace map for XPath (if root exists)
-            ns_map = {}
-            if root is not None:
-                # detect default namespace (None key)
-                ns_uri = root.nsmap.get(None)
-                if ns_uri:
-                    ns_map = {'ns': ns_uri}
-                # optional: normalize tree to that namespace if you want consistent tags
-                # root = normalize_namespaces(root, ns_uri)  # uncomment if needed
-
-            dq_report = []
-            dq_meta = {'xml_repair_status': status}
-
-            # load rules for this message
-            rules_json = rules_map.get(xsd_name, {})
-            rules = rules_json.get("rules") if isinstance(rules_json, dict) else None
-            if not rules:
-                dq_report.append({'error': f'No rules found for XSD {xsd_name}'})
-            else:
-                for rule in rules:
-                    path_raw, required = normalize_rule(rule)
-                    if not path_raw:
-                        continue
-                    # build xpath expression: if ns_map present, use ns: prefix
-                    # If path already starts with "/": keep; else ensure leading slash
-                    path = path_raw
-                    if ns_map and not path.startswith("/ns:"):
-                        # turn /A/B -> /ns:A/ns:B
-                        path = "/" + "/".join([("ns:" + p) for p in path.strip("/").split("/")])
-                    elif not path.startswith("/"):
-                        path = "/" + path
-
-                    # pick which xml to use for searching: repaired_xml if available, otherwise original
-                    search_xml = repaired_xml if repaired_xml is not None else xml_text_sanitized
-                    res = dq_xpath_exists(search_xml, path, ns_map)
-
-                    # construct report entry
-                    entry = {
-                        'path': path_raw,
-                        'required': int(required),
-                        'exists': int(res['exists']),
-                        'parent_exists': int(res.get('parent_exists', 0)),
-                        'in_correct_location': int(res.get('in_correct_location', 0)),
-                        'valid': 'ok' if (res['exists'] and res.get('in_correct_location', 0)) else 'missing' if required == 1 and not res['exists'] else 'ok',
-                        'reason': res.get('reason')
-                    }
-                    dq_report.append(entry)
-
-            # Add meta info
-            out = {
-                'msg_id': msg_id,
-                'xsd_name': xsd_name,
-                'xml_repair_status': status,
-                'dq_report': dq_report
-            }
-            out_json = json.dumps(out, ensure_ascii=False)
+    ensure_report_tables(cur)
+    conn.commit()
 
-            # persist to iso_message_dq_report (upsert style: try update else insert)
-            if not DRY_RUN:
-                cur.execute("UPDATE iso_message_dq_report SET dq_report = :dq, created_at = SYSTIMESTAMP WHERE msg_id = :mid",
-                            dq=out_json, mid=msg_id)
-                if cur.rowcount == 0:
-                    cur.execute("INSERT INTO iso_message_dq_report (msg_id, dq_report) VALUES (:mid, :dq)",
-                                mid=msg_id, dq=out_json)
+    catalog = isoDqEngine.load_rule_catalog_dir(rules_dir) if rules_dir else load_rule_catalog(cur)
+    print("Rule catalog:", catalog.stats())
 
-            # commit periodically
-            if not DRY_RUN and (processed % BATCH_COMMIT == 0):
-                conn.commit()
+    done = load_done_buckets(cur, run_id, bucket_count) if resume else set()
+    todo = [b for b in my_buckets if b not in done]
+    print(f"Strategies: {', '.join(config['strategies'])}")
+    print(f"Run {run_id}: shard {shard_index}/{shard_count} owns {len(my_buckets)} of {bucket_count} buckets, "
+          f"{len(my_buckets) - len(todo)} already done, {len(todo)} to process.")
 
-        except Exception as e:
-            # on any message-level error, capture and store the exception in report table
-            tb = traceback.format_exc()
-            err_json = json.dumps({'msg_id': msg_id, 'error': str(e), 'trace': tb}, ensure_ascii=False)
-            if not DRY_RUN:
-                try:
-                    cur.execute("UPDATE iso_message_dq_report SET dq_report = :dq, created_at = SYSTIMESTAMP WHERE msg_id = :mid",
-                                dq=err_json, mid=msg_id)
-                    if cur.rowcount == 0:
-                        cur.execute("INSERT INTO iso_message_dq_report (msg_id, dq_report) VALUES (:mid, :dq)",
-                                    mid=msg_id, dq=err_json)
-                except Exception:
-                    # best-effort: if even storing fails, print to console
-                    print("Failed to write error for msg_id", msg_id)
-                    print(err_json)
-            print("Error processing msg_id", msg_id, ":", str(e))
+    processed = 0
+    for bucket in todo:
+        if not DRY_RUN:
+            mark_bucket(cur, run_id, bucket, bucket_count, 'RUNNING', host)
+            conn.commit()
+        count = process_bucket(conn, cur, catalog, config, bucket, bucket_count)
+        processed += count
+        if not DRY_RUN:
+            # report rows and the DONE checkpoint land in the same commit
+            mark_bucket(cur, run_id, bucket, bucket_count, 'DONE', host, msg_count=count)
+            conn.commit()
+        print(f"Bucket {bucket} done ({count} messages).")
 
-    # final commit
-    if not DRY_RUN:
-        conn.commit()
     cur.close()
     conn.close()
     print(f"Processed {processed} messages. Output written to iso_message_dq_report.")
@@ -4427,347 +255,32 @@ def process_all_messages():
 # -------------------------
 # Run
 # -------------------------
-if __name__ == "__main__":
-    process_all_messages()
-    
-#---------------//-------------
-
-
-import re
-from lxml import etree
-
-# -----------------------------------------------------------
-# 1. Fallback: Raw existence check using regex
-# -----------------------------------------------------------
-def fallback_raw_exists(xml_str, tag_name):
-    """
-    Check if <tag> exists anywhere in the raw XML.
-    Namespace prefixes are ignored.
-    """
-    pattern = fr"<(?:\w+:)?{tag_name}\b[^>]*>.*?</(?:\w+:)?{tag_name}>"
-    return bool(re.search(pattern, xml_str, flags=re.DOTALL))
-
-
-# -----------------------------------------------------------
-# 2. Fallback: Check tag under its parent using regex
-# -----------------------------------------------------------
-def fallback_raw_parent_child(xml_str, parent_tag, child_tag):
-    """
-    Detect <parent><child>...</child></parent> structure in malformed XML.
-    Namespace prefixes are ignored.
-    """
-    pattern = fr"<(?:\w+:)?{parent_tag}\b[^>]*>.*?<(?:\w+:)?{child_tag}\b"
-    return bool(re.search(pattern, xml_str, flags=re.DOTALL))
-
-
-# -----------------------------------------------------------
-# 3. Enhanced existence checker for DQ rules
-# -----------------------------------------------------------
-def dq_xpath_exists(xml_str, xpath, ns_map):
-    """
-    RETURN STRUCTURED INFORMATION:
-    {
-        "exists": 0/1,
-        "parent_exists": 0/1,
-        "in_correct_location": 0/1,
-        "reason": "..."
-    }
-    """
-
-    # --------------------------------------------
-    # PART A: Split the path for deep analysis
-    # --------------------------------------------
-    parts = xpath.strip("/").split("/")
-    tag = parts[-1]                   # final tag
-    parent = parts[-2] if len(parts) > 1 else None
-
-    # --------------------------------------------
-    # PART B: Try proper XML parsing first
-    # --------------------------------------------
-    try:
-        root = etree.fromstring(xml_str.encode("utf-8"))
-        nodes = root.xpath(xpath, namespaces=ns_map)
-
-        if nodes:
-            return {
-                "exists": 1,
-                "parent_exists": 1,
-                "in_correct_location": 1,
-                "reason": "OK (XML well-formed and path matches)"
-            }
-        else:
-            # Tag not found through XML parsing
-            return {
-                "exists": 0,
-                "parent_exists": 1 if parent and root.xpath(f"//{parent}", namespaces=ns_map) else 0,
-                "in_correct_location": 0,
-                "reason": "Tag missing in well-formed XML"
-            }
-
-    except etree.XMLSyntaxError:
-        # XML is malformed — fallback mode
-        pass
-
-    # --------------------------------------------
-    # PART C: Fallback for malformed XML
-    # --------------------------------------------
-
-    raw_exists = fallback_raw_exists(xml_str, tag)
-
-    if not raw_exists:
-        return {
-            "exists": 0,
-            "parent_exists": 0,
-            "in_correct_location": 0,
-            "reason": "Tag not found (malformed XML, raw search failed)"
-        }
-
-    # Tag exists → check parent
-    if parent:
-        parent_exists = fallback_raw_exists(xml_str, parent)
-        correct_location = fallback_raw_parent_child(xml_str, parent, tag)
-    else:
-        parent_exists = 1
-        correct_location = 1
-
-    reason = "Tag found in malformed XML"
-    if not correct_location:
-        reason = "Tag found but not under expected parent"
-
-    return {
-        "exists": 1,
-        "parent_exists": 1 if parent_exists else 0,
-        "in_correct_location": 1 if correct_location else 0,
-        "reason": reason
-    }
-    
-
-res = dq_xpath_exists(xml_payload, xpath_expr, ns_map)
-
-dq_report.append({
-    "path": path,
-    "required": int(required),
-    "exists": res["exists"],
-    "parent_exists": res["parent_exists"],
-    "in_correct_location": res["in_correct_location"],
-    "valid": "ok" if (res["exists"] and res["in_correct_location"]) else "fail",
-    "reason": res["reason"]
-})
-
-
-import json
-from lxml import etree
-import oracledb
-
-# -------------------------------
-# 1. Oracle connection
-# -------------------------------
-DB_USER = "YOUR_USER"
-DB_PASS = "YOUR_PASS"
-DB_DSN  = "YOUR_HOST:1521/YOUR_SERVICE"
-
-conn = oracledb.connect(
-    user=DB_USER,
-    password=DB_PASS,
-    dsn=DB_DSN
-)
-cursor = conn.cursor()
-
-# -------------------------------
-# 2. Load rules JSON from iso_dq_rules
-# -------------------------------
-rules_dict = {}
-cursor.execute("SELECT xsd_name, rule_json FROM iso_dq_rules")
-for xsd_name, rule_json in cursor.fetchall():
-    if hasattr(rule_json, "read"):
-        rules_dict[xsd_name] = json.loads(rule_json.read())
-    else:
-        rules_dict[xsd_name] = json.loads(str(rule_json))
-
-# -------------------------------
-# 3. Load ISO messages
-# -------------------------------
-messages = []
-cursor.execute("SELECT msg_id, xml_payload, xsd_name FROM iso_messages")
-for msg_id, xml_payload, xsd_name in cursor.fetchall():
-    if hasattr(xml_payload, "read"):
-        xml_str = xml_payload.read()
-    else:
-        xml_str = str(xml_payload)
-    messages.append((msg_id, xml_str, xsd_name))
-
-# -------------------------------
-# 4. Helper: namespace-aware XPath
-# -------------------------------
-def check_xpath_exists(xml_str, xpath, ns_map):
-    """Return True if XPath exists in XML"""
-    try:
-        root = etree.fromstring(xml_str.encode("utf-8"))
-        result = root.xpath(xpath, namespaces=ns_map)
-        return len(result) > 0
-    except etree.XMLSyntaxError:
-        return False  # consider invalid XML as missing
+def main():
+    p = argparse.ArgumentParser(description="ISO20022 DQ validator (sharded, resumable).")
+    p.add_argument("--run-id", default=DEFAULT_RUN_ID, help="Checkpoint namespace; hosts splitting one backlog use the same id")
+    p.add_argument("--buckets", type=int, default=SHARD_BUCKETS, help="Number of ORA_HASH(msg_id) buckets")
+    p.add_argument("--shard-count", type=int, default=1, help="Number of validator hosts splitting the run")
+    p.add_argument("--shard-index", type=int, default=0, help="This host's shard (0-based)")
+    p.add_argument("--resume", action="store_true", help="Skip buckets already checkpointed as DONE for --run-id")
+    p.add_argument("--host", help="Host label stored in iso_dq_checkpoint (default: hostname)")
+    p.add_argument("--config", help="isoDqEngine config JSON (strategies, strict_structure, expected_root_by_xsd, ...)")
+    p.add_argument("--strategies", help="Comma separated strategy chain, e.g. strict,relaxed,raw_regex")
+    p.add_argument("--rules-dir", help="Read rule sets from this pyParseXsd_DQ output folder (.dq.bin preferred) "
+                                       "instead of iso_dq_rules")
+    p.add_argument("--strict-structure", action="store_true", default=None,
+                   help="Treat mislocated required elements as missing")
+    args = p.parse_args()
+    try:
+        buckets_for_shard(args.buckets, args.shard_count, args.shard_index)
+        config = isoDqEngine.load_engine_config(
+            args.config,
+            strategies=args.strategies.split(",") if args.strategies else None,
+            strict_structure=args.strict_structure)
+    except ValueError as e:
+        p.error(str(e))
+    process_all_messages(run_id=args.run_id, bucket_count=args.buckets, shard_count=args.shard_count,
+                         shard_index=args.shard_index, resume=args.resume, host=args.host, config=config,
+                         rules_dir=args.rules_dir)
 
-# -------------------------------
-# 5. Process each message
-# -------------------------------
-for msg_id, xml_payload, xsd_name in messages:
-    dq_report = []
-
-    # Try parsing XML first
-    try:
-        root = etree.fromstring(xml_payload.encode("utf-8"))
-        ns_uri = root.nsmap.get(None)
-        ns_map = {"ns": ns_uri} if ns_uri else {}
-    except etree.XMLSyntaxError as e:
-        dq_report.append({"error": f"Invalid XML: {str(e)}"})
-        # Insert or update DQ report table
-        cursor.execute(
-            "INSERT INTO iso_message_dq_report (msg_id, dq_report) VALUES (:msg_id, :dq)",
-            dq=json.dumps(dq_report),
-            msg_id=msg_id
-        )
-        continue  # skip validation for this bad XML
-
-    # Proceed if XML is valid
-    rules = rules_dict.get(xsd_name, {}).get("rules", [])
-    if not rules:
-        dq_report.append({"error": f"No rules found for XSD {xsd_name}"})
-    else:
-        for rule in rules:
-            path = rule.get("path") or rule.get("xpath")
-            required = rule.get("required") or rule.get("minOccurs") or 0
-
-            xpath_expr = path
-            if ns_uri and not path.startswith("/ns:"):
-                xpath_expr = "/ns:" + "/ns:".join(path.strip("/").split("/"))
-
-            exists = check_xpath_exists(xml_payload, xpath_expr, ns_map)
-            valid = "missing" if required == 1 and not exists else "ok"
-
-            dq_report.append({
-                "path": path,
-                "required": int(required),
-                "exists": int(exists),
-                "valid": valid
-            })
-
-    # -------------------------------
-    # 6. Insert into DQ table
-    # -------------------------------
-    cursor.execute(
-        "INSERT INTO iso_message_dq_report (msg_id, dq_report) VALUES (:msg_id, :dq)",
-        dq=json.dumps(dq_report),
-        msg_id=msg_id
-    )
-
-# Commit all updates
-conn.commit()
-cursor.close()
-conn.close()
-
-print("DQ validation completed successfully (including invalid XMLs).")
-
-
-
-
-import json
-from lxml import etree
-import oracledb
-
-# -------------------------------
-# 1. Oracle connection
-# -------------------------------
-DB_USER = "YOUR_USER"
-DB_PASS = "YOUR_PASS"
-DB_DSN  = "YOUR_HOST:1521/YOUR_SERVICE"
-
-conn = oracledb.connect(
-    user=DB_USER,
-    password=DB_PASS,
-    dsn=DB_DSN
-)
-cursor = conn.cursor()
-
-# -------------------------------
-# 2. Load rules JSON from iso_dq_rules
-# -------------------------------
-rules_dict = {}
-cursor.execute("SELECT xsd_name, rule_json FROM iso_dq_rules")
-for xsd_name, rule_json in cursor.fetchall():
-    # Convert CLOB to string if necessary
-    if hasattr(rule_json, "read"):
-        rules_dict[xsd_name] = json.loads(rule_json.read())
-    else:
-        rules_dict[xsd_name] = json.loads(str(rule_json))
-
-# -------------------------------
-# 3. Load ISO messages
-# -------------------------------
-messages = []
-cursor.execute("SELECT msg_id, xml_payload, xsd_name FROM iso_messages")
-for msg_id, xml_payload, xsd_name in cursor.fetchall():
-    if hasattr(xml_payload, "read"):
-        xml_str = xml_payload.read()
-    else:
-        xml_str = str(xml_payload)
-    messages.append((msg_id, xml_str, xsd_name))
-
-# -------------------------------
-# 4. Helper: namespace-aware XPath
-# -------------------------------
-def check_xpath_exists(xml_str, xpath, ns_map):
-    """Return True if XPath exists in XML"""
-    root = etree.fromstring(xml_str.encode("utf-8"))
-    result = root.xpath(xpath, namespaces=ns_map)
-    return len(result) > 0
-
-# -------------------------------
-# 5. Process each message
-# -------------------------------
-for msg_id, xml_payload, xsd_name in messages:
-    rules = rules_dict.get(xsd_name, {}).get("rules", [])
-    if not rules:
-        dq_report = [{"error": f"No rules found for XSD {xsd_name}"}]
-    else:
-        # Detect default namespace
-        root = etree.fromstring(xml_payload.encode("utf-8"))
-        ns_uri = root.nsmap.get(None)
-        ns_map = {"ns": ns_uri} if ns_uri else {}
-
-        dq_report = []
-        for rule in rules:
-            # Support flexible keys
-            path = rule.get("path") or rule.get("xpath")
-            required = rule.get("required") or rule.get("minOccurs") or 0
-
-            # Namespace-aware XPath
-            xpath_expr = path
-            if ns_uri and not path.startswith("/ns:"):
-                xpath_expr = "/ns:" + "/ns:".join(path.strip("/").split("/"))
-
-            exists = check_xpath_exists(xml_payload, xpath_expr, ns_map)
-            valid = "missing" if required == 1 and not exists else "ok"
-
-            dq_report.append({
-                "path": path,
-                "required": int(required),
-                "exists": int(exists),
-                "valid": valid
-            })
-
-    # -------------------------------
-    # 6. Update dq_report column
-    # -------------------------------
-    cursor.execute(
-        "UPDATE iso_messages SET dq_report = :dq WHERE msg_id = :msg_id",
-        dq=json.dumps(dq_report),
-        msg_id=msg_id
-    )
-
-# Commit all updates
-conn.commit()
-cursor.close()
-conn.close()
-
-print("DQ validation completed successfully.")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -1,158 +1,157 @@
-import xml.etree.ElementTree as ET
-import pandas as pd
-
-NS = {'xs': 'http://www.w3.org/2001/XMLSchema'}
-
-def collect_type_definitions(root):
-    type_map = {}
-    for t in root.findall(".//xs:complexType", NS) + root.findall(".//xs:simpleType", NS):
-        name = t.attrib.get("name")
-        if name:
-            type_map[name] = t
-    return type_map
-
-def extract_restrictions(type_element):
-    """Extract base type, pattern, length, and range info from xs:restriction."""
-    data_type = ""
+import os
+import csv
+import argparse
+from xsdSchemaGraph import DEFAULT_CACHE_DIR, load_schema_graph, find_root, iter_paths
+
+COLUMNS = ["XPath", "Data Type", "Range", "Pattern", "Length", "Sample", "Mandatory/Optional"]
+
+OUTPUT_FORMATS = ("xlsx", "csv", "parquet")
+EXCEL_MAX_ROWS = 1048576        # rows per sheet, header included
+PARQUET_ROW_GROUP = 50000
+
+def extract_restrictions(constraints):
+    """Base type, pattern, length, and range info from the constraints of a simple type."""
+    data_type = constraints.get("base", "")
+    range_info = ", ".join(f"{tag}={constraints[tag]}"
+                           for tag in ["minInclusive", "maxInclusive", "minExclusive", "maxExclusive"]
+                           if tag in constraints)
+    pattern = constraints.get("pattern", "")
+    length = ", ".join(f"{tag}={constraints[tag]}" for tag in ["length", "minLength", "maxLength"] if tag in constraints)
+    return data_type, pattern, length, range_info
+
+def field_row(xpath, node):
+    mandatory = "Mandatory" if node["minOccurs"] != 0 else "Optional"
+    data_type = node.get("type", "")
     pattern = ""
     length = ""
     range_info = ""
-
-    restriction = type_element.find("xs:restriction", NS)
-    if restriction is not None:
-        data_type = restriction.attrib.get("base", "")
-
-        # Range tags
-        range_parts = []
-        for tag in ["minInclusive", "maxInclusive", "minExclusive", "maxExclusive"]:
-            for val in restriction.findall(f"xs:{tag}", NS):
-                range_parts.append(f"{tag}={val.attrib.get('value')}")
-        range_info = ", ".join(range_parts)
-
-        # Pattern
-        pattern_el = restriction.find("xs:pattern", NS)
-        if pattern_el is not None:
-            pattern = pattern_el.attrib.get("value", "")
-
-        # Length-related tags
-        length_parts = []
-        for tag in ["length", "minLength", "maxLength"]:
-            val = restriction.find(f"xs:{tag}", NS)
-            if val is not None:
-                length_parts.append(f"{tag}={val.attrib.get('value')}")
-        length = ", ".join(length_parts)
-
-    return data_type, pattern, length, range_info
-
-def extract_children(element, path, results, type_map):
-    sequence = element.find("xs:sequence", NS)
-    if sequence is not None:
-        for child in sequence.findall("xs:element", NS):
-            name = child.attrib.get("name")
-            if not name:
-                continue
-
-            xpath = f"{path}/{name}"
-            min_occurs = child.attrib.get("minOccurs", "1")
-            mandatory = "Mandatory" if min_occurs != "0" else "Optional"
-            data_type = child.attrib.get("type", "")
-            pattern = ""
-            length = ""
-            range_info = ""
-
-            # 1. Inline xs:simpleType
-            simple_type = child.find("xs:simpleType", NS)
-            if simple_type is not None:
-                data_type, pattern, length, range_info = extract_restrictions(simple_type)
-
-            # 2. Inline xs:complexType with nested sequence
-            elif child.find("xs:complexType", NS) is not None:
-                results.append({
-                    "XPath": xpath,
-                    "Data Type": "complexType",
-                    "Range": "",
-                    "Pattern": "",
-                    "Length": "",
-                    "Sample": "",
-                    "Mandatory/Optional": mandatory
-                })
-                extract_children(child.find("xs:complexType", NS), xpath, results, type_map)
-                continue
-
-            # 3. Referenced type
-            elif data_type:
-                type_name = data_type.split(":")[-1]  # remove namespace if present
-                ref_type = type_map.get(type_name)
-                if ref_type is not None:
-                    if ref_type.tag.endswith("simpleType"):
-                        data_type, pattern, length, range_info = extract_restrictions(ref_type)
-                    elif ref_type.tag.endswith("complexType"):
-                        results.append({
-                            "XPath": xpath,
-                            "Data Type": "complexType",
-                            "Range": "",
-                            "Pattern": "",
-                            "Length": "",
-                            "Sample": "",
-                            "Mandatory/Optional": mandatory
-                        })
-                        extract_children(ref_type, xpath, results, type_map)
-                        continue
-
-            # Default row if no restrictions
-            results.append({
-                "XPath": xpath,
-                "Data Type": data_type or "complexType",
-                "Range": range_info,
-                "Pattern": pattern,
-                "Length": length,
-                "Sample": "",
-                "Mandatory/Optional": mandatory
-            })
-
-def process_xsd(xsd_path, output_excel):
-    tree = ET.parse(xsd_path)
-    root = tree.getroot()
-    results = []
-
-    type_map = collect_type_definitions(root)
+    if node["kind"] == "complex":
+        data_type = "complexType"
+    elif node.get("constraints"):
+        data_type, pattern, length, range_info = extract_restrictions(node["constraints"])
+    return {
+        "XPath": xpath,
+        "Data Type": data_type or "complexType",
+        "Range": range_info,
+        "Pattern": pattern,
+        "Length": length,
+        "Sample": "",
+        "Mandatory/Optional": mandatory
+    }
+
+def extract_children(graph, root_node, max_depth=None):
+    """
+    Rows for every element under root_node (from the shared schema graph), yielded as walked.
+    The walk is iterative: a recursive type is listed once per branch and not re-entered,
+    and max_depth (levels below /Document) bounds it further.
+    """
+    # a node reached through a shared type gives the same cells at every path
+    cells = {}
+    for xpath, kind, node in iter_paths(graph, roots=[root_node], include_attributes=False,
+                                        max_depth=None if max_depth is None else max_depth + 1):
+        if node is root_node:
+            continue
+        row = cells.get(id(node))
+        if row is None:
+            row = cells[id(node)] = field_row(xpath, node)
+        row = dict(row)
+        row["XPath"] = xpath
+        yield row
+
+# -------------------------
+# Streaming writers: each consumes a row iterator and returns the row count,
+# so no more than one sheet row / one row group is held at a time
+# -------------------------
+def write_xlsx(rows, path):
+    from openpyxl import Workbook
+    wb = Workbook(write_only=True)
+    count = 0
+    ws = None
+    sheet_rows = 0
+    for row in rows:
+        if ws is None or sheet_rows >= EXCEL_MAX_ROWS:
+            # continue on a new sheet once the current one is full
+            ws = wb.create_sheet(f"Sheet{len(wb.worksheets) + 1}")
+            ws.append(COLUMNS)
+            sheet_rows = 1
+        ws.append([row[c] for c in COLUMNS])
+        sheet_rows += 1
+        count += 1
+    if ws is None:
+        wb.create_sheet("Sheet1").append(COLUMNS)
+    wb.save(path)
+    return count
+
+def write_csv(rows, path):
+    count = 0
+    with open(path, "w", newline="", encoding="utf-8") as fh:
+        writer = csv.DictWriter(fh, fieldnames=COLUMNS)
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(row)
+            count += 1
+    return count
+
+def write_parquet(rows, path, row_group=PARQUET_ROW_GROUP):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    schema = pa.schema([(c, pa.string()) for c in COLUMNS])
+    count = 0
+    with pq.ParquetWriter(path, schema) as writer:
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= row_group:
+                writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+                count += len(batch)
+                batch = []
+        if batch or not count:
+            writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+            count += len(batch)
+    return count
+
+WRITERS = {"xlsx": write_xlsx, "csv": write_csv, "parquet": write_parquet}
+
+def output_format(path, fmt=None):
+    if fmt:
+        return fmt
+    ext = os.path.splitext(path)[1].lower().lstrip(".")
+    return ext if ext in WRITERS else "xlsx"
+
+def process_xsd(xsd_path, output_excel, cache_dir=DEFAULT_CACHE_DIR, fmt=None, max_depth=None):
+    """Write every field under /Document to output_excel (.xlsx, .csv or .parquet, or per fmt)."""
+    graph = load_schema_graph(xsd_path, cache_dir=cache_dir)
 
     # Start from /Document
-    element = root.find("xs:element[@name='Document']", NS)
+    element = find_root(graph, "Document")
     if element is None:
         print("❌ Root element 'Document' not found.")
         return
 
-    root_xpath = "/Document"
-    results.append({
-        "XPath": root_xpath,
-        "Data Type": element.attrib.get("type", "complexType"),
+    root_row = {
+        "XPath": "/Document",
+        "Data Type": element.get("type", "complexType"),
         "Range": "",
         "Pattern": "",
         "Length": "",
         "Sample": "",
         "Mandatory/Optional": "Mandatory"
-    })
-
-    # Process type
-    if "type" in element.attrib:
-        type_name = element.attrib["type"].split(":")[-1]
-        ref_type = type_map.get(type_name)
-        if ref_type is not None:
-            extract_children(ref_type, root_xpath, results, type_map)
-    else:
-        ct = element.find("xs:complexType", NS)
-        if ct is not None:
-            extract_children(ct, root_xpath, results, type_map)
-
-    # Save to Excel
-    df = pd.DataFrame(results, columns=[
-        "XPath", "Data Type", "Range", "Pattern", "Length", "Sample", "Mandatory/Optional"
-    ])
-    df.to_excel(output_excel, index=False)
-    print(f"✅ Extraction complete. Output saved to: {output_excel}")
-
-# Example usage
-xsd_file = "your_file.xsd"           # Update this
-output_file = "xpaths_output.xlsx"   # Desired output
-process_xsd(xsd_file, output_file)
\ No newline at end of file
+    }
+
+    def rows():
+        yield root_row
+        yield from extract_children(graph, element, max_depth=max_depth)
+
+    # Stream rows straight to the output file
+    count = WRITERS[output_format(output_excel, fmt)](rows(), output_excel)
+    print(f"✅ Extraction complete. {count} rows saved to: {output_excel}")
+
+if __name__ == "__main__":
+    p = argparse.ArgumentParser(description="List every field under /Document of an XSD with its type and restrictions.")
+    p.add_argument("xsd_file")
+    p.add_argument("-o", "--output", default="xpaths_output.xlsx", help="Output file (.xlsx, .csv or .parquet)")
+    p.add_argument("--format", choices=OUTPUT_FORMATS, help="Output format (default: from the output extension)")
+    p.add_argument("--max-depth", type=int, help="Stop listing this many levels below /Document")
+    p.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help="Schema graph cache directory")
+    args = p.parse_args()
+    process_xsd(args.xsd_file, args.output, cache_dir=args.cache_dir, fmt=args.format, max_depth=args.max_depth)
@@ -1,25 +1,65 @@
+#!/usr/bin/env python3
+"""
+xsdPydot.py
+
+Graphviz views of an XSD.
+
+visualize_xsd_pydot draws one node per xs:element (fine for small schemas).
+For full ISO messages use the type view instead: built from the shared schema
+graph (xsdSchemaGraph), it draws each complex type once as a table of its
+attributes and simple fields, with an edge per complex child element, so a
+type used in twenty places is one node. Anonymous types are clustered with the
+named type that owns them.
+
+Views are level-of-detail: a view shows the types within --depth hops of its
+focus (the root elements, or one type); types further out are drawn as
+collapsed stubs that link to their own view. write_lod_views writes the index
+view and the view of every type into one folder, so opening index.svg in a
+browser gives a clickable, expand-on-click schema. Rendered views are cached
+under <cache-dir>/layouts keyed by the schema content hash (and the hashes of
+its includes), focus, depth and format, so a rerun on an unchanged schema does
+not lay anything out again.
+
+Usage:
+  python xsdPydot.py pacs.008.001.08.xsd --lod-dir pacs008_views        # index.svg + one view per type
+  python xsdPydot.py pacs.008.001.08.xsd --focus GroupHeader93 -o grphdr.svg --depth 1
+  python xsdPydot.py small.xsd --legacy -o xsd_graph.png
+
+Requirements:
+  pip install pydot lxml   (and the Graphviz "dot" binary for svg/png output)
+"""
+
+import os
+import html
+import argparse
 import pydot
 import xml.etree.ElementTree as ET
-import matplotlib.pyplot as plt
-import matplotlib.image as mpimg
+from xsdSchemaGraph import DEFAULT_CACHE_DIR, load_schema_graph, find_root, sha256_hex
+
+LOD_DEPTH = 2
+VIEW_VERSION = 1
+LAYOUT_FORMATS = ("svg", "png", "pdf", "dot")
 
 def parse_xsd(xsd_file):
     tree = ET.parse(xsd_file)
     root = tree.getroot()
-    
+
     ns = {'xs': 'http://www.w3.org/2001/XMLSchema'}
     elements = []
-    
+
     for elem in root.findall('.//xs:element', ns):
         name = elem.get('name')
         type_ = elem.get('type')
         elements.append((name, type_ if type_ else "ComplexType"))
-    
+
     return elements
 
 def visualize_xsd_pydot(xsd_file, output_file="xsd_graph.png"):
+    import matplotlib.pyplot as plt
+    import matplotlib.image as mpimg
+
     elements = parse_xsd(xsd_file)
-    
+
     graph = pydot.Dot(graph_type="digraph")
 
     for name, type_ in elements:
@@ -37,6 +77,202 @@ def visualize_xsd_pydot(xsd_file, output_file="xsd_graph.png"):
     plt.axis("off")
     plt.show()
 
-# Example Usage
-xsd_file = 'example.xsd'  # Provide the path to your XSD file
-visualize_xsd_pydot(xsd_file)
\ No newline at end of file
+# -------------------------
+# Type view (level of detail)
+# -------------------------
+def _node_id(type_id):
+    return "t_" + sha256_hex(type_id.encode("utf-8"))[:16]
+
+def _occurs(node):
+    hi = "*" if node["maxOccurs"] is None else node["maxOccurs"]
+    return "" if (node["minOccurs"], hi) == (1, 1) else f" [{node['minOccurs']}..{hi}]"
+
+def _cluster_of(types, type_id):
+    """Type an anonymous type belongs to ("{ns}Owner/Elem" -> "{ns}Owner"), else type_id itself."""
+    start = type_id.find("}") + 1     # namespace URIs may contain "/" themselves
+    end = type_id.find("/", start)
+    owner = type_id[:end] if end > 0 else type_id
+    return owner if owner in types else type_id
+
+def _short(type_id):
+    return type_id.rsplit("}", 1)[-1]
+
+def _title(type_id, type_node):
+    """Type name, or the element an anonymous type is declared on."""
+    return type_node["name"] or "(" + type_id.rsplit("/", 1)[-1].lstrip("#") + ")"
+
+def view_file(type_id, fmt="svg"):
+    """File name of a type's view inside a write_lod_views folder."""
+    return f"{_node_id(type_id)}.{fmt}"
+
+def resolve_focus(graph, focus):
+    """Type ids a view starts from: the root elements' types, or the type named focus."""
+    if not focus:
+        return [n["content"] for n in graph["roots"] if n.get("content")]
+    if focus in graph["types"]:
+        return [focus]
+    root = find_root(graph, focus)
+    if root is not None and root.get("content"):
+        return [root["content"]]
+    matches = [tid for tid, t in graph["types"].items() if focus in (t["name"], _short(tid))]
+    if not matches:
+        raise ValueError(f"no complex type or root element named {focus!r}")
+    return matches[:1]
+
+def types_within(graph, start_ids, depth):
+    """{type id: hops from the start types} for types at most depth hops away."""
+    types = graph["types"]
+    dist = {tid: 0 for tid in start_ids}
+    frontier = list(start_ids)
+    for hop in range(1, depth + 1):
+        nxt = []
+        for tid in frontier:
+            for child in types[tid]["children"]:
+                content = child.get("content")
+                if content is not None and content not in dist:
+                    dist[content] = hop
+                    nxt.append(content)
+        frontier = nxt
+    return dist
+
+def _type_label(type_id, type_node):
+    rows = [f'<tr><td bgcolor="lightblue" colspan="2"><b>{html.escape(_title(type_id, type_node))}</b></td></tr>']
+    for attr in type_node["attributes"]:
+        rows.append(f'<tr><td align="left">@{html.escape(attr["name"])}</td>'
+                    f'<td align="left">{html.escape(str(attr.get("type") or ""))}</td></tr>')
+    for i, child in enumerate(type_node["children"]):
+        name = html.escape(child["name"] + _occurs(child))
+        if child.get("content") is not None:
+            rows.append(f'<tr><td align="left" port="p{i}"><i>{name}</i></td><td align="left">&#8594;</td></tr>')
+        else:
+            rows.append(f'<tr><td align="left">{name}</td>'
+                        f'<td align="left">{html.escape(str(child.get("type") or ""))}</td></tr>')
+    return '<<table border="0" cellborder="1" cellspacing="0">' + "".join(rows) + "</table>>"
+
+def build_type_view(graph, focus=None, depth=LOD_DEPTH, link=None):
+    """
+    pydot graph of the types within depth hops of focus. Types beyond that are
+    collapsed stubs; link(type_id) gives the URL a stub (and every type header)
+    points to, so views can link to each other.
+    """
+    types = graph["types"]
+    start = resolve_focus(graph, focus)
+    shown = types_within(graph, start, depth)
+
+    dot = pydot.Dot(graph_type="digraph", rankdir="LR", fontname="Helvetica",
+                    label=f"{graph.get('source') or ''} {('- ' + focus) if focus else ''}".strip())
+    clusters = {}
+    # named types that own an anonymous type in this view
+    owners = {_cluster_of(types, tid) for tid in shown if _cluster_of(types, tid) != tid}
+    for tid in shown:
+        owner = _cluster_of(types, tid)
+        node = pydot.Node(_node_id(tid), shape="plain", label=_type_label(tid, types[tid]))
+        if link and tid not in start:
+            node.set("URL", link(tid))
+        if tid in start:
+            node.set("color", "red")
+        if owner == tid and tid not in owners:
+            dot.add_node(node)
+            continue
+        cluster = clusters.get(owner)
+        if cluster is None:
+            cluster = clusters[owner] = pydot.Cluster(_node_id(owner), label=_title(owner, types[owner]), style="dashed")
+            dot.add_subgraph(cluster)
+        cluster.add_node(node)
+
+    if not focus:
+        for root in graph["roots"]:
+            dot.add_node(pydot.Node("r_" + _node_id(root["name"]), label=root["name"], shape="box",
+                                    style="filled", fillcolor="gold"))
+            if root.get("content") in shown:
+                dot.add_edge(pydot.Edge("r_" + _node_id(root["name"]), _node_id(root["content"])))
+
+    stubs = set()
+    for tid in shown:
+        for i, child in enumerate(types[tid]["children"]):
+            content = child.get("content")
+            if content is None:
+                continue
+            if content not in shown and content not in stubs:
+                stubs.add(content)
+                target = types[content]
+                title = _title(content, target)
+                stub = pydot.Node(_node_id(content), shape="box", style="dashed",
+                                  label=f"{title}\\n+{len(target['children'])} fields",
+                                  tooltip=f"expand {title}")
+                if link:
+                    stub.set("URL", link(content))
+                dot.add_node(stub)
+            dot.add_edge(pydot.Edge(f"{_node_id(tid)}:p{i}", _node_id(content)))
+    return dot
+
+# -------------------------
+# Layout cache
+# -------------------------
+def layout_key(graph, focus, depth, fmt, linked=False):
+    deps = "|".join(f"{k}={v}" for k, v in sorted(graph.get("deps", {}).items()))
+    return sha256_hex(f"{VIEW_VERSION}|{graph['sha256']}|{deps}|{focus or ''}|{depth}|{fmt}|{int(linked)}".encode("utf-8"))
+
+def render_view(graph, output, focus=None, depth=LOD_DEPTH, fmt=None, link=None, cache_dir=DEFAULT_CACHE_DIR):
+    """Write one view to output; returns True when it came from the layout cache."""
+    fmt = fmt or os.path.splitext(output)[1].lstrip(".").lower() or "svg"
+    cache_path = None
+    if cache_dir:
+        cache_path = os.path.join(cache_dir, "layouts", layout_key(graph, focus, depth, fmt, link is not None) + "." + fmt)
+        if os.path.exists(cache_path):
+            with open(cache_path, "rb") as src, open(output, "wb") as dst:
+                dst.write(src.read())
+            return True
+    dot = build_type_view(graph, focus=focus, depth=depth, link=link)
+    data = dot.to_string().encode("utf-8") if fmt == "dot" else dot.create(format=fmt)
+    with open(output, "wb") as fh:
+        fh.write(data)
+    if cache_path:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        tmp = cache_path + ".tmp"
+        with open(tmp, "wb") as fh:
+            fh.write(data)
+        os.replace(tmp, cache_path)
+    return False
+
+def write_lod_views(graph, outdir, depth=LOD_DEPTH, fmt="svg", cache_dir=DEFAULT_CACHE_DIR):
+    """index.<fmt> (root elements) plus one linked view per complex type in outdir."""
+    os.makedirs(outdir, exist_ok=True)
+    def link(type_id):
+        return view_file(type_id, fmt)
+
+    cached = render_view(graph, os.path.join(outdir, f"index.{fmt}"), depth=depth, fmt=fmt, link=link,
+                         cache_dir=cache_dir)
+    for tid in graph["types"]:
+        cached += render_view(graph, os.path.join(outdir, view_file(tid, fmt)), focus=tid, depth=depth, fmt=fmt,
+                              link=link, cache_dir=cache_dir)
+    total = len(graph["types"]) + 1
+    print(f"{total} views written to {outdir} ({cached} from the layout cache)")
+    return os.path.join(outdir, f"index.{fmt}")
+
+def main():
+    p = argparse.ArgumentParser(description="Graphviz views of an XSD (type view with level of detail).")
+    p.add_argument("xsd_file")
+    p.add_argument("-o", "--output", help="Single view to write (.svg, .png, .pdf or .dot)")
+    p.add_argument("--lod-dir", help="Write index + one linked view per complex type into this folder")
+    p.add_argument("--focus", help="Complex type or root element the view starts from")
+    p.add_argument("--depth", type=int, default=LOD_DEPTH, help="Type hops shown before collapsing")
+    p.add_argument("--format", choices=LAYOUT_FORMATS, help="Output format (default: from -o, else svg)")
+    p.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help="Schema graph / layout cache directory")
+    p.add_argument("--legacy", action="store_true", help="One node per xs:element, shown with matplotlib")
+    args = p.parse_args()
+
+    if args.legacy:
+        visualize_xsd_pydot(args.xsd_file, args.output or "xsd_graph.png")
+        return
+    graph = load_schema_graph(args.xsd_file, cache_dir=args.cache_dir)
+    if args.lod_dir:
+        write_lod_views(graph, args.lod_dir, depth=args.depth, fmt=args.format or "svg", cache_dir=args.cache_dir)
+    else:
+        output = args.output or "xsd_graph.svg"
+        cached = render_view(graph, output, focus=args.focus, depth=args.depth, fmt=args.format,
+                             cache_dir=args.cache_dir)
+        print(f"View saved to {output}{' (layout cache)' if cached else ''}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,796 @@
+#!/usr/bin/env python3
+"""
+xsdSchemaGraph.py
+
+One resolved, serializable graph per XSD schema set, shared by pyParseXsd_DQ
+(DQ rule metadata), CompareXSD (path sets / diffs) and xpathAllFields (field
+listing), so a schema is parsed and resolved by one walker with one set of
+semantics instead of three.
+
+Resolution covers includes/imports (cached across files by content hash),
+QName type lookup through a per-schema-set registry, xs:group/attributeGroup
+refs and complexContent/simpleContent derivation. The resulting graph holds
+each complex type once, with its attributes and child element declarations
+(occurrences, type, simple-type constraints, documentation). Paths are a query
+over the graph (graph_metadata, iter_paths).
+
+Graphs are cached as JSON under --cache-dir / $XSD_GRAPH_CACHE keyed by the
+schema content hash, and are reused while the hashes of their includes are
+unchanged.
+
+Usage:
+  python xsdSchemaGraph.py pacs.008.001.08.xsd --paths
+
+Requirements:
+  pip install lxml
+"""
+
+import os
+import json
+import hashlib
+import argparse
+from collections import OrderedDict
+from lxml import etree
+
+# XML Schema namespace
+XSD_NS = "http://www.w3.org/2001/XMLSchema"
+NSMAP = {"xs": XSD_NS}
+
+# Utility: safe get attribute with default
+def _attr(el, name, default=None):
+    v = el.get(name)
+    return default if v is None else v
+
+# Normalize maxOccurs text
+def norm_maxocc(val):
+    if val is None:
+        return 1
+    if val == "unbounded":
+        return -1
+    try:
+        return int(val)
+    except:
+        return -1
+
+# Parse simpleType restriction -> dict of constraints
+def parse_simpletype_constraints(simpleTypeEl):
+    constraints = {}
+    # look for xs:restriction
+    restr = simpleTypeEl.find("xs:restriction", namespaces=NSMAP)
+    if restr is None:
+        # could be xs:list or xs:union (rare for ISO)
+        return constraints
+
+    base = _attr(restr, "base")
+    if base:
+        constraints["base"] = base
+
+    enums = []
+    for e in restr.findall("xs:enumeration", namespaces=NSMAP):
+        v = e.get("value")
+        if v is not None:
+            enums.append(v)
+    if enums:
+        constraints["enumeration"] = enums
+
+    pat = restr.find("xs:pattern", namespaces=NSMAP)
+    if pat is not None and pat.get("value"):
+        constraints["pattern"] = pat.get("value")
+
+    length = restr.find("xs:length", namespaces=NSMAP)
+    if length is not None and length.get("value"):
+        constraints["length"] = int(length.get("value"))
+
+    minlen = restr.find("xs:minLength", namespaces=NSMAP)
+    if minlen is not None and minlen.get("value"):
+        constraints["minLength"] = int(minlen.get("value"))
+
+    maxlen = restr.find("xs:maxLength", namespaces=NSMAP)
+    if maxlen is not None and maxlen.get("value"):
+        constraints["maxLength"] = int(maxlen.get("value"))
+
+    minincl = restr.find("xs:minInclusive", namespaces=NSMAP)
+    if minincl is not None and minincl.get("value"):
+        constraints["minInclusive"] = minincl.get("value")
+
+    maxincl = restr.find("xs:maxInclusive", namespaces=NSMAP)
+    if maxincl is not None and maxincl.get("value"):
+        constraints["maxInclusive"] = maxincl.get("value")
+
+    for tag in ("minExclusive", "maxExclusive"):
+        bound = restr.find(f"xs:{tag}", namespaces=NSMAP)
+        if bound is not None and bound.get("value"):
+            constraints[tag] = bound.get("value")
+
+    return constraints
+
+# Type registry: built once per schema set (schema + its includes/imports).
+# registry[kind] maps QName ("{namespace}Name") -> global definition, registry["local"][kind]
+# maps the bare local name for references we cannot resolve to a namespace.
+REGISTRY_KINDS = ("simpleType", "complexType", "element", "attribute", "group", "attributeGroup")
+
+def build_type_registry(schema_roots):
+    registry = {kind: {} for kind in REGISTRY_KINDS}
+    registry["local"] = {kind: {} for kind in REGISTRY_KINDS}
+    registry["constraints"] = {}
+    for schema_root in schema_roots:
+        tns = schema_root.get("targetNamespace") or ""
+        for kind in REGISTRY_KINDS:
+            for el in schema_root.findall(f"xs:{kind}", namespaces=NSMAP):
+                name = el.get("name")
+                if not name:
+                    continue
+                # first definition wins, like find() on the including schema did
+                registry[kind].setdefault(f"{{{tns}}}{name}", el)
+                registry["local"][kind].setdefault(name, el)
+    return registry
+
+# Resolve a QName attribute value (type="ns:Name" / ref="Name") against the nsmap of the referencing element
+def resolve_qname(context_el, qname_text):
+    if ":" in qname_text:
+        prefix, local = qname_text.split(":", 1)
+    else:
+        prefix, local = None, qname_text
+    ns = context_el.nsmap.get(prefix) if context_el is not None else None
+    return f"{{{ns or ''}}}{local}", local
+
+# Resolve a named type (simple or complex) or global element through the registry
+def find_named_type(registry, type_name, kind="complexType", context_el=None):
+    qname, local = resolve_qname(context_el, type_name)
+    if qname.startswith(f"{{{XSD_NS}}}"):
+        return None  # built-in (xs:string, xs:decimal, ...)
+    res = registry[kind].get(qname)
+    if res is None:
+        res = registry["local"][kind].get(local)
+    return res
+
+# parse_simpletype_constraints, cached per named simpleType
+def type_constraints(registry, simpleEl):
+    key = id(simpleEl)
+    cached = registry["constraints"].get(key)
+    if cached is None:
+        cached = parse_simpletype_constraints(simpleEl)
+        registry["constraints"][key] = cached
+    return cached
+
+# Flattened content model of a complexType, memoized per definition in the registry:
+#   (attributes, elements) with attributes = [xs:attribute], elements = [(xs:element, in_choice)]
+# Nested sequence/choice/all, xs:group and xs:attributeGroup refs and complexContent /
+# simpleContent extension or restriction of a base type are expanded here, so every
+# base type and group is walked once per schema set however often it is used.
+def collect_content_particles(registry, complexEl):
+    cache = registry.setdefault("particles", {})
+    key = id(complexEl)
+    if key in cache:
+        return cache[key]
+    # placeholder while expanding: a type deriving from itself (invalid XSD) contributes nothing
+    cache[key] = ([], [])
+    attrs, elems = [], []
+    body = complexEl
+    for content in ("xs:complexContent", "xs:simpleContent"):
+        contentEl = complexEl.find(content, namespaces=NSMAP)
+        if contentEl is None:
+            continue
+        derivation = contentEl.find("xs:extension", namespaces=NSMAP)
+        if derivation is None:
+            derivation = contentEl.find("xs:restriction", namespaces=NSMAP)
+        if derivation is not None:
+            base = find_named_type(registry, derivation.get("base") or "", kind="complexType", context_el=derivation)
+            if base is not None:
+                base_attrs, base_elems = collect_content_particles(registry, base)
+                attrs.extend(base_attrs)
+                # a restriction re-declares the particles it keeps; an extension appends to the base
+                if derivation.tag == f"{{{XSD_NS}}}extension":
+                    elems.extend(base_elems)
+            body = derivation
+        break
+    collect_attributes(registry, body, attrs)
+    collect_model_group(registry, body, elems, in_choice=False)
+    cache[key] = (merge_attributes(attrs), elems)
+    return cache[key]
+
+# Elements of a model group (sequence/choice/all, nested at any depth, xs:group refs), in document order
+def collect_model_group(registry, parentEl, elems, in_choice):
+    for child in parentEl:
+        tag = child.tag
+        if tag == f"{{{XSD_NS}}}element":
+            elems.append((child, in_choice))
+        elif tag in (f"{{{XSD_NS}}}sequence", f"{{{XSD_NS}}}all"):
+            collect_model_group(registry, child, elems, in_choice)
+        elif tag == f"{{{XSD_NS}}}choice":
+            collect_model_group(registry, child, elems, True)
+        elif tag == f"{{{XSD_NS}}}group" and child.get("ref"):
+            groupEl = find_named_type(registry, child.get("ref"), kind="group", context_el=child)
+            if groupEl is not None:
+                for el, group_choice in group_particles(registry, groupEl):
+                    elems.append((el, in_choice or group_choice))
+
+# Elements of a named xs:group, memoized
+def group_particles(registry, groupEl):
+    cache = registry.setdefault("group_particles", {})
+    key = id(groupEl)
+    if key not in cache:
+        cache[key] = []
+        elems = []
+        collect_model_group(registry, groupEl, elems, in_choice=False)
+        cache[key] = elems
+    return cache[key]
+
+# xs:attribute children and xs:attributeGroup refs (recursively, memoized per group)
+def collect_attributes(registry, parentEl, attrs):
+    cache = registry.setdefault("attribute_groups", {})
+    for child in parentEl:
+        if child.tag == f"{{{XSD_NS}}}attribute":
+            attrs.append(child)
+        elif child.tag == f"{{{XSD_NS}}}attributeGroup" and child.get("ref"):
+            groupEl = find_named_type(registry, child.get("ref"), kind="attributeGroup", context_el=child)
+            if groupEl is None:
+                continue
+            key = id(groupEl)
+            if key not in cache:
+                cache[key] = []
+                group_attrs = []
+                collect_attributes(registry, groupEl, group_attrs)
+                cache[key] = group_attrs
+            attrs.extend(cache[key])
+
+def attribute_name(attrEl):
+    return attrEl.get("name") or (attrEl.get("ref") or "").split(":")[-1]
+
+# Later declarations (extension/restriction) override inherited ones by name; use="prohibited" removes
+def merge_attributes(attrs):
+    merged = OrderedDict()
+    for attr in attrs:
+        name = attribute_name(attr)
+        if not name:
+            continue
+        merged.pop(name, None)
+        if attr.get("use") != "prohibited":
+            merged[name] = attr
+    return list(merged.values())
+
+# Cross-file include cache: sha256 of the file content -> parsed tree.
+# It lives for the whole process (one per pool worker), so the shared ISO 20022
+# include/import files are parsed once per worker instead of once per schema.
+_INCLUDE_CACHE = {}
+# DB mode: file_name -> xsd text of every repository row, used to resolve includes,
+# and file_name -> sha256_hash of that row (recorded as the dependency hash)
+_DB_SCHEMAS = {}
+_DB_HASHES = {}
+
+def sha256_hex(data):
+    return hashlib.sha256(data).hexdigest()
+
+def parse_cached(data):
+    key = sha256_hex(data)
+    t = _INCLUDE_CACHE.get(key)
+    if t is None:
+        t = etree.ElementTree(etree.fromstring(data))
+        _INCLUDE_CACHE[key] = t
+    return t
+
+# Find the content of an include/import: relative to the including file, or
+# (DB mode, base "db:<file_name>") among the other repository rows by file name.
+# Returns (location, bytes); bytes is None when the target does not exist.
+def read_include(schema_loc, cur_base):
+    if cur_base.startswith("db:"):
+        name = os.path.basename(schema_loc)
+        data = _DB_SCHEMAS.get(name)
+        return "db:" + name, data
+    candidate = os.path.normpath(os.path.join(os.path.dirname(cur_base), schema_loc))
+    if not os.path.exists(candidate):
+        return candidate, None
+    with open(candidate, "rb") as fh:
+        return candidate, fh.read()
+
+# Hash recorded for an include/import in the incremental manifest (None = not found)
+def dependency_hash(location, data):
+    if data is None:
+        return None
+    if location.startswith("db:"):
+        h = _DB_HASHES.get(location[3:])
+        if h:
+            return h
+    return sha256_hex(data)
+
+# Load xs:include / xs:import targets (transitively) relative to base_filename
+def load_schema_set(root, base_filename=None, schema_map=None, dep_hashes=None):
+    """
+    Returns (included, notes):
+      included: list of (location, tree) for every include/import that could be read
+      notes: OrderedDict of _include_* note entries (same keys as before) for missing/failed ones
+    schema_map: {location: tree} extra cache checked before the process-wide content cache
+    dep_hashes: if given, filled with {location: content hash or None if missing}
+    """
+    if schema_map is None:
+        schema_map = {}
+    included = []
+    notes = OrderedDict()
+    pending = [(root, base_filename)]
+    seen = set()
+    while pending:
+        cur_root, cur_base = pending.pop(0)
+        for inc in cur_root.findall("xs:include", namespaces=NSMAP) + cur_root.findall("xs:import", namespaces=NSMAP):
+            schema_loc = inc.get("schemaLocation")
+            if not schema_loc:
+                continue
+            if not cur_base:
+                notes[f"_include_ref_{schema_loc}"] = {"note": f"schemaLocation '{schema_loc}' present but base file unknown"}
+                continue
+            try:
+                candidate, data = read_include(schema_loc, cur_base)
+                if candidate in seen:
+                    continue
+                seen.add(candidate)
+                if dep_hashes is not None:
+                    dep_hashes[candidate] = dependency_hash(candidate, data)
+                if data is None and candidate not in schema_map:
+                    notes[f"_include_missing_{schema_loc}"] = {"note": f"schemaLocation '{schema_loc}' not found relative to {cur_base}"}
+                    continue
+                t = schema_map.get(candidate)
+                if t is None:
+                    t = parse_cached(data)
+                    schema_map[candidate] = t
+            except Exception as e:
+                notes[f"_include_error_{schema_loc}"] = {"note": f"failed to load include/import '{schema_loc}': {str(e)}"}
+                continue
+            included.append((candidate, t))
+            pending.append((t.getroot(), candidate))
+    return included, notes
+
+# -------------------------
+# Schema graph
+# Element declarations are resolved once into nodes:
+#   {"name", "minOccurs", "maxOccurs", "inChoice", "type"?, "kind", "constraints"?,
+#    "content"?: type id of the complex content, "cut"?: named type local name (recursion key),
+#    "note_on_cut"?, "guard"?: "element:<name>" for global elements with an anonymous type,
+#    "note"?, "documentation"?}
+# and complex types into graph["types"][type_id] = {"name", "attributes", "children"}.
+# Named types are keyed by QName ("{ns}Name"), anonymous ones by owner type id + "/" + element name.
+# Attributes are {"name", "type", "use", "constraints"?: facets of an inline simpleType}; the
+# facets of the named simpleTypes used by elements and attributes are in graph["simple_types"][QName].
+# -------------------------
+GRAPH_VERSION = 2
+
+def _type_qname(complexEl):
+    tns = complexEl.getroottree().getroot().get("targetNamespace") or ""
+    return f"{{{tns}}}{complexEl.get('name')}"
+
+# Constraints of a named simpleType, recorded once in graph["simple_types"]
+def _simple_constraints(state, simpleEl):
+    constraints = type_constraints(state["registry"], simpleEl)
+    state["simple_types"].setdefault(_type_qname(simpleEl), constraints)
+    return constraints
+
+def _graph_type(state, complexEl, type_id=None):
+    key = id(complexEl)
+    if key in state["ids"]:
+        return state["ids"][key]
+    if type_id is None:
+        type_id = _type_qname(complexEl)
+    while type_id in state["types"]:
+        type_id += "'"
+    state["ids"][key] = type_id
+    node = OrderedDict()
+    node["name"] = complexEl.get("name")
+    state["types"][type_id] = node
+    registry = state["registry"]
+    attrs, elems = collect_content_particles(registry, complexEl)
+    node["attributes"] = []
+    for attr in attrs:
+        decl = attr
+        if attr.get("type") is None and attr.get("ref"):
+            global_attr = find_named_type(registry, attr.get("ref"), kind="attribute", context_el=attr)
+            if global_attr is not None:
+                decl = global_attr
+        attr_type = decl.get("type")
+        attr_node = OrderedDict([("name", attribute_name(attr)), ("type", attr_type),
+                                 ("use", _attr(attr, "use", "optional"))])
+        if attr_type:
+            simple = find_named_type(registry, attr_type, kind="simpleType", context_el=decl)
+            if simple is not None:
+                _simple_constraints(state, simple)
+        else:
+            simple_inline = decl.find("xs:simpleType", namespaces=NSMAP)
+            if simple_inline is not None:
+                attr_node["constraints"] = parse_simpletype_constraints(simple_inline)
+        node["attributes"].append(attr_node)
+    node["children"] = [n for n in (_graph_element(state, el, in_choice, type_id) for el, in_choice in elems) if n]
+    return type_id
+
+def _set_complex_content(state, node, complexEl, type_attr, note_on_cut):
+    node["kind"] = "complex"
+    node["content"] = _graph_type(state, complexEl)
+    node["cut"] = type_attr.split(":")[-1]
+    node["note_on_cut"] = note_on_cut
+
+def _graph_element(state, elementEl, in_choice, owner_id):
+    registry = state["registry"]
+    # Determine name (or ref)
+    ref = elementEl.get("ref")
+    name = ref.split(":")[-1] if ref else elementEl.get("name")
+    if not name:
+        return None
+
+    maxocc = norm_maxocc(elementEl.get("maxOccurs"))
+    node = OrderedDict()
+    node["name"] = name
+    node["minOccurs"] = int(elementEl.get("minOccurs")) if elementEl.get("minOccurs") is not None else 1
+    node["maxOccurs"] = None if maxocc == -1 else maxocc
+    node["inChoice"] = bool(in_choice)
+
+    type_attr = elementEl.get("type")
+    if type_attr:
+        node["type"] = type_attr
+        simple = find_named_type(registry, type_attr, kind="simpleType", context_el=elementEl)
+        complex_ = find_named_type(registry, type_attr, kind="complexType", context_el=elementEl) if simple is None else None
+        if simple is not None:
+            node["kind"] = "simple"
+            node["constraints"] = _simple_constraints(state, simple)
+        elif complex_ is not None:
+            _set_complex_content(state, node, complex_, type_attr, note_on_cut=True)
+        else:
+            node["kind"] = "simple"  # assume built-in simple type (xs:string etc.)
+    else:
+        simple_inline = elementEl.find("xs:simpleType", namespaces=NSMAP)
+        complex_inline = elementEl.find("xs:complexType", namespaces=NSMAP)
+        if simple_inline is not None:
+            node["kind"] = "simple"
+            node["constraints"] = parse_simpletype_constraints(simple_inline)
+        elif complex_inline is not None:
+            node["kind"] = "complex"
+            node["content"] = _graph_type(state, complex_inline, f"{owner_id}/{name}")
+        else:
+            # element reference (or missing type): resolve the global element
+            ge = find_named_type(registry, ref or name, kind="element", context_el=elementEl)
+            if ge is not None and ge is not elementEl:
+                t = ge.get("type")
+                ge_inline = ge.find("xs:complexType", namespaces=NSMAP)
+                if t:
+                    node["type"] = t
+                    simple = find_named_type(registry, t, kind="simpleType", context_el=ge)
+                    complex_ = find_named_type(registry, t, kind="complexType", context_el=ge) if simple is None else None
+                    if simple is not None:
+                        node["kind"] = "simple"
+                        node["constraints"] = _simple_constraints(state, simple)
+                    elif complex_ is not None:
+                        _set_complex_content(state, node, complex_, t, note_on_cut=False)
+                    else:
+                        node["kind"] = "simple"
+                elif ge_inline is not None:
+                    # global element with an anonymous type; the guard stops <xs:element ref> cycles
+                    node["kind"] = "complex"
+                    node["content"] = _graph_type(state, ge_inline, f"#{ge.get('name')}")
+                    node["guard"] = f"element:{ge.get('name')}"
+                else:
+                    node["kind"] = "unknown"
+                    node["note"] = "global element reference without explicit type"
+            else:
+                node["kind"] = "simple"
+
+    ann = elementEl.find("xs:annotation/xs:documentation", namespaces=NSMAP)
+    if ann is not None and ann.text:
+        node["documentation"] = ann.text.strip()
+    return node
+
+# Top-level xs:element declarations of one schema document
+def global_elements(root):
+    globals_elems = root.findall("xs:element", namespaces=NSMAP)
+    if not globals_elems:
+        # maybe xsi prefix is different; fallback
+        globals_elems = root.findall(".//{http://www.w3.org/2001/XMLSchema}element")
+    result = []
+    for ge in globals_elems:
+        # only consider top-level elements (those with parent xs:schema)
+        parent = ge.getparent()
+        if parent is not None and parent.tag == f"{{{XSD_NS}}}schema" and ge.get("name"):
+            result.append(ge)
+    return result
+
+# Build the graph of a schema (lxml ElementTree) and the includes/imports it resolves
+def build_schema_graph(tree, base_filename=None, schema_map=None, follow_includes=True, source=None, sha256=None):
+    """
+    Returns a JSON-serializable dict:
+      roots            element nodes of the schema's global elements
+      included_roots   [element nodes] per include/import, for their global elements
+      types            {type_id: complex type node}
+      simple_types     {QName: constraints} of the named simpleTypes in use
+      notes            _include_* notes for includes/imports that could not be read
+      deps             {location: content hash} of every include/import (None = missing)
+    """
+    root = tree.getroot()
+    deps = {}
+    included, notes = load_schema_set(root, base_filename, schema_map, deps) if follow_includes else ([], OrderedDict())
+    registry = build_type_registry([root] + [t.getroot() for _, t in included])
+    state = {"registry": registry, "types": OrderedDict(), "ids": {}, "simple_types": OrderedDict()}
+    graph = OrderedDict()
+    graph["version"] = GRAPH_VERSION
+    graph["sha256"] = sha256
+    graph["source"] = source
+    graph["target_namespace"] = root.get("targetNamespace")
+    graph["deps"] = deps
+    graph["roots"] = [_graph_element(state, ge, False, "#") for ge in global_elements(root)]
+    graph["included_roots"] = [[_graph_element(state, ge, False, "#") for ge in global_elements(t.getroot())]
+                               for _, t in included]
+    graph["types"] = state["types"]
+    graph["simple_types"] = state["simple_types"]
+    graph["notes"] = notes
+    return graph
+
+# -------------------------
+# Queries
+# -------------------------
+
+# Named type local names and "element:<name>" guards reachable from type_id
+# (the recursion "footprint" used by the expansion memo)
+def _type_closure(ctx, type_id):
+    cache = ctx["closure"]
+    if type_id not in cache:
+        types = ctx["graph"]["types"]
+        seen, visited = set(), {type_id}
+        pending = [type_id]
+        while pending:
+            for child in types[pending.pop()]["children"]:
+                content = child.get("content")
+                if content is None:
+                    continue
+                if child.get("cut"):
+                    seen.add(child["cut"])
+                if child.get("guard"):
+                    seen.add(child["guard"])
+                if content not in visited:
+                    visited.add(content)
+                    pending.append(content)
+        cache[type_id] = frozenset(seen)
+    return cache[type_id]
+
+def _type_metadata(ctx, type_id, path_prefix, metadata, parent_types_stack):
+    type_node = ctx["graph"]["types"][type_id]
+    for attr in type_node["attributes"]:
+        xpath = f"{path_prefix}/@{attr['name']}" if path_prefix else f"@{attr['name']}"
+        metadata[xpath] = {"path": xpath, "kind": "attribute", "type": attr["type"], "use": attr["use"]}
+    for child in type_node["children"]:
+        _element_metadata(ctx, child, path_prefix, metadata, parent_types_stack)
+
+# Expand a named complexType under xpath, reusing an earlier expansion of the same type.
+# The expansion is stored relative to the element ("A/B", "@Ccy") and re-rooted at each use.
+# It only depends on which of the types and element guards reachable from this one are
+# already on parent_types_stack (those are where recursion gets cut), so that is part of the key.
+def _expand_named(ctx, type_local, type_id, xpath, metadata, parent_types_stack):
+    parent_types_stack.append(type_local)
+    closure = _type_closure(ctx, type_id)
+    key = (type_id, frozenset(t for t in parent_types_stack if t in closure))
+    template = ctx["expansions"].get(key)
+    if template is None:
+        template = OrderedDict()
+        _type_metadata(ctx, type_id, "", template, parent_types_stack)
+        ctx["expansions"][key] = template
+    parent_types_stack.pop()
+    for rel_path, md in template.items():
+        full = f"{xpath}/{rel_path}"
+        md = md.copy()
+        md["path"] = full
+        metadata[full] = md
+
+def _element_metadata(ctx, node, path_prefix, metadata, parent_types_stack):
+    xpath = f"{path_prefix}/{node['name']}" if path_prefix else node["name"]
+    md = OrderedDict()
+    md["path"] = xpath
+    md["minOccurs"] = node["minOccurs"]
+    md["maxOccurs"] = node["maxOccurs"]
+    md["required"] = node["minOccurs"] > 0
+    md["inChoice"] = node["inChoice"]
+    if "type" in node:
+        md["type"] = node["type"]
+    md["kind"] = node["kind"]
+    if "constraints" in node:
+        md["constraints"] = node["constraints"]
+    content = node.get("content")
+    if content is not None:
+        cut, guard = node.get("cut"), node.get("guard")
+        if cut:
+            if cut in parent_types_stack:
+                if node.get("note_on_cut"):
+                    md["note"] = f"recursion detected for type {cut}"
+            else:
+                _expand_named(ctx, cut, content, xpath, metadata, parent_types_stack)
+        elif guard:
+            if guard not in parent_types_stack:
+                parent_types_stack.append(guard)
+                _type_metadata(ctx, content, xpath, metadata, parent_types_stack)
+                parent_types_stack.pop()
+        else:
+            _type_metadata(ctx, content, xpath, metadata, parent_types_stack)
+    if "note" in node:
+        md["note"] = node["note"]
+    if "documentation" in node:
+        md["documentation"] = node["documentation"]
+    # children are added first, the element itself last
+    metadata[xpath] = md
+
+# DQ metadata {xpath: entry} as produced by pyParseXsd_DQ.parse_schema
+def graph_metadata(graph):
+    ctx = {"graph": graph, "expansions": {}, "closure": {}}
+    metadata = OrderedDict()
+    for node in graph["roots"]:
+        _element_metadata(ctx, node, "", metadata, [])
+    # merge global elements of included/imported schemas (do not override existing keys)
+    for roots in graph["included_roots"]:
+        submeta = OrderedDict()
+        for node in roots:
+            _element_metadata(ctx, node, "", submeta, [])
+        for k, v in submeta.items():
+            if k not in metadata:
+                metadata[k] = v
+    metadata.update(graph["notes"])
+    return metadata
+
+def find_root(graph, name):
+    for node in graph["roots"]:
+        if node["name"] == name:
+            return node
+    return None
+
+# Type ids reachable below type_id (what decides where a walk of its content gets cut)
+def _content_closure(types, type_id, cache):
+    if type_id not in cache:
+        seen = set()
+        pending = [type_id]
+        while pending:
+            for child in types[pending.pop()]["children"]:
+                content = child.get("content")
+                if content is not None and content not in seen:
+                    seen.add(content)
+                    pending.append(content)
+        cache[type_id] = seen
+    return cache[type_id]
+
+# largest subtree (in paths) kept for replay by iter_paths
+SUBTREE_MEMO_LIMIT = 20000
+
+# Walk element (and attribute) paths depth-first in document order, without recursion.
+# Yields (xpath, "element" | "attribute", node); xpaths start with "/".
+# A complex type already being expanded on the current branch is not expanded again,
+# and with max_depth elements below that many levels (roots are level 1) are not listed.
+# The paths under a type only depend on which of the types reachable from it are
+# already on the branch (and the depth left), so each such expansion is recorded
+# relative to its element once and replayed at later uses of the type.
+def iter_paths(graph, roots=None, include_attributes=True, max_depth=None):
+    types = graph["types"]
+    if roots is None:
+        roots = graph["roots"]
+    closures = {}
+    memo = {}
+    # paths yielded while at least one expansion is being recorded; a recorder is
+    # [key, start index in buffer, len(xpath) of its element, still recording]
+    buffer = []
+    recorders = []
+    stack = [("", node, (), 1) for node in reversed(roots)]
+    while stack:
+        entry = stack.pop()
+        if entry[0] is None:
+            rec = entry[1]
+            if rec[3]:
+                recorders.pop()
+                cut = rec[2]
+                memo[rec[0]] = [(x[cut:], k, n) for x, k, n in buffer[rec[1]:]]
+                if not recorders:
+                    buffer.clear()
+            continue
+        prefix, node, active, depth = entry
+        xpath = f"{prefix}/{node['name']}"
+        out = [(xpath, "element", node)]
+        content = node.get("content")
+        if content is not None and content not in active and (max_depth is None or depth < max_depth):
+            closure = _content_closure(types, content, closures)
+            key = (content, frozenset(t for t in active if t in closure),
+                   None if max_depth is None else max_depth - depth)
+            template = memo.get(key)
+            if template is not None:
+                out.extend((xpath + rel, kind, n) for rel, kind, n in template)
+            else:
+                type_node = types[content]
+                rec = [key, len(buffer) + 1, len(xpath), True]
+                recorders.append(rec)
+                stack.append((None, rec))
+                active = active + (content,)
+                for child in reversed(type_node["children"]):
+                    stack.append((xpath, child, active, depth + 1))
+                if include_attributes:
+                    out.extend((f"{xpath}/@{attr['name']}", "attribute", attr) for attr in type_node["attributes"])
+        for item in out:
+            yield item
+        if recorders:
+            buffer.extend(out)
+            if len(buffer) - recorders[0][1] > SUBTREE_MEMO_LIMIT:
+                # the outermost expansion is too large to keep; stop recording it
+                recorders.pop(0)[3] = False
+                base = recorders[0][1] if recorders else len(buffer)
+                del buffer[:base]
+                for rec in recorders:
+                    rec[1] -= base
+
+# -------------------------
+# Cache: graphs are stored as JSON under cache_dir, keyed by the schema's content
+# hash and where its includes were resolved from; a cached graph is used only while
+# the hashes of its includes/imports are unchanged.
+# -------------------------
+DEFAULT_CACHE_DIR = os.environ.get("XSD_GRAPH_CACHE") or os.path.join(os.path.expanduser("~"), ".cache", "xsd_schema_graph")
+
+# in-process cache: graph key -> graph
+_GRAPHS = {}
+
+def graph_key(sha256, base_filename=None):
+    origin = ""
+    if base_filename:
+        origin = "db:" if base_filename.startswith("db:") else os.path.dirname(os.path.abspath(base_filename))
+    return sha256_hex(f"{GRAPH_VERSION}|{sha256}|{origin}".encode("utf-8"))
+
+def current_dependency_hash(location):
+    if location.startswith("db:"):
+        return dependency_hash(location, _DB_SCHEMAS.get(location[3:]))
+    try:
+        with open(location, "rb") as fh:
+            return sha256_hex(fh.read())
+    except OSError:
+        return None
+
+def graph_is_current(graph):
+    return all(current_dependency_hash(loc) == h for loc, h in graph.get("deps", {}).items())
+
+def schema_graph_from_bytes(data, base_filename=None, source=None, cache_dir=None, schema_map=None):
+    """
+    Graph for one schema document given as bytes. base_filename resolves
+    includes/imports (a path, or "db:<file_name>" in DB mode). With cache_dir,
+    the graph is read from / written to <cache_dir>/<key>.json.
+    """
+    sha256 = sha256_hex(data)
+    key = graph_key(sha256, base_filename)
+    graph = _GRAPHS.get(key)
+    if graph is not None and graph_is_current(graph):
+        return graph
+    cache_path = os.path.join(cache_dir, key + ".json") if cache_dir else None
+    graph = None
+    if cache_path and os.path.exists(cache_path):
+        try:
+            with open(cache_path, "r", encoding="utf-8") as fh:
+                graph = json.load(fh, object_pairs_hook=OrderedDict)
+            if graph.get("version") != GRAPH_VERSION or not graph_is_current(graph):
+                graph = None
+        except (OSError, ValueError):
+            graph = None
+    if graph is None:
+        tree = etree.ElementTree(etree.fromstring(data))
+        graph = build_schema_graph(tree, base_filename, schema_map, source=source, sha256=sha256)
+        # round-trip through JSON so a fresh graph and a cached one are identical
+        text = json.dumps(graph, ensure_ascii=False)
+        graph = json.loads(text, object_pairs_hook=OrderedDict)
+        if cache_path:
+            os.makedirs(cache_dir, exist_ok=True)
+            with open(cache_path + ".tmp", "w", encoding="utf-8") as fh:
+                fh.write(text)
+            os.replace(cache_path + ".tmp", cache_path)
+    _GRAPHS[key] = graph
+    return graph
+
+def load_schema_graph(path, cache_dir=DEFAULT_CACHE_DIR):
+    with open(path, "rb") as fh:
+        data = fh.read()
+    return schema_graph_from_bytes(data, os.path.abspath(path), source=os.path.basename(path), cache_dir=cache_dir)
+
+def main():
+    p = argparse.ArgumentParser(description="Build (and cache) the schema graph of XSD files.")
+    p.add_argument("xsd_files", nargs="+")
+    p.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help="Graph cache directory (env XSD_GRAPH_CACHE)")
+    p.add_argument("--paths", action="store_true", help="Print element/attribute paths")
+    args = p.parse_args()
+    for path in args.xsd_files:
+        graph = load_schema_graph(path, cache_dir=args.cache_dir)
+        print(f"{path}: {len(graph['roots'])} global elements, {len(graph['types'])} complex types, "
+              f"{len(graph['deps'])} includes/imports")
+        if args.paths:
+            for xpath, _, _ in iter_paths(graph):
+                print("  " + xpath)
+
+if __name__ == "__main__":
+    main()